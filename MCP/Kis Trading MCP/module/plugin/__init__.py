@@ -1,4 +1,5 @@
 from .kis import setup_kis_config
 from .environment import setup_environment, EnvironmentConfig
 from .master_file import MasterFileManager
-from .database import DatabaseEngine, Database
\ No newline at end of file
+from .database import DatabaseEngine, Database
+from .stock_index import StockSearchIndex
\ No newline at end of file
@@ -1,9 +1,11 @@
+from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Type, Union
-from sqlalchemy import create_engine, Engine
+from sqlalchemy import create_engine, Engine, event, text, bindparam
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 import os
+import time
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -38,6 +40,9 @@ class DatabaseEngine:
                 connect_args={"check_same_thread": False}  # SQLite 멀티스레드 지원
             )
             
+            # 연결마다 WAL 저널/동기화 수준 설정
+            event.listen(self.engine, "connect", self._configure_connection)
+            
             # 세션 팩토리 생성
             self.SessionLocal = sessionmaker(
                 autocommit=False,
@@ -54,6 +59,28 @@ class DatabaseEngine:
             logger.error(f"Failed to initialize database engine {self.db_path}: {e}")
             raise
     
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record):
+        """SQLite 연결 설정 - WAL 모드로 읽기와 쓰기(마스터 갱신)가 서로 막지 않도록 함"""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    @contextmanager
+    def _bulk_load_pragmas(conn):
+        """대량 적재 동안 fsync를 생략하고 임시 데이터를 메모리에 두도록 설정 (종료 시 복원)"""
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        conn.exec_driver_sql("PRAGMA temp_store=MEMORY")
+        try:
+            yield
+        finally:
+            conn.exec_driver_sql("PRAGMA synchronous=NORMAL")
+            conn.exec_driver_sql("PRAGMA temp_store=DEFAULT")
+    
     def _create_tables(self):
         """모든 모델의 테이블 생성"""
         try:
@@ -70,6 +97,36 @@ class DatabaseEngine:
             raise RuntimeError("Database engine not initialized")
         return self.SessionLocal()
     
+    @staticmethod
+    def _apply_filters(query, model_class: Type, filters: Optional[Dict[str, Any]]):
+        """
+        필터 조건을 쿼리에 적용
+        
+        문자열 값에 '%' 와일드카드가 포함되면 LIKE로, 그 외에는 일치(==) 조건으로 적용합니다.
+        
+        Args:
+            query: SQLAlchemy 쿼리
+            model_class: 조회할 모델 클래스
+            filters: 필터 조건 딕셔너리 {field: value}
+            
+        Returns:
+            필터가 적용된 쿼리
+        """
+        if not filters:
+            return query
+        
+        for field, value in filters.items():
+            if not hasattr(model_class, field):
+                logger.warning(f"Field '{field}' not found in {model_class.__name__}")
+                continue
+            
+            column = getattr(model_class, field)
+            if isinstance(value, str) and "%" in value:
+                query = query.filter(column.like(value))
+            else:
+                query = query.filter(column == value)
+        return query
+    
     def insert(self, model_instance: Any) -> Any:
         """
         모델 인스턴스를 데이터베이스에 삽입
@@ -183,12 +240,7 @@ class DatabaseEngine:
             query = session.query(model_class)
             
             # 필터 적용
-            if filters:
-                for field, value in filters.items():
-                    if hasattr(model_class, field):
-                        query = query.filter(getattr(model_class, field) == value)
-                    else:
-                        logger.warning(f"Field '{field}' not found in {model_class.__name__}")
+            query = self._apply_filters(query, model_class, filters)
             
             # 페이징 적용
             if offset:
@@ -222,11 +274,7 @@ class DatabaseEngine:
             query = session.query(model_class)
             
             # 필터 적용
-            for field, value in filters.items():
-                if hasattr(model_class, field):
-                    query = query.filter(getattr(model_class, field) == value)
-                else:
-                    logger.warning(f"Field '{field}' not found in {model_class.__name__}")
+            query = self._apply_filters(query, model_class, filters)
             
             result = query.first()
             if result:
@@ -257,12 +305,7 @@ class DatabaseEngine:
             query = session.query(model_class)
             
             # 필터 적용
-            if filters:
-                for field, value in filters.items():
-                    if hasattr(model_class, field):
-                        query = query.filter(getattr(model_class, field) == value)
-                    else:
-                        logger.warning(f"Field '{field}' not found in {model_class.__name__}")
+            query = self._apply_filters(query, model_class, filters)
             
             count = query.count()
             logger.info(f"Counted {count} records: {model_class.__name__}")
@@ -276,7 +319,10 @@ class DatabaseEngine:
     
     def bulk_replace_master_data(self, model_class: Type, data_list: List[Dict], master_name: str) -> int:
         """
-        마스터 데이터 추가 (INSERT만) - 카테고리 레벨에서 이미 삭제됨
+        마스터 데이터 고속 적재 (INSERT만) - 비어 있는 테이블의 초기 적재용
+        
+        ORM 객체를 만들지 않고 Core INSERT를 executemany로 한 트랜잭션에 실행합니다.
+        보조 인덱스는 적재 전에 삭제했다가 적재 후 한 번에 다시 생성합니다.
         
         Args:
             model_class: 마스터 데이터 모델 클래스
@@ -286,49 +332,124 @@ class DatabaseEngine:
         Returns:
             삽입된 레코드 수
         """
-        session = self.get_session()
-        try:
-            # 새 데이터 배치 삽입 (카테고리 레벨에서 이미 삭제되었으므로 INSERT만)
-            if data_list:
-                # 배치 크기 설정 (메모리 효율성을 위해 1000개씩)
-                batch_size = 1000
-                total_inserted = 0
+        if not data_list:
+            logger.warning(f"No data to insert for {master_name}")
+            return 0
+        
+        table = model_class.__table__
+        columns = [column.name for column in table.columns if not column.primary_key]
+        # 모든 값을 문자열로 강제 변환 (타입 추론 방지)
+        rows = [
+            {col: (str(data[col]) if data.get(col) is not None else None) for col in columns}
+            for data in data_list
+        ]
+        indexes = list(table.indexes)
+        
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            with self._bulk_load_pragmas(conn):
+                # 인덱스 생성 지연 (행마다 인덱스를 갱신하지 않도록)
+                for index in indexes:
+                    index.drop(conn, checkfirst=True)
+                try:
+                    conn.execute(table.insert(), rows)
+                    conn.commit()
+                except SQLAlchemyError as e:
+                    conn.rollback()
+                    logger.error(f"Failed to bulk replace master data for {master_name}: {e}")
+                    raise
+                finally:
+                    for index in indexes:
+                        index.create(conn, checkfirst=True)
+                    conn.commit()
+        
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Bulk load completed: {len(rows)} records inserted into {model_class.__name__} "
+            f"in {elapsed:.3f}s ({len(rows) / max(elapsed, 1e-9):,.0f} rows/sec)"
+        )
+        return len(rows)
+    
+    def sync_master_data(self, model_class: Type, data_list: List[Dict], scope_values: List[str],
+                         full_replace: bool = False) -> Dict[str, int]:
+        """
+        마스터 데이터를 섀도 테이블에 적재한 뒤 한 트랜잭션으로 본 테이블에 반영
+        
+        새 데이터는 먼저 임시 섀도 테이블에 적재되고, 본 테이블은 마지막 반영 단계에서만
+        잠기므로 갱신 중에도 기존 데이터로 종목 검색이 가능합니다.
+        
+        Args:
+            model_class: 마스터 데이터 모델 클래스 (ex 컬럼 필수)
+            data_list: 반영할 데이터 리스트 (딕셔너리 리스트)
+            scope_values: 반영 대상 거래소 코드(ex) 목록 - 범위 밖의 기존 행은 유지됨
+            full_replace: True면 범위 내 행 전체 교체, False면 변경된 행만 삭제/추가 (diff 모드)
+            
+        Returns:
+            {"inserted": 추가 행 수, "deleted": 삭제 행 수, "total": 새 데이터 행 수}
+        """
+        table_name = model_class.__tablename__
+        shadow_name = f"{table_name}_shadow"
+        columns = [column.name for column in model_class.__table__.columns if not column.primary_key]
+        column_list = ", ".join(columns)
+        # 인덱스가 있는 code로 먼저 찾고 나머지 컬럼은 NULL 안전 비교 (SQLite IS 연산자).
+        # IS 조건만 있으면 플래너가 ex 인덱스를 골라 행마다 거래소 전체를 훑으므로(O(n²))
+        # 나머지 컬럼은 단항 +로 인덱스 사용을 막음. code가 NULL인 행은 매번 삭제 후 재삽입됨.
+        match_condition = " AND ".join(
+            [f"s.code = {table_name}.code"]
+            + [f"+s.{col} IS +{table_name}.{col}" for col in columns if col != "code"]
+        )
+        
+        rows = [
+            {col: (str(data[col]) if data.get(col) is not None else None) for col in columns}
+            for data in data_list
+        ]
+        
+        started = time.perf_counter()
+        with self.engine.connect() as conn, self._bulk_load_pragmas(conn):
+            try:
+                # 1. 섀도 테이블 생성 및 적재 (TEMP 스키마라 본 DB를 잠그지 않음, 인덱스는 적재 후 생성)
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS temp.{shadow_name}")
+                conn.exec_driver_sql(f"CREATE TEMP TABLE {shadow_name} ({column_list})")
+                if rows:
+                    placeholders = ", ".join(f":{col}" for col in columns)
+                    conn.execute(text(f"INSERT INTO {shadow_name} ({column_list}) VALUES ({placeholders})"), rows)
+                conn.exec_driver_sql(f"CREATE INDEX temp.ix_{shadow_name}_code ON {shadow_name} (code)")
                 
-                for i in range(0, len(data_list), batch_size):
-                    batch = data_list[i:i + batch_size]
-                    batch_objects = []
-                    
-                    for data in batch:
-                        # 모든 값을 문자열로 강제 변환 (SQLAlchemy 타입 추론 방지)
-                        str_data = {key: str(value) if value is not None else None for key, value in data.items()}
-                        
-                        # 딕셔너리를 모델 인스턴스로 변환
-                        obj = model_class(**str_data)
-                        batch_objects.append(obj)
-                    
-                    # 배치 삽입
-                    session.bulk_save_objects(batch_objects)
-                    total_inserted += len(batch_objects)
-                    
-                    # 중간 커밋 (메모리 절약)
-                    if i + batch_size < len(data_list):
-                        session.commit()
-                        logger.info(f"Inserted batch {i//batch_size + 1}: {len(batch_objects)} records")
+                # 2. 본 테이블 반영 (단일 트랜잭션)
+                scope = {"scope": list(scope_values)}
+                if full_replace:
+                    delete_sql = text(f"DELETE FROM {table_name} WHERE ex IN :scope")
+                    insert_sql = text(f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {shadow_name}")
+                else:
+                    delete_sql = text(
+                        f"DELETE FROM {table_name} WHERE ex IN :scope AND NOT EXISTS "
+                        f"(SELECT 1 FROM {shadow_name} s WHERE {match_condition})"
+                    )
+                    insert_sql = text(
+                        f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {shadow_name} s "
+                        f"WHERE NOT EXISTS (SELECT 1 FROM {table_name} WHERE {match_condition})"
+                    )
+                delete_sql = delete_sql.bindparams(bindparam("scope", expanding=True))
                 
-                # 최종 커밋
-                session.commit()
-                logger.info(f"Bulk replace completed: {total_inserted} records inserted into {model_class.__name__}")
-                return total_inserted
-            else:
-                logger.warning(f"No data to insert for {master_name}")
-                return 0
+                deleted = conn.execute(delete_sql, scope).rowcount
+                inserted = conn.execute(insert_sql).rowcount
+                conn.commit()
                 
-        except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Failed to bulk replace master data for {master_name}: {e}")
-            raise
-        finally:
-            session.close()
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Synced {model_class.__name__} ({'replace' if full_replace else 'diff'}): "
+                    f"{inserted} inserted, {deleted} deleted, {len(rows)} total "
+                    f"in {elapsed:.3f}s ({len(rows) / max(elapsed, 1e-9):,.0f} rows/sec)"
+                )
+                return {"inserted": inserted, "deleted": deleted, "total": len(rows)}
+                
+            except SQLAlchemyError as e:
+                conn.rollback()
+                logger.error(f"Failed to sync master data for {model_class.__name__}: {e}")
+                raise
+            finally:
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS temp.{shadow_name}")
+                conn.commit()
     
     def update_master_timestamp(self, tool_name: str, record_count: int = None) -> bool:
         """
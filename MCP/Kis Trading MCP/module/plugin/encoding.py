@@ -0,0 +1,111 @@
+import codecs
+import hashlib
+import logging
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from module.decorator import singleton
+
+logger = logging.getLogger(__name__)
+
+
+# 마스터파일 인코딩 후보 (앞에 있을수록 우선)
+ENCODING_CANDIDATES = ('cp949', 'euc-kr', 'utf-8', 'utf-8-sig', 'iso-8859-1', 'latin1')
+
+# 감지 시 한 번에 읽는 바이트 수
+CHUNK_SIZE = 1024 * 1024
+
+
+@singleton
+class EncodingDetector:
+    """마스터파일 인코딩 감지기
+
+    파일을 한 번만 스트리밍으로 읽으면서 모든 후보 인코딩의 증분 디코더에 동시에 넣고,
+    끝까지 디코딩에 성공한 후보 중 우선순위가 가장 높은 인코딩을 선택합니다.
+    결과는 같은 패스에서 계산한 파일 해시와 함께 캐시하므로, 파일이 바뀌지 않으면
+    (경로/크기/수정시각 동일) 세 리더(텍스트/CSV/고정폭)가 몇 번을 호출해도 다시 읽지 않습니다.
+
+    Example:
+        >>> detector = EncodingDetector()
+        >>> detector.detect("overseas_stock_master.tmp")
+        'cp949'
+        >>> with detector.open("overseas_stock_master.tmp") as f:
+        ...     df = pd.read_csv(f, sep='\\t', dtype=str)
+    """
+
+    def __init__(self, candidates: Sequence[str] = ENCODING_CANDIDATES):
+        self._lock = threading.Lock()
+        self.candidates = tuple(candidates)
+        # 경로 → (크기, 수정시각, 해시, 인코딩)
+        self._by_path: Dict[str, Tuple[int, int, str, str]] = {}
+
+    def detect(self, file_path: str) -> str:
+        """파일 인코딩 감지 (캐시 사용)
+
+        Raises:
+            UnicodeError: 어떤 후보 인코딩으로도 디코딩할 수 없는 경우
+        """
+        return self.inspect(file_path)[1]
+
+    def file_hash(self, file_path: str) -> str:
+        """감지 시 계산한 파일 SHA-1 해시"""
+        return self.inspect(file_path)[0]
+
+    def inspect(self, file_path: str) -> Tuple[str, str]:
+        """파일 해시와 인코딩 반환 - 캐시에 없을 때만 파일을 한 번 읽음
+
+        Returns:
+            (SHA-1 해시, 인코딩)
+        """
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+
+        with self._lock:
+            cached = self._by_path.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2], cached[3]
+
+        digest, encoding = self._sniff(file_path)
+        with self._lock:
+            self._by_path[key] = (stat.st_size, stat.st_mtime_ns, digest, encoding)
+
+        logger.info(f"Detected encoding {encoding} for {os.path.basename(file_path)} ({digest[:12]})")
+        return digest, encoding
+
+    def open(self, file_path: str, encoding: Optional[str] = None):
+        """감지한 인코딩으로 텍스트 스트림 열기 (전체 내용을 메모리에 올리지 않음)"""
+        return open(file_path, mode="r", encoding=encoding or self.detect(file_path))
+
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        """캐시 무효화 (file_path가 없으면 전체)"""
+        with self._lock:
+            if file_path is None:
+                self._by_path.clear()
+            else:
+                self._by_path.pop(os.path.abspath(file_path), None)
+
+    def _sniff(self, file_path: str) -> Tuple[str, str]:
+        """파일을 청크 단위로 한 번 읽으며 해시 계산과 후보 인코딩 검증을 동시에 수행"""
+        hasher = hashlib.sha1()
+        decoders = {encoding: codecs.getincrementaldecoder(encoding)() for encoding in self.candidates}
+
+        with open(file_path, mode="rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                final = not chunk
+                if chunk:
+                    hasher.update(chunk)
+                for encoding in list(decoders):
+                    try:
+                        decoders[encoding].decode(chunk, final=final)
+                    except UnicodeDecodeError:
+                        del decoders[encoding]
+                if final:
+                    break
+
+        digest = hasher.hexdigest()
+        for encoding in self.candidates:
+            if encoding in decoders:
+                return digest, encoding
+        raise UnicodeError(f"모든 인코딩 시도 실패: {os.path.basename(file_path)}")
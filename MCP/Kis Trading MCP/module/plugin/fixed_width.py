@@ -0,0 +1,107 @@
+import logging
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def parse_fixed_width_records(content: bytes,
+                              head_columns: Sequence[str],
+                              head_widths: Sequence[int],
+                              middle_column: str,
+                              tail_columns: Sequence[str],
+                              tail_widths: Sequence[int],
+                              tail_width: Optional[int] = None,
+                              encoding: str = "cp949",
+                              numeric_columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    고정폭 마스터파일(국내주식 *.mst 등) 바이트를 한 번에 파싱하여 DataFrame 생성
+
+    각 행은 [앞쪽 고정폭 필드][가변 길이 종목명][뒤쪽 고정폭 필드] 구조입니다.
+    앞/뒤 필드는 ASCII이므로 바이트 오프셋으로 NumPy 배열에서 잘라내고,
+    한글이 포함된 종목명만 행별로 디코딩합니다. 임시 파일이나 read_fwf 재읽기가 없습니다.
+
+    Args:
+        content: 마스터파일 원본 바이트
+        head_columns: 앞쪽 고정폭 필드 컬럼명 (예: 단축코드, 표준코드)
+        head_widths: 앞쪽 고정폭 필드 바이트 폭
+        middle_column: 앞/뒤 필드 사이의 가변 길이 필드 컬럼명 (종목명)
+        tail_columns: 뒤쪽 고정폭 필드 컬럼명 (field_specs 순서)
+        tail_widths: 뒤쪽 고정폭 필드 바이트 폭 (field_specs)
+        tail_width: 행 끝에서부터의 뒤쪽 영역 바이트 수 (기본값: tail_widths 합계).
+            field_specs가 영역 전체를 덮지 않는 경우(코스닥 등) 필드는 영역 앞쪽부터 채워집니다.
+        encoding: 종목명 디코딩 인코딩 (기본값: cp949)
+        numeric_columns: 숫자형으로 변환할 컬럼명 (정수면 Int64, 소수면 float64)
+
+    Returns:
+        head_columns + middle_column + tail_columns 순서의 DataFrame
+        (문자열 필드는 앞뒤 공백 제거, 빈 값은 "")
+
+    Raises:
+        ValueError: 컬럼명과 폭의 개수가 다르거나 뒤쪽 영역 폭이 필드 폭 합계보다 작은 경우
+
+    Example:
+        >>> with open("kospi_code.mst", "rb") as f:
+        ...     df = parse_fixed_width_records(f.read(), ["short_code", "standard_code"], [9, 12],
+        ...                                    "korean_name", part2_columns, field_specs)
+    """
+    if len(head_columns) != len(head_widths) or len(tail_columns) != len(tail_widths):
+        raise ValueError("컬럼명과 필드 폭의 개수가 일치하지 않습니다.")
+
+    head_width = sum(head_widths)
+    if tail_width is None:
+        tail_width = sum(tail_widths)
+    if tail_width < sum(tail_widths):
+        raise ValueError("뒤쪽 영역 폭이 필드 폭 합계보다 작습니다.")
+
+    lines = [line for line in content.splitlines() if line.strip()]
+    records = [line for line in lines if len(line) >= head_width + tail_width]
+    if len(records) != len(lines):
+        logger.warning(f"Skipped {len(lines) - len(records)} short lines in fixed-width master")
+
+    row_count = len(records)
+    columns = {}
+
+    # 앞/뒤 고정폭 영역을 (행 수 x 폭) 바이트 행렬로 구성
+    head_matrix = np.frombuffer(b"".join(line[:head_width] for line in records),
+                                dtype=np.uint8).reshape(row_count, head_width)
+    tail_matrix = np.frombuffer(b"".join(line[len(line) - tail_width:] for line in records),
+                                dtype=np.uint8).reshape(row_count, tail_width)
+
+    columns.update(_slice_columns(head_matrix, head_columns, head_widths, encoding))
+    columns[middle_column] = [
+        line[head_width:len(line) - tail_width].decode(encoding, errors="replace").strip()
+        for line in records
+    ]
+    columns.update(_slice_columns(tail_matrix, tail_columns, tail_widths, encoding))
+
+    df = pd.DataFrame(columns, columns=list(head_columns) + [middle_column] + list(tail_columns))
+
+    for column in numeric_columns or ():
+        if column in df.columns:
+            df[column] = _to_numeric(df[column])
+
+    return df
+
+
+def _slice_columns(matrix: np.ndarray, names: Sequence[str], widths: Sequence[int], encoding: str) -> dict:
+    """바이트 행렬을 필드 폭대로 잘라 컬럼별 문자열 배열로 변환"""
+    columns = {}
+    offset = 0
+    for name, width in zip(names, widths):
+        field = np.ascontiguousarray(matrix[:, offset:offset + width]).view(f"S{width}").ravel()
+        columns[name] = np.char.decode(np.char.strip(field), encoding, errors="replace")
+        offset += width
+    return columns
+
+
+def _to_numeric(values: pd.Series) -> pd.Series:
+    """숫자 문자열 컬럼을 정수(Int64) 또는 실수(float64) 컬럼으로 변환 (빈 값은 NA)"""
+    numbers = pd.to_numeric(values, errors="coerce")
+    non_null = numbers.dropna()
+    if non_null.empty or (non_null % 1 == 0).all():
+        return numbers.astype("Int64")
+    return numbers.astype("float64")
+
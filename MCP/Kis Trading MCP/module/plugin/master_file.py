@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import shutil
@@ -5,6 +6,9 @@ import requests
 from datetime import datetime
 from typing import List
 from module.plugin.database import Database
+from module.plugin.stock_index import StockSearchIndex
+from module.plugin.encoding import EncodingDetector
+from module.plugin.fixed_width import parse_fixed_width_records
 from typing import Dict
 import pandas as pd
 
@@ -242,6 +246,12 @@ class MasterFileManager:
         }
     }
 
+    # 동시에 다운로드할 마스터파일 수 (해외주식은 11개 거래소)
+    MAX_CONCURRENT_DOWNLOADS = 6
+
+    # 툴별 갱신 잠금 (인스턴스가 요청마다 생성되므로 클래스 레벨에서 공유)
+    _refresh_locks: Dict[str, asyncio.Lock] = {}
+
     def __init__(self, tool_name: str):
         self.tool_name = tool_name
         self.master_dir = f"./configs/master/{tool_name}"
@@ -328,29 +338,62 @@ class MasterFileManager:
                 await ctx.info(f"{self.tool_name} 툴은 마스터파일이 필요하지 않습니다.")
                 return
 
-            # 1. 강제 업데이트가 아닌 경우 툴 전체 업데이트 시간 확인
-            if not force_update:
-                last_update = self.db_engine.get_master_update_time(self.tool_name)
-                if last_update and not self.__should_update_from_db(last_update):
-                    await ctx.info(f"{self.tool_name} 툴의 마스터파일들이 최신 상태입니다.")
-                    return
-
-            # 2. 카테고리 레벨에서 테이블 전체 삭제 (한 번만)
-            await self.__clear_category_tables(ctx)
-
-            # 2-1. 해당 폴더의 CSV 파일들 삭제
-            await self.__clear_category_csv_files(ctx)
-
-            # 3. 각 마스터파일별로 업데이트 (삭제 없이 추가만)
-            total_record_count = 0
-            for master_name in self.required_masters:
-                record_count = await self.__ensure_single_master_updated(ctx, master_name, force_update)
-                total_record_count += record_count
-
-            # 4. 모든 마스터파일 처리 완료 후 툴 전체 업데이트 시간 기록
-            if total_record_count > 0:
-                self.db_engine.update_master_timestamp(self.tool_name, total_record_count)
-                await ctx.info(f"{self.tool_name} 툴의 모든 마스터파일 업데이트 완료 (총 {total_record_count}개 레코드)")
+            # 같은 툴의 갱신이 동시에 실행되지 않도록 직렬화 (대기 후에는 갱신 시간을 다시 확인)
+            refresh_lock = self._refresh_locks.setdefault(self.tool_name, asyncio.Lock())
+            async with refresh_lock:
+                # 1. 강제 업데이트가 아닌 경우 툴 전체 업데이트 시간 확인
+                if not force_update:
+                    last_update = self.db_engine.get_master_update_time(self.tool_name)
+                    if last_update and not self.__should_update_from_db(last_update):
+                        await ctx.info(f"{self.tool_name} 툴의 마스터파일들이 최신 상태입니다.")
+                        return
+
+                # 2. 마스터파일 동시 다운로드 및 가공 (기존 테이블/CSV는 반영 직전까지 유지)
+                prepared, failed = await self.__prepare_all_masters(ctx)
+                if not prepared:
+                    raise Exception(f"모든 마스터파일 준비 실패: {', '.join(failed)}")
+
+                # 3. 모델별로 섀도 테이블 적재 후 한 트랜잭션으로 반영 (기본: 변경분만 반영)
+                total_record_count = 0
+                for model_class, master_names in self.__group_masters_by_model(prepared).items():
+                    rows = [row for master_name in master_names for row in prepared[master_name]]
+                    scope_values = [self.MASTER_FILE_PROCESS[master_name]["ex_value"] for master_name in master_names]
+                    try:
+                        if self.db_engine.count(model_class) == 0:
+                            # 초기 적재: 비교할 기존 데이터가 없으므로 고속 적재 경로 사용
+                            inserted = await asyncio.to_thread(
+                                self.db_engine.bulk_replace_master_data,
+                                model_class=model_class,
+                                data_list=rows,
+                                master_name=", ".join(master_names)
+                            )
+                            stats = {"inserted": inserted, "deleted": 0, "total": inserted}
+                        else:
+                            stats = await asyncio.to_thread(
+                                self.db_engine.sync_master_data,
+                                model_class=model_class,
+                                data_list=rows,
+                                scope_values=scope_values,
+                                full_replace=force_update
+                            )
+                    except Exception as e:
+                        self._log("error", model_class.__name__, "sync_master_data", str(e))
+                        raise
+                    total_record_count += stats["total"]
+                    await ctx.info(
+                        f"{model_class.__name__} 반영 완료: 추가 {stats['inserted']}개, "
+                        f"삭제 {stats['deleted']}개 (총 {stats['total']}개 레코드)"
+                    )
+
+                # 4. 모든 마스터파일 처리 완료 후 툴 전체 업데이트 시간 기록 (실패한 마스터가 있으면 다음 호출에서 재시도)
+                if failed:
+                    await ctx.warning(f"일부 마스터파일 업데이트 실패: {', '.join(failed)}")
+                elif total_record_count > 0:
+                    self.db_engine.update_master_timestamp(self.tool_name, total_record_count)
+                    await ctx.info(f"{self.tool_name} 툴의 모든 마스터파일 업데이트 완료 (총 {total_record_count}개 레코드)")
+
+                # 5. 종목 검색 인덱스 무효화 (다음 검색 시 새 데이터로 재구성)
+                StockSearchIndex().invalidate()
 
         except Exception as e:
             # 오류 로그 기록
@@ -384,93 +427,101 @@ class MasterFileManager:
     #     """마스터파일 경로 반환"""
     #     return os.path.join(self.master_dir, f"{master_name}.tmp")
 
-    async def __ensure_single_master_updated(self, ctx, master_name: str, force_update: bool = False) -> int:
-        """단일 마스터파일 체크 및 업데이트"""
-        # 마스터파일 다운로드 및 DB 저장
-        await ctx.info(f"{master_name} 마스터파일 업데이트 중...")
+    async def __prepare_all_masters(self, ctx):
+        """툴의 모든 마스터파일을 동시에 다운로드하고, 도착하는 순서대로 가공
 
-        try:
-            # 1. URL 확인
-            master_config = self.MASTER_FILE_PROCESS.get(master_name)
-            if not master_config:
-                raise Exception(f"{master_name}에 대한 마스터파일 설정이 없습니다.")
-            
-            master_url = master_config["file"]
+        Returns:
+            (마스터파일명 → 모델용 데이터 딕셔너리, 실패한 마스터파일명 목록)
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_DOWNLOADS)
 
-            # 2. 임시 파일로 다운로드
-            temp_file = os.path.join(self.master_dir, f"{master_name}.tmp")
-            await ctx.info(f"마스터파일 다운로드 중: {master_name}")
+        async def download(master_name: str):
+            async with semaphore:
+                return master_name, await self.__download_master(ctx, master_name)
 
-            success = await self.__download_file(master_url, temp_file)
-            if not success:
-                raise Exception(f"{master_name} 마스터파일 다운로드 실패")
+        prepared: Dict[str, List[Dict]] = {}
+        failed: List[str] = []
+        downloads = [asyncio.create_task(download(master_name)) for master_name in self.required_masters]
 
-            # 3. 파일 가공 (마스터파일별 특화 로직) - DataFrame 반환
-            import pandas as pd
-
-            # MASTER_FILE_PROCESS에서 처리 함수명 가져오기
-            process_func_name = master_config.get("process")
-            if process_func_name:
-                try:
-                    # 처리 함수 가져오기
-                    process_func = getattr(self, process_func_name)
-                    # 가공 함수에서 DataFrame 반환받기
-                    df = await process_func(temp_file, ctx)
-                except Exception as e:
-                    # 오류 로그 기록
-                    self._log("error", master_name, "process", str(e))
-                    await ctx.error(f"마스터파일 가공 실패: {master_name}, 오류: {str(e)}")
-                    # 빈 DataFrame 반환
-                    df = pd.DataFrame()
-            else:
-                # 기본 처리 - 빈 DataFrame 반환
-                await ctx.warning(f"지원하지 않는 마스터파일: {master_name}")
-                df = pd.DataFrame()
-
-            # 4. CSV 파일 저장
-            await ctx.info(f"CSV 파일 저장 중: {master_name} ({len(df)}개 레코드)")
-            csv_saved = await self.__save_csv_file(df, master_name, ctx)
-
-            # 5. 모델에 저장
-            await ctx.info(f"모델에 저장 중: {master_name} ({len(df)}개 레코드)")
-
-            # 5-1. 모델용 데이터 변환
-            model_data = self.__convert_to_model_data(df, master_name)
-
-            # 5-2. 모델에 저장
+        for completed in asyncio.as_completed(downloads):
+            master_name, temp_file = await completed
+            if not temp_file:
+                failed.append(master_name)
+                continue
             try:
-                model_class = self.__get_model_class(master_name)
-                if not model_class:
-                    raise Exception(f"{master_name}에 대한 모델 클래스를 찾을 수 없습니다.")
-                
-                # bulk_replace_master_data 사용 (카테고리 레벨에서 이미 삭제되었으므로 INSERT만)
-                record_count = self.db_engine.bulk_replace_master_data(
-                    model_class=model_class,
-                    data_list=model_data,
-                    master_name=master_name
-                )
+                prepared[master_name] = await self.__prepare_single_master(ctx, master_name, temp_file)
             except Exception as e:
-                # 에러 로깅 시스템에 기록
-                self._log("error", master_name, "bulk_replace_master_data", str(e))
-                raise
-
-            await ctx.info(f"데이터베이스 저장 완료: {master_name} ({record_count}개 레코드)")
-
-            # 6. 임시 파일 정리 (보존)
-            # if os.path.exists(temp_file):
-            #     os.remove(temp_file)
+                self._log("error", master_name, "prepare", str(e))
+                await ctx.error(f"마스터파일 가공 실패: {master_name}, 오류: {str(e)}")
+                failed.append(master_name)
+
+        return prepared, failed
+
+    async def __download_master(self, ctx, master_name: str):
+        """단일 마스터파일 다운로드 - 성공 시 임시 파일 경로, 실패 시 None 반환"""
+        master_config = self.MASTER_FILE_PROCESS.get(master_name)
+        if not master_config:
+            self._log("error", master_name, "download", "마스터파일 설정이 없습니다.")
+            await ctx.error(f"{master_name}에 대한 마스터파일 설정이 없습니다.")
+            return None
+
+        temp_file = os.path.join(self.master_dir, f"{master_name}.tmp")
+        await ctx.info(f"마스터파일 다운로드 중: {master_name}")
+
+        success = await self.__download_file(master_config["file"], temp_file)
+        if not success:
+            await ctx.error(f"{master_name} 마스터파일 다운로드 실패")
+            return None
+        return temp_file
+
+    async def __prepare_single_master(self, ctx, master_name: str, temp_file: str) -> List[Dict]:
+        """다운로드된 마스터파일 가공 → CSV 저장 → 모델용 데이터 변환"""
+        import pandas as pd
 
-            await ctx.info(f"{master_name} 마스터파일 업데이트 완료")
-            return record_count
+        master_config = self.MASTER_FILE_PROCESS[master_name]
 
-        except Exception as e:
-            # 오류 로그 기록
-            self._log("error", master_name, "download_and_save", str(e))
-            # 임시 파일 정리 (보존)
-            # temp_file = os.path.join(self.master_dir, f"{master_name}.tmp")
-            # if os.path.exists(temp_file):
-            #     os.remove(temp_file)
-            raise
+        # MASTER_FILE_PROCESS에서 처리 함수명 가져오기
+        process_func_name = master_config.get("process")
+        if process_func_name:
+            try:
+                # 가공 함수에서 DataFrame 반환받기
+                process_func = getattr(self, process_func_name)
+                df = await process_func(temp_file, ctx)
+            except Exception as e:
+                # 오류 로그 기록
+                self._log("error", master_name, "process", str(e))
+                await ctx.error(f"마스터파일 가공 실패: {master_name}, 오류: {str(e)}")
+                df = pd.DataFrame()
+        else:
+            await ctx.warning(f"지원하지 않는 마스터파일: {master_name}")
+            df = pd.DataFrame()
+
+        # 가공 결과가 비어 있으면 기존 데이터를 지우지 않도록 실패로 처리
+        if df.empty:
+            raise Exception(f"{master_name} 가공 결과가 비어 있습니다.")
+
+        # CSV 파일 저장
+        await ctx.info(f"CSV 파일 저장 중: {master_name} ({len(df)}개 레코드)")
+        await self.__save_csv_file(df, master_name, ctx)
+
+        # 모델용 데이터 변환
+        if not self.__get_model_class(master_name):
+            raise Exception(f"{master_name}에 대한 모델 클래스를 찾을 수 없습니다.")
+        model_data = self.__convert_to_model_data(df, master_name)
+        # 컬럼/키가 맞지 않아 변환된 레코드가 없으면 기존 데이터를 지우지 않도록 실패로 처리
+        if not model_data:
+            raise Exception(f"{master_name} 모델 데이터 변환 결과가 비어 있습니다.")
+
+        await ctx.info(f"{master_name} 마스터파일 가공 완료 ({len(model_data)}개 레코드)")
+        return model_data
+
+    def __group_masters_by_model(self, prepared: Dict[str, List[Dict]]) -> Dict:
+        """가공된 마스터파일들을 모델 클래스별로 묶기 (툴의 마스터파일 순서 유지)"""
+        grouped = {}
+        for master_name in self.required_masters:
+            if master_name in prepared:
+                grouped.setdefault(self.__get_model_class(master_name), []).append(master_name)
+        return grouped
 
     def __should_update_from_db(self, last_update: datetime) -> bool:
         """DB 기반 업데이트 필요 여부 확인"""
@@ -479,94 +530,6 @@ class MasterFileManager:
         except (ValueError, AttributeError):
             return True  # 날짜 파싱 실패 시 업데이트
 
-    async def __clear_category_tables(self, ctx):
-        """카테고리 레벨에서 해당 툴의 모든 테이블 데이터 삭제"""
-        try:
-            # 툴별 모델 클래스들 가져오기
-            master_models = self.get_master_models_for_tool(self.tool_name)
-            
-            if not master_models:
-                await ctx.info(f"{self.tool_name} 툴에 해당하는 모델이 없습니다.")
-                return
-            
-            # 각 모델의 테이블 데이터 삭제
-            for model_class in master_models:
-                try:
-                    # 기존 데이터 개수 확인
-                    before_count = self.db_engine.count(model_class)
-                    
-                    # 테이블 전체 삭제
-                    session = self.db_engine.get_session()
-                    try:
-                        deleted_count = session.query(model_class).delete()
-                        session.commit()
-                        await ctx.info(f"{model_class.__name__} 테이블 데이터 삭제 완료: {deleted_count}개 레코드")
-                    finally:
-                        session.close()
-                        
-                except Exception as e:
-                    self._log("error", model_class.__name__, "clear_table", str(e))
-                    await ctx.error(f"{model_class.__name__} 테이블 삭제 실패: {str(e)}")
-                    raise
-                    
-        except Exception as e:
-            self._log("error", "all_models", "clear_category_tables", str(e))
-            await ctx.error(f"카테고리 테이블 삭제 실패: {str(e)}")
-            raise
-
-    async def __clear_category_csv_files(self, ctx):
-        """카테고리 레벨에서 해당 툴의 모든 CSV 파일 및 임시 파일 삭제"""
-        try:
-            import glob
-            
-            # 해당 툴의 마스터 디렉토리 경로
-            master_dir = self.master_dir
-            
-            if not os.path.exists(master_dir):
-                await ctx.info(f"마스터 디렉토리가 존재하지 않습니다: {master_dir}")
-                return
-            
-            # CSV 파일 패턴으로 검색
-            csv_pattern = os.path.join(master_dir, "*.csv")
-            csv_files = glob.glob(csv_pattern)
-            
-            # 임시 파일 패턴으로 검색 (.tmp, .tmp.zip 등)
-            tmp_patterns = [
-                os.path.join(master_dir, "*.tmp"),
-                os.path.join(master_dir, "*.tmp.*"),
-                os.path.join(master_dir, "*_part*.tmp"),
-                os.path.join(master_dir, "*_part*.tmp.*")
-            ]
-            
-            tmp_files = []
-            for pattern in tmp_patterns:
-                tmp_files.extend(glob.glob(pattern))
-            
-            all_files = csv_files + tmp_files
-            
-            if not all_files:
-                await ctx.info(f"삭제할 파일이 없습니다: {master_dir}")
-                return
-            
-            # 파일들 삭제
-            deleted_count = 0
-            for file_path in all_files:
-                try:
-                    os.remove(file_path)
-                    deleted_count += 1
-                    file_type = "CSV" if file_path.endswith('.csv') else "TMP"
-                    await ctx.info(f"{file_type} 파일 삭제: {os.path.basename(file_path)}")
-                except Exception as e:
-                    self._log("error", os.path.basename(file_path), "delete_file", str(e))
-                    await ctx.warning(f"파일 삭제 실패: {os.path.basename(file_path)} - {str(e)}")
-            
-            await ctx.info(f"파일 삭제 완료: {deleted_count}개 파일 (CSV + TMP)")
-                    
-        except Exception as e:
-            self._log("error", "all_files", "clear_category_csv_files", str(e))
-            await ctx.error(f"카테고리 파일 삭제 실패: {str(e)}")
-            raise
-
     def __get_model_class(self, master_name: str):
         """마스터파일명에 해당하는 모델 클래스 반환 - TOOL_MASTER_MAPPING 활용"""
         # TOOL_MASTER_MAPPING을 역방향으로 검색하여 마스터파일이 속한 툴 찾기
@@ -582,6 +545,10 @@ class MasterFileManager:
         return None
 
     async def __download_file(self, url: str, file_path: str) -> bool:
+        """파일 다운로드 (ZIP 파일 지원) - 블로킹 I/O는 워커 스레드에서 실행하여 다른 다운로드와 병렬 처리"""
+        return await asyncio.to_thread(self.__download_file_sync, url, file_path)
+
+    def __download_file_sync(self, url: str, file_path: str) -> bool:
         """파일 다운로드 (ZIP 파일 지원)"""
         try:
             import zipfile
@@ -665,22 +632,12 @@ class MasterFileManager:
     # ========== 공통 유틸리티 메서드들 ==========
     
     async def _read_file_with_encoding(self, file_path: str, ctx) -> str:
-        """여러 인코딩을 시도하여 파일 읽기"""
-        encodings = ['cp949', 'euc-kr', 'utf-8', 'utf-8-sig', 'iso-8859-1', 'latin1']
-        
-        for encoding in encodings:
-            try:
-                with open(file_path, mode="r", encoding=encoding) as f:
-                    content = f.read()
-                await ctx.info(f"파일을 {encoding} 인코딩으로 성공적으로 읽었습니다.")
-                return content
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                await ctx.warning(f"{encoding} 인코딩 시도 중 오류: {str(e)}")
-                continue
-        
-        raise Exception("모든 인코딩 시도 실패")
+        """감지한 인코딩으로 파일 읽기 (인코딩은 파일당 한 번만 감지)"""
+        encoding = await asyncio.to_thread(EncodingDetector().detect, file_path)
+        with EncodingDetector().open(file_path, encoding) as f:
+            content = f.read()
+        await ctx.info(f"파일을 {encoding} 인코딩으로 성공적으로 읽었습니다.")
+        return content
     
     def _create_dataframe(self, data, columns):
         """DataFrame 생성 및 공통 처리"""
@@ -692,38 +649,42 @@ class MasterFileManager:
         return df
     
     def _read_csv_with_encoding(self, file_path: str, **kwargs):
-        """여러 인코딩을 시도하여 CSV 파일 읽기"""
+        """감지한 인코딩의 텍스트 스트림으로 CSV 파일 읽기"""
         import pandas as pd
         
-        encodings = ['cp949', 'euc-kr', 'utf-8', 'utf-8-sig', 'iso-8859-1', 'latin1']
-        
-        for encoding in encodings:
-            try:
-                df = pd.read_csv(file_path, encoding=encoding, **kwargs)
-                return df
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                continue
-        
-        raise Exception("모든 인코딩 시도 실패")
+        with EncodingDetector().open(file_path) as f:
+            return pd.read_csv(f, **kwargs)
     
     def _read_fwf_with_encoding(self, file_path: str, **kwargs):
-        """여러 인코딩을 시도하여 고정폭 파일 읽기"""
+        """감지한 인코딩의 텍스트 스트림으로 고정폭 파일 읽기"""
         import pandas as pd
         
-        encodings = ['cp949', 'euc-kr', 'utf-8', 'utf-8-sig', 'iso-8859-1', 'latin1']
-        
-        for encoding in encodings:
-            try:
-                df = pd.read_fwf(file_path, encoding=encoding, **kwargs)
-                return df
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                continue
-        
-        raise Exception("모든 인코딩 시도 실패")
+        with EncodingDetector().open(file_path) as f:
+            return pd.read_fwf(f, **kwargs)
+
+    def _parse_domestic_stock_master(self, file_path: str, tail_columns: List[str], tail_widths: List[int],
+                                     numeric_columns: List[str], tail_width: int = None,
+                                     name_column: str = 'korean_name'):
+        """국내주식(코스피/코스닥/코넥스) 마스터파일 파싱
+
+        각 행은 단축코드(9) + 표준코드(12) + 한글종목명(가변) + 뒤쪽 고정폭 영역(tail_width)으로 구성되며,
+        뒤쪽 영역의 필드는 field_specs 순서로 앞에서부터 채워집니다.
+        파일을 바이트로 한 번 읽어 고정폭 필드는 바이트 오프셋으로 잘라내고 종목명만 cp949로 디코딩합니다.
+        """
+        with open(file_path, 'rb') as f:
+            content = f.read()
+
+        return parse_fixed_width_records(
+            content,
+            head_columns=['short_code', 'standard_code'],
+            head_widths=[9, 12],
+            middle_column=name_column,
+            tail_columns=tail_columns,
+            tail_widths=tail_widths,
+            tail_width=tail_width,
+            encoding='cp949',
+            numeric_columns=numeric_columns
+        )
 
     def __convert_to_model_data(self, df, master_name: str) -> List[Dict]:
         """DataFrame을 모델용 데이터로 변환 - MASTER_FILE_PROCESS의 name_key, code_key, ex_value 사용"""
@@ -765,7 +726,7 @@ class MasterFileManager:
             
         except Exception as e:
             self._log("error", master_name, "convert_to_model_data", str(e))
-            return []
+            raise
 
     async def __save_csv_file(self, df, master_name: str, ctx) -> bool:
         """DataFrame을 CSV 파일로 저장"""
@@ -781,8 +742,10 @@ class MasterFileManager:
             # CSV 파일 경로 설정
             csv_file_path = os.path.join(self.master_dir, f"{master_name}.csv")
             
-            # CSV 파일 저장 (UTF-8 BOM 인코딩으로 한글 지원)
-            df_clean.to_csv(csv_file_path, index=False, encoding='utf-8-sig')
+            # CSV 파일 저장 (UTF-8 BOM 인코딩으로 한글 지원) - 임시 파일에 쓴 뒤 교체하여 기존 CSV를 항상 유효하게 유지
+            partial_path = csv_file_path + ".partial"
+            df_clean.to_csv(partial_path, index=False, encoding='utf-8-sig')
+            os.replace(partial_path, csv_file_path)
             
             await ctx.info(f"CSV 파일 저장 완료: {csv_file_path} ({len(df_clean)}개 레코드)")
             return True
@@ -802,32 +765,6 @@ class MasterFileManager:
 
         try:
             import pandas as pd
-            import os
-
-            # 파일 읽기 (공통 로직)
-            file_content = await self._read_file_with_encoding(raw_file, ctx)
-
-            # 원본 코드와 정확히 동일한 파싱
-            tmp_fil1 = raw_file.replace('.tmp', '_part1.tmp')
-            tmp_fil2 = raw_file.replace('.tmp', '_part2.tmp')
-            wf1 = open(tmp_fil1, mode="w")
-            wf2 = open(tmp_fil2, mode="w")
-
-            # 파일 내용을 라인별로 처리
-            for row in file_content.splitlines():
-                rf1 = row[0:len(row) - 222]
-                rf1_1 = rf1[0:9].rstrip()
-                rf1_2 = rf1[9:21].rstrip()
-                rf1_3 = rf1[21:].strip()
-                wf1.write(rf1_1 + ',' + rf1_2 + ',' + rf1_3 + '\n')
-                rf2 = row[-222:]
-                wf2.write(rf2)
-
-            wf1.close()
-            wf2.close()
-
-            part1_columns = ['short_code', 'standard_code', 'korean_name']
-            df1 = self._read_csv_with_encoding(tmp_fil1, header=None, names=part1_columns, dtype=str)
 
             field_specs = [2, 1,
                            4, 4, 4, 1, 1,
@@ -861,19 +798,14 @@ class MasterFileManager:
                              'base_year_month', 'prev_day_market_cap_billion', 'group_company_code', 'company_credit_limit_exceed_yn', 'collateral_loan_yn', 'securities_lending_yn'
                              ]
 
-            df2 = self._read_fwf_with_encoding(tmp_fil2, widths=field_specs, names=part2_columns)
+            numeric_columns = ['stock_base_price', 'regular_market_unit', 'after_hours_market_unit', 'margin_rate',
+                               'credit_period', 'prev_day_volume', 'stock_par_value', 'listed_shares_thousand',
+                               'capital', 'public_offering_price', 'sales', 'operating_profit', 'ordinary_profit',
+                               'net_income', 'roe', 'prev_day_market_cap_billion']
 
-            df = pd.merge(df1, df2, how='outer', left_index=True, right_index=True)
-            
-            # 공통 DataFrame 처리
-            df = df.astype(str)
-            df = df.replace(['nan', 'NaN', 'None', 'null'], '')
-
-            # clean temporary file and dataframe
-            del (df1)
-            del (df2)
-            os.remove(tmp_fil1)
-            os.remove(tmp_fil2)
+            # 바이트 단위 한 번의 파싱 (임시 파일 없음) - 행 끝 221바이트가 고정폭 영역
+            df = self._parse_domestic_stock_master(raw_file, part2_columns, field_specs, numeric_columns,
+                                                   tail_width=221)
 
             await ctx.info(f"국내주식 마스터파일 가공 완료: {len(df)}개 종목")
             return df
@@ -889,32 +821,6 @@ class MasterFileManager:
 
         try:
             import pandas as pd
-            import os
-
-            # 파일 읽기 (공통 로직)
-            file_content = await self._read_file_with_encoding(raw_file, ctx)
-
-            # 원본 코드와 정확히 동일한 파싱
-            tmp_fil1 = raw_file.replace('.tmp', '_part1.tmp')
-            tmp_fil2 = raw_file.replace('.tmp', '_part2.tmp')
-            wf1 = open(tmp_fil1, mode="w")
-            wf2 = open(tmp_fil2, mode="w")
-
-            # 파일 내용을 라인별로 처리
-            for row in file_content.splitlines():
-                rf1 = row[0:len(row) - 228]
-                rf1_1 = rf1[0:9].rstrip()
-                rf1_2 = rf1[9:21].rstrip()
-                rf1_3 = rf1[21:].strip()
-                wf1.write(rf1_1 + ',' + rf1_2 + ',' + rf1_3 + '\n')
-                rf2 = row[-228:]
-                wf2.write(rf2)
-
-            wf1.close()
-            wf2.close()
-
-            part1_columns = ['short_code', 'standard_code', 'korean_name']
-            df1 = self._read_csv_with_encoding(tmp_fil1, header=None, names=part1_columns, dtype=str)
 
             field_specs = [2, 1, 4, 4, 4,
                            1, 1, 1, 1, 1,
@@ -948,19 +854,13 @@ class MasterFileManager:
                              'market_cap', 'group_company_code', 'company_credit_limit_exceed', 'collateral_loan_available', 'securities_lending_available'
                              ]
 
-            df2 = self._read_fwf_with_encoding(tmp_fil2, widths=field_specs, names=part2_columns)
+            numeric_columns = ['base_price', 'trading_unit', 'after_hours_unit', 'margin_rate', 'credit_period',
+                               'prev_day_volume', 'par_value', 'listed_shares', 'capital', 'public_offering_price',
+                               'sales', 'operating_profit', 'ordinary_profit', 'net_income', 'roe', 'market_cap']
 
-            df = pd.merge(df1, df2, how='outer', left_index=True, right_index=True)
-            
-            # 공통 DataFrame 처리
-            df = df.astype(str)
-            df = df.replace(['nan', 'NaN', 'None', 'null'], '')
-
-            # clean temporary file and dataframe
-            del (df1)
-            del (df2)
-            os.remove(tmp_fil1)
-            os.remove(tmp_fil2)
+            # 바이트 단위 한 번의 파싱 (임시 파일 없음) - 행 끝 227바이트가 고정폭 영역
+            df = self._parse_domestic_stock_master(raw_file, part2_columns, field_specs, numeric_columns,
+                                                   tail_width=227)
 
             await ctx.info(f"국내주식 마스터파일 가공 완료: {len(df)}개 종목")
             return df
@@ -977,81 +877,35 @@ class MasterFileManager:
         try:
             import pandas as pd
 
-            # 원본 코드와 정확히 동일한 파싱
-            await ctx.info("복잡한 고정폭 텍스트 파일 파싱 중...")
-            
-            # 파일 읽기 (공통 로직)
-            file_content = await self._read_file_with_encoding(raw_file, ctx)
-            lines = file_content.splitlines()
+            # 행 끝에서부터 184바이트가 고정폭 필드 영역
+            field_specs = [2, 9, 5, 5, 1,
+                           1, 1, 2, 1, 1,
+                           1, 2, 2, 2, 3,
+                           1, 3, 12, 12, 8,
+                           15, 21, 2, 7, 1,
+                           1, 1, 1, 9, 9,
+                           9, 5, 9, 8, 9,
+                           1, 1, 1
+                           ]
 
-            data = []
-            for row in lines:
-                row = row.strip()
-                mksc_shrn_iscd = row[0:9].strip()
-                stnd_iscd = row[9:21].strip()
-                scrt_grp_cls_code = row[-184:-182].strip()
-                stck_sdpr = row[-182:-173].strip()
-                frml_mrkt_deal_qty_unit = row[-173:-168].strip()
-                ovtm_mrkt_deal_qty_unit = row[-168:-163].strip()
-                trht_yn = row[-163:-162].strip()
-                sltr_yn = row[-162:-161].strip()
-                mang_issu_yn = row[-161:-160].strip()
-                mrkt_alrm_cls_code = row[-160:-158].strip()
-                mrkt_alrm_risk_adnt_yn = row[-158:-157].strip()
-                insn_pbnt_yn = row[-157:-156].strip()
-                byps_lstn_yn = row[-156:-155].strip()
-                flng_cls_code = row[-155:-153].strip()
-                fcam_mod_cls_code = row[-153:-151].strip()
-                icic_cls_code = row[-151:-149].strip()
-                marg_rate = row[-149:-146].strip()
-                crdt_able = row[-146:-145].strip()
-                crdt_days = row[-145:-142].strip()
-                prdy_vol = row[-142:-130].strip()
-                stck_fcam = row[-130:-118].strip()
-                stck_lstn_date = row[-118:-110].strip()
-                lstn_stcn = row[-110:-95].strip()
-                cpfn = row[-95:-74].strip()
-                stac_month = row[-74:-72].strip()
-                po_prc = row[-72:-65].strip()
-                prst_cls_code = row[-65:-64].strip()
-                ssts_hot_yn = row[-64:-63].strip()
-                stange_runup_yn = row[-63:-62].strip()
-                krx300_issu_yn = row[-62:-61].strip()
-                sale_account = row[-61:-52].strip()
-                bsop_prfi = row[-52:-43].strip()
-                op_prfi = row[-43:-34].strip()
-                thtr_ntin = row[-34:-29].strip()
-                roe = row[-29:-20].strip()
-                base_date = row[-20:-12].strip()
-                prdy_avls_scal = row[-12:-3].strip()
-                co_crdt_limt_over_yn = row[-3:-2].strip()
-                secu_lend_able_yn = row[-2:-1].strip()
-                stln_able_yn = row[-1:].strip()
-                hts_kor_isnm = row[21:-184].strip()
-
-                data.append([mksc_shrn_iscd, stnd_iscd, hts_kor_isnm, scrt_grp_cls_code,
-                             stck_sdpr, frml_mrkt_deal_qty_unit, ovtm_mrkt_deal_qty_unit,
-                             trht_yn, sltr_yn, mang_issu_yn, mrkt_alrm_cls_code,
-                             mrkt_alrm_risk_adnt_yn, insn_pbnt_yn, byps_lstn_yn,
-                             flng_cls_code, fcam_mod_cls_code, icic_cls_code, marg_rate,
-                             crdt_able, crdt_days, prdy_vol, stck_fcam, stck_lstn_date,
-                             lstn_stcn, cpfn, stac_month, po_prc, prst_cls_code, ssts_hot_yn,
-                             stange_runup_yn, krx300_issu_yn, sale_account, bsop_prfi,
-                             op_prfi, thtr_ntin, roe, base_date, prdy_avls_scal,
-                             co_crdt_limt_over_yn, secu_lend_able_yn, stln_able_yn])
-
-            columns = ['short_code', 'standard_code', 'stock_name', 'security_group_code', 'stock_base_price',
-                       'regular_market_unit', 'after_hours_market_unit', 'trading_halt_yn',
-                       'liquidation_yn', 'management_stock_yn', 'market_warning_code', 'market_warning_risk_yn',
-                       'dishonest_disclosure_yn', 'bypass_listing_yn', 'lock_division_code', 'par_value_change_code',
-                       'capital_increase_code', 'margin_rate', 'credit_order_yn', 'credit_period', 'prev_day_volume',
-                       'stock_par_value', 'stock_listing_date', 'listed_shares_thousand', 'capital', 'settlement_month', 'public_offering_price',
-                       'preferred_stock_code', 'short_sale_overheat_yn', 'unusual_rise_yn', 'krx300_stock_yn',
-                       'sales', 'operating_profit', 'ordinary_profit', 'net_income', 'roe', 'base_year_month', 'prev_day_market_cap_billion',
-                       'company_credit_limit_exceed_yn', 'collateral_loan_yn', 'securities_lending_yn']
-            
-            # 공통 DataFrame 처리
-            df = self._create_dataframe(data, columns)
+            part2_columns = ['security_group_code', 'stock_base_price',
+                             'regular_market_unit', 'after_hours_market_unit', 'trading_halt_yn',
+                             'liquidation_yn', 'management_stock_yn', 'market_warning_code', 'market_warning_risk_yn',
+                             'dishonest_disclosure_yn', 'bypass_listing_yn', 'lock_division_code', 'par_value_change_code',
+                             'capital_increase_code', 'margin_rate', 'credit_order_yn', 'credit_period', 'prev_day_volume',
+                             'stock_par_value', 'stock_listing_date', 'listed_shares_thousand', 'capital', 'settlement_month', 'public_offering_price',
+                             'preferred_stock_code', 'short_sale_overheat_yn', 'unusual_rise_yn', 'krx300_stock_yn',
+                             'sales', 'operating_profit', 'ordinary_profit', 'net_income', 'roe', 'base_year_month', 'prev_day_market_cap_billion',
+                             'company_credit_limit_exceed_yn', 'collateral_loan_yn', 'securities_lending_yn']
+
+            numeric_columns = ['stock_base_price', 'regular_market_unit', 'after_hours_market_unit', 'margin_rate',
+                               'credit_period', 'prev_day_volume', 'stock_par_value', 'listed_shares_thousand',
+                               'capital', 'public_offering_price', 'sales', 'operating_profit', 'ordinary_profit',
+                               'net_income', 'roe', 'prev_day_market_cap_billion']
+
+            # 바이트 단위 한 번의 파싱 (임시 파일 없음)
+            df = self._parse_domestic_stock_master(raw_file, part2_columns, field_specs, numeric_columns,
+                                                   name_column='stock_name')
 
             await ctx.info(f"국내주식 마스터파일 가공 완료: {len(df)}개 종목")
             return df
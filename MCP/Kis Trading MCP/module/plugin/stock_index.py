@@ -0,0 +1,279 @@
+import bisect
+import logging
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from module.decorator import singleton
+
+logger = logging.getLogger(__name__)
+
+
+# 매칭 유형별 기본 점수 (높을수록 우선)
+MATCH_SCORES = {
+    "code_exact": 4.0,
+    "name_exact": 3.0,
+    "name_prefix": 2.0,
+    "name_contains": 1.0,
+}
+
+# 퍼지 매칭으로 인정할 최소 유사도 (Dice 계수)
+FUZZY_THRESHOLD = 0.5
+
+# 정규화 시 제거할 법인 표기
+_CORPORATE_MARKS = ("(주)", "㈜", "주식회사")
+
+# 한글/영문/숫자 이외의 문자 (공백, 괄호, 점, 하이픈 등)
+_NON_WORD_PATTERN = re.compile(r"[^0-9a-z가-힣ㄱ-ㆎ]+")
+
+
+class _IndexData:
+    """한 번의 build()로 만들어진 인덱스 묶음 (구성 후 변경하지 않음)"""
+
+    __slots__ = ("entries", "by_code", "by_name", "sorted_names", "bigrams", "chars")
+
+    def __init__(self, entries=None, by_code=None, by_name=None, sorted_names=None, bigrams=None, chars=None):
+        # (table, name, code, ex, normalized_name, normalized_code)
+        self.entries: List[Tuple[str, str, str, Optional[str], str, str]] = entries or []
+        self.by_code: Dict[str, List[int]] = by_code or {}
+        self.by_name: Dict[str, List[int]] = by_name or {}
+        self.sorted_names: List[Tuple[str, int]] = sorted_names or []
+        self.bigrams: Dict[str, List[int]] = bigrams or {}
+        self.chars: Dict[str, List[int]] = chars or {}
+
+
+@singleton
+class StockSearchIndex:
+    """전체 마스터 테이블을 대상으로 하는 메모리 기반 종목 검색 인덱스
+
+    모든 마스터 모델(국내/해외 주식, 선물옵션, 채권, ELW 등)의 종목명과 종목코드를
+    한 번 읽어 코드/종목명 해시, 정렬된 종목명 목록(앞글자 검색), 2-gram 포스팅
+    (중간/퍼지 검색)으로 구성합니다. 검색은 DB 쿼리 없이 인덱스 조회 한 번으로
+    모든 시장의 후보를 점수순으로 반환합니다.
+
+    마스터파일이 갱신되면 MasterFileManager가 invalidate()를 호출하고,
+    다음 검색 시점에 인덱스가 다시 구성됩니다.
+
+    스레드 안전성: build()는 새 _IndexData를 완성한 뒤 락 안에서 한 번의 대입으로
+    교체하고, search()는 시작 시점의 _IndexData 참조 하나만 사용하므로 재구성 중에도
+    이전/새 인덱스가 섞이지 않습니다. ensure_built()의 확인-구성도 같은 락 안에서
+    수행되어 동시에 호출되어도 한 번만 구성됩니다.
+
+    Example:
+        >>> index = StockSearchIndex()
+        >>> index.ensure_built(Database().get_by_name("master"))
+        >>> index.search("삼성전자", tables=["domestic_stock_master"], limit=3)
+        [{'code': '005930', 'name': '삼성전자', 'ex': 'kospi', 'match_type': 'name_exact', ...}]
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._data = _IndexData()
+
+    # ========== 정규화 ==========
+
+    @staticmethod
+    def normalize(text: Any) -> str:
+        """검색용 종목명 정규화
+
+        전각/반각 통일(NFKC), 영문 소문자화, 법인 표기((주), 주식회사) 제거,
+        공백/특수문자 제거를 수행합니다.
+
+        Args:
+            text: 원본 종목명 또는 검색어
+
+        Returns:
+            정규화된 문자열 (빈 값이면 "")
+        """
+        if text is None:
+            return ""
+        normalized = unicodedata.normalize("NFKC", str(text)).lower()
+        for mark in _CORPORATE_MARKS:
+            normalized = normalized.replace(mark, "")
+        return _NON_WORD_PATTERN.sub("", normalized)
+
+    @staticmethod
+    def normalize_code(code: Any) -> str:
+        """종목코드 정규화 (공백 제거, 대문자화)"""
+        if code is None:
+            return ""
+        return re.sub(r"\s+", "", str(code)).upper()
+
+    @staticmethod
+    def _bigrams_of(text: str) -> List[str]:
+        """2-gram 목록 (한 글자인 경우 그 글자 자체)"""
+        if len(text) < 2:
+            return [text] if text else []
+        return [text[i:i + 2] for i in range(len(text) - 1)]
+
+    # ========== 인덱스 구성 ==========
+
+    def is_built(self) -> bool:
+        """인덱스 구성 여부"""
+        return self._built
+
+    def invalidate(self) -> None:
+        """인덱스 무효화 (다음 검색 시 재구성)"""
+        with self._lock:
+            self._built = False
+        logger.info("Stock search index invalidated")
+
+    def ensure_built(self, db_engine, models: Optional[Sequence] = None) -> None:
+        """인덱스가 없으면 구성 (동시 호출 시 한 번만 구성)"""
+        with self._lock:
+            if not self._built:
+                self.build(db_engine, models)
+
+    def build(self, db_engine, models: Optional[Sequence] = None) -> int:
+        """마스터 테이블 전체를 읽어 인덱스 구성
+
+        Args:
+            db_engine: 마스터 DatabaseEngine
+            models: 인덱싱할 모델 목록 (기본값: name/code 컬럼을 가진 모든 모델)
+
+        Returns:
+            인덱싱된 종목 수
+        """
+        with self._lock:
+            return self._build(db_engine, models)
+
+    def _build(self, db_engine, models: Optional[Sequence]) -> int:
+        """build() 본체 (self._lock 보유 상태에서 호출)"""
+        if models is None:
+            from model import ALL_MODELS
+            models = [m for m in ALL_MODELS if hasattr(m, "name") and hasattr(m, "code")]
+
+        rows: List[Tuple[str, str, str, Optional[str]]] = []
+        session = db_engine.get_session()
+        try:
+            for model_class in models:
+                ex_column = getattr(model_class, "ex", None)
+                columns = [model_class.name, model_class.code]
+                if ex_column is not None:
+                    columns.append(ex_column)
+                for row in session.query(*columns).all():
+                    ex = row[2] if ex_column is not None else None
+                    rows.append((model_class.__tablename__, row[0], row[1], ex))
+        finally:
+            session.close()
+
+        entries = []
+        by_code: Dict[str, List[int]] = defaultdict(list)
+        by_name: Dict[str, List[int]] = defaultdict(list)
+        bigrams: Dict[str, List[int]] = defaultdict(list)
+        chars: Dict[str, List[int]] = defaultdict(list)
+
+        for table, name, code, ex in rows:
+            normalized_name = self.normalize(name)
+            normalized_code = self.normalize_code(code)
+            if not normalized_name and not normalized_code:
+                continue
+
+            position = len(entries)
+            entries.append((table, name, code, ex, normalized_name, normalized_code))
+            if normalized_code:
+                by_code[normalized_code].append(position)
+            if normalized_name:
+                by_name[normalized_name].append(position)
+                for gram in set(self._bigrams_of(normalized_name)):
+                    bigrams[gram].append(position)
+                for char in set(normalized_name):
+                    chars[char].append(position)
+
+        sorted_names = sorted((entry[4], i) for i, entry in enumerate(entries) if entry[4])
+
+        self._data = _IndexData(entries, dict(by_code), dict(by_name), sorted_names, dict(bigrams), dict(chars))
+        self._built = True
+
+        logger.info(f"Stock search index built: {len(entries)} entries from {len(models)} models")
+        return len(entries)
+
+    # ========== 검색 ==========
+
+    def search(self, query: str, tables: Optional[Sequence[str]] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """종목명/종목코드 통합 검색
+
+        코드 완전일치 > 종목명 완전일치 > 앞글자 일치 > 중간 일치 > 퍼지(2-gram 유사도)
+        순으로 점수를 매기고, 같은 점수에서는 종목명 길이가 검색어에 가까운 종목을 우선합니다.
+        한 글자 검색어는 글자 포스팅으로 중간 일치를 찾고, 퍼지 매칭은 하지 않습니다.
+
+        Args:
+            query: 검색어 (종목명 또는 종목코드)
+            tables: 검색 대상 테이블명 목록 (None이면 모든 시장)
+            limit: 반환할 최대 후보 수
+
+        Returns:
+            후보 리스트 [{code, name, ex, table, match_type, score}, ...] (점수 내림차순)
+        """
+        normalized_query = self.normalize(query)
+        normalized_code = self.normalize_code(query)
+        if not normalized_query and not normalized_code:
+            return []
+
+        allowed = set(tables) if tables else None
+        data = self._data  # 검색 도중 build()가 교체해도 이 참조만 사용
+        entries = data.entries
+        scores: Dict[int, Tuple[float, str]] = {}
+
+        def consider(position: int, score: float, match_type: str) -> None:
+            if allowed is not None and entries[position][0] not in allowed:
+                return
+            if position not in scores or scores[position][0] < score:
+                scores[position] = (score, match_type)
+
+        # 1) 코드 / 종목명 완전일치 (해시 조회)
+        for position in data.by_code.get(normalized_code, []):
+            consider(position, MATCH_SCORES["code_exact"], "code_exact")
+        for position in data.by_name.get(normalized_query, []):
+            consider(position, MATCH_SCORES["name_exact"], "name_exact")
+
+        if normalized_query:
+            # 2) 앞글자 일치 (정렬 목록 이진 탐색)
+            start = bisect.bisect_left(data.sorted_names, (normalized_query, -1))
+            for name, position in data.sorted_names[start:]:
+                if not name.startswith(normalized_query):
+                    break
+                consider(position, MATCH_SCORES["name_prefix"], "name_prefix")
+
+            if len(normalized_query) == 1:
+                # 3) 한 글자 검색어는 2-gram이 없으므로 글자 포스팅으로 중간 일치만 판정
+                for position in data.chars.get(normalized_query, ()):
+                    consider(position, MATCH_SCORES["name_contains"], "name_contains")
+            else:
+                # 3) 중간 일치 / 퍼지 (2-gram 포스팅 카운트)
+                query_grams = set(self._bigrams_of(normalized_query))
+                shared: Dict[int, int] = defaultdict(int)
+                for gram in query_grams:
+                    for position in data.bigrams.get(gram, ()):
+                        shared[position] += 1
+
+                for position, shared_count in shared.items():
+                    name = entries[position][4]
+                    if shared_count == len(query_grams) and normalized_query in name:
+                        consider(position, MATCH_SCORES["name_contains"], "name_contains")
+                        continue
+                    name_grams = len(set(self._bigrams_of(name)))
+                    similarity = 2.0 * shared_count / (len(query_grams) + name_grams)
+                    if similarity >= FUZZY_THRESHOLD:
+                        consider(position, similarity * MATCH_SCORES["name_contains"] * 0.99, "name_fuzzy")
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1][0], abs(len(entries[item[0]][4]) - len(normalized_query)), item[0])
+        )
+
+        results = []
+        for position, (score, match_type) in ranked[:limit]:
+            table, name, code, ex, _, _ = entries[position]
+            results.append({
+                "code": code,
+                "name": name,
+                "ex": ex,
+                "table": table,
+                "match_type": match_type,
+                "score": round(score, 4),
+            })
+        return results
@@ -8,7 +8,7 @@ import subprocess
 import requests
 from fastmcp import FastMCP, Context
 
-from module.plugin import MasterFileManager
+from module.plugin import MasterFileManager, StockSearchIndex
 from module.plugin.database import Database
 import module.factory as factory
 
@@ -605,79 +605,25 @@ class BaseTool(ABC):
             if not master_models:
                 return {"found": False, "message": f"지원하지 않는 툴: {self.tool_name}"}
             
-            # 각 모델에서 우선순위별 검색
-            for model_class in master_models:
-                try:
-                    # 1순위: 종목코드로 완전 매칭
-                    code_results = db_engine.list(
-                        model_class, 
-                        filters={"code": search_term}, 
-                        limit=1
-                    )
-                    
-                    if code_results:
-                        result = code_results[0]
-                        return {
-                            "found": True,
-                            "code": result.code,
-                            "name": result.name,
-                            "ex": result.ex if hasattr(result, 'ex') else None,
-                            "match_type": "code_exact"
-                        }
-                    
-                    # 2순위: 종목명으로 완전 매칭
-                    name_results = db_engine.list(
-                        model_class, 
-                        filters={"name": search_term}, 
-                        limit=1
-                    )
-                    
-                    if name_results:
-                        result = name_results[0]
-                        return {
-                            "found": True,
-                            "code": result.code,
-                            "name": result.name,
-                            "ex": result.ex if hasattr(result, 'ex') else None,
-                            "match_type": "name_exact"
-                        }
-                    
-                    # 3순위: 종목명으로 앞글자 매칭
-                    prefix_results = db_engine.list(
-                        model_class, 
-                        filters={"name": f"{search_term}%"}, 
-                        limit=1
-                    )
-                    
-                    if prefix_results:
-                        result = prefix_results[0]
-                        return {
-                            "found": True,
-                            "code": result.code,
-                            "name": result.name,
-                            "ex": result.ex if hasattr(result, 'ex') else None,
-                            "match_type": "name_prefix"
-                        }
-                    
-                    # 4순위: 종목명으로 중간 매칭
-                    contains_results = db_engine.list(
-                        model_class, 
-                        filters={"name": f"%{search_term}%"}, 
-                        limit=1
-                    )
-                    
-                    if contains_results:
-                        result = contains_results[0]
-                        return {
-                            "found": True,
-                            "code": result.code,
-                            "name": result.name,
-                            "ex": result.ex if hasattr(result, 'ex') else None,
-                            "match_type": "name_contains"
-                        }
-                        
-                except Exception as e:
-                    continue
+            # 전체 마스터 인덱스에서 툴 대상 테이블만 한 번에 검색 (코드/종목명/앞글자/중간/퍼지 순위)
+            stock_index = StockSearchIndex()
+            stock_index.ensure_built(db_engine)
+            candidates = stock_index.search(
+                search_term,
+                tables=[model_class.__tablename__ for model_class in master_models],
+                limit=5
+            )
+            
+            if candidates:
+                best = candidates[0]
+                return {
+                    "found": True,
+                    "code": best["code"],
+                    "name": best["name"],
+                    "ex": best["ex"],
+                    "match_type": best["match_type"],
+                    "candidates": candidates
+                }
             
             return {"found": False, "message": f"종목을 찾을 수 없음: {search_value}"}
             
@@ -760,6 +706,7 @@ class BaseTool(ABC):
                         "stock_name_found": result["name"],
                         "ex": result.get("ex"),
                         "match_type": result.get("match_type"),
+                        "candidates": result.get("candidates", []),
                         "message": f"'{search_value}' 종목을 찾았습니다. 종목번호: {result['code']}",
                         "usage_guide": f"find_api_detail로 API상세정보를 확인하고 종목코드 '{result['code']}'를 해당 API의 종목코드 필드에 입력하여 실행하세요.",
                         "next_step": f"{self.tool_name} 툴에서 find_api_detail로 확인한 종목코드 필드에 '{result['code']}'를 입력하세요."
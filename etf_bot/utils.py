@@ -1,6 +1,8 @@
 import datetime
 import pytz
 
+from infinite_buying_bot.utils.market_calendar import get_calendar
+
 def get_current_time_et():
     """Get current time in US Eastern Time."""
     # US Eastern Timezone
@@ -8,35 +10,28 @@ def get_current_time_et():
     return datetime.datetime.now(et_tz)
 
 def is_market_open():
-    """Check if US market is currently open (09:30 - 16:00 ET, Mon-Fri)."""
-    now_et = get_current_time_et()
-    
-    # Check weekday (0=Mon, 4=Fri)
-    if now_et.weekday() > 4:
-        return False
-        
-    # Market hours: 09:30 - 16:00
-    market_start = now_et.replace(hour=9, minute=30, second=0, microsecond=0)
-    market_end = now_et.replace(hour=16, minute=0, second=0, microsecond=0)
-    
-    return market_start <= now_et <= market_end
+    """Check if US market is currently open (regular session; holidays and half-days from the shared calendar)."""
+    return get_calendar().is_open(get_current_time_et())
 
 def is_near_market_close(minutes=5):
     """Check if it is within 'minutes' before market close."""
     now_et = get_current_time_et()
     
-    if now_et.weekday() > 4:
+    bounds = get_calendar().session_bounds(now_et.date())
+    if bounds is None:
         return False
         
-    market_end = now_et.replace(hour=16, minute=0, second=0, microsecond=0)
+    market_end = bounds[1]
     check_start = market_end - datetime.timedelta(minutes=minutes)
     
     return check_start <= now_et < market_end
 
 def get_seconds_until_close():
-    """Get seconds remaining until market close."""
+    """Get seconds remaining until market close (0 when closed)."""
     now_et = get_current_time_et()
-    market_end = now_et.replace(hour=16, minute=0, second=0, microsecond=0)
+    bounds = get_calendar().session_bounds(now_et.date())
+    if bounds is None:
+        return 0
     
-    delta = market_end - now_et
+    delta = bounds[1] - now_et
     return max(0, delta.total_seconds())
@@ -15,18 +15,39 @@ KST = timezone(timedelta(hours=9))
 
 def get_kst_now():
     """현재 시간을 KST로 반환 (서버 위치와 무관하게 항상 한국시간)"""
-    return datetime.now(KST).replace(tzinfo=None)  # naive datetime for comparison
+    return get_clock().kst_now()  # naive datetime for comparison
 
 logger = logging.getLogger(__name__)
 
 import os
 from infinite_buying_bot.utils.bot_status_manager import BotStatusManager
+from infinite_buying_bot.dashboard.journal import TelemetryJournal
+from infinite_buying_bot.utils.config_service import ConfigService, RuntimeConfig
+from infinite_buying_bot.core.portfolio_manager import MIN_ALLOCATION
+from infinite_buying_bot.core.rebalance_solver import solve_single
+from infinite_buying_bot.utils.clock import KST, Clock, get_clock
+from infinite_buying_bot.utils.market_calendar import ET, get_calendar
 
 class BotController:
-    def __init__(self):
+    # LAYER 0 profit target (%) for _check_and_execute_profit_taking
+    PROFIT_TARGET_PCT = 10.0
+    # How late a fired daily timer (see mark_due) may still execute its scheduled trade
+    SCHEDULE_GRACE = timedelta(minutes=5)
+    
+    def __init__(self, clock: Clock = None, config_path: str = None, root_path: str = None):
+        """
+        Args:
+            clock: Time source (default: wall clock); inject a SimulatedClock for fast runs
+            config_path: runtime_config.json to follow (default: the one in root_path)
+            root_path: Directory holding logs/bot_status.json and runtime_config.json (default: the bot's own)
+        """
+        root_path = root_path or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.clock = clock or get_clock()
+        self.calendar = get_calendar()  # [NEW] US holidays / half-days (KIS refresh once a day)
         self.is_running = False
         self.notifier = None
         self.trader = None
+        self.order_tracker = None  # [NEW] OrderTracker: fills from execution notices
         self.start_time = None
         self.portfolio_manager = None 
         # Hardcoded REAL settings
@@ -42,14 +63,16 @@ class BotController:
         self.accel_interval_minutes = 5  # NEW: 5-minute interval for accelerated test
         
         # Initialize Status Manager
-        root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.status_manager = BotStatusManager(root_path)
+        self.status_manager = BotStatusManager(root_path, clock=self.clock)
         
         # NEW: Trading Mode Settings (for S-T Exchange / Gradual)
         self.trading_mode = "gradual"  # gradual, st-exchange, scheduled-single
         self.daily_time = "16:00"  # Target time for st-exchange mode (HH:MM)
         self.gradual_interval = 5  # Minutes between gradual buys
         
+        # [NEW] Daily timers fired by the event loop: {mode: scheduled KST datetime}
+        self.due_events = {}
+        
         # [NEW] Portfolio snapshot timer (every 30 minutes)
         self.last_snapshot_time = None
         self.snapshot_interval_minutes = 30  # Save portfolio history every 30 mins
@@ -63,12 +86,20 @@ class BotController:
             {"start": "04:00", "end": "06:00", "mode": "scheduled-single", "name": "마감"}
         ]
         
+        # Runtime config: parsed once per file change, applied via _apply_config
+        self.config_service = ConfigService(config_path or os.path.join(root_path, 'runtime_config.json'))
+        self.runtime_config = self.config_service.current
+        self.config_service.subscribe(self._apply_config)
+        
         # Load from config file on init
         self.sync_with_config()
 
         # [NEW] Holdings history timer
         self.last_holdings_log_time = None
 
+        # [NEW] Write-behind journal: DB writes run on a background thread, off the trading loop
+        self.journal = TelemetryJournal()
+
         
     def set_status_manager(self, manager):
         self.status_manager = manager
@@ -89,7 +120,7 @@ class BotController:
             # [NEW] 이전 거래 체결 확인 (옵션 C)
             self._verify_last_trade()
             
-            # [NEW] Sync config every cycle to pick up UI changes
+            # [NEW] Sync config every cycle to pick up UI changes (stat only; parsed on change)
             self.sync_with_config()
 
             # [FIX] Update heartbeat
@@ -111,19 +142,20 @@ class BotController:
 
             # [NEW] Log Holdings to DB for Report Page
             try:
-                from infinite_buying_bot.dashboard.database import log_holdings, log_holdings_history
                 all_holdings = self.trader.get_all_holdings()
                 # Enriched with 'value' for DB
                 for h in all_holdings:
                     h['value'] = h['qty'] * h.get('current_price', 0)
-                log_holdings(all_holdings)
+                
+                # Queued to the journal; written in one batched transaction by its writer thread
+                self.journal.log_holdings(all_holdings)
                 
                 # [NEW] Log holdings history for 5-minute interval tracking
-                now_kst = get_kst_now()
+                now_kst = self.clock.kst_now()
                 if self.last_holdings_log_time is None or (now_kst - self.last_holdings_log_time).total_seconds() >= 300:
-                    log_holdings_history(all_holdings, strategy_mode=self.strategy_mode)
+                    self.journal.log_holdings_history(all_holdings, strategy_mode=self.strategy_mode)
                     self.last_holdings_log_time = now_kst
-                    logger.info("[Snapshot] Saved 5-minute holdings history (KST)")
+                    logger.info("[Snapshot] Queued 5-minute holdings history (KST)")
                 
                 # [NEW] Save portfolio history snapshot every 30 minutes
                 self._maybe_save_portfolio_snapshot(all_holdings, cash)
@@ -156,7 +188,7 @@ class BotController:
             
             if self.trading_mode == 'gradual':
                 # Gradual Mode: Check Start Time & Interval
-                now = get_kst_now()  # KST 시간 사용
+                now = self.clock.kst_now()  # KST 시간 사용
                 
                 # 1. Check Start Time (Independent Time Setting)
                 target_str = getattr(self, 'gradual_start_time', '23:40')
@@ -211,7 +243,7 @@ class BotController:
 
             elif self.trading_mode == 'st-exchange':
                 # S-T Exchange Mode: Check target time with market day awareness
-                now = get_kst_now()  # KST 시간 사용 (사용자 입력과 일치)
+                now = self.clock.kst_now()  # KST 시간 사용 (사용자 입력과 일치)
                 target_str = getattr(self, 'daily_time', '16:00')
                 
                 # 다음 거래 가능 시간 계산 (휴장일 고려)
@@ -219,10 +251,11 @@ class BotController:
                 
                 # 목표 시간 도달 여부 체크
                 target_hour, target_minute = map(int, target_str.split(':'))
-                is_target_time = (now.hour == target_hour and now.minute == target_minute)
-                is_trading_day = now.weekday() < 5  # 월~금만 거래
+                is_target_time = (now.hour == target_hour and now.minute == target_minute) or self._is_due('st-exchange', now)
+                is_trading_day = self._is_us_trading_day(now)  # 미국 거래일만 (휴장일 제외)
                 
                 if is_target_time and is_trading_day:
+                    self.due_events.pop('st-exchange', None)
                     last_exchange = getattr(self, 'last_st_exchange_date', None)
                     if last_exchange != now.date():
                         if self.status_manager:
@@ -261,7 +294,7 @@ class BotController:
             
             elif self.trading_mode == 'scheduled-single':
                 # Scheduled Single Mode: Buy specific ETF at scheduled time
-                now = get_kst_now()  # KST 시간 사용
+                now = self.clock.kst_now()  # KST 시간 사용
                 target_str = getattr(self, 'scheduled_time', '22:00')
                 symbol = getattr(self, 'scheduled_symbol', 'TQQQ')
                 qty = getattr(self, 'scheduled_qty', 1)
@@ -271,49 +304,18 @@ class BotController:
                 
                 # 목표 시간 도달 여부 체크
                 target_hour, target_minute = map(int, target_str.split(':'))
-                is_target_time = (now.hour == target_hour and now.minute == target_minute)
-                is_trading_day = now.weekday() < 5  # 월~금만 거래
+                is_target_time = (now.hour == target_hour and now.minute == target_minute) or self._is_due('scheduled-single', now)
+                is_trading_day = self._is_us_trading_day(now)  # 미국 거래일만 (휴장일 제외)
                 
                 if is_target_time and is_trading_day:
+                    self.due_events.pop('scheduled-single', None)
                     last_scheduled = getattr(self, 'last_scheduled_buy_date', None)
                     if last_scheduled != now.date():
                         if self.status_manager:
                             self.status_manager.update_logic("Buying", f"Scheduled: Buying {qty} {symbol}...", "BUSY")
                         
                         # Execute the scheduled buy
-                        try:
-                            if self.trader:
-                                current_price = self.trader.get_price(symbol)
-                                buy_price = current_price * 1.01  # 1% buffer
-                                success = self.trader.buy(buy_price, symbol)
-                                logger.info(f"[SCHEDULED] Bought {qty} {symbol} @ ${current_price:.2f}")
-                                
-                                if success:
-                                    # [NEW] 예약매수 체결 예상 알림
-                                    if self.notifier:
-                                        self.notifier.send(f"✅ [{symbol} 예약매수 전송] {qty}주 @ ${current_price:.2f} 체결 예상")
-                                    
-                                    # [NEW] 최종 요약 알림
-                                    self._send_trade_summary(
-                                        mode='예약매매',
-                                        bought_symbol=symbol,
-                                        bought_qty=qty,
-                                        bought_price=current_price
-                                    )
-                                    
-                                    if self.status_manager:
-                                        self.status_manager.update_logic("Trade Success", f"Bought {qty} {symbol}", "ORDER FILLED")
-                                else:
-                                    if self.notifier:
-                                        self.notifier.send(f"❌ [{symbol} 예약매수 실패]")
-                                    if self.status_manager:
-                                        self.status_manager.update_logic("Error", f"Buy failed for {symbol}")
-                        except Exception as e:
-                            logger.error(f"[SCHEDULED] Buy failed: {e}")
-                            if self.notifier:
-                                self.notifier.send(f"❌ [예약매매 오류] {e}")
-                            if self.status_manager:
-                                self.status_manager.update_logic("Error", f"Buy failed: {e}")
+                        self._execute_scheduled_buy(symbol, qty)
                         
                         self.last_scheduled_buy_date = now.date()
                 else:
@@ -365,25 +367,25 @@ class BotController:
         logger.info(f"[GRADUAL] Targets filter: {targets}, Orders: {len(orders)}")
         
         # 3. Execute Orders
+        # [NEW] One batch: priced from a single quote snapshot, legs sent concurrently
         executed = False
         executed_orders = []
-        for order in orders:
-            if order['type'] == 'buy':
-                # Add 1% buffer for limit order
-                buy_price = order['price'] * 1.01 
-                success = self.trader.buy(buy_price, order['symbol'])
-                logger.info(f"[GRADUAL] Delegated Buy: 1 {order['symbol']} ({order.get('reason','')})")
-                
-                if success:
-                    executed = True
-                    executed_orders.append(order)
-                    
-                    # [NEW] 매수 체결 예상 알림
-                    if self.notifier:
-                        self.notifier.send(f"✅ [{order['symbol']} 매수 전송] 1주 @ ${order['price']:.2f} 체결 예상")
+        buy_orders = [order for order in orders if order['type'] == 'buy']
+        results = self.trader.place_orders(buy_orders, notify=False) if buy_orders else []
+        for order, result in zip(buy_orders, results):
+            logger.info(f"[GRADUAL] Delegated Buy: 1 {order['symbol']} ({order.get('reason','')}) "
+                        f"{'sent' if result.success else 'failed: ' + result.error} {result.latency_ms:.0f}ms")
+            
+            if result.success:
+                executed = True
+                executed_orders.append(order)
                 
+                # [NEW] 매수 체결 예상 알림
+                if self.notifier:
+                    self.notifier.send(f"✅ [{order['symbol']} 매수 전송] 1주 @ ${order['price']:.2f} 체결 예상")
+        
         if executed:
-            self.last_dip_buy_time = get_kst_now()
+            self.last_dip_buy_time = self.clock.kst_now()
             
             # [NEW] 최종 요약 알림 (등시점진 모드)
             if self.notifier and executed_orders:
@@ -400,7 +402,7 @@ class BotController:
                     )
                 else:
                     # 다중 매수 시 커스텀 메시지
-                    now = get_kst_now()
+                    now = self.clock.kst_now()
                     summary_msg = (
                         f"✅ [거래 완료] {now.strftime('%Y-%m-%d %H:%M')} KST\n"
                         f"━━━━━━━━━━━━━━━━━━\n"
@@ -429,19 +431,69 @@ class BotController:
              if self.status_manager:
                  self.status_manager.update_logic("Monitoring", "Gradual Mode: All targets met. No buys needed.")
 
-    def _get_next_trading_datetime(self, target_time_str: str):
+    def _execute_scheduled_buy(self, symbol: str, qty: int):
+        """Scheduled-single mode: buy the scheduled ETF (called once per trading day at scheduled_time)"""
+        try:
+            if self.trader:
+                current_price = self.trader.get_price(symbol)
+                buy_price = current_price * 1.01  # 1% buffer
+                success = self.trader.buy(buy_price, symbol)
+                logger.info(f"[SCHEDULED] Bought {qty} {symbol} @ ${current_price:.2f}")
+                
+                if success:
+                    # [NEW] 예약매수 체결 예상 알림
+                    if self.notifier:
+                        self.notifier.send(f"✅ [{symbol} 예약매수 전송] {qty}주 @ ${current_price:.2f} 체결 예상")
+                    
+                    # [NEW] 최종 요약 알림
+                    self._send_trade_summary(
+                        mode='예약매매',
+                        bought_symbol=symbol,
+                        bought_qty=qty,
+                        bought_price=current_price
+                    )
+                    
+                    if self.status_manager:
+                        self.status_manager.update_logic("Trade Success", f"Bought {qty} {symbol}", "ORDER FILLED")
+                else:
+                    if self.notifier:
+                        self.notifier.send(f"❌ [{symbol} 예약매수 실패]")
+                    if self.status_manager:
+                        self.status_manager.update_logic("Error", f"Buy failed for {symbol}")
+        except Exception as e:
+            logger.error(f"[SCHEDULED] Buy failed: {e}")
+            if self.notifier:
+                self.notifier.send(f"❌ [예약매매 오류] {e}")
+            if self.status_manager:
+                self.status_manager.update_logic("Error", f"Buy failed: {e}")
+
+    def mark_due(self, mode: str, when: datetime):
+        """
+        [NEW] 이벤트 루프의 일일 타이머(st-exchange / scheduled-single)가 발동했음을 기록
+        
+        사이클이 늦게 시작해 목표 분(HH:MM)을 넘겨도 SCHEDULE_GRACE 안이면 실행된다.
+        """
+        self.due_events[mode] = when
+
+    def _is_due(self, mode: str, now: datetime) -> bool:
+        """mark_due로 기록된 타이머가 유예 시간 안에 있는지"""
+        due = self.due_events.get(mode)
+        return due is not None and timedelta(0) <= now - due < self.SCHEDULE_GRACE
+
+    def _get_next_trading_datetime(self, target_time_str: str, after: datetime = None):
         """
         다음 거래 가능 시간 계산 (미국 휴장일 고려)
         
         Args:
             target_time_str: "HH:MM" 형식 (한국시간)
+            after: 기준 시각 (한국시간 naive, 기본: 현재)
         
         Returns:
             datetime: 다음 거래 가능 시점 (한국시간, naive datetime)
         """
         from datetime import timedelta
         
-        now = get_kst_now()  # KST 시간 사용
+        now = after or self.clock.kst_now()  # KST 시간 사용
         target_hour, target_minute = map(int, target_time_str.split(':'))
         
         # 오늘 목표 시간
@@ -451,15 +503,22 @@ class BotController:
         if target_dt < now:  # Fixed: was <= which caused same-minute to skip to next day
             target_dt += timedelta(days=1)
         
-        # 토요일(5) 또는 일요일(6)이면 월요일로 이동
-        # 한국시간 기준으로 체크 (미국 시장은 한국시간 월~금 밤에 열림)
-        while target_dt.weekday() >= 5:  # 5=토, 6=일
+        # 미국 휴장일(주말, 공휴일)이면 다음 거래일로 이동
+        # 목표 시각을 미국 동부시간으로 바꾼 날짜 기준 (한국시간 새벽 = 미국 전날 세션)
+        for _ in range(14):
+            if self._is_us_trading_day(target_dt):
+                break
             target_dt += timedelta(days=1)
             logger.info(f"[SCHEDULE] 휴장일 감지, 다음 거래일로 이동: {target_dt.strftime('%Y-%m-%d %H:%M')} KST")
         
         logger.debug(f"[SCHEDULE] 다음 거래 시간: {target_dt.strftime('%Y-%m-%d %H:%M %A')}")
         return target_dt
 
+    def _is_us_trading_day(self, kst_dt: datetime) -> bool:
+        """한국시간(naive) 시각이 속한 미국 날짜가 거래일인지 (MarketCalendar, O(1))"""
+        et_date = kst_dt.replace(tzinfo=KST).astimezone(ET).date()
+        return self.calendar.is_trading_day(et_date)
+
     def _calculate_next_etf_preview(self) -> tuple:
         """
         Calculate which ETF will be bought next in S-T exchange mode.
@@ -775,65 +834,15 @@ class BotController:
         
     def set_trader(self, trader):
         self.trader = trader
-        
-    def _sync_from_config(self):
-        """runtime_config.json에서 설정 동기화"""
-        import os
-        import json
-        
-        config_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            'runtime_config.json'
-        )
-        
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                
-                # Sync trading mode settings
-                if 'trading_mode' in config:
-                    self.trading_mode = config['trading_mode']
-                if 'daily_time' in config:
-                    self.daily_time = config['daily_time']
-                if 'gradual_interval' in config:
-                    self.gradual_interval = config['gradual_interval']
-                if 'strategy_mode' in config:
-                    self.strategy_mode = config['strategy_mode']
-                if 'command' in config:
-                    if config['command'] == 'start':
-                        self.is_running = True
-                    elif config['command'] == 'stop':
-                        self.is_running = False
-                
-                # [NEW] Sync gradual targets (ETF filter)
-                if 'gradual_targets' in config:
-                    self.gradual_targets = config['gradual_targets']
-                else:
-                    self.gradual_targets = ['all']  # Default: all ETFs
-                
-                # [NEW] Sync scheduled-single settings
-                if 'scheduled_symbol' in config:
-                    self.scheduled_symbol = config['scheduled_symbol']
-                if 'scheduled_time' in config:
-                    self.scheduled_time = config['scheduled_time']
-                if 'scheduled_qty' in config:
-                    self.scheduled_qty = config['scheduled_qty']
-                
-                logger.info(f"[CONFIG SYNC] trading_mode={self.trading_mode}, daily_time={self.daily_time}")
-                if self.trading_mode == 'scheduled-single':
-                    logger.info(f"[CONFIG SYNC] Scheduled: {getattr(self, 'scheduled_symbol', 'TQQQ')} @ {getattr(self, 'scheduled_time', '22:00')}")
-                
-                # [NEW] Sync auto schedule settings
-                if 'auto_schedule_enabled' in config:
-                    self.auto_schedule_enabled = config['auto_schedule_enabled']
-                if 'schedule_zones' in config:
-                    self.schedule_zones = config['schedule_zones']
-                
-                if self.auto_schedule_enabled:
-                    logger.info(f"[CONFIG SYNC] Auto Schedule: ENABLED ({len(self.schedule_zones)} zones)")
-        except Exception as e:
-            logger.error(f"[CONFIG SYNC] Failed to sync: {e}")
+        if self.order_tracker is not None:
+            trader.order_tracker = self.order_tracker
+    
+    def set_order_tracker(self, tracker):
+        """[NEW] Confirm fills from execution notices instead of re-reading holdings next cycle"""
+        self.order_tracker = tracker
+        tracker.add_listener(self._on_order_done)
+        if self.trader is not None:
+            self.trader.order_tracker = tracker
         
     def set_notifier(self, notifier):
         self.notifier = notifier
@@ -841,9 +850,9 @@ class BotController:
     def _maybe_save_portfolio_snapshot(self, holdings: list, cash: float):
         """
         Save portfolio snapshot every 30 minutes for performance report.
-        Calculates daily/cumulative returns and MDD.
+        The snapshot itself (benchmark fetch + DB write) runs on the journal's writer thread.
         """
-        now = get_kst_now()
+        now = self.clock.kst_now()
         
         # Check if 30 minutes have passed since last snapshot
         if self.last_snapshot_time:
@@ -851,6 +860,24 @@ class BotController:
             if elapsed < self.snapshot_interval_minutes:
                 return  # Not time yet
         
+        previous_snapshot_time = self.last_snapshot_time
+        self.last_snapshot_time = now
+        holdings = [dict(h) for h in holdings]
+        
+        def job():
+            if not self._save_portfolio_snapshot(holdings, cash):
+                # Retry on the next cycle, as before
+                self.last_snapshot_time = previous_snapshot_time
+        
+        self.journal.submit_snapshot(job)
+    
+    def _save_portfolio_snapshot(self, holdings: list, cash: float) -> bool:
+        """
+        Calculate daily/cumulative returns and MDD and save a portfolio snapshot.
+        
+        Returns:
+            True if saved, False otherwise
+        """
         try:
             from infinite_buying_bot.dashboard.database import (
                 log_portfolio_history,
@@ -859,7 +886,7 @@ class BotController:
                 set_initial_capital,
                 get_net_capital_flow
             )
-            import yfinance as yf
+            from infinite_buying_bot.dashboard.market_data import get_market_data_store
             
             # Deduplicate holdings by symbol (NASD + AMEX may return duplicates)
             holdings_by_symbol = {}
@@ -910,14 +937,11 @@ class BotController:
             
             cumulative_return_pct = ((total_value - adjusted_principal) / adjusted_principal * 100) if adjusted_principal > 0 else 0
             
-            # Get S&P 500 benchmark
+            # Get S&P 500 benchmark (local market data store, refreshed from the provider when stale)
             benchmark_value = None
             benchmark_return_pct = 0
             try:
-                sp500 = yf.Ticker('^GSPC')
-                hist = sp500.history(period='1d')
-                if not hist.empty:
-                    benchmark_value = float(hist['Close'].iloc[-1])
+                benchmark_value = get_market_data_store().latest_close('^GSPC')
             except Exception as e:
                 logger.warning(f"[SNAPSHOT] Could not fetch S&P 500: {e}")
             
@@ -933,11 +957,12 @@ class BotController:
                 holdings=holdings_data
             )
             
-            self.last_snapshot_time = now
             logger.info(f"[SNAPSHOT] Saved: ${total_value:.2f}, Return: {cumulative_return_pct:+.2f}%")
+            return True
             
         except Exception as e:
             logger.error(f"[SNAPSHOT] Failed to save: {e}")
+            return False
     
     def _check_and_execute_profit_taking(self, holdings: list) -> bool:
         """
@@ -950,9 +975,14 @@ class BotController:
         if not self.trader:
             return False
         
-        PROFIT_TARGET_PCT = 10.0  # 10% profit target
+        PROFIT_TARGET_PCT = self.PROFIT_TARGET_PCT
         executed = False
         
+        # Sells still waiting for their fill: holdings keep showing the excess until then
+        open_sells = set()
+        if self.order_tracker is not None:
+            open_sells = {o.symbol for o in self.order_tracker.open_orders() if o.side == 'sell'}
+        
         # Deduplicate holdings by symbol
         holdings_by_symbol = {}
         for h in holdings:
@@ -972,6 +1002,9 @@ class BotController:
             
             if profit_pct >= PROFIT_TARGET_PCT:
                 logger.info(f"[LAYER 0] 🎯 {symbol} profit target reached: +{profit_pct:.1f}%")
+                if symbol in open_sells:
+                    logger.info(f"[LAYER 0] {symbol}: Previous sell still open, waiting for its fill")
+                    continue
                 
                 # [CORRECT LOGIC] Calculate excess quantity based on target allocation
                 # Load target allocation from portfolio_manager or config
@@ -996,53 +1029,123 @@ class BotController:
                     logger.info(f"[LAYER 0] {symbol}: No excess (current: ${current_value:.2f} <= target: ${target_value:.2f})")
                     continue
                 
-                # Calculate excess quantity to sell
-                excess_qty = int(excess_value / current_price)
+                # [NEW] Whole shares closest to the target weight (commission and the
+                # MIN_ALLOCATION floor included) instead of truncating excess_value / price
+                symbols = list(holdings_by_symbol)
+                solution = solve_single(
+                    symbols,
+                    [holdings_by_symbol[s].get('current_price', 0) for s in symbols],
+                    [holdings_by_symbol[s].get('qty', 0) for s in symbols],
+                    0.0,
+                    [target_allocation.get(s, 0) for s in symbols],
+                    symbol, side='sell',
+                    min_weights=[MIN_ALLOCATION.get(s, 0) for s in symbols],
+                    track_cash=False
+                )
+                excess_qty = -int(solution.delta[symbols.index(symbol)])
                 if excess_qty < 1:
                     logger.info(f"[LAYER 0] {symbol}: Excess < 1 share, skipping")
                     continue
                     
                 logger.info(f"[LAYER 0] {symbol}: Selling excess {excess_qty} shares (${excess_value:.2f})")
                 
-                # Execute sell
-                success = self.trader.sell(excess_qty, symbol, reason=f"Profit taking +{profit_pct:.1f}% (excess)")
-                if success:
-                    sell_proceeds = excess_qty * current_price
-                    logger.info(f"[LAYER 0] ✅ Sold {excess_qty} {symbol} @ ${current_price:.2f} = ${sell_proceeds:.2f}")
-                    
-                    # [NEW] Buy SHV with proceeds (complete the cycle)
-                    shv_price = self.trader.get_price('SHV') or 110
-                    shv_buy_success = self.trader.buy(sell_proceeds, 'SHV', reason=f"Profit taking → SHV")
-                    
-                    if shv_buy_success:
-                        shv_qty_bought = int(sell_proceeds / shv_price)
-                        logger.info(f"[LAYER 0] ✅ Bought ~{shv_qty_bought} SHV with proceeds")
-                        
-                        # Log to database
-                        try:
-                            from infinite_buying_bot.dashboard.database import log_trade
-                            log_trade("sell", symbol, excess_qty, current_price, reason=f"Profit taking +{profit_pct:.1f}%")
-                            log_trade("buy", "SHV", shv_qty_bought, shv_price, reason=f"Profit taking → SHV")
-                        except Exception as e:
-                            logger.warning(f"[LAYER 0] DB log failed: {e}")
-                        
-                        if self.status_manager:
-                            self.status_manager.update_logic(
-                                "Profit Taking", 
-                                f"{symbol} → SHV (+{profit_pct:.1f}%)", 
-                                "BUSY"
-                            )
-                    else:
-                        logger.warning(f"[LAYER 0] SHV buy failed, proceeds remain as cash")
-                        if self.status_manager:
-                            self.status_manager.update_logic("Profit Taking", f"Sold {excess_qty} {symbol} (+{profit_pct:.1f}%)", "BUSY")
-                    
+                # Execute sell; SHV is bought with the actual proceeds once the sell fills
+                result = self.trader.place_orders([{
+                    'symbol': symbol, 'side': 'sell', 'qty': excess_qty,
+                    'fallback_price': current_price, 'reason': f"Profit taking +{profit_pct:.1f}% (excess)"
+                }])[0]
+                if result.success:
+                    logger.info(f"[LAYER 0] ✅ Sell sent: {excess_qty} {symbol} @ ${result.price:.2f} (#{result.order_no or '-'})")
+                    self._when_done(result, lambda order, profit_pct=profit_pct: self._reinvest_in_shv(order, profit_pct))
+                    if self.status_manager:
+                        self.status_manager.update_logic("Profit Taking", f"Sold {excess_qty} {symbol} (+{profit_pct:.1f}%)", "BUSY")
                     executed = True
                 else:
                     logger.error(f"[LAYER 0] ❌ Failed to sell {symbol}")
         
         return executed
     
+    def _reinvest_in_shv(self, order: 'TrackedOrder', profit_pct: float):
+        """LAYER 0 second leg: buy SHV with what the profit-taking sell actually filled for"""
+        symbol = order.symbol
+        if order.filled_qty <= 0:
+            logger.warning(f"[LAYER 0] {symbol} sell ended {order.state} without fills, nothing to reinvest")
+            return
+        sell_proceeds = order.fill_amount
+        logger.info(f"[LAYER 0] ✅ Sold {order.filled_qty} {symbol} @ ${order.avg_fill_price:.2f} = ${sell_proceeds:.2f}")
+        
+        # Log to database (via write-behind journal)
+        try:
+            self.journal.log_trade("sell", symbol, order.filled_qty, order.avg_fill_price, reason=f"Profit taking +{profit_pct:.1f}%")
+        except Exception as e:
+            logger.warning(f"[LAYER 0] DB log failed: {e}")
+        
+        # [NEW] Buy SHV with proceeds (complete the cycle)
+        shv = self.trader.place_orders([{'symbol': 'SHV', 'side': 'buy', 'amount': sell_proceeds,
+                                         'reason': "Profit taking → SHV"}])[0]
+        if shv.success:
+            logger.info(f"[LAYER 0] ✅ SHV buy sent: {shv.qty} SHV with proceeds (#{shv.order_no or '-'})")
+            self._when_done(shv, self._log_shv_fill)
+            
+            if self.status_manager:
+                self.status_manager.update_logic(
+                    "Profit Taking", 
+                    f"{symbol} → SHV (+{profit_pct:.1f}%)", 
+                    "BUSY"
+                )
+        else:
+            logger.warning(f"[LAYER 0] SHV buy failed, proceeds remain as cash")
+    
+    def _log_shv_fill(self, order: 'TrackedOrder'):
+        """LAYER 0 SHV leg filled: journal what was actually bought, at the fill price"""
+        if order.filled_qty <= 0:
+            logger.warning(f"[LAYER 0] SHV buy ended {order.state} without fills, proceeds remain as cash")
+            return
+        logger.info(f"[LAYER 0] ✅ Bought {order.filled_qty} SHV @ ${order.avg_fill_price:.2f}")
+        try:
+            self.journal.log_trade("buy", "SHV", order.filled_qty, order.avg_fill_price, reason="Profit taking → SHV")
+        except Exception as e:
+            logger.warning(f"[LAYER 0] DB log failed: {e}")
+    
+    def _when_done(self, result, callback):
+        """
+        Run callback(order) once the order behind `result` is final: on its execution notice
+        when an OrderTracker is attached, otherwise right away as filled at the sent price
+        (SimulatedBroker results are already fills).
+        """
+        # Imported here: order_tracker imports the api package, which imports this module
+        from infinite_buying_bot.core.order_tracker import FILLED, TrackedOrder
+
+        if self.order_tracker is not None and self.order_tracker.track(result, on_done=callback):
+            return
+        callback(TrackedOrder(
+            result.order_no, result.symbol, result.side, result.qty, result.price,
+            state=FILLED, filled_qty=result.qty, fill_amount=result.qty * result.price, source='sim'
+        ))
+    
+    def _on_order_done(self, order: 'TrackedOrder'):
+        """OrderTracker listener: fill confirmation (replaces the next-cycle holdings check)"""
+        from infinite_buying_bot.core.order_tracker import FILLED
+
+        last_trade = getattr(self, '_last_trade', None)
+        if last_trade and order.side == 'buy' and last_trade.get('bought_symbol') == order.symbol:
+            last_trade['verified'] = True
+        
+        if order.state == FILLED:
+            logger.info(f"[VERIFY] {order.symbol} 체결 확인: {order.filled_qty}주 @ ${order.avg_fill_price:.2f}")
+            if self.notifier:
+                self.notifier.send(
+                    f"✅ [체결 확인] {order.symbol} {'매수' if order.side == 'buy' else '매도'} 체결 완료\n"
+                    f"{order.filled_qty}주 @ ${order.avg_fill_price:.2f}"
+                )
+        else:
+            logger.warning(f"[VERIFY] {order.symbol} {order.state}: {order.filled_qty}/{order.qty}주 ({order.reason})")
+            if self.notifier:
+                self.notifier.send(
+                    f"⚠️ [체결 확인 필요] {order.symbol} {order.state}\n"
+                    f"체결: {order.filled_qty}/{order.qty}주 ({order.reason})"
+                )
+    
     def _get_mode_for_current_time(self) -> str:
         """
         Determine which trading mode should be active based on current time.
@@ -1050,7 +1153,7 @@ class BotController:
         Returns:
             Mode string ('gradual', 'st-exchange', 'scheduled-single') or None
         """
-        now = get_kst_now()
+        now = self.clock.kst_now()
         current_time = now.hour * 60 + now.minute  # Minutes since midnight
         
         for zone in self.schedule_zones:
@@ -1081,13 +1184,21 @@ class BotController:
         
     def start_bot(self):
         self.is_running = True
-        self.start_time = get_kst_now()
+        self.start_time = self.clock.kst_now()
         if self.notifier: self.notifier.send("[BOT STARTED] (REAL)")
         
     def stop_bot(self):
         self.is_running = False
         if self.notifier: self.notifier.send("Paused.")
         
+    def shutdown(self):
+        """Flush pending telemetry writes and the debounced status file before process exit."""
+        self.journal.stop()
+        if self.order_tracker is not None:
+            self.order_tracker.stop()
+        if self.status_manager:
+            self.status_manager.close()
+        
     def get_status(self):
         return {
             'is_running': self.is_running,
@@ -1096,7 +1207,7 @@ class BotController:
             'market_open': True, # Simple assumption or check logic
             'market_status': "OPEN",
             'mode': "[REAL TRADING]", # HARDCODED
-            'uptime': str(get_kst_now() - self.start_time).split('.')[0] if self.start_time else "0:00",
+            'uptime': str(self.clock.kst_now() - self.start_time).split('.')[0] if self.start_time else "0:00",
             'next_open': "OPEN",
             'last_update': "Now"
         }
@@ -1117,80 +1228,89 @@ class BotController:
         }
 
     def get_target_portfolio(self):
-        """Get target portfolio allocation from runtime_config.json"""
-        import json
-        import os
-        
-        try:
-            config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'runtime_config.json')
-            if not os.path.exists(config_path):
-                return None
-            
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            return config.get('target_portfolio', None)
-        except Exception as e:
-            logger.warning(f"Failed to read target portfolio: {e}")
-            return None
+        """Get target portfolio allocation from runtime_config.json (in-memory snapshot)"""
+        target_portfolio = self.config_service.current.target_portfolio
+        return dict(target_portfolio) if target_portfolio else None
 
     def sync_with_config(self):
-        """Sync running state and mode with runtime_config.json"""
-        import json
-        import os
+        """
+        Sync running state and mode with runtime_config.json.
+        
+        Only stats the file: it is parsed/validated once per change by ConfigService,
+        which then calls _apply_config. The running state follows the config's command
+        on every call, as before; without the file nothing changes (is_running is kept).
+        """
+        self.config_service.poll()
+        if not self.config_service.exists:
+            return
+        
+        # 1. Sync Running State
+        command = self.config_service.current.command
+        if command == 'start' and not self.is_running:
+            self.start_bot()
+        elif command == 'stop' and self.is_running:
+            self.stop_bot()
+        
+        # portfolio_manager may be attached after the snapshot was applied
+        self._sync_target_allocation()
+
+    def _apply_config(self, config: RuntimeConfig):
+        """ConfigService subscriber: apply a new runtime_config.json snapshot"""
+        self.runtime_config = config
+        
+        # 2. Sync Strategy Mode
+        self.strategy_mode = config.strategy_mode
+        
+        # 3. Sync Buy Mode (accelerated/daily) - legacy
+        if config.dip_buy_mode != self.dip_buy_mode:
+            logger.info(f"[SYNC] Buy mode changed: {self.dip_buy_mode} -> {config.dip_buy_mode}")
+            self.dip_buy_mode = config.dip_buy_mode
         
+        # 4. Sync Trading Mode (gradual/st-exchange)
+        if config.trading_mode != self.trading_mode:
+            logger.info(f"[SYNC] Trading mode changed to: {config.trading_mode}")
+            self.trading_mode = config.trading_mode
+        
+        # 5. Sync Gradual Interval (minutes) / targets (ETF filter)
+        self.gradual_interval = config.gradual_interval
+        self.gradual_targets = list(config.gradual_targets)
+        
+        # 6. Sync Daily Time (for S-T exchange mode)
+        self.daily_time = config.daily_time
+        
+        # [NEW] Sync Gradual Start Time
+        self.gradual_start_time = config.gradual_start_time
+        
+        # [NEW] Sync scheduled-single settings
+        if config.scheduled_symbol is not None:
+            self.scheduled_symbol = config.scheduled_symbol
+        if config.scheduled_time is not None:
+            self.scheduled_time = config.scheduled_time
+        if config.scheduled_qty is not None:
+            self.scheduled_qty = config.scheduled_qty
+        
+        # [NEW] Sync auto schedule settings
+        if config.auto_schedule_enabled is not None:
+            self.auto_schedule_enabled = config.auto_schedule_enabled
+        if config.schedule_zones is not None:
+            self.schedule_zones = [dict(zone) for zone in config.schedule_zones]
+        
+        # 7. Sync Portfolio Targets
+        self._sync_target_allocation()
+
+    def _sync_target_allocation(self):
+        """Push the snapshot's target allocation (validated to sum to 1.0) to the portfolio manager once"""
+        config = self.runtime_config
+        if not config.target_portfolio or not self.portfolio_manager:
+            return
+        applied = (id(self.portfolio_manager), config.version)
+        if getattr(self, '_applied_targets', None) == applied:
+            return
+        self._applied_targets = applied
         try:
-            config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'runtime_config.json')
-            if not os.path.exists(config_path):
-                return
-                
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            # 1. Sync Running State
-            command = config.get('command', 'stop')
-            if command == 'start' and not self.is_running:
-                self.start_bot()
-            elif command == 'stop' and self.is_running:
-                self.stop_bot()
-                
-            # 2. Sync Strategy Mode
-            self.strategy_mode = config.get('strategy_mode', 'neutral')
-            
-            # 3. Sync Buy Mode (accelerated/daily) - legacy
-            new_buy_mode = config.get('dip_buy_mode', 'accelerated')
-            if new_buy_mode != self.dip_buy_mode:
-                logger.info(f"[SYNC] Buy mode changed: {self.dip_buy_mode} -> {new_buy_mode}")
-                self.dip_buy_mode = new_buy_mode
-            
-            # 4. Sync Trading Mode (gradual/st-exchange)
-            new_trading_mode = config.get('trading_mode', 'gradual')
-            if not hasattr(self, 'trading_mode') or new_trading_mode != self.trading_mode:
-                logger.info(f"[SYNC] Trading mode changed to: {new_trading_mode}")
-                self.trading_mode = new_trading_mode
-            
-            # 5. Sync Gradual Interval (minutes)
-            self.gradual_interval = config.get('gradual_interval', 5)
-            
-            # 6. Sync Daily Time (for S-T exchange mode)
-            self.daily_time = config.get('daily_time', '22:00')
-            
-            # [NEW] Sync Gradual Start Time
-            self.gradual_start_time = config.get('gradual_start_time', '23:40')
-            
-            # 7. Sync Portfolio Targets
-            target_portfolio = config.get('target_portfolio', {})
-            if target_portfolio and self.portfolio_manager:
-                 # Ensure MAGS and JEPI are included if missing (default logic)
-                 # But user might only send TQQQ/SHV/SCHD. We need to handle this.
-                 # For now, just pass what we get, PortfolioManager validation handles 100% check.
-                 try:
-                     self.portfolio_manager.update_target_allocation(target_portfolio)
-                 except Exception as e:
-                     logger.warning(f"Target sync failed (likely sum!=1.0): {e}")
-            
+            self.portfolio_manager.update_target_allocation(dict(config.target_portfolio))
         except Exception as e:
-            logger.error(f"Failed to sync config: {e}")
+            logger.warning(f"Target sync failed: {e}")
 
     def _send_trade_summary(self, mode: str, sold_symbol: str = None, sold_qty: int = 0,
                             sold_price: float = 0, bought_symbol: str = None,
@@ -1212,7 +1332,7 @@ class BotController:
         if not self.notifier:
             return
         
-        now = get_kst_now()
+        now = self.clock.kst_now()
         summary_msg = (
             f"✅ [거래 완료] {now.strftime('%Y-%m-%d %H:%M')} KST\n"
             f"━━━━━━━━━━━━━━━━━━\n"
@@ -1248,7 +1368,14 @@ class BotController:
         """
         다음 주기에 이전 거래 체결 여부 확인 (옵션 C)
         보유량 변화를 확인하여 체결 성공/실패 알림
+        
+        [NEW] OrderTracker가 연결되어 있으면 체결통보(_on_order_done)로 확인하고,
+        여기서는 웹소켓 장애 시 REST 조회(refresh)만 수행
         """
+        if self.order_tracker is not None:
+            self.order_tracker.refresh()
+            return
+        
         last_trade = getattr(self, '_last_trade', None)
         if not last_trade or last_trade.get('verified', True):
             return  # 확인할 거래 없음
@@ -1257,7 +1384,7 @@ class BotController:
             return
         
         try:
-            now = get_kst_now()
+            now = self.clock.kst_now()
             elapsed = (now - last_trade['timestamp']).total_seconds() / 60
             
             if elapsed >= 1:  # 최소 1분 경과 후 확인
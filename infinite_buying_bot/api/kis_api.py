@@ -12,6 +12,8 @@ from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+MAX_PAGES = 10  # tr_cont continuation limit per query
+
 
 def retry_on_network_error(max_retries=3, initial_delay=1):
     """Decorator for automatic retry with exponential backoff on network errors"""
@@ -143,15 +145,170 @@ def inquire_balance(cano, acnt_prdt_cd, ovrs_excg_cd, tr_crcy_cd, env_dv='prod')
         "CTX_AREA_NK200": ""
     }
     
-    # try-except removed to allow decorator to handle retries
-    res = requests.get(url, headers=headers, params=params)
-    res.raise_for_status()
-    data = res.json()
-    if data['rt_cd'] != '0':
-        logger.error(f"Balance API Failed: {data.get('msg1')}")
-        return pd.DataFrame(), pd.DataFrame()
+    # [NEW] Follow tr_cont pagination: response header F/M = more rows, request the
+    # next page with tr_cont=N and the returned CTX_AREA keys
+    rows = []
+    summary = {}
+    for page in range(MAX_PAGES):
+        headers["tr_cont"] = "N" if page else ""
+        # try-except removed to allow decorator to handle retries
+        res = requests.get(url, headers=headers, params=params)
+        res.raise_for_status()
+        data = res.json()
+        if data['rt_cd'] != '0':
+            logger.error(f"Balance API Failed: {data.get('msg1')}")
+            return pd.DataFrame(), pd.DataFrame()
+        
+        rows.extend(data.get('output1') or [])
+        summary = data.get('output2') or summary
+        if res.headers.get('tr_cont') not in ('F', 'M'):
+            break
+        params["CTX_AREA_FK200"] = data.get('ctx_area_fk200', '')
+        params["CTX_AREA_NK200"] = data.get('ctx_area_nk200', '')
+    else:
+        logger.warning(f"Balance API: stopped after {MAX_PAGES} pages")
+        
+    return pd.DataFrame(rows), pd.DataFrame([summary])
+
+def _fetch_pages(url, headers, params, label):
+    """GET every tr_cont page of a list inquiry; returns the 'output' rows or None on API error"""
+    rows = []
+    for page in range(MAX_PAGES):
+        headers["tr_cont"] = "N" if page else ""
+        res = requests.get(url, headers=headers, params=params)
+        res.raise_for_status()
+        data = res.json()
+        if data['rt_cd'] != '0':
+            logger.error(f"{label} API Failed: {data.get('msg1')}")
+            return None
         
-    return pd.DataFrame(data['output1']), pd.DataFrame([data['output2']])
+        output = data.get('output') or []
+        rows.extend(output if isinstance(output, list) else [output])
+        if res.headers.get('tr_cont') not in ('F', 'M'):
+            break
+        for key in [k for k in params if k.startswith("CTX_AREA_")]:
+            params[key] = data.get(key.lower(), '')  # CTX_AREA_FK200 <- ctx_area_fk200, ...
+    else:
+        logger.warning(f"{label} API: stopped after {MAX_PAGES} pages")
+    return rows
+
+@retry_on_network_error(max_retries=3, initial_delay=1)
+def inquire_ccnl(cano, acnt_prdt_cd, ord_strt_dt, ord_end_dt, pdno='%', ovrs_excg_cd='%', env_dv='prod'):
+    """
+    Order/Fill History (TTTS3035R)
+    
+    Args:
+        ord_strt_dt, ord_end_dt: YYYYMMDD, US local date
+    
+    Returns:
+        DataFrame (odno, pdno, sll_buy_dvsn_cd 01=sell/02=buy, ft_ord_qty, ft_ccld_qty,
+        ft_ccld_unpr3, nccs_qty, prcs_stat_name, rjct_rson, ...) or None on API error
+    """
+    from infinite_buying_bot.api import kis_auth
+    trenv = kis_auth.getTREnv()
+
+    path = "/uapi/overseas-stock/v1/trading/inquire-ccnl"
+    url = f"{trenv.my_url}{path}"
+    headers = _get_headers(trenv, "TTTS3035R")
+    
+    params = {
+        "CANO": cano,
+        "ACNT_PRDT_CD": acnt_prdt_cd,
+        "PDNO": pdno,
+        "ORD_STRT_DT": ord_strt_dt,
+        "ORD_END_DT": ord_end_dt,
+        "SLL_BUY_DVSN": "00",      # all
+        "CCLD_NCCS_DVSN": "00",    # filled + unfilled
+        "OVRS_EXCG_CD": ovrs_excg_cd,
+        "SORT_SQN": "DS",
+        "ORD_DT": "",
+        "ORD_GNO_BRNO": "",
+        "ODNO": "",                # KIS cannot filter by order number
+        "CTX_AREA_FK200": "",
+        "CTX_AREA_NK200": ""
+    }
+    rows = _fetch_pages(url, headers, params, "Fill History")
+    return pd.DataFrame(rows) if rows is not None else None
+
+@retry_on_network_error(max_retries=3, initial_delay=1)
+def inquire_nccs(cano, acnt_prdt_cd, ovrs_excg_cd='NASD', env_dv='prod'):
+    """
+    Open (unfilled) Orders (TTTS3018R); NASD covers every US exchange
+    
+    Returns:
+        DataFrame (odno, pdno, sll_buy_dvsn_cd, ft_ord_qty, ft_ccld_qty, nccs_qty, ...) or None on API error
+    """
+    from infinite_buying_bot.api import kis_auth
+    trenv = kis_auth.getTREnv()
+
+    path = "/uapi/overseas-stock/v1/trading/inquire-nccs"
+    url = f"{trenv.my_url}{path}"
+    headers = _get_headers(trenv, "TTTS3018R")
+    
+    params = {
+        "CANO": cano,
+        "ACNT_PRDT_CD": acnt_prdt_cd,
+        "OVRS_EXCG_CD": ovrs_excg_cd,
+        "SORT_SQN": "DS",
+        "CTX_AREA_FK200": "",
+        "CTX_AREA_NK200": ""
+    }
+    rows = _fetch_pages(url, headers, params, "Open Orders")
+    return pd.DataFrame(rows) if rows is not None else None
+
+@retry_on_network_error(max_retries=3, initial_delay=1)
+def countries_holiday(trad_dt, env_dv='prod'):
+    """
+    Overseas Settlement Dates (CTOS5011R): markets trading on trad_dt and their settlement dates
+    
+    Args:
+        trad_dt: YYYYMMDD
+    
+    Returns:
+        DataFrame (tr_natn_cd, natn_eng_abrv_cd, tr_mket_cd, tr_mket_name, acpl_sttl_dt,
+        dmst_sttl_dt, ...) or None on API error
+    """
+    from infinite_buying_bot.api import kis_auth
+    trenv = kis_auth.getTREnv()
+
+    path = "/uapi/overseas-stock/v1/quotations/countries-holiday"
+    url = f"{trenv.my_url}{path}"
+    headers = _get_headers(trenv, "CTOS5011R")
+    
+    params = {
+        "TRAD_DT": trad_dt,
+        "CTX_AREA_NK": "",
+        "CTX_AREA_FK": ""
+    }
+    rows = _fetch_pages(url, headers, params, "Overseas Holidays")
+    return pd.DataFrame(rows) if rows is not None else None
+
+@retry_on_network_error(max_retries=3, initial_delay=1)
+def chk_holiday(bass_dt, env_dv='prod'):
+    """
+    Domestic Holidays (CTCA0903R): business/trading/open/settlement flags from bass_dt onwards
+    KIS asks for at most one call per day (the service shares its ledger backend).
+    
+    Args:
+        bass_dt: YYYYMMDD
+    
+    Returns:
+        DataFrame (bass_dt, wday_dvsn_cd, bzdy_yn, tr_day_yn, opnd_yn, sttl_day_yn) or None on API error
+    """
+    from infinite_buying_bot.api import kis_auth
+    trenv = kis_auth.getTREnv()
+
+    path = "/uapi/domestic-stock/v1/quotations/chk-holiday"
+    url = f"{trenv.my_url}{path}"
+    headers = _get_headers(trenv, "CTCA0903R")
+    
+    params = {
+        "BASS_DT": bass_dt,
+        "CTX_AREA_NK": "",
+        "CTX_AREA_FK": ""
+    }
+    rows = _fetch_pages(url, headers, params, "Domestic Holidays")
+    return pd.DataFrame(rows) if rows is not None else None
 
 @retry_on_network_error(max_retries=2, initial_delay=2)
 def order(order_dv, cano, acnt_prdt_cd, ovrs_excg_cd, pdno, ord_qty, ovrs_ord_unpr, ord_dvsn, env_dv='prod'):
@@ -197,3 +354,39 @@ def order(order_dv, cano, acnt_prdt_cd, ovrs_excg_cd, pdno, ord_qty, ovrs_ord_un
         return None
         
     return pd.DataFrame([data['output']])
+
+@retry_on_network_error(max_retries=3, initial_delay=1)
+def get_daily_prices(trenv, exchange, symbol, end_date='', adjusted=True):
+    """
+    Daily OHLCV bars (HHDFS76240000, up to 100 rows ending at end_date, newest first)
+    
+    Args:
+        exchange: Price exchange code (NAS, AMS, NYS)
+        end_date: YYYYMMDD (empty = today)
+        adjusted: Apply split/dividend adjustments
+    
+    Returns:
+        DataFrame with xymd, open, high, low, clos, tvol (empty if no bars), or None on API failure
+    """
+    path = "/uapi/overseas-price/v1/quotations/dailyprice"
+    url = f"{trenv.my_url}{path}"
+    
+    headers = _get_headers(trenv, "HHDFS76240000")
+    params = {
+        "AUTH": "",
+        "EXCD": exchange,
+        "SYMB": symbol,
+        "GUBN": "0",  # Daily
+        "BYMD": end_date,
+        "MODP": "1" if adjusted else "0"
+    }
+    
+    res = requests.get(url, headers=headers, params=params)
+    res.raise_for_status()
+    data = res.json()
+    
+    if data['rt_cd'] != '0':
+        logger.error(f"DailyPrice API Failed: {data.get('msg1')}")
+        return None
+    
+    return pd.DataFrame([row for row in data.get('output2') or [] if row.get('xymd')])
@@ -13,14 +13,23 @@ from collections import namedtuple
 logger = logging.getLogger(__name__)
 
 # --- CONFIG & CONSTANTS ---
+# [NEW] KIS_BASE_URL points the client at another server (e.g. the local stub:
+# python -m infinite_buying_bot.test.kis_stub_server). Its token goes to a separate file
+# so it never overwrites the production token.
+PROD_URL = "https://openapi.koreainvestment.com:9443"
+BASE_URL = os.getenv('KIS_BASE_URL', PROD_URL).rstrip('/')
+# Realtime websocket (execution notices). A non-prod BASE_URL has none unless KIS_WS_URL is set.
+PROD_WS_URL = "ws://ops.koreainvestment.com:21000"
+WS_URL = os.getenv('KIS_WS_URL', PROD_WS_URL if BASE_URL == PROD_URL else '').rstrip('/')
 # Use a unique token file name to avoid conflict with legacy files
-TOKEN_FILE_NAME = "token_prod_v2.yaml" 
+TOKEN_FILE_NAME = "token_prod_v2.yaml" if BASE_URL == PROD_URL else "token_local_v2.yaml"
 # Fix Path: api/kis_auth.py -> api -> infinite_buying_bot -> open-trading-api (ROOT)
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 TOKEN_PATH = os.path.join(ROOT_DIR, 'infinite_buying_bot', 'config', TOKEN_FILE_NAME)
 
 # Global Auth Object
-TREnv = namedtuple('TREnv', ['my_app', 'my_sec', 'my_acct', 'my_prod', 'my_token', 'my_url'])
+TREnv = namedtuple('TREnv', ['my_app', 'my_sec', 'my_acct', 'my_prod', 'my_token', 'my_url', 'my_htsid', 'my_url_ws'],
+                   defaults=('', ''))
 _trenv = None
 
 def getTREnv():
@@ -78,7 +87,7 @@ def auth(svr='prod', product='01'):
     if not app_key or not app_secret:
         raise ValueError("API Keys (my_app, my_sec) are missing in kis_devlp.yaml")
 
-    base_url = "https://openapi.koreainvestment.com:9443" # Hardcoded PROD URL
+    base_url = BASE_URL  # PROD unless KIS_BASE_URL overrides it
 
     # 2. Get Token
     token = _get_valid_token(app_key, app_secret, base_url)
@@ -90,7 +99,9 @@ def auth(svr='prod', product='01'):
         my_acct=acc_no,
         my_prod=product,
         my_token=f"Bearer {token}",
-        my_url=base_url
+        my_url=base_url,
+        my_htsid=str(cfg.get('my_htsid') or ''),
+        my_url_ws=WS_URL
     )
     
     logger.info(f"??Authentication Success (Account: {acc_no})")
@@ -154,3 +165,15 @@ def _issue_token(app_key, app_secret, base_url):
         
     return access_token
 
+
+def get_approval_key(trenv=None):
+    """Websocket approval key (/oauth2/Approval); raises on failure"""
+    trenv = trenv or getTREnv()
+    resp = requests.post(
+        f"{trenv.my_url}/oauth2/Approval",
+        headers={"content-type": "application/json"},
+        json={"grant_type": "client_credentials", "appkey": trenv.my_app, "secretkey": trenv.my_sec},
+        timeout=10
+    )
+    resp.raise_for_status()
+    return resp.json()['approval_key']
@@ -0,0 +1,228 @@
+"""
+Simulated broker for backtests
+Drop-in replacement for core.trader.Trader that fills orders against historical bars.
+"""
+import logging
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from infinite_buying_bot.core.trader import OrderResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEE_RATE = 0.0025  # KIS overseas stock commission (0.25%)
+
+
+class SimulatedBroker:
+    """
+    Trader-compatible broker (get_price(s) / get_balance / buy / sell / place_orders /
+    get_all_holdings).
+
+    The engine moves it through the price matrix with set_bar(i); every order fills
+    immediately at that bar's close adjusted by slippage.
+
+    Fill rules (same as Trader unless noted):
+        - buy(amount): qty = floor(amount / price), fractional shares only if `fractional`
+        - sell(qty): rejected if more than the position
+        - fee = max(notional * fee_rate, min_fee) on every fill, paid from cash
+        - a buy larger than the available cash is trimmed to what the cash covers
+          (KIS rejects it instead; pass cap_to_cash=False to reproduce that)
+
+    Positions are kept in NumPy arrays indexed like PriceData.symbols, so the engine can
+    snapshot them per bar without building dicts.
+    """
+
+    def __init__(self, prices, initial_cash: float, fee_rate: float = DEFAULT_FEE_RATE,
+                 min_fee: float = 0.0, slippage_bps: float = 0.0, fractional: bool = False,
+                 cap_to_cash: bool = True, symbol: str = 'TQQQ'):
+        """
+        Args:
+            prices: PriceData (close matrix, bars x symbols, in USD)
+            initial_cash: Starting cash in USD
+            slippage_bps: Buys fill this many basis points above the close, sells below
+            symbol: Main symbol reported by get_balance() (Trader.symbol)
+        """
+        self.prices = prices
+        self.symbol = symbol
+        self.symbols = list(prices.symbols)
+        self.fee_rate = fee_rate
+        self.min_fee = min_fee
+        self.slippage = slippage_bps / 10000.0
+        self.fractional = fractional
+        self.cap_to_cash = cap_to_cash
+
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+        self.cash = float(initial_cash)
+        self.qty = np.zeros(len(self.symbols))
+        self.avg = np.zeros(len(self.symbols))
+        self.bar = 0
+
+        self.trades: List[Dict] = []
+        self.fees = 0.0
+        self.turnover = 0.0
+        self.rejected = 0
+
+    # ------------------------------------------------------------------
+    # Engine hooks
+    # ------------------------------------------------------------------
+
+    def set_bar(self, bar: int):
+        self.bar = bar
+
+    @property
+    def closes(self) -> np.ndarray:
+        """Close prices of the current bar (NaN before a symbol has data)"""
+        return self.prices.close[self.bar]
+
+    # ------------------------------------------------------------------
+    # Trader API
+    # ------------------------------------------------------------------
+
+    def get_price(self, symbol):
+        i = self._index.get(symbol)
+        if i is None:
+            return 0
+        price = self.closes[i]
+        return float(price) if price > 0 else 0  # NaN compares False
+
+    def get_prices(self, symbols):
+        return {symbol: self.get_price(symbol) for symbol in symbols}
+
+    def get_balance(self):
+        """Returns: (cash, quantity_of_main_symbol, avg_price_of_main_symbol)"""
+        i = self._index.get(self.symbol)
+        if i is None:
+            return self.cash, 0, 0.0
+        return self.cash, self._qty_out(self.qty[i]), float(self.avg[i])
+
+    def get_position(self, symbol):
+        """Shares held of one symbol (0 if unknown)"""
+        i = self._index.get(symbol)
+        return self._qty_out(self.qty[i]) if i is not None else 0
+
+    def place_orders(self, orders, prices=None, notify=True) -> List[OrderResult]:
+        """Trader.place_orders: every leg fills at this bar, sells before buys (latency 0)"""
+        results: List[Optional[OrderResult]] = [None] * len(orders)
+        sides = [order.get('side') or order.get('type') for order in orders]
+        for n in sorted(range(len(orders)), key=lambda n: sides[n] != 'sell'):
+            order, side = orders[n], sides[n]
+            symbol = order['symbol']
+            qty = order.get('qty')
+            price = self.get_price(symbol) or order.get('fallback_price') or 0.0
+            fills = len(self.trades)
+            if side == 'sell':
+                ok = self.sell(qty or 0, symbol, reason=order.get('reason'), fallback_price=order.get('fallback_price'))
+            elif side == 'buy':
+                amount = qty * price if qty is not None else order.get('amount', 0)
+                ok = self.buy(amount, symbol, reason=order.get('reason'))
+            else:
+                ok = self._reject(str(side), symbol, f"unknown side {side!r}")
+            if ok and len(self.trades) > fills:
+                fill = self.trades[-1]
+                results[n] = OrderResult(symbol, side, fill['qty'], fill['price'], True)
+            else:
+                results[n] = OrderResult(symbol, str(side), qty or 0, price, False, error='rejected')
+        return results
+
+    def get_all_holdings(self):
+        closes = self.closes
+        out = []
+        for i in np.flatnonzero(self.qty > 0):
+            out.append({
+                'symbol': self.symbols[i],
+                'qty': self._qty_out(self.qty[i]),
+                'avg_price': float(self.avg[i]),
+                'current_price': float(closes[i]) if closes[i] > 0 else 0.0
+            })
+        return out
+
+    def buy(self, amount, symbol=None, reason=None, **kwargs):
+        target = symbol or self.symbol
+        price = self.get_price(target)
+        if price <= 0:
+            return self._reject('buy', target, f"no price for {target}")
+
+        fill = price * (1 + self.slippage)
+        qty = self._round_qty(amount / price)
+        if self._cost(qty, fill) > self.cash:
+            if not self.cap_to_cash:
+                return self._reject('buy', target, f"insufficient cash ${self.cash:.2f}")
+            qty = self._round_qty(max(self.cash - self.min_fee, 0) / (fill * (1 + self.fee_rate)))
+        if qty <= 0:
+            return self._reject('buy', target, f"amount ${amount:.2f} below one share")
+
+        i = self._index[target]
+        notional = qty * fill
+        fee = self._fee(notional)
+        self.avg[i] = (self.qty[i] * self.avg[i] + notional) / (self.qty[i] + qty)
+        self.qty[i] += qty
+        self.cash -= notional + fee
+        self._record('buy', target, qty, fill, fee, reason)
+        return True
+
+    def sell(self, qty, symbol=None, reason=None, fallback_price=None):
+        target = symbol or self.symbol
+        price = self.get_price(target)
+        if price <= 0 and fallback_price and fallback_price > 0:
+            price = fallback_price
+        if price <= 0:
+            return self._reject('sell', target, f"no price for {target}")
+        if qty <= 0:
+            return self._reject('sell', target, f"invalid quantity {qty}")
+
+        i = self._index[target]
+        if qty > self.qty[i] + 1e-9:
+            return self._reject('sell', target, f"{qty} > held {self._qty_out(self.qty[i])}")
+
+        fill = price * (1 - self.slippage)
+        notional = qty * fill
+        fee = self._fee(notional)
+        self.qty[i] -= qty
+        if self.qty[i] <= 1e-9:
+            self.qty[i] = 0.0
+            self.avg[i] = 0.0
+        self.cash += notional - fee
+        self._record('sell', target, qty, fill, fee, reason)
+        return True
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _round_qty(self, qty: float) -> float:
+        if self.fractional:
+            return math.floor(qty * 1e6) / 1e6
+        return float(math.floor(qty + 1e-9))
+
+    def _qty_out(self, qty: float):
+        return float(qty) if self.fractional else int(qty)
+
+    def _fee(self, notional: float) -> float:
+        return max(notional * self.fee_rate, self.min_fee)
+
+    def _cost(self, qty: float, fill: float) -> float:
+        return qty * fill + self._fee(qty * fill) if qty > 0 else 0.0
+
+    def _record(self, side: str, symbol: str, qty: float, price: float, fee: float, reason: Optional[str]):
+        notional = qty * price
+        self.fees += fee
+        self.turnover += notional
+        self.trades.append({
+            'bar': self.bar,
+            'timestamp': self.prices.index[self.bar],
+            'side': side,
+            'symbol': symbol,
+            'qty': self._qty_out(qty),
+            'price': price,
+            'amount': notional,
+            'fee': fee,
+            'cash_after': self.cash,
+            'reason': reason or ''
+        })
+
+    def _reject(self, side: str, symbol: str, why: str) -> bool:
+        self.rejected += 1
+        logger.debug(f"[SIM] {side} {symbol} rejected: {why}")
+        return False
@@ -0,0 +1,472 @@
+"""
+Backtest engine
+Replays historical prices through the bot's own decision code (InfiniteBuyingStrategy,
+RebalancingEngine, BotController trading modes) against a SimulatedBroker.
+
+Usage:
+    python -m infinite_buying_bot.backtest.engine --mode gradual --start 2020-01-01 --end 2024-12-31
+"""
+import argparse
+import contextlib
+import json
+import logging
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from infinite_buying_bot.api.bot_controller import BotController
+from infinite_buying_bot.backtest.broker import DEFAULT_FEE_RATE, SimulatedBroker
+from infinite_buying_bot.backtest.report import BacktestResult
+from infinite_buying_bot.core.portfolio_manager import PortfolioManager
+from infinite_buying_bot.core.rebalancing_engine import RebalancingEngine
+from infinite_buying_bot.core.strategy import InfiniteBuyingStrategy
+from infinite_buying_bot.utils.clock import SimulatedClock
+from infinite_buying_bot.utils.config_service import RuntimeConfig
+
+logger = logging.getLogger(__name__)
+
+MODES = ('infinite', 'rebalancing', 'gradual', 'st-exchange', 'scheduled-single')
+
+DEFAULT_SYMBOLS = ('TQQQ', 'MAGS', 'SHV', 'JEPI')
+
+# Same defaults as the live bot (BotController / PortfolioManager / InfiniteBuyingStrategy)
+DEFAULT_PARAMS = {
+    'symbol': 'TQQQ',                  # infinite mode symbol, get_balance() symbol
+    'profit_target_pct': 10.0,         # InfiniteBuyingStrategy sell target (%)
+    'split_count_low': 80,             # InfiniteBuyingStrategy: price >= avg
+    'split_count_high': 40,            # InfiniteBuyingStrategy: price < avg / first entry
+    'layer0_profit_target_pct': 10.0,  # BotController.PROFIT_TARGET_PCT (LAYER 0)
+    'profit_target': 0.10,             # RebalancingEngine TQQQ target (fraction)
+    'profit_reinvest_symbol': 'JEPI',
+    'strategy_mode': 'neutral',
+    'gradual_interval': 5,             # minutes between gradual buys (intraday bars)
+    'gradual_targets': ['all'],
+    'rotation_priority': ['SHV', 'JEPI', 'MAGS'],
+    'target_allocation': {'TQQQ': 0.10, 'MAGS': 0.20, 'SHV': 0.50, 'JEPI': 0.20},
+    'scheduled_symbol': 'TQQQ',
+    'scheduled_qty': 1,
+    'initial_allocation': None,        # {symbol: weight} bought on the first bar (None = all cash)
+}
+
+# Parameters each mode's decision code reads; the rest of DEFAULT_PARAMS has no effect on it
+# (symbol and initial_allocation apply to every mode)
+MODE_PARAMS = {
+    'infinite': ('profit_target_pct', 'split_count_low', 'split_count_high'),
+    'rebalancing': ('profit_target', 'profit_reinvest_symbol', 'strategy_mode', 'rotation_priority',
+                    'target_allocation'),
+    'gradual': ('layer0_profit_target_pct', 'gradual_interval', 'gradual_targets', 'target_allocation'),
+    'st-exchange': ('layer0_profit_target_pct', 'strategy_mode', 'target_allocation'),
+    'scheduled-single': ('layer0_profit_target_pct', 'scheduled_symbol', 'scheduled_qty', 'target_allocation'),
+}
+COMMON_PARAMS = ('symbol', 'initial_allocation')
+
+# Loggers silenced while a quiet backtest runs (the decision code logs every order and every
+# rejected one; rejections are counted in BacktestResult instead)
+QUIET_LOGGERS = ('infinite_buying_bot', 'api', 'core')
+
+
+@dataclass
+class PriceData:
+    """
+    Close prices aligned on one time index (daily or intraday bars).
+
+    close is a float matrix (bars x symbols); a symbol has NaN until its first bar and is
+    forward-filled afterwards. fx is the optional KRW per USD rate per bar.
+    """
+    index: np.ndarray
+    symbols: Tuple[str, ...]
+    close: np.ndarray
+    fx: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, fx: pd.Series = None) -> 'PriceData':
+        """
+        Args:
+            frame: Wide frame of closes (DatetimeIndex or 'date' column, one column per symbol)
+            fx: Optional KRW/USD series, aligned to the frame by date (forward/back filled)
+        """
+        if 'date' in frame.columns:
+            frame = frame.set_index('date')
+        frame = frame.copy()
+        frame.index = pd.to_datetime(frame.index)
+        frame = frame.sort_index().astype(float).ffill()
+
+        fx_values = None
+        if fx is not None:
+            fx = pd.Series(fx, dtype=float)
+            fx.index = pd.to_datetime(fx.index)
+            fx_values = fx.sort_index().reindex(frame.index, method='ffill').bfill().to_numpy()
+
+        return cls(index=frame.index.to_numpy(dtype='datetime64[ns]'),
+                   symbols=tuple(str(c) for c in frame.columns),
+                   close=frame.to_numpy(dtype=float),
+                   fx=fx_values)
+
+    @classmethod
+    def from_store(cls, symbols: Iterable[str] = DEFAULT_SYMBOLS, start=None, end=None, days: int = None,
+                   fx_symbol: str = None, store=None, refresh: bool = True) -> 'PriceData':
+        """Daily closes from the local MarketDataStore (gap-filled from its providers when refresh)"""
+        from infinite_buying_bot.dashboard.market_data import get_market_data_store
+        store = store or get_market_data_store()
+
+        closes = store.get_closes(symbols, start, end, days, refresh)
+        if not closes:
+            raise ValueError(f"No price data for {list(symbols)}")
+        frame = pd.DataFrame(closes)
+        frame = frame[[s for s in symbols if s in frame.columns]]
+
+        fx = None
+        if fx_symbol:
+            fx = pd.Series(store.get_closes([fx_symbol], start, end, days, refresh).get(fx_symbol, {}))
+            if fx.empty:
+                logger.warning(f"[BACKTEST] No FX data for {fx_symbol}, reporting in USD only")
+                fx = None
+        return cls.from_frame(frame, fx=fx)
+
+    @classmethod
+    def from_csv(cls, path: str, fx_column: str = None) -> 'PriceData':
+        """Wide CSV: a date column and one close column per symbol (optionally an FX column)"""
+        frame = pd.read_csv(path)
+        fx = None
+        if fx_column:
+            fx = frame.set_index('date')[fx_column]
+            frame = frame.drop(columns=fx_column)
+        return cls.from_frame(frame, fx=fx)
+
+
+class _NullJournal:
+    """TelemetryJournal stand-in: the broker keeps the trade log, nothing goes to SQLite"""
+
+    def log_holdings(self, holdings):
+        pass
+
+    def log_holdings_history(self, holdings, strategy_mode=None):
+        pass
+
+    def log_trade(self, *args, **kwargs):
+        pass
+
+    def submit_snapshot(self, job):
+        pass
+
+    def stop(self, timeout=None):
+        pass
+
+
+class BacktestController(BotController):
+    """
+    BotController wired to a SimulatedBroker.
+
+    BotController.__init__ is skipped on purpose: it would write logs/bot_status.json,
+    read the live runtime_config.json and start the journal thread. Only the attributes
+    the trading-mode methods read are set here. The engine moves `clock` to each bar's
+    timestamp, so timestamps the controller records (last_dip_buy_time, ...) are bar times.
+    """
+
+    def __init__(self, broker: SimulatedBroker, portfolio_manager: PortfolioManager, params: Dict,
+                 clock: SimulatedClock = None):
+        self.clock = clock or SimulatedClock()
+        self.is_running = True
+        self.notifier = None
+        self.status_manager = None
+        self.trader = broker
+        self.order_tracker = None  # fills are known on submit
+        self.portfolio_manager = portfolio_manager
+        self.journal = _NullJournal()
+        self.trading_symbol = params['symbol']
+
+        self.strategy_mode = params['strategy_mode']
+        self.dip_buy_mode = 'backtest'  # RebalancingEngine skips its wall-clock window check
+        self.last_dip_buy_time = None
+        self.entry_allowed = True
+        self.trading_mode = None
+        self.gradual_interval = params['gradual_interval']
+        self.gradual_targets = list(params['gradual_targets'])
+        self.target_allocation = dict(params['target_allocation'])
+        self.PROFIT_TARGET_PCT = params['layer0_profit_target_pct']
+        self.runtime_config, _ = RuntimeConfig.from_dict({'rotation_priority': list(params['rotation_priority'])})
+
+
+class BacktestEngine:
+    """
+    Bar-by-bar replay of one trading mode.
+
+    Per bar the broker is moved to that bar's close, the mode's decision code runs and the
+    resulting positions/cash are recorded; equity, drawdown and the other metrics are then
+    computed vectorized from those arrays (see BacktestResult).
+
+    Cadence (the live bot polls every minute; here one poll per bar):
+        - LAYER 0 profit taking runs every bar (BotController modes)
+        - gradual: every bar once gradual_interval minutes passed since the last buy
+        - st-exchange / scheduled-single / rebalancing / infinite buys: once per day,
+          on that day's last bar (is_near_close=True for InfiniteBuyingStrategy)
+        - infinite sells: every bar
+    """
+
+    def __init__(self, prices: PriceData, initial_cash: float = 10000.0, mode: str = 'gradual',
+                 params: Dict = None, broker_kwargs: Dict = None, quiet: bool = True):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        unknown = set(params or {}) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown backtest params: {sorted(unknown)}")
+
+        self.prices = prices
+        self.initial_cash = initial_cash
+        self.mode = mode
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.broker_kwargs = broker_kwargs or {}
+        self.quiet = quiet
+
+    def run(self) -> BacktestResult:
+        prices = self.prices
+        broker = SimulatedBroker(prices, self.initial_cash, symbol=self.params['symbol'], **self.broker_kwargs)
+        step = self._build_step(broker)
+
+        n_bars = len(prices.index)
+        positions = np.zeros((n_bars, len(prices.symbols)))
+        cash = np.zeros(n_bars)
+        days = prices.index.astype('datetime64[D]')
+        day_end = np.append(days[1:] != days[:-1], True)
+
+        with _quiet_logs(self.quiet):
+            for i in range(n_bars):
+                broker.set_bar(i)
+                if i == 0 and self.params['initial_allocation']:
+                    self._buy_initial(broker)
+                step(i, bool(day_end[i]))
+                positions[i] = broker.qty
+                cash[i] = broker.cash
+
+        return BacktestResult(
+            mode=self.mode, index=prices.index, symbols=prices.symbols, close=prices.close,
+            positions=positions, cash=cash, initial_cash=self.initial_cash,
+            trades=broker.trades, fees=broker.fees, turnover=broker.turnover,
+            rejected=broker.rejected, fx=prices.fx, params=self.params
+        )
+
+    # ------------------------------------------------------------------
+    # Modes
+    # ------------------------------------------------------------------
+
+    def _build_step(self, broker: SimulatedBroker) -> Callable[[int, bool], None]:
+        if self.mode == 'infinite':
+            return self._infinite_step(broker)
+        if self.mode == 'rebalancing':
+            return self._rebalancing_step(broker)
+        return self._controller_step(broker)
+
+    def _infinite_step(self, broker):
+        params = self.params
+        symbol = params['symbol']
+        strategy = InfiniteBuyingStrategy({'strategy': {
+            'symbol': symbol,
+            'profit_target_pct': params['profit_target_pct'],
+            'split_count_low': params['split_count_low'],
+            'split_count_high': params['split_count_high'],
+        }})
+
+        def step(i, day_end):
+            price = broker.get_price(symbol)
+            if price <= 0:
+                return
+            cash, qty, avg = broker.get_balance()
+            if strategy.should_sell(price, avg, qty):
+                broker.sell(qty, symbol, reason=f"Profit target +{strategy.profit_target_pct}%")
+            elif day_end:
+                should_buy, split_count = strategy.should_buy(price, avg, qty, is_near_close=True)
+                if should_buy:
+                    broker.buy(cash / split_count, symbol, reason=f"Split buy 1/{split_count}")
+        return step
+
+    def _rebalancing_step(self, broker):
+        params = self.params
+        portfolio_manager = self._portfolio_manager()
+        controller = BacktestController(broker, portfolio_manager, params)
+        engine = RebalancingEngine(portfolio_manager, bot_controller=controller, config={
+            'profit_target': params['profit_target'],
+            'profit_reinvest_symbol': params['profit_reinvest_symbol'],
+        })
+
+        def step(i, day_end):
+            if not day_end:
+                return
+            controller.clock.set(self._bar_time(i))
+            self._sync_portfolio(broker, portfolio_manager)
+            for action in engine.get_rebalancing_actions():
+                self._apply_action(broker, action)
+        return step
+
+    def _controller_step(self, broker):
+        params = self.params
+        portfolio_manager = self._portfolio_manager()
+        controller = BacktestController(broker, portfolio_manager, params)
+        controller.trading_mode = self.mode
+        interval = np.timedelta64(int(params['gradual_interval'] * 60), 's')
+        index = self.prices.index
+        last_buy = [None]
+
+        def step(i, day_end):
+            controller.clock.set(self._bar_time(i))
+            # LAYER 0 first, skipping the mode logic on that bar (same as run_monitoring_cycle)
+            if controller._check_and_execute_profit_taking(broker.get_all_holdings()):
+                return
+
+            if self.mode == 'gradual':
+                if last_buy[0] is not None and index[i] - last_buy[0] < interval:
+                    return
+                # Prices for symbols not held yet (live, the manager keeps them from earlier cycles)
+                self._sync_portfolio(broker, portfolio_manager)
+                trades_before = len(broker.trades)
+                controller._execute_gradual_buy(broker.cash)
+                if len(broker.trades) > trades_before:
+                    last_buy[0] = index[i]
+            elif day_end and self.mode == 'st-exchange':
+                controller._execute_st_exchange()
+            elif day_end and self.mode == 'scheduled-single':
+                controller._execute_scheduled_buy(params['scheduled_symbol'], params['scheduled_qty'])
+        return step
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _bar_time(self, i: int):
+        return pd.Timestamp(self.prices.index[i]).to_pydatetime()
+
+    def _portfolio_manager(self) -> PortfolioManager:
+        portfolio_manager = PortfolioManager(initial_capital=self.initial_cash)
+        portfolio_manager.update_target_allocation(dict(self.params['target_allocation']))
+        return portfolio_manager
+
+    @staticmethod
+    def _sync_portfolio(broker: SimulatedBroker, portfolio_manager: PortfolioManager):
+        """Push broker state into PortfolioManager (prices included for symbols not held)"""
+        held = {h['symbol']: h for h in broker.get_all_holdings()}
+        positions = {}
+        for symbol in portfolio_manager.positions:
+            h = held.get(symbol, {})
+            positions[symbol] = {
+                'quantity': h.get('qty', 0),
+                'avg_price': h.get('avg_price', 0.0),
+                'current_price': broker.get_price(symbol),
+            }
+        portfolio_manager.update_positions(positions)
+        portfolio_manager.update_cash(broker.cash)
+
+    @staticmethod
+    def _apply_action(broker: SimulatedBroker, action: Dict):
+        """Execute a RebalancingEngine action dict on the broker"""
+        kind = action['action']
+        if kind == 'profit_taking':
+            if broker.sell(action['sell_quantity'], action['sell_symbol'], reason=action['reason']):
+                broker.buy(action['profit_amount'], action['buy_symbol'], reason=action['reason'])
+        elif kind == 'dip_buying':
+            price = broker.get_price(action['sell_symbol'])
+            held = broker.get_position(action['sell_symbol'])
+            qty = min(held, math.ceil(action['sell_amount'] / price)) if price > 0 else 0
+            if qty > 0 and broker.sell(qty, action['sell_symbol'], reason=action['reason']):
+                broker.buy(action['sell_amount'], action['buy_symbol'], reason=action['reason'])
+        elif kind == 'interest_reinvest':
+            broker.buy(action['amount'], action['buy_symbol'], reason=action['reason'])
+        elif kind == 'rebalance':
+            price = broker.get_price(action['symbol'])
+            qty = action.get('qty')
+            if action['trade_action'] == 'buy':
+                amount = qty * price if qty is not None else action['amount_krw']
+                broker.buy(amount, action['symbol'], reason=action['reason'])
+            elif price > 0:
+                qty = qty if qty is not None else int(action['amount_krw'] / price)
+                broker.sell(qty, action['symbol'], reason=action['reason'])
+
+    def _buy_initial(self, broker: SimulatedBroker):
+        allocation = self.params['initial_allocation']
+        budget = broker.cash
+        for symbol, weight in allocation.items():
+            if weight > 0:
+                broker.buy(budget * weight, symbol, reason="Initial allocation")
+
+
+@contextlib.contextmanager
+def _quiet_logs(enabled: bool):
+    if not enabled:
+        yield
+        return
+    loggers = [logging.getLogger(name) for name in QUIET_LOGGERS]
+    levels = [lg.level for lg in loggers]
+    for lg in loggers:
+        lg.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        for lg, level in zip(loggers, levels):
+            lg.setLevel(level)
+
+
+def run_backtest(prices: PriceData, mode: str = 'gradual', initial_cash: float = 10000.0,
+                 params: Dict = None, **broker_kwargs) -> BacktestResult:
+    """Convenience wrapper: BacktestEngine(...).run()"""
+    return BacktestEngine(prices, initial_cash, mode, params, broker_kwargs).run()
+
+
+def _parse_param(text: str):
+    key, _, value = text.partition('=')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the bot's trading modes on historical prices")
+    parser.add_argument('--mode', choices=MODES, default='gradual')
+    parser.add_argument('--symbols', default=','.join(DEFAULT_SYMBOLS))
+    parser.add_argument('--start', help="YYYY-MM-DD")
+    parser.add_argument('--end', help="YYYY-MM-DD (default: today)")
+    parser.add_argument('--days', type=int, default=365 * 3, help="Calendar days back from end (if no --start)")
+    parser.add_argument('--csv', help="Wide CSV of closes (date + one column per symbol) instead of the store")
+    parser.add_argument('--fx', help="FX symbol for KRW reporting (e.g. KRW=X)")
+    parser.add_argument('--cash', type=float, default=10000.0, help="Initial cash (USD)")
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE_RATE, help="Commission rate")
+    parser.add_argument('--min-fee', type=float, default=0.0)
+    parser.add_argument('--slippage-bps', type=float, default=0.0)
+    parser.add_argument('--fractional', action='store_true', help="Allow fractional shares")
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                        help="Override a strategy param (JSON value), e.g. layer0_profit_target_pct=15")
+    parser.add_argument('--trades', help="Write the trade log to this CSV")
+    parser.add_argument('--equity', help="Write the equity curve to this CSV")
+    parser.add_argument('--verbose', action='store_true', help="Keep the decision code's logging")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    if args.csv:
+        prices = PriceData.from_csv(args.csv)
+    else:
+        prices = PriceData.from_store(symbols, start=args.start, end=args.end,
+                                      days=None if args.start else args.days, fx_symbol=args.fx)
+
+    engine = BacktestEngine(
+        prices, initial_cash=args.cash, mode=args.mode,
+        params=dict(_parse_param(p) for p in args.param),
+        broker_kwargs={'fee_rate': args.fee, 'min_fee': args.min_fee,
+                       'slippage_bps': args.slippage_bps, 'fractional': args.fractional},
+        quiet=not args.verbose
+    )
+    result = engine.run()
+    print(result.summary())
+
+    if args.trades:
+        result.trades_frame().to_csv(args.trades, index=False)
+        logger.info(f"[BACKTEST] Trade log saved: {args.trades}")
+    if args.equity:
+        result.equity_frame().to_csv(args.equity, index=False)
+        logger.info(f"[BACKTEST] Equity curve saved: {args.equity}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Backtest results and metrics
+All metrics are computed with NumPy over the per-bar equity curve.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+
+@dataclass
+class BacktestResult:
+    """
+    Output of BacktestEngine.run().
+
+    Arrays are aligned with `index` (one row per bar, state after that bar's orders).
+    Amounts are in USD; with an FX series, equity_krw converts them at each bar's rate.
+    """
+    mode: str
+    index: np.ndarray                 # datetime64 per bar
+    symbols: Tuple[str, ...]
+    close: np.ndarray                 # bars x symbols
+    positions: np.ndarray             # bars x symbols (shares held)
+    cash: np.ndarray                  # per bar
+    initial_cash: float
+    trades: List[Dict] = field(default_factory=list)
+    fees: float = 0.0
+    turnover: float = 0.0
+    rejected: int = 0
+    fx: Optional[np.ndarray] = None   # KRW per USD per bar
+    params: Dict = field(default_factory=dict)
+
+    # ------------------------------------------------------------------
+    # Series
+    # ------------------------------------------------------------------
+
+    @property
+    def holdings_value(self) -> np.ndarray:
+        """Market value per symbol (bars x symbols); symbols without a price count as 0"""
+        return self.positions * np.nan_to_num(self.close)
+
+    @property
+    def equity(self) -> np.ndarray:
+        return self.cash + self.holdings_value.sum(axis=1)
+
+    @property
+    def equity_krw(self) -> Optional[np.ndarray]:
+        return self.equity * self.fx if self.fx is not None else None
+
+    @property
+    def drawdown_pct(self) -> np.ndarray:
+        """Drawdown from the running peak (%, <= 0)"""
+        equity = self.equity
+        peak = np.maximum.accumulate(equity)
+        return np.where(peak > 0, (equity / peak - 1) * 100, 0.0)
+
+    def equity_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.holdings_value, columns=list(self.symbols))
+        df.insert(0, 'date', pd.to_datetime(self.index))
+        df['cash'] = self.cash
+        df['total_value'] = self.equity
+        df['drawdown_pct'] = self.drawdown_pct
+        if self.fx is not None:
+            df['total_value_krw'] = self.equity_krw
+        return df
+
+    def trades_frame(self) -> pd.DataFrame:
+        columns = ['timestamp', 'side', 'symbol', 'qty', 'price', 'amount', 'fee', 'cash_after', 'reason']
+        return pd.DataFrame(self.trades, columns=['bar'] + columns).drop(columns='bar')
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def metrics(self) -> Dict[str, float]:
+        equity = self.equity
+        final_value = float(equity[-1]) if len(equity) else self.initial_cash
+        total_return = final_value / self.initial_cash - 1 if self.initial_cash > 0 else 0.0
+
+        years = 0.0
+        if len(self.index) > 1:
+            years = (self.index[-1] - self.index[0]) / np.timedelta64(1, 's') / SECONDS_PER_YEAR
+        cagr = (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else 0.0
+
+        returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+        returns = returns[np.isfinite(returns)]
+        bars_per_year = (len(equity) - 1) / years if years > 0 else 252
+        volatility = float(returns.std() * np.sqrt(bars_per_year)) if len(returns) > 1 else 0.0
+        sharpe = float(returns.mean() / returns.std() * np.sqrt(bars_per_year)) if volatility > 0 else 0.0
+
+        drawdown = self.drawdown_pct
+        trough = int(np.argmin(drawdown)) if len(drawdown) else 0
+        peak = int(np.argmax(equity[:trough + 1])) if len(equity) else 0
+
+        sides = np.array([t['side'] for t in self.trades])
+        average_equity = float(equity.mean()) if len(equity) else 0.0
+
+        metrics = {
+            'initial_value': self.initial_cash,
+            'final_value': final_value,
+            'pnl': final_value - self.initial_cash,
+            'total_return_pct': total_return * 100,
+            'cagr_pct': cagr * 100,
+            'volatility_pct': volatility * 100,
+            'sharpe': sharpe,
+            'mdd_pct': float(drawdown[trough]) if len(drawdown) else 0.0,
+            'mdd_peak': str(pd.Timestamp(self.index[peak]).date()) if len(self.index) else '',
+            'mdd_trough': str(pd.Timestamp(self.index[trough]).date()) if len(self.index) else '',
+            'turnover': self.turnover,
+            'turnover_ratio': self.turnover / average_equity if average_equity > 0 else 0.0,
+            'fees': self.fees,
+            'trade_count': len(self.trades),
+            'buy_count': int((sides == 'buy').sum()),
+            'sell_count': int((sides == 'sell').sum()),
+            'rejected_orders': self.rejected,
+            'final_cash': float(self.cash[-1]) if len(self.cash) else self.initial_cash,
+            'bars': len(equity),
+        }
+        if self.fx is not None and len(equity):
+            initial_krw = self.initial_cash * float(self.fx[0])
+            final_krw = float(self.equity_krw[-1])
+            metrics['final_value_krw'] = final_krw
+            metrics['total_return_krw_pct'] = (final_krw / initial_krw - 1) * 100 if initial_krw > 0 else 0.0
+        return metrics
+
+    def summary(self) -> str:
+        """Plain-text report (same layout as the Telegram summaries)"""
+        m = self.metrics()
+        start = str(pd.Timestamp(self.index[0]).date()) if len(self.index) else '-'
+        end = str(pd.Timestamp(self.index[-1]).date()) if len(self.index) else '-'
+        lines = [
+            f"📊 [백테스트] {self.mode} ({start} ~ {end}, {m['bars']} bars)",
+            "━━━━━━━━━━━━━━━━━━",
+            f"💰 최종 평가액: ${m['final_value']:,.2f} (P&L ${m['pnl']:+,.2f})",
+            f"📈 수익률: {m['total_return_pct']:+.2f}% | CAGR {m['cagr_pct']:+.2f}%",
+            f"📉 MDD: {m['mdd_pct']:.2f}% ({m['mdd_peak']} → {m['mdd_trough']})",
+            f"⚖️ 변동성: {m['volatility_pct']:.2f}% | Sharpe {m['sharpe']:.2f}",
+            f"🔄 매매: {m['trade_count']}건 (매수 {m['buy_count']} / 매도 {m['sell_count']}, 거부 {m['rejected_orders']})",
+            f"🔁 회전율: ${m['turnover']:,.0f} ({m['turnover_ratio']:.2f}x) | 수수료 ${m['fees']:,.2f}",
+        ]
+        if 'final_value_krw' in m:
+            lines.append(f"💱 원화 평가액: ₩{m['final_value_krw']:,.0f} ({m['total_return_krw_pct']:+.2f}%)")
+        lines.append("━━━━━━━━━━━━━━━━━━")
+        return "\n".join(lines)
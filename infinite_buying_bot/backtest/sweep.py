@@ -0,0 +1,579 @@
+"""
+Parameter sweep runner
+Runs many backtests over a search space (grid / random / Bayesian) on a process pool,
+checkpoints every finished trial to disk and ranks the results by weighted objectives.
+
+Usage:
+    python -m infinite_buying_bot.backtest.sweep --mode gradual --method bayes --trials 200 \\
+        --checkpoint sweep_gradual.jsonl --objective cagr_pct=1 --objective mdd_pct=0.5
+"""
+import argparse
+import itertools
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from infinite_buying_bot.backtest.engine import (
+    COMMON_PARAMS, DEFAULT_SYMBOLS, MODE_PARAMS, MODES, BacktestEngine, PriceData
+)
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('grid', 'random', 'bayes')
+
+# Score = sum(weight * metric); mdd_pct is negative, so a positive weight penalizes drawdown
+DEFAULT_OBJECTIVES = {'cagr_pct': 1.0, 'mdd_pct': 0.5}
+
+
+@dataclass(frozen=True)
+class Choice:
+    """Categorical dimension (any JSON-serializable values, e.g. rotation orders or allocations)"""
+    values: tuple
+
+    def grid(self) -> list:
+        return list(self.values)
+
+    def sample(self, rng: np.random.Generator):
+        return self.values[rng.integers(len(self.values))]
+
+
+@dataclass(frozen=True)
+class Range:
+    """Numeric dimension [low, high]; `num` points when enumerated for a grid search"""
+    low: float
+    high: float
+    integer: bool = False
+    log: bool = False
+    num: int = 5
+
+    def grid(self) -> list:
+        if self.log:
+            points = np.geomspace(self.low, self.high, self.num)
+        else:
+            points = np.linspace(self.low, self.high, self.num)
+        if self.integer:
+            return sorted({int(round(p)) for p in points})
+        return [float(p) for p in points]
+
+    def sample(self, rng: np.random.Generator):
+        return self.from_unit(rng.random())
+
+    def to_unit(self, value) -> float:
+        if self.log:
+            return (math.log(value) - math.log(self.low)) / (math.log(self.high) - math.log(self.low))
+        return (value - self.low) / (self.high - self.low) if self.high > self.low else 0.0
+
+    def from_unit(self, u: float):
+        if self.log:
+            value = math.exp(math.log(self.low) + u * (math.log(self.high) - math.log(self.low)))
+        else:
+            value = self.low + u * (self.high - self.low)
+        return int(round(value)) if self.integer else float(value)
+
+
+# Hand-picked values in the bot today, with ranges around them. Each sweep only searches the
+# dimensions its mode reads (see space_for)
+DEFAULT_SPACE = {
+    'profit_target_pct': Range(5.0, 20.0, num=4),
+    'split_count_low': Range(40, 120, integer=True, num=3),
+    'split_count_high': Range(20, 60, integer=True, num=3),
+    'layer0_profit_target_pct': Range(5.0, 20.0, num=4),
+    'profit_target': Range(0.05, 0.20, num=4),
+    'strategy_mode': Choice(('aggressive', 'neutral', 'defensive')),
+    'gradual_interval': Choice((1, 5, 15, 60)),
+    'rotation_priority': Choice((('SHV', 'JEPI', 'MAGS'), ('SHV', 'MAGS', 'JEPI'), ('JEPI', 'SHV', 'MAGS'))),
+    'target_allocation': Choice((
+        {'TQQQ': 0.10, 'MAGS': 0.20, 'SHV': 0.50, 'JEPI': 0.20},
+        {'TQQQ': 0.20, 'MAGS': 0.20, 'SHV': 0.40, 'JEPI': 0.20},
+        {'TQQQ': 0.30, 'MAGS': 0.20, 'SHV': 0.30, 'JEPI': 0.20},
+    )),
+}
+
+
+def load_space(path: str) -> Dict:
+    """
+    Search space from JSON: a list is a Choice, an object is a Range.
+
+        {"profit_target_pct": {"low": 5, "high": 20, "num": 4},
+         "split_count_high": {"low": 20, "high": 60, "integer": true},
+         "rotation_priority": [["SHV", "JEPI", "MAGS"], ["JEPI", "SHV", "MAGS"]]}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    space = {}
+    for name, spec in raw.items():
+        if isinstance(spec, list):
+            space[name] = Choice(tuple(spec))
+        elif isinstance(spec, dict):
+            space[name] = Range(**spec)
+        else:
+            raise ValueError(f"{name}: expected a list (choices) or an object (range), got {spec!r}")
+    return space
+
+
+def space_for(mode: str, space: Dict, prices: PriceData = None) -> Dict:
+    """
+    The dimensions of `space` that can change a `mode` backtest.
+
+    Parameters the mode never reads (engine.MODE_PARAMS) are dropped, and so is
+    gradual_interval when no value is longer than the bar spacing (every bar passes the
+    interval check, e.g. minutes on daily bars). Searching them would only repeat trials
+    with identical results.
+    """
+    used = set(MODE_PARAMS[mode]) | set(COMMON_PARAMS)
+    bar_seconds = _bar_seconds(prices) if prices is not None else None
+    kept, dropped = {}, []
+    for name, dim in space.items():
+        if name not in used:
+            dropped.append(name)
+        elif name == 'gradual_interval' and bar_seconds and _max_value(dim) * 60 <= bar_seconds:
+            dropped.append(name)
+        else:
+            kept[name] = dim
+    if dropped:
+        logger.info(f"[SWEEP] {mode}: not searching {', '.join(dropped)} (no effect in this mode)")
+    if not kept:
+        raise ValueError(f"No dimension of the search space affects mode {mode!r} "
+                         f"(it reads {', '.join(MODE_PARAMS[mode])})")
+    return kept
+
+
+def _bar_seconds(prices: PriceData) -> Optional[float]:
+    """Smallest gap between bars (None with fewer than two bars)"""
+    index = np.asarray(prices.index, dtype='datetime64[ns]')
+    if len(index) < 2:
+        return None
+    gaps = np.diff(index).astype('timedelta64[s]').astype(float)
+    gaps = gaps[gaps > 0]
+    return float(gaps.min()) if len(gaps) else None
+
+
+def _max_value(dim) -> float:
+    return dim.high if isinstance(dim, Range) else max(dim.values)
+
+
+def trial_key(params: Dict) -> str:
+    """Stable identity of a parameter set (checkpoint de-duplication)"""
+    return json.dumps(params, sort_keys=True, default=list)
+
+
+def score(metrics: Optional[Dict], objectives: Dict[str, float]) -> float:
+    if not metrics:
+        return float('-inf')
+    try:
+        return float(sum(weight * metrics[name] for name, weight in objectives.items()))
+    except (KeyError, TypeError):
+        return float('-inf')
+
+
+# ----------------------------------------------------------------------
+# Search methods
+# ----------------------------------------------------------------------
+
+def grid_trials(space: Dict) -> Iterator[Dict]:
+    names = list(space)
+    for values in itertools.product(*(space[n].grid() for n in names)):
+        yield dict(zip(names, values))
+
+
+def random_trial(space: Dict, rng: np.random.Generator) -> Dict:
+    return {name: dim.sample(rng) for name, dim in space.items()}
+
+
+def suggest_bayes(space: Dict, history: List[tuple], rng: np.random.Generator, count: int,
+                  n_startup: int = 10, n_candidates: int = 256, gamma: float = 0.25) -> List[Dict]:
+    """
+    Tree-structured Parzen estimator: split finished trials into the best `gamma` share and
+    the rest, model each dimension's density in both groups (Gaussian kernels on [0, 1] for
+    ranges, smoothed frequencies for choices) and pick the random candidates that maximize
+    l(x) / g(x).
+
+    Args:
+        history: [(params, score)] of finished trials (failed ones have score -inf)
+    """
+    finite = [(p, s) for p, s in history if np.isfinite(s)]
+    if len(finite) < n_startup:
+        return [random_trial(space, rng) for _ in range(count)]
+
+    finite.sort(key=lambda item: item[1], reverse=True)
+    n_good = max(1, int(math.ceil(gamma * len(finite))))
+    good = [p for p, _ in finite[:n_good]]
+    bad = [p for p, _ in finite[n_good:]] or good
+
+    candidates = [random_trial(space, rng) for _ in range(n_candidates)]
+    log_ratio = np.zeros(n_candidates)
+    for name, dim in space.items():
+        if isinstance(dim, Range):
+            x = np.array([dim.to_unit(c[name]) for c in candidates])
+            log_ratio += np.log(_parzen(x, [dim.to_unit(p[name]) for p in good]))
+            log_ratio -= np.log(_parzen(x, [dim.to_unit(p[name]) for p in bad]))
+        else:
+            keys = [trial_key(v) for v in dim.values]
+            x = np.array([keys.index(trial_key(c[name])) for c in candidates])
+            log_ratio += np.log(_frequencies([keys.index(trial_key(p[name])) for p in good], len(keys))[x])
+            log_ratio -= np.log(_frequencies([keys.index(trial_key(p[name])) for p in bad], len(keys))[x])
+
+    picked, seen = [], set()
+    for i in np.argsort(-log_ratio):
+        key = trial_key(candidates[i])
+        if key not in seen:
+            seen.add(key)
+            picked.append(candidates[i])
+        if len(picked) == count:
+            break
+    return picked
+
+
+def _parzen(x: np.ndarray, samples: Sequence[float]) -> np.ndarray:
+    """Kernel density on [0, 1] mixed with a uniform prior (never 0)"""
+    samples = np.asarray(samples, dtype=float)
+    n = len(samples)
+    bandwidth = max(samples.std() * n ** -0.2, 0.05) if n > 1 else 0.25
+    kernels = np.exp(-0.5 * ((x[:, None] - samples[None, :]) / bandwidth) ** 2) / (bandwidth * math.sqrt(2 * math.pi))
+    return (kernels.sum(axis=1) + 1.0) / (n + 1)
+
+
+def _frequencies(indices: Sequence[int], size: int) -> np.ndarray:
+    counts = np.bincount(np.asarray(indices, dtype=int), minlength=size).astype(float)
+    return (counts + 1.0) / (counts.sum() + size)
+
+
+# ----------------------------------------------------------------------
+# Workers (prices shared read-only through shared memory)
+# ----------------------------------------------------------------------
+
+_WORKER = {}
+
+
+def _attach(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(close_name, fx_name, shape, index, symbols, mode, initial_cash, broker_kwargs):
+    logging.getLogger().setLevel(logging.WARNING)
+    close_shm = _attach(close_name)
+    close = np.ndarray(shape, dtype=np.float64, buffer=close_shm.buf)
+    close.flags.writeable = False
+    fx, fx_shm = None, None
+    if fx_name:
+        fx_shm = _attach(fx_name)
+        fx = np.ndarray((shape[0],), dtype=np.float64, buffer=fx_shm.buf)
+        fx.flags.writeable = False
+
+    _WORKER.update(
+        shm=(close_shm, fx_shm),  # keep the mappings alive
+        prices=PriceData(index=index, symbols=symbols, close=close, fx=fx),
+        mode=mode, initial_cash=initial_cash, broker_kwargs=broker_kwargs
+    )
+
+
+def _run_trial(params: Dict) -> Dict:
+    started = time.perf_counter()
+    try:
+        result = BacktestEngine(_WORKER['prices'], _WORKER['initial_cash'], _WORKER['mode'],
+                                params=params, broker_kwargs=_WORKER['broker_kwargs']).run()
+        metrics, error = result.metrics(), None
+    except Exception as e:
+        metrics, error = None, f"{type(e).__name__}: {e}"
+    return {'params': params, 'metrics': metrics, 'error': error,
+            'elapsed': time.perf_counter() - started}
+
+
+class _SharedPrices:
+    """Copies the price matrices into shared memory once for all workers"""
+
+    def __init__(self, prices: PriceData):
+        close = np.ascontiguousarray(prices.close, dtype=np.float64)
+        self.shape = close.shape
+        self._blocks = []
+        self.close_name = self._share(close)
+        self.fx_name = self._share(np.ascontiguousarray(prices.fx, dtype=np.float64)) if prices.fx is not None else None
+
+    def _share(self, array: np.ndarray) -> str:
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        self._blocks.append(block)
+        return block.name
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+class SweepRunner:
+    """
+    Runs a parameter search and appends each finished trial to a JSONL checkpoint.
+
+    Re-running with the same checkpoint resumes: finished parameter sets are loaded,
+    skipped (grid/random) or used as the model's history (bayes).
+
+    Only the dimensions the mode reads are searched (space_for), so no two trials differ
+    in parameters the backtest ignores.
+
+    Usage:
+        runner = SweepRunner(prices, mode='gradual', space=DEFAULT_SPACE, checkpoint='sweep.jsonl')
+        runner.run(method='bayes', trials=200)
+        print(runner.ranking().head(10))
+    """
+
+    def __init__(self, prices: PriceData, mode: str = 'gradual', space: Dict = None,
+                 initial_cash: float = 10000.0, broker_kwargs: Dict = None, base_params: Dict = None,
+                 objectives: Dict[str, float] = None, checkpoint: str = None, workers: int = None,
+                 seed: int = 0):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.prices = prices
+        self.mode = mode
+        self.space = space_for(mode, space or DEFAULT_SPACE, prices)
+        self.initial_cash = initial_cash
+        self.broker_kwargs = broker_kwargs or {}
+        self.base_params = base_params or {}
+        self.objectives = objectives or DEFAULT_OBJECTIVES
+        self.checkpoint = checkpoint
+        self.workers = workers or os.cpu_count() or 1
+        self.rng = np.random.default_rng(seed)
+        self.records: List[Dict] = self._load_checkpoint()
+
+    def run(self, method: str = 'random', trials: int = 100) -> List[Dict]:
+        """
+        Args:
+            method: grid (all combinations; `trials` is ignored), random or bayes
+            trials: Total trials including those already in the checkpoint
+
+        Returns:
+            All records (previous + new)
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+
+        done = {r['key'] for r in self.records}
+        if method == 'grid':
+            pending = (t for t in grid_trials(self.space) if trial_key(self._params(t)) not in done)
+            budget = None
+        else:
+            pending = None
+            budget = max(trials - len(self.records), 0)
+        if budget == 0:
+            logger.info(f"[SWEEP] Checkpoint already has {len(self.records)} trials, nothing to run")
+            return self.records
+
+        shared = _SharedPrices(self.prices)
+        started = time.perf_counter()
+        submitted = 0
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(shared.close_name, shared.fx_name, shared.shape, self.prices.index,
+                          self.prices.symbols, self.mode, self.initial_cash, self.broker_kwargs)
+            ) as pool:
+                running = {}
+                while True:
+                    # Keep every worker busy
+                    slots = self.workers * 2 - len(running)
+                    if budget is not None:
+                        slots = min(slots, budget - submitted)
+                    for trial in self._next_trials(method, pending, slots, done, running):
+                        params = self._params(trial)
+                        key = trial_key(params)
+                        done.add(key)
+                        running[pool.submit(_run_trial, params)] = trial
+                        submitted += 1
+                    if not running:
+                        break
+
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        trial = running.pop(future)
+                        self._record(trial, future.result())
+        finally:
+            shared.close()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"[SWEEP] {submitted} trials in {elapsed:.1f}s ({self.workers} workers), "
+                    f"{len(self.records)} total")
+        return self.records
+
+    def ranking(self, objectives: Dict[str, float] = None) -> pd.DataFrame:
+        """
+        Finished trials sorted by score (best first).
+
+        Columns: one per searched parameter, each objective metric, total_return_pct,
+        score, pareto (not dominated on the objective metrics) and error.
+        """
+        objectives = objectives or self.objectives
+        rows = []
+        for r in self.records:
+            metrics = r.get('metrics') or {}
+            row = {name: _display(r['trial'].get(name)) for name in self.space}
+            for name in dict.fromkeys([*objectives, 'total_return_pct', 'mdd_pct', 'trade_count']):
+                row[name] = metrics.get(name, np.nan)
+            row['score'] = score(metrics, objectives)
+            row['error'] = r.get('error')
+            rows.append(row)
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(rows)
+        df['pareto'] = _pareto_mask(df[list(objectives)].to_numpy(dtype=float) * np.sign(list(objectives.values())))
+        return df.sort_values('score', ascending=False, ignore_index=True)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _params(self, trial: Dict) -> Dict:
+        params = {**self.base_params, **trial}
+        for name, value in params.items():
+            if isinstance(value, tuple):
+                params[name] = list(value)
+        return params
+
+    def _next_trials(self, method, pending, count, done, running) -> List[Dict]:
+        if count <= 0:
+            return []
+        if method == 'grid':
+            return list(itertools.islice(pending, count))
+
+        trials, attempts = [], 0
+        while len(trials) < count and attempts < count * 20:
+            attempts += 1
+            if method == 'bayes':
+                history = [(r['trial'], r['score']) for r in self.records]
+                batch = suggest_bayes(self.space, history, self.rng, count - len(trials))
+            else:
+                batch = [random_trial(self.space, self.rng)]
+            for trial in batch:
+                key = trial_key(self._params(trial))
+                if key not in done and all(trial_key(self._params(t)) != key for t in trials):
+                    trials.append(trial)
+        return trials
+
+    def _record(self, trial: Dict, outcome: Dict):
+        record = {
+            'key': trial_key(outcome['params']),
+            'trial': trial,
+            'params': outcome['params'],
+            'metrics': outcome['metrics'],
+            'error': outcome['error'],
+            'elapsed': outcome['elapsed'],
+            'score': score(outcome['metrics'], self.objectives),
+        }
+        self.records.append(record)
+        if outcome['error']:
+            logger.warning(f"[SWEEP] Trial failed: {outcome['error']} ({trial})")
+        if self.checkpoint:
+            with open(self.checkpoint, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, default=list) + '\n')
+
+    def _load_checkpoint(self) -> List[Dict]:
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return []
+        records = []
+        with open(self.checkpoint, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("[SWEEP] Skipping a truncated checkpoint line")  # killed mid-write
+                    continue
+                record['score'] = score(record.get('metrics'), self.objectives)
+                records.append(record)
+        logger.info(f"[SWEEP] Resumed {len(records)} trials from {self.checkpoint}")
+        return records
+
+
+def _display(value):
+    """Dicts/lists as compact JSON so they fit in one ranking column"""
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=list)
+    return value
+
+
+def _pareto_mask(values: np.ndarray) -> np.ndarray:
+    """True for rows not dominated by any other row (all columns maximized, NaN rows excluded)"""
+    valid = ~np.isnan(values).any(axis=1)
+    mask = np.zeros(len(values), dtype=bool)
+    points = values[valid]
+    if len(points):
+        ge = (points[None, :, :] >= points[:, None, :]).all(axis=2)
+        gt = (points[None, :, :] > points[:, None, :]).any(axis=2)
+        mask[np.flatnonzero(valid)] = ~(ge & gt).any(axis=1)
+    return mask
+
+
+def _parse_objective(text: str):
+    name, _, weight = text.partition('=')
+    return name, float(weight or 1.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parameter sweep over backtests")
+    parser.add_argument('--mode', choices=MODES, default='gradual')
+    parser.add_argument('--method', choices=METHODS, default='random')
+    parser.add_argument('--trials', type=int, default=100, help="Total trials (random/bayes)")
+    parser.add_argument('--space', help="Search space JSON (default: built-in space)")
+    parser.add_argument('--symbols', default=','.join(DEFAULT_SYMBOLS))
+    parser.add_argument('--start', help="YYYY-MM-DD")
+    parser.add_argument('--end', help="YYYY-MM-DD (default: today)")
+    parser.add_argument('--days', type=int, default=365 * 3)
+    parser.add_argument('--csv', help="Wide CSV of closes instead of the market data store")
+    parser.add_argument('--cash', type=float, default=10000.0)
+    parser.add_argument('--fractional', action='store_true')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoint', help="JSONL file for results (resumes if it exists)")
+    parser.add_argument('--objective', action='append', default=[], metavar='METRIC=WEIGHT',
+                        help="Ranking objective (repeatable), e.g. cagr_pct=1 mdd_pct=0.5")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help="Write the full ranking to this CSV")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    if args.csv:
+        prices = PriceData.from_csv(args.csv)
+    else:
+        prices = PriceData.from_store(symbols, start=args.start, end=args.end,
+                                      days=None if args.start else args.days)
+
+    runner = SweepRunner(
+        prices, mode=args.mode, space=load_space(args.space) if args.space else None,
+        initial_cash=args.cash, broker_kwargs={'fractional': args.fractional},
+        objectives=dict(_parse_objective(o) for o in args.objective) or None,
+        checkpoint=args.checkpoint, workers=args.workers, seed=args.seed
+    )
+    runner.run(method=args.method, trials=args.trials)
+
+    ranking = runner.ranking()
+    if args.output:
+        ranking.to_csv(args.output, index=False)
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_colwidth', 60):
+        print(ranking.head(args.top).to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
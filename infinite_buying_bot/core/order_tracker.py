@@ -0,0 +1,457 @@
+"""
+Order Tracker - order lifecycle driven by KIS execution notices
+Subscribes to the overseas execution notice websocket (H0GSCNI0) and keeps an in-memory
+state machine per order number, so follow-up legs run on the actual fill instead of
+re-querying holdings on the next cycle. The REST inquiries (inquire_nccs / inquire_ccnl)
+take over while the websocket is down or cannot be decrypted.
+
+    submitted -> accepted -> partial -> filled
+                          \\-> rejected / cancelled
+"""
+import asyncio
+import base64
+import json
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from infinite_buying_bot.api import kis_api as api
+from infinite_buying_bot.api import kis_auth as ka
+from infinite_buying_bot.utils.clock import Clock, get_clock
+
+try:
+    from websockets.asyncio.client import connect as ws_connect
+except ImportError:  # websockets < 13 or not installed
+    ws_connect = None
+
+try:
+    from Crypto.Cipher import AES  # pycryptodome (same as examples_user/kis_auth.py)
+    from Crypto.Util.Padding import unpad
+except ImportError:
+    AES = None
+
+logger = logging.getLogger(__name__)
+
+CCNL_TR_ID = "H0GSCNI0"
+# Field order of the H0GSCNI0 frame (examples_llm/overseas_stock/ccnl_notice/ccnl_notice.py)
+CCNL_COLUMNS = [
+    'CUST_ID', 'ACNT_NO', 'ODER_NO', 'OODER_NO', 'SELN_BYOV_CLS', 'RCTF_CLS', 'ODER_KIND2',
+    'STCK_SHRN_ISCD', 'CNTG_QTY', 'CNTG_UNPR', 'STCK_CNTG_HOUR', 'RFUS_YN', 'CNTG_YN', 'ACPT_YN',
+    'BRNC_NO', 'ODER_QTY', 'ACNT_NAME', 'CNTG_ISNM', 'ODER_COND', 'DEBT_GB', 'DEBT_DATE',
+    'START_TM', 'END_TM', 'TM_DIV_TP'
+]
+
+SUBMITTED, ACCEPTED, PARTIAL, FILLED, REJECTED, CANCELLED = (
+    'submitted', 'accepted', 'partial', 'filled', 'rejected', 'cancelled'
+)
+FINAL_STATES = (FILLED, REJECTED, CANCELLED)
+
+REST_POLL_SECONDS = 5      # min gap between REST fallback polls
+STALE_SECONDS = 60         # REST-check an open order this long without a notice, websocket or not
+PENDING_NOTICES = 200      # notices kept for order numbers not tracked yet
+FINISHED_ORDERS = 200      # final orders kept for get()/wait()/late track(); older ones are evicted
+
+
+def normalize_order_no(order_no) -> str:
+    """KIS pads order numbers differently per API ('0030123456' vs '30123456')"""
+    return str(order_no or '').strip().lstrip('0')
+
+
+@dataclass
+class TrackedOrder:
+    order_no: str
+    symbol: str
+    side: str                          # 'buy' | 'sell'
+    qty: int
+    limit_price: float
+    state: str = SUBMITTED
+    filled_qty: int = 0
+    fill_amount: float = 0.0           # sum(fill qty * fill price)
+    reason: str = ''                   # reject / cancel reason
+    source: str = ''                   # 'ws' | 'rest' | 'sim': where the last update came from
+    submitted_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    callbacks: List[Callable] = field(default_factory=list, repr=False)
+
+    @property
+    def remaining(self) -> int:
+        return max(self.qty - self.filled_qty, 0)
+
+    @property
+    def avg_fill_price(self) -> float:
+        return self.fill_amount / self.filled_qty if self.filled_qty else 0.0
+
+    @property
+    def is_final(self) -> bool:
+        return self.state in FINAL_STATES
+
+
+class OrderTracker:
+    """
+    In-memory order book keyed by order number.
+
+    Orders are registered with track() (Trader does this for every accepted order); notices
+    that arrive before registration are parked and replayed. Callbacks passed to track() and
+    listeners added with add_listener() run once per order when it reaches a final state,
+    on a worker thread (never on the websocket loop). Only the last FINISHED_ORDERS final
+    orders stay in `orders`, so the book does not grow for the life of the process.
+
+    Usage:
+        tracker = OrderTracker(trader.trenv).start()
+        trader.order_tracker = tracker
+        result = trader.place_orders([{'symbol': 'TQQQ', 'side': 'sell', 'qty': 3}])[0]
+        tracker.track(result, on_done=lambda order: print(order.filled_qty, order.avg_fill_price))
+    """
+
+    def __init__(self, trenv=None, clock: Clock = None, poll_seconds: float = REST_POLL_SECONDS):
+        """
+        Args:
+            trenv: KIS TREnv (default: kis_auth.getTREnv())
+            clock: Time source for order timestamps and REST poll pacing
+            poll_seconds: Min gap between REST fallback polls
+        """
+        self.trenv = trenv or ka.getTREnv()
+        self.clock = clock or get_clock()
+        self.poll_seconds = poll_seconds
+
+        self.orders: Dict[str, TrackedOrder] = {}
+        self.listeners: List[Callable[[TrackedOrder], None]] = []
+        self.connected = False             # websocket subscribed and notices readable
+        self.stats = {'ws_notices': 0, 'rest_polls': 0, 'fills': 0}
+
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._pending: Dict[str, List] = {}
+        self._finished = deque()           # order numbers of final orders, oldest first
+        self._last_poll = None
+        self._callbacks = ThreadPoolExecutor(max_workers=1, thread_name_prefix='order-tracker-cb')
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task = None
+        self._cipher_key = None            # (key, iv) from the subscribe response
+
+    # ------------------------------------------------------------------
+    # Registration / queries
+    # ------------------------------------------------------------------
+
+    def track(self, result, on_done: Callable[[TrackedOrder], None] = None) -> Optional[TrackedOrder]:
+        """
+        Register an accepted order (Trader OrderResult) and optionally a completion callback.
+        Tracking the same order again only adds the callback; if the order is already
+        final the callback runs right away.
+        """
+        order_no = normalize_order_no(getattr(result, 'order_no', ''))
+        if not getattr(result, 'success', False) or not order_no:
+            return None
+
+        with self._lock:
+            order = self.orders.get(order_no)
+            if order is None:
+                now = self.clock.now()
+                order = TrackedOrder(order_no, result.symbol, result.side, int(result.qty),
+                                     float(result.price), submitted_at=now, updated_at=now)
+                self.orders[order_no] = order
+                for source, notice in self._pending.pop(order_no, []):
+                    self._apply(order, source, **notice)
+            if on_done:
+                if order.is_final:
+                    self._callbacks.submit(self._run_callback, on_done, order)
+                else:
+                    order.callbacks.append(on_done)
+        return order
+
+    def add_listener(self, listener: Callable[[TrackedOrder], None]):
+        """Called for every tracked order that reaches a final state"""
+        self.listeners.append(listener)
+
+    def get(self, order_no) -> Optional[TrackedOrder]:
+        return self.orders.get(normalize_order_no(order_no))
+
+    def open_orders(self) -> List[TrackedOrder]:
+        with self._lock:
+            return [o for o in self.orders.values() if not o.is_final]
+
+    def wait(self, order_no, timeout: float = 30.0) -> Optional[TrackedOrder]:
+        """Block until the order is final or timeout seconds (wall time) passed; returns the order"""
+        key = normalize_order_no(order_no)
+        with self._changed:
+            self._changed.wait_for(lambda: key in self.orders and self.orders[key].is_final, timeout)
+            return self.orders.get(key)
+
+    # ------------------------------------------------------------------
+    # State machine
+    # ------------------------------------------------------------------
+
+    def on_notice(self, values: Dict[str, str], source: str = 'ws'):
+        """Apply one H0GSCNI0 notice (column name -> value)"""
+        order_no = normalize_order_no(values.get('ODER_NO'))
+        if values.get('RCTF_CLS') == '2' and values.get('OODER_NO'):
+            # Cancel confirmation: the original order is the one that ends
+            self._update(normalize_order_no(values['OODER_NO']), source, state=CANCELLED, reason='cancelled')
+            return
+
+        if values.get('RFUS_YN') == '1':
+            self._update(order_no, source, state=REJECTED, reason='rejected by broker')
+        elif values.get('CNTG_YN') == '2':
+            try:
+                qty = int(float(values.get('CNTG_QTY') or 0))
+                price = float(values.get('CNTG_UNPR') or 0)
+            except ValueError:
+                logger.warning(f"[TRACKER] Unreadable fill notice: {values}")
+                return
+            self._update(order_no, source, fill_qty=qty, fill_price=price)
+        elif values.get('ACPT_YN') == '3':
+            self._update(order_no, source, state=CANCELLED, reason='expired (IOC/FOK)')
+        else:
+            self._update(order_no, source, state=ACCEPTED)
+
+    def _update(self, order_no: str, source: str, **notice):
+        with self._lock:
+            order = self.orders.get(order_no)
+            if order is None:
+                # Notice raced ahead of the order response (or belongs to another client)
+                parked = self._pending.setdefault(order_no, [])
+                parked.append((source, notice))
+                while len(self._pending) > PENDING_NOTICES:
+                    self._pending.pop(next(iter(self._pending)))
+                return
+            self._apply(order, source, **notice)
+
+    def _apply(self, order: TrackedOrder, source: str, state: str = None, reason: str = '',
+               fill_qty: int = 0, fill_price: float = 0.0, cum_qty: int = None, avg_price: float = 0.0):
+        """Move one order forward (lock held). Fills come as increments (ws) or cumulative (REST)."""
+        if order.is_final:
+            return
+        if cum_qty is not None and cum_qty > order.filled_qty:
+            order.filled_qty = min(cum_qty, order.qty)
+            order.fill_amount = order.filled_qty * avg_price
+            self.stats['fills'] += 1
+        elif fill_qty > 0:
+            fill_qty = min(fill_qty, order.remaining)
+            order.filled_qty += fill_qty
+            order.fill_amount += fill_qty * fill_price
+            self.stats['fills'] += 1
+
+        if order.qty > 0 and order.filled_qty >= order.qty:
+            state = FILLED
+        elif state is None or state == ACCEPTED:
+            state = PARTIAL if order.filled_qty else ACCEPTED
+        order.state = state
+        order.reason = reason or order.reason
+        order.source = source
+        order.updated_at = self.clock.now()
+
+        if order.is_final:
+            logger.info(f"[TRACKER] #{order.order_no} {order.side} {order.symbol} {order.state}: "
+                        f"{order.filled_qty}/{order.qty} @ ${order.avg_fill_price:.2f} ({source})")
+            callbacks, order.callbacks = order.callbacks + self.listeners, []
+            for callback in callbacks:
+                self._callbacks.submit(self._run_callback, callback, order)  # callbacks hold the order itself
+            self._finished.append(order.order_no)
+            while len(self._finished) > FINISHED_ORDERS:
+                self.orders.pop(self._finished.popleft(), None)
+        self._changed.notify_all()
+
+    @staticmethod
+    def _run_callback(callback, order: TrackedOrder):
+        try:
+            callback(order)
+        except Exception as e:
+            logger.error(f"[TRACKER] Callback for #{order.order_no} failed: {e}")
+
+    # ------------------------------------------------------------------
+    # REST fallback
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Poll open orders over REST when the websocket is down, when an order went
+        STALE_SECONDS without a notice, or when forced. Paced by poll_seconds.
+
+        Returns:
+            Number of orders whose state changed
+        """
+        open_orders = self.open_orders()
+        if not open_orders:
+            return 0
+        now = self.clock.now()
+        stale = any((now - o.updated_at).total_seconds() >= STALE_SECONDS for o in open_orders)
+        if self.connected and not stale and not force:
+            return 0
+        mono = self.clock.monotonic()
+        if not force and self._last_poll is not None and mono - self._last_poll < self.poll_seconds:
+            return 0
+        self._last_poll = mono
+        self.stats['rest_polls'] += 1
+
+        before = {o.order_no: (o.state, o.filled_qty) for o in open_orders}
+        try:
+            self._poll_rest(open_orders)
+        except Exception as e:
+            logger.error(f"[TRACKER] REST poll failed: {e}")
+        return sum(1 for o in open_orders if (o.state, o.filled_qty) != before[o.order_no])
+
+    def _poll_rest(self, open_orders: List[TrackedOrder]):
+        acct, prod = self.trenv.my_acct, self.trenv.my_prod
+
+        # 1. Open-order list (NASD = all US exchanges): partial fills of resting orders
+        nccs = api.inquire_nccs(acct, prod, 'NASD')
+        if nccs is None:
+            return
+        resting = {}
+        for row in nccs.to_dict('records'):
+            resting[normalize_order_no(row.get('odno'))] = row
+        for order in open_orders:
+            row = resting.get(order.order_no)
+            if row is not None:
+                self._apply_rest_row(order, row, resting=True)
+
+        # 2. Orders that left the open list are done: the fill history has how they ended
+        done = [o for o in open_orders if o.order_no not in resting]
+        if not done:
+            return
+        start = min(o.submitted_at for o in done) - timedelta(days=1)  # fill history uses US dates
+        end = self.clock.now() + timedelta(days=1)
+        ccnl = api.inquire_ccnl(acct, prod, start.strftime('%Y%m%d'), end.strftime('%Y%m%d'))
+        if ccnl is None:
+            return
+        history = {normalize_order_no(row.get('odno')): row for row in ccnl.to_dict('records')}
+        for order in done:
+            row = history.get(order.order_no)
+            if row is not None:
+                self._apply_rest_row(order, row, resting=False)
+
+    def _apply_rest_row(self, order: TrackedOrder, row: Dict, resting: bool):
+        def number(key):
+            try:
+                return float(row.get(key) or 0)
+            except (TypeError, ValueError):
+                return 0.0
+
+        cum_qty = int(number('ft_ccld_qty'))
+        avg_price = number('ft_ccld_unpr3')
+        status = str(row.get('prcs_stat_name') or '')
+        state, reason = None, ''
+        if not resting and cum_qty < order.qty:
+            if str(row.get('rjct_rson') or '').strip() or '거부' in status:
+                state, reason = REJECTED, str(row.get('rjct_rson_name') or row.get('rjct_rson') or status)
+            elif '취소' in status or number('nccs_qty') == 0:
+                state, reason = CANCELLED, status or 'cancelled'
+        with self._lock:
+            self._apply(order, 'rest', state=state, reason=reason, cum_qty=cum_qty, avg_price=avg_price)
+
+    # ------------------------------------------------------------------
+    # Websocket
+    # ------------------------------------------------------------------
+
+    def start(self) -> 'OrderTracker':
+        """Start the notice websocket in a background thread (REST fallback only if unavailable)"""
+        if not getattr(self.trenv, 'my_url_ws', '') or not getattr(self.trenv, 'my_htsid', ''):
+            logger.warning("[TRACKER] No websocket URL / HTS ID configured, using REST polling")
+            return self
+        if ws_connect is None:
+            logger.warning("[TRACKER] websockets not installed, using REST polling")
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_ws, name='order-tracker-ws', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._callbacks.shutdown(wait=False)
+
+    def _run_ws(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self._ws_main())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.connected = False
+            self._loop.close()
+
+    async def _ws_main(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                approval_key = await asyncio.to_thread(ka.get_approval_key, self.trenv)
+                async with ws_connect(self.trenv.my_url_ws) as ws:
+                    await ws.send(json.dumps({
+                        'header': {'approval_key': approval_key, 'custtype': 'P', 'tr_type': '1',
+                                   'content-type': 'utf-8'},
+                        'body': {'input': {'tr_id': CCNL_TR_ID, 'tr_key': self.trenv.my_htsid}}
+                    }))
+                    async for raw in ws:
+                        await self._on_ws_message(ws, raw)
+                        backoff = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[TRACKER] Websocket disconnected: {e} (retry in {backoff}s, REST fallback active)")
+            self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _on_ws_message(self, ws, raw):
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        if raw[:1] in ('0', '1'):
+            # Data frame: encrypted|tr_id|record count|fields joined by ^
+            parts = raw.split('|', 3)
+            if len(parts) < 4 or parts[1] not in (CCNL_TR_ID, 'H0GSCNI9'):
+                return
+            data = parts[3]
+            if parts[0] == '1':
+                data = self._decrypt(data)
+                if data is None:
+                    return
+            fields = data.split('^')
+            width = len(CCNL_COLUMNS)
+            for i in range(0, len(fields) - width + 1, width):
+                self.stats['ws_notices'] += 1
+                self.on_notice(dict(zip(CCNL_COLUMNS, fields[i:i + width])), source='ws')
+            return
+
+        message = json.loads(raw)
+        header, body = message.get('header', {}), message.get('body', {})
+        if header.get('tr_id') == 'PINGPONG':
+            await ws.send(raw)  # KIS drops sessions that do not echo the ping
+            return
+        if header.get('tr_id') != CCNL_TR_ID:
+            return
+        if body.get('rt_cd') != '0':
+            logger.error(f"[TRACKER] Notice subscription failed: {body.get('msg_cd')} {body.get('msg1')}")
+            return
+        output = body.get('output') or {}
+        if output.get('key'):
+            self._cipher_key = (output['key'], output['iv'])
+        if header.get('encrypt') == 'Y' and AES is None:
+            logger.warning("[TRACKER] Notices are encrypted and pycryptodome is missing, using REST polling")
+            return
+        self.connected = True
+        logger.info(f"[TRACKER] Subscribed to execution notices ({body.get('msg1')})")
+
+    def _decrypt(self, data: str) -> Optional[str]:
+        if AES is None or self._cipher_key is None:
+            return None
+        key, iv = self._cipher_key
+        try:
+            cipher = AES.new(key.encode('utf-8'), AES.MODE_CBC, iv.encode('utf-8'))
+            return unpad(cipher.decrypt(base64.b64decode(data)), AES.block_size).decode('utf-8')
+        except (ValueError, KeyError) as e:
+            logger.warning(f"[TRACKER] Notice decrypt failed: {e}")
+            return None
@@ -6,11 +6,25 @@ import logging
 from typing import Dict, List, Tuple
 from datetime import datetime
 
+import numpy as np
+
+from infinite_buying_bot.core.position_book import PositionBook
+from infinite_buying_bot.core.rebalance_solver import DEFAULT_FEE_RATE, RebalanceSolution, solve_rebalance, solve_single
+
 logger = logging.getLogger(__name__)
 
+# Minimum allocation to preserve when selling (JEPI/MAGS are never sold below 20%)
+MIN_ALLOCATION = {'SHV': 0.0, 'JEPI': 0.20, 'MAGS': 0.20}
+
 
 class PortfolioManager:
-    """Manages multi-asset portfolio allocation and tracking"""
+    """
+    Manages multi-asset portfolio allocation and tracking
+
+    [NEW] Positions live in a PositionBook (NumPy arrays aligned to a symbol index), so the
+    universe is whatever the target allocation names and the allocation math runs once per
+    price/position update. `positions` and `target_allocation` keep their dict interface.
+    """
     
     def __init__(self, initial_capital: float = 0.0, aggressive_etf: str = 'TQQQ'):
         """
@@ -24,24 +38,49 @@ class PortfolioManager:
         self.aggressive_etf = aggressive_etf
         
         # Target allocation (percentages) - 4종목 구성
+        # Current positions (will be updated from Trader) - one row per symbol in the universe
+        self.book = PositionBook(cash=initial_capital)
         self.target_allocation = {
             'TQQQ': 0.10,   # 10% - Aggressive (3x leverage)
             'MAGS': 0.20,   # 20% - Magnificent 7
             'SHV': 0.50,    # 50% - Cash buffer
             'JEPI': 0.20    # 20% - Income generation
         }
+        self.min_allocation = dict(MIN_ALLOCATION)
+        self.fee_rate = DEFAULT_FEE_RATE
         
-        # Current positions (will be updated from Trader) - DYNAMIC
-        self.positions = {
-            'TQQQ': {'quantity': 0, 'avg_price': 0.0, 'current_price': 0.0},
-            'MAGS': {'quantity': 0, 'avg_price': 0.0, 'current_price': 0.0},
-            'SHV': {'quantity': 0, 'avg_price': 0.0, 'current_price': 0.0},
-            'JEPI': {'quantity': 0, 'avg_price': 0.0, 'current_price': 0.0}
-        }
-        
-        self.cash = initial_capital
-        
-        logger.info(f"Portfolio Manager initialized with {initial_capital:,.0f} KRW, 4-asset strategy")
+        logger.info(f"Portfolio Manager initialized with {initial_capital:,.0f} KRW, {len(self.book)}-asset strategy")
+    
+    @property
+    def target_allocation(self) -> Dict[str, float]:
+        return self._target_allocation
+    
+    @target_allocation.setter
+    def target_allocation(self, allocation: Dict[str, float]):
+        # New symbols join the universe; symbols dropped from the target keep their row
+        self._target_allocation = dict(allocation)
+        self.book.set_targets(self._target_allocation)
+    
+    @property
+    def positions(self) -> Dict[str, Dict]:
+        """{symbol: {quantity, avg_price, current_price}} for every symbol in the universe"""
+        return self.book.to_dict()
+    
+    @positions.setter
+    def positions(self, positions: Dict[str, Dict]):
+        self.book.update(positions, add_new=True)
+    
+    @property
+    def cash(self) -> float:
+        return self.book.cash
+    
+    @cash.setter
+    def cash(self, cash: float):
+        self.book.set_cash(cash)
+    
+    def add_symbols(self, symbols: List[str]):
+        """Track symbols without a target (their value still counts toward the total)"""
+        self.book.add_symbols(symbols)
     
     def update_positions(self, positions: Dict[str, Dict]):
         """
@@ -49,12 +88,16 @@ class PortfolioManager:
         
         Args:
             positions: Dict of {symbol: {quantity, avg_price, current_price}}
+                       (symbols outside the universe are ignored)
         """
-        for symbol in ['TQQQ', 'MAGS', 'SHV', 'JEPI']:
-            if symbol in positions:
-                self.positions[symbol] = positions[symbol]
+        self.book.update(positions)
         
-        logger.debug(f"Positions updated: {self.positions}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Positions updated: {self.positions}")
+    
+    def update_prices(self, prices: Dict[str, float]):
+        """Update current prices only"""
+        self.book.set_prices(prices)
     
     def update_cash(self, cash: float):
         """Update current cash balance"""
@@ -62,11 +105,7 @@ class PortfolioManager:
     
     def get_total_value(self) -> float:
         """Calculate total portfolio value"""
-        stock_value = sum(
-            pos['quantity'] * pos['current_price']
-            for pos in self.positions.values()
-        )
-        return self.cash + stock_value
+        return self.book.total_value
     
     def get_current_allocation(self) -> Dict[str, float]:
         """
@@ -75,16 +114,12 @@ class PortfolioManager:
         Returns:
             Dict of {symbol: percentage}
         """
-        total_value = self.get_total_value()
-        if total_value == 0:
+        book = self.book
+        if book.total_value == 0:
             return {symbol: 0.0 for symbol in self.target_allocation}
         
-        allocation = {}
-        for symbol, pos in self.positions.items():
-            value = pos['quantity'] * pos['current_price']
-            allocation[symbol] = value / total_value
-        
-        allocation['CASH'] = self.cash / total_value
+        allocation = dict(zip(book.symbols, book.weights.tolist()))
+        allocation['CASH'] = book.cash_weight
         
         return allocation
     
@@ -95,14 +130,9 @@ class PortfolioManager:
         Returns:
             Dict of {symbol: drift_percentage}
         """
-        current = self.get_current_allocation()
-        drift = {}
-        
-        for symbol, target in self.target_allocation.items():
-            current_pct = current.get(symbol, 0.0)
-            drift[symbol] = current_pct - target
-        
-        return drift
+        book = self.book
+        drift = book.drift
+        return {symbol: float(drift[book.index[symbol]]) for symbol in self.target_allocation}
     
     def needs_rebalancing(self, threshold: float = 0.05) -> bool:
         """
@@ -114,63 +144,79 @@ class PortfolioManager:
         Returns:
             True if any asset drifted more than threshold
         """
-        drift = self.get_allocation_drift()
-        return any(abs(d) > threshold for d in drift.values())
+        book = self.book
+        return bool(np.any(np.abs(book.drift[book.has_target]) > threshold))
+    
+    def solve_rebalance(self, lower=None, upper=None, budget=None, track_cash: bool = True) -> RebalanceSolution:
+        """
+        Whole-share rebalance of the book toward the target allocation (see rebalance_solver)
+        
+        Args:
+            lower, upper: Share bounds per book row (default: free, never below min_allocation)
+            budget: Max net cash spent (default: current cash)
+            track_cash: Count leftover cash as tracking error
+        """
+        book = self.book
+        return solve_rebalance(
+            book.symbols, book.price, book.qty, book.cash, book.target,
+            lower=lower, upper=upper, min_weights=self._min_weights(),
+            fee_rate=self.fee_rate, budget=budget, track_cash=track_cash
+        )
+    
+    def _min_weights(self) -> np.ndarray:
+        floors = np.zeros(len(self.book))
+        rows = self.book.rows(self.min_allocation)
+        floors[rows] = [self.min_allocation[self.book.symbols[i]] for i in rows]
+        return floors
     
     def calculate_rebalancing_trades(self) -> List[Dict]:
         """
         Calculate trades needed to rebalance to target allocation
         
+        [NEW] Quantities come from the whole-share solver in one pass: sell legs fund the buy
+        legs, fees and min_allocation floors included, so no residual drift is left from
+        truncating each symbol's amount separately.
+        
         Returns:
-            List of {symbol, action (buy/sell), amount_usd}
+            List of {symbol, action (buy/sell), qty, amount_krw (USD), reason}, sells first
         """
-        total_value = self.get_total_value()
-        current_alloc = self.get_current_allocation()
-        trades = []
+        book = self.book
+        weights, drift, profits = book.weights, book.drift, book.profit_pct
+        
+        # Only rows past the 1% minimum may trade, and only toward their target
+        lower, upper = book.qty.copy(), book.qty.copy()
+        rows = book.rows(self.target_allocation)
+        for i in rows[np.abs(drift[rows]) > 0.01]:
+            symbol = book.symbols[i]
+            profit_pct = float(profits[i])
+            if drift[i] < 0:
+                # Need to buy - no restrictions
+                upper[i] = np.inf
+            # [LOSS PROTECTION] Only sell if:
+            # 1. In profit (profit_pct > 0)
+            # 2. Profit >= 10%
+            elif profit_pct >= 10:
+                lower[i] = 0.0
+                logger.info(f"[SELL] {symbol}: profit {profit_pct:.1f}% >= 10%, selling excess")
+            else:
+                # Skip sell - loss protection active
+                logger.info(f"[SKIP SELL] {symbol}: profit {profit_pct:.1f}% < 10%, protecting position")
         
-        for symbol, target_pct in self.target_allocation.items():
-            current_pct = current_alloc.get(symbol, 0.0)
-            drift = current_pct - target_pct
-            
-            if abs(drift) > 0.01:  # 1% minimum
-                target_value = total_value * target_pct
-                current_value = self.positions[symbol]['quantity'] * self.positions[symbol]['current_price']
-                diff_value = target_value - current_value
-                
-                if diff_value > 0:
-                    # Need to buy - no restrictions
-                    trades.append({
-                        'symbol': symbol,
-                        'action': 'buy',
-                        'amount_krw': diff_value,
-                        'reason': f'Rebalance: {current_pct:.1%} → {target_pct:.1%}'
-                    })
-                else:
-                    # Need to sell - check profit protection
-                    pos = self.positions[symbol]
-                    avg_price = pos['avg_price']
-                    current_price = pos['current_price']
-                    
-                    # Calculate profit percentage
-                    if avg_price > 0:
-                        profit_pct = ((current_price - avg_price) / avg_price) * 100
-                    else:
-                        profit_pct = 0
-                    
-                    # [LOSS PROTECTION] Only sell if:
-                    # 1. In profit (profit_pct > 0)
-                    # 2. Profit >= 10%
-                    if profit_pct >= 10:
-                        trades.append({
-                            'symbol': symbol,
-                            'action': 'sell',
-                            'amount_krw': abs(diff_value),  # Only excess portion
-                            'reason': f'Profit taking ({profit_pct:.1f}%): {current_pct:.1%} → {target_pct:.1%}'
-                        })
-                        logger.info(f"[SELL] {symbol}: profit {profit_pct:.1f}% >= 10%, selling excess")
-                    else:
-                        # Skip sell - loss protection active
-                        logger.info(f"[SKIP SELL] {symbol}: profit {profit_pct:.1f}% < 10%, protecting position")
+        trades = []
+        for order in self.solve_rebalance(lower=lower, upper=upper).orders():
+            i = book.index[order['symbol']]
+            current_pct, target_pct = float(weights[i]), float(book.target[i])
+            if order['type'] == 'buy':
+                reason = f'Rebalance: {current_pct:.1%} → {target_pct:.1%}'
+            else:
+                reason = f'Profit taking ({profits[i]:.1f}%): {current_pct:.1%} → {target_pct:.1%}'
+            trades.append({
+                'symbol': order['symbol'],
+                'action': order['type'],
+                'qty': order['qty'],
+                'amount_krw': order['amount_usd'],
+                'reason': reason
+            })
         
         return trades
     
@@ -219,38 +265,31 @@ class PortfolioManager:
             List of orders (usually 1 items): [{symbol, qty, price, type='buy'}]
         """
         orders = []
-        total_value = self.get_total_value()
-        current_alloc = self.get_current_allocation()
+        book = self.book
         
         # Determine which symbols to process
         target_filter = targets if targets and 'all' not in targets else None
         
-        for symbol, target_pct in self.target_allocation.items():
-            if target_pct <= 0: continue
-            
-            # Apply target filter if specified
-            if target_filter and symbol not in target_filter:
-                logger.debug(f"[SPLIT BUY] {symbol} skipped (not in targets: {target_filter})")
-                continue
-            
-            # Get current data from internal state (must be updated via update_positions first)
-            pos = self.positions.get(symbol, {'quantity': 0, 'current_price': 0.0})
-            price = pos['current_price']
-            if price <= 0: continue
-            
-            current_pct = current_alloc.get(symbol, 0.0)
-            target_pct_100 = target_pct * 100 if target_pct <= 1 else target_pct
-            current_pct_100 = current_pct * 100
-            
-            # Custom Logic: If Deficit > 1% check, propose buying 1 share
-            if target_pct_100 - current_pct_100 > 1.0:
-                 orders.append({
-                     'symbol': symbol,
-                     'qty': 1,
-                     'price': price,
-                     'type': 'buy',
-                     'reason': f"Gradual Split: Deficit {target_pct_100 - current_pct_100:.1f}%"
-                 })
+        # Uses internal state (must be updated via update_positions first)
+        target_pct_100 = np.where(book.target <= 1, book.target * 100, book.target)
+        deficit = target_pct_100 - book.weights * 100
+        rows = book.rows(self.target_allocation)
+        rows = rows[(book.target[rows] > 0) & (book.price[rows] > 0)]
+        if target_filter:
+            in_filter = np.isin(np.array(book.symbols)[rows], target_filter)
+            for i in rows[~in_filter]:
+                logger.debug(f"[SPLIT BUY] {book.symbols[i]} skipped (not in targets: {target_filter})")
+            rows = rows[in_filter]
+        
+        # Custom Logic: If Deficit > 1% check, propose buying 1 share
+        for i in rows[deficit[rows] > 1.0]:
+            orders.append({
+                'symbol': book.symbols[i],
+                'qty': 1,
+                'price': float(book.price[i]),
+                'type': 'buy',
+                'reason': f"Gradual Split: Deficit {deficit[i]:.1f}%"
+            })
         
         logger.info(f"[SPLIT BUY] Filter={targets}, Found {len(orders)} orders")
         return orders
@@ -263,7 +302,7 @@ class PortfolioManager:
              List of orders
         """
         orders = []
-        shv_pos = self.positions.get('SHV', {})
+        shv_pos = self.book.row('SHV') or {}
         shv_qty = shv_pos.get('quantity', 0)
         
         if shv_qty > 0:
@@ -312,28 +351,28 @@ class PortfolioManager:
             return {'error': f'{symbol} has 0% target allocation'}
         
         # Get current position
-        pos = self.positions.get(symbol, {'quantity': 0, 'current_price': 0.0, 'avg_price': 0.0})
-        current_qty = pos.get('quantity', 0)
-        current_price = pos.get('current_price', 0.0)
+        pos = self.book.row(symbol)
+        current_qty = pos['quantity']
+        current_price = pos['current_price']
+        avg_price = pos['avg_price']
         
         if current_price <= 0:
             logger.warning(f"[SINGLE REBALANCE] {symbol} price not available")
             return {'error': f'{symbol} price not available'}
         
         # Calculate values
-        total_value = self.get_total_value()
-        current_value = current_qty * current_price
-        current_pct = (current_value / total_value) if total_value > 0 else 0
-        target_value = total_value * target_pct
+        i = self.book.index[symbol]
+        current_pct = float(self.book.weights[i])
+        diff_value = float(self.book.trade_values[i])
         
-        # Calculate difference
-        diff_value = target_value - current_value
-        diff_qty = int(diff_value / current_price)
+        # [NEW] Whole-share quantity from the solver (fees and min_allocation floor included)
+        solution = self._solve_single(symbol, budget=np.inf)
+        diff_qty = int(solution.delta[i])
         
         logger.info(f"[SINGLE REBALANCE] {symbol}: Current {current_pct*100:.1f}% → Target {target_pct*100:.1f}%")
         logger.info(f"[SINGLE REBALANCE] {symbol}: Diff ${diff_value:.2f} = {diff_qty} shares @ ${current_price:.2f}")
         
-        if abs(diff_qty) < 1:
+        if diff_qty == 0:
             logger.info(f"[SINGLE REBALANCE] {symbol} already at target (diff < 1 share)")
             return {
                 'symbol': symbol,
@@ -348,11 +387,11 @@ class PortfolioManager:
         
         if diff_qty > 0:
             # Need to buy
-            # Check cash availability
-            required_cash = diff_qty * current_price
+            # Check cash availability (commission included)
+            required_cash = diff_qty * current_price + solution.fees
             if cash_available > 0 and required_cash > cash_available:
                 # Adjust quantity to available cash
-                diff_qty = int(cash_available / current_price)
+                diff_qty = int(self._solve_single(symbol, budget=cash_available).delta[i])
                 if diff_qty < 1:
                     return {'error': f'Insufficient cash. Need ${required_cash:.2f}, have ${cash_available:.2f}'}
                 logger.info(f"[SINGLE REBALANCE] Adjusted qty to {diff_qty} due to cash limit")
@@ -400,4 +439,13 @@ class PortfolioManager:
                     'target_pct': target_pct * 100,
                     'protected': True  # Flag for UI
                 }
+    
+    def _solve_single(self, symbol: str, budget: float) -> RebalanceSolution:
+        """Solver run where only `symbol` trades; leftover cash is not counted as drift"""
+        book = self.book
+        return solve_single(
+            book.symbols, book.price, book.qty, book.cash, book.target, symbol,
+            min_weights=self._min_weights(), fee_rate=self.fee_rate,
+            budget=budget, track_cash=False
+        )
 
@@ -0,0 +1,211 @@
+"""
+Position Book - NumPy-backed positions for an arbitrary symbol universe
+Quantities, average prices, last prices and target weights live in arrays aligned to one
+symbol index, so allocation, drift and rebalance trade values come out of a single pass.
+"""
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def compute_allocation(qty: np.ndarray, price: np.ndarray, cash, target: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Allocation math for one account (1-D arrays) or many (accounts x symbols, cash per row).
+
+    Args:
+        qty, price: Shares held and last price per symbol
+        cash: Cash balance (scalar, or one per account)
+        target: Target weight per symbol (0 for symbols without a target)
+
+    Returns:
+        Dict of arrays:
+            values: market value per symbol
+            total: cash + sum(values) (per account)
+            weights: values / total (0 where total is 0)
+            cash_weight: cash / total
+            drift: weights - target
+            trade_values: target * total - values (positive = buy)
+    """
+    values = qty * price
+    cash = np.asarray(cash, dtype=float)
+    total = cash + values.sum(axis=-1)
+    safe_total = np.where(total > 0, total, 1.0)
+    scale = np.where(total > 0, 1.0 / safe_total, 0.0)
+    weights = values * scale[..., None] if values.ndim > 1 else values * scale
+    return {
+        'values': values,
+        'total': total,
+        'weights': weights,
+        'cash_weight': cash * scale,
+        'drift': weights - target,
+        'trade_values': target * (total[..., None] if values.ndim > 1 else total) - values,
+    }
+
+
+class PositionBook:
+    """
+    Positions of one account in arrays indexed by symbol.
+
+    Symbols are appended on first use and never removed, so row indices stay stable.
+    Every mutation bumps `version`; derived arrays are computed once per version.
+
+    Usage:
+        book = PositionBook(['TQQQ', 'SHV'], targets={'TQQQ': 0.3, 'SHV': 0.7})
+        book.update({'TQQQ': {'quantity': 10, 'avg_price': 50.0, 'current_price': 55.0}})
+        book.set_cash(1000.0)
+        book.drift          # array aligned with book.symbols
+    """
+
+    def __init__(self, symbols: Iterable[str] = (), targets: Optional[Dict[str, float]] = None, cash: float = 0.0):
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.qty = np.zeros(0)
+        self.avg = np.zeros(0)
+        self.price = np.zeros(0)
+        self.target = np.zeros(0)
+        self.has_target = np.zeros(0, dtype=bool)
+        self.cash = float(cash)
+        self.version = 0
+        self._cache = None
+        self._cache_version = -1
+
+        self.add_symbols(symbols)
+        if targets:
+            self.set_targets(targets)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add_symbols(self, symbols: Iterable[str]) -> np.ndarray:
+        """Append unknown symbols; returns the row index of every symbol given"""
+        symbols = list(symbols)
+        new = [s for s in dict.fromkeys(symbols) if s not in self.index]
+        if new:
+            for symbol in new:
+                self.index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            grow = len(new)
+            self.qty = np.concatenate([self.qty, np.zeros(grow)])
+            self.avg = np.concatenate([self.avg, np.zeros(grow)])
+            self.price = np.concatenate([self.price, np.zeros(grow)])
+            self.target = np.concatenate([self.target, np.zeros(grow)])
+            self.has_target = np.concatenate([self.has_target, np.zeros(grow, dtype=bool)])
+            self._touch()
+        return np.array([self.index[s] for s in symbols], dtype=int)
+
+    def rows(self, symbols: Iterable[str]) -> np.ndarray:
+        """Row indices of known symbols, in the order given"""
+        return np.array([self.index[s] for s in symbols if s in self.index], dtype=int)
+
+    def update(self, positions: Dict[str, Dict], add_new: bool = False):
+        """
+        Overwrite rows from {symbol: {quantity, avg_price, current_price}}.
+
+        Missing keys count as 0. Symbols outside the universe are ignored unless add_new.
+        """
+        if add_new:
+            self.add_symbols(positions)
+        rows = [(self.index[s], p) for s, p in positions.items() if s in self.index]
+        if not rows:
+            return
+        idx = np.fromiter((i for i, _ in rows), dtype=int, count=len(rows))
+        self.qty[idx] = [p.get('quantity', 0) or 0 for _, p in rows]
+        self.avg[idx] = [p.get('avg_price', 0.0) or 0.0 for _, p in rows]
+        self.price[idx] = [p.get('current_price', 0.0) or 0.0 for _, p in rows]
+        self._touch()
+
+    def set_prices(self, prices: Dict[str, float]):
+        """Update last prices only (e.g. from a quote snapshot)"""
+        rows = [(self.index[s], p) for s, p in prices.items() if s in self.index]
+        if rows:
+            idx = np.fromiter((i for i, _ in rows), dtype=int, count=len(rows))
+            self.price[idx] = [p for _, p in rows]
+            self._touch()
+
+    def set_cash(self, cash: float):
+        self.cash = float(cash)
+        self._touch()
+
+    def set_targets(self, targets: Dict[str, float]):
+        """Replace target weights; symbols not listed get no target"""
+        self.add_symbols(targets)
+        self.target[:] = 0.0
+        self.has_target[:] = False
+        idx = np.array([self.index[s] for s in targets], dtype=int)
+        if len(idx):
+            self.target[idx] = list(targets.values())
+            self.has_target[idx] = True
+        self._touch()
+
+    def _touch(self):
+        self.version += 1
+
+    # ------------------------------------------------------------------
+    # Derived (cached per version)
+    # ------------------------------------------------------------------
+
+    def _derived(self) -> Dict[str, np.ndarray]:
+        if self._cache_version != self.version:
+            self._cache = compute_allocation(self.qty, self.price, self.cash, self.target)
+            self._cache_version = self.version
+        return self._cache
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._derived()['values']
+
+    @property
+    def total_value(self) -> float:
+        return float(self._derived()['total'])
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._derived()['weights']
+
+    @property
+    def cash_weight(self) -> float:
+        return float(self._derived()['cash_weight'])
+
+    @property
+    def drift(self) -> np.ndarray:
+        return self._derived()['drift']
+
+    @property
+    def trade_values(self) -> np.ndarray:
+        """USD to buy (+) or sell (-) per symbol to reach the target weights"""
+        return self._derived()['trade_values']
+
+    @property
+    def profit_pct(self) -> np.ndarray:
+        """Unrealized profit per symbol in % of the average price (0 without a cost basis)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.avg > 0, (self.price - self.avg) / self.avg * 100, 0.0)
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def row(self, symbol: str) -> Optional[Dict]:
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        qty = self.qty[i]
+        return {
+            'quantity': int(qty) if float(qty).is_integer() else float(qty),
+            'avg_price': float(self.avg[i]),
+            'current_price': float(self.price[i])
+        }
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """{symbol: {quantity, avg_price, current_price}} (the PortfolioManager.positions layout)"""
+        return {symbol: self.row(symbol) for symbol in self.symbols}
@@ -0,0 +1,299 @@
+"""
+Rebalance Solver - whole-share rebalancing with minimum tracking error
+Finds the integer share vector closest to the target weights in one shot, subject to cash,
+per-symbol bounds (loss protection, buy/sell only), minimum-allocation floors and fees.
+"""
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEE_RATE = 0.0025  # KIS overseas stock commission (0.25%)
+SWAP_CANDIDATES = 32       # legs per side considered for sell-one/buy-one swaps
+ESCAPE_CANDIDATES = 8      # first legs per side tried by the escape step
+
+
+@dataclass
+class RebalanceSolution:
+    """Result of solve_rebalance(); arrays are aligned with `symbols`"""
+    symbols: List[str]
+    prices: np.ndarray
+    current_qty: np.ndarray
+    qty: np.ndarray                 # target whole-share quantities
+    cash_after: float
+    fees: float
+    tracking_error: float           # sqrt(sum of squared weight errors), cash included
+    weights: np.ndarray             # weights after the trades
+    iterations: int = 0
+
+    @property
+    def delta(self) -> np.ndarray:
+        return self.qty - self.current_qty
+
+    def orders(self) -> List[Dict]:
+        """Sell legs first (they fund the buys), then buys; largest notional first within a side"""
+        delta = self.delta
+        out = []
+        for side, rows in (('sell', np.flatnonzero(delta < 0)), ('buy', np.flatnonzero(delta > 0))):
+            rows = rows[np.argsort(-np.abs(delta[rows]) * self.prices[rows], kind='stable')]
+            for i in rows:
+                qty = int(abs(delta[i]))
+                out.append({
+                    'symbol': self.symbols[i],
+                    'type': side,
+                    'qty': qty,
+                    'price': float(self.prices[i]),
+                    'amount_usd': qty * float(self.prices[i])
+                })
+        return out
+
+
+def solve_rebalance(symbols: List[str], prices, qty, cash: float, targets, *,
+                    lower=None, upper=None, min_weights=None, fee_rate: float = DEFAULT_FEE_RATE,
+                    min_fee: float = 0.0, budget: Optional[float] = None, cash_target: Optional[float] = None,
+                    track_cash: bool = True, max_iter: Optional[int] = None) -> RebalanceSolution:
+    """
+    Whole-share quantities minimizing sum((w_i - t_i)^2) (+ the cash weight error).
+
+    Weights are measured against the pre-trade total value V = cash + sum(qty * price), so
+    the objective is a separable quadratic plus one cash term. The solver starts from the
+    continuous optimum (box constraints and budget included, fees ignored) rounded down,
+    repairs cash feasibility, then runs a steepest-descent local search over +1 / -1 share
+    moves and sell-one/buy-one swaps, each iteration evaluated with NumPy, and finally tries
+    one-share trades offset by several opposite ones to leave local optima the swaps cannot.
+    That ends on the optimum or within a share or two of it, in about one iteration per
+    share traded.
+
+    Args:
+        symbols, prices, qty: Universe, last prices and current shares (aligned)
+        cash: Cash on hand
+        targets: Target weight per symbol (sum <= 1; the rest is the cash target)
+        lower, upper: Per-symbol share bounds (e.g. lower = qty forbids selling)
+        min_weights: Minimum allocation floors; a position is not sold below its floor
+                     (one already under it is held, not topped up)
+        fee_rate, min_fee: Commission per order = max(notional * fee_rate, min_fee)
+        budget: Max net cash spent (default: cash; np.inf = unconstrained)
+        cash_target: Target cash weight (default: 1 - sum(targets))
+        track_cash: Include the cash weight error in the objective
+        max_iter: Local-search iteration cap (default: 20 * n + 100)
+    """
+    p = np.asarray(prices, dtype=float)
+    q0 = np.asarray(qty, dtype=float)
+    t = np.asarray(targets, dtype=float)
+    n = len(p)
+
+    value = q0 * p
+    V = float(cash + value.sum())
+    budget = float(cash if budget is None else budget)
+    tc = max(0.0, 1.0 - float(t.sum())) if cash_target is None else float(cash_target)
+    cash_w = 1.0 if track_cash else 0.0
+
+    lb = np.zeros(n) if lower is None else np.asarray(lower, dtype=float).copy()
+    ub = np.full(n, np.inf) if upper is None else np.asarray(upper, dtype=float).copy()
+    no_price = ~(p > 0)
+    lb[no_price] = ub[no_price] = q0[no_price]
+    if min_weights is not None and V > 0:
+        floor_qty = np.ceil(np.asarray(min_weights, dtype=float) * V / np.where(no_price, 1.0, p) - 1e-9)
+        lb = np.maximum(lb, np.minimum(q0, floor_qty))
+    ub = np.maximum(ub, lb)
+
+    if V <= 0 or n == 0:
+        return _solution(symbols, p, q0, q0.copy(), cash, 0.0, V, t, tc, cash_w, 0)
+
+    safe_p = np.where(no_price, 1.0, p)
+
+    def fees_of(q):
+        notional = np.abs(q - q0) * p
+        return np.where(notional > 0, np.maximum(notional * fee_rate, min_fee), 0.0)
+
+    def spent_of(q, fee):
+        return float(((q - q0) * p).sum() + fee.sum())
+
+    # 1. Continuous optimum (fees ignored), rounded down into the bounds
+    q = np.clip(np.floor(_continuous_weights(t, lb * p / V, ub * p / V, value.sum() / V,
+                                             (cash - budget) / V, tc, track_cash) * V / safe_p + 1e-9), lb, ub)
+    q[no_price] = q0[no_price]
+
+    fee = fees_of(q)
+    spent = spent_of(q, fee)
+
+    # 2. Repair: drop buy shares (largest price first) until the budget holds
+    iterations = 0
+    while spent > budget + 1e-9:
+        removable = (q > lb) & (q > q0)
+        if not removable.any():
+            removable = q > lb
+            if not removable.any():
+                break
+        i = int(np.argmax(np.where(removable, p, -np.inf)))
+        q[i] -= 1
+        fee = fees_of(q)
+        spent = spent_of(q, fee)
+        iterations += 1
+
+    # 3. Local search over single-share moves and swaps
+    limit = max_iter if max_iter is not None else 20 * n + 100
+
+    def descend(q, iterations, hold=None, direction=None):
+        """Steepest descent from q; with `direction`, only that step on symbols other than `hold`"""
+        fee = fees_of(q)
+        spent = spent_of(q, fee)
+        w = q * p / V
+        c = (cash - spent) / V
+        while iterations < limit:
+            moves = []
+            for step in ((direction,) if direction else (1.0, -1.0)):
+                nq = q + step
+                ok = (nq >= lb) & (nq <= ub) & ~no_price
+                if hold is not None:
+                    ok[hold] = False
+                new_notional = np.abs(nq - q0) * p
+                new_fee = np.where(new_notional > 0, np.maximum(new_notional * fee_rate, min_fee), 0.0)
+                d_spent = step * p + (new_fee - fee)
+                d_obj = (w + step * p / V - t) ** 2 - (w - t) ** 2
+                moves.append((step, ok, d_spent, d_obj))
+
+            # Over budget (an escape trial bought first): take the best move that spends less
+            over = spent > budget + 1e-9
+            c_err = c - tc
+            best = (np.inf if over else 0.0, None)
+            for step, ok, d_spent, d_obj in moves:
+                feasible = ok & ((d_spent < 0) if over else (spent + d_spent <= budget + 1e-9))
+                gain = d_obj + cash_w * ((c_err - d_spent / V) ** 2 - c_err ** 2)
+                gain = np.where(feasible, gain, np.inf)
+                i = int(np.argmin(gain))
+                if gain[i] < best[0] - (0.0 if over else 1e-15):
+                    best = (gain[i], ((i, step),))
+
+            # Swap: sell one share of i, buy one of j (needed when cash blocks a plain buy),
+            # over the SWAP_CANDIDATES best legs per side
+            if direction is None:
+                (_, ok_up, ds_up, do_up), (_, ok_dn, ds_dn, do_dn) = moves
+                up = _best_rows(np.where(ok_up, do_up, np.inf))
+                dn = _best_rows(np.where(ok_dn, do_dn, np.inf))
+                pair_spent = ds_dn[dn][:, None] + ds_up[up][None, :]
+                pair_ok = (spent + pair_spent <= budget + 1e-9) & (dn[:, None] != up[None, :])
+                pair_ok &= ok_dn[dn][:, None] & ok_up[up][None, :]
+                if pair_ok.any():
+                    pair_gain = do_dn[dn][:, None] + do_up[up][None, :] + cash_w * ((c_err - pair_spent / V) ** 2 - c_err ** 2)
+                    pair_gain = np.where(pair_ok, pair_gain, np.inf)
+                    a, b = np.unravel_index(int(np.argmin(pair_gain)), pair_gain.shape)
+                    if pair_gain[a, b] < best[0] - 1e-15:
+                        best = (pair_gain[a, b], ((int(dn[a]), -1.0), (int(up[b]), 1.0)))
+
+            if best[1] is None:
+                break
+            for i, step in best[1]:
+                q[i] += step
+            fee = fees_of(q)
+            spent = spent_of(q, fee)
+            w = q * p / V
+            c = (cash - spent) / V
+            iterations += 1
+        return q, fee, spent, iterations
+
+    def objective(q, spent):
+        return float(((q * p / V - t) ** 2).sum() + cash_w * ((cash - spent) / V - tc) ** 2)
+
+    q, fee, spent, iterations = descend(q, iterations)
+
+    # 4. Escape: sell one share and refill with buys only, or buy one and fund it with sells
+    #    only. Reaches one-against-several optima that no single move or swap improves toward
+    #    (e.g. when min_fee makes each extra leg costly).
+    while iterations < limit:
+        current = objective(q, spent)
+        found = None
+        for step in (-1.0, 1.0):
+            rows = np.flatnonzero((q + step >= lb) & (q + step <= ub) & ~no_price)
+            # Sells from the most overweight symbols, buys into the most underweight
+            for i in rows[_best_rows(step * (q[rows] * p[rows] / V - t[rows]), ESCAPE_CANDIDATES)]:
+                trial = q.copy()
+                trial[i] += step
+                trial, _, trial_spent, _ = descend(trial, iterations, hold=i, direction=-step)
+                if trial_spent <= budget + 1e-9 and objective(trial, trial_spent) < current - 1e-15:
+                    current = objective(trial, trial_spent)
+                    found = trial
+        if found is None:
+            break
+        q, fee, spent, iterations = descend(found, iterations + 1)
+
+    return _solution(symbols, p, q0, q, cash - spent, float(fee.sum()), V, t, tc, cash_w, iterations)
+
+
+def _best_rows(scores: np.ndarray, k: int = SWAP_CANDIDATES) -> np.ndarray:
+    """Indices of the k lowest scores"""
+    if len(scores) <= k:
+        return np.arange(len(scores))
+    return np.argpartition(scores, k)[:k]
+
+
+def _continuous_weights(t, lo, hi, invested, min_cash, tc, track_cash):
+    """
+    Box-constrained least squares: w_i = clip(t_i + theta, lo_i, hi_i) with one scalar theta.
+
+    With the cash term, theta equals the cash weight error (1 - sum(w) - tc); theta is then
+    raised if needed so the cash left (1 - sum(w)) stays >= min_cash. Both conditions are
+    piecewise linear and monotone in theta, so they are solved exactly at the breakpoints.
+    """
+    def weights(theta):
+        return np.clip(t + theta, lo, hi)
+
+    theta = _clip_root(t, lo, hi, 1.0, 1.0 - tc) if track_cash else 0.0
+    w = weights(theta)
+    if 1 - w.sum() < min_cash - 1e-12:
+        # Budget binds: lower the weights until the cash floor holds (cash = 1 - sum(w))
+        w = weights(_clip_root(t, lo, hi, 0.0, 1.0 - min_cash))
+    return w
+
+
+def _clip_root(t, lo, hi, slope, rhs):
+    """theta solving slope * theta + sum(clip(t + theta, lo, hi)) = rhs (left side non-decreasing)"""
+    knots = np.concatenate([lo - t, hi - t])
+    knots = np.unique(knots[np.isfinite(knots)])
+    f = slope * knots + np.clip(t + knots[:, None], lo, hi).sum(axis=1) - rhs
+    k = int(np.searchsorted(f, 0.0))
+    if k == 0 or k == len(knots):
+        # Outside the breakpoints only the slope term (and unbounded weights) still move
+        edge = 0 if k == 0 else -1
+        rate = slope if k == 0 else slope + np.isinf(hi).sum()
+        return knots[edge] - f[edge] / rate if rate > 0 else knots[edge]
+    x0, x1, f0, f1 = knots[k - 1], knots[k], f[k - 1], f[k]
+    return x1 if f1 == f0 else x0 - f0 * (x1 - x0) / (f1 - f0)
+
+
+def _solution(symbols, p, q0, q, cash_after, fees, V, t, tc, cash_w, iterations) -> RebalanceSolution:
+    weights = q * p / V if V > 0 else np.zeros_like(p)
+    error = float(((weights - t) ** 2).sum())
+    if V > 0:
+        error += cash_w * (cash_after / V - tc) ** 2
+    return RebalanceSolution(
+        symbols=list(symbols), prices=p, current_qty=q0, qty=q.astype(float),
+        cash_after=float(cash_after), fees=fees, tracking_error=math.sqrt(error),
+        weights=weights, iterations=iterations
+    )
+
+
+def solve_single(symbols: List[str], prices, qty, cash: float, targets, symbol: str,
+                 side: Optional[str] = None, **kwargs) -> RebalanceSolution:
+    """
+    solve_rebalance() with only `symbol` free to trade (every other position held).
+
+    Args:
+        side: 'buy' or 'sell' to allow one direction only
+        **kwargs: Passed to solve_rebalance (min_weights, budget, track_cash, ...)
+    """
+    q0 = np.asarray(qty, dtype=float)
+    lower, upper = q0.copy(), q0.copy()
+    i = list(symbols).index(symbol)
+    lower[i] = q0[i] if side == 'buy' else 0.0
+    upper[i] = q0[i] if side == 'sell' else np.inf
+    if 'lower' in kwargs:
+        lower[i] = max(lower[i], np.asarray(kwargs.pop('lower'), dtype=float)[i])
+    if 'upper' in kwargs:
+        upper[i] = min(upper[i], np.asarray(kwargs.pop('upper'), dtype=float)[i])
+    return solve_rebalance(symbols, prices, q0, cash, targets, lower=lower, upper=upper, **kwargs)
+
@@ -5,16 +5,20 @@ Implements TQQQ 40/80 split buying using SHV as cash buffer
 - Price >= Avg: Buy SHV/80 (conservative)
 """
 import logging
+import math
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from infinite_buying_bot.core.portfolio_manager import MIN_ALLOCATION
+from infinite_buying_bot.utils.clock import get_clock
+
 logger = logging.getLogger(__name__)
 
 
 class RebalancingEngine:
     """Implements infinite buying strategy with dynamic rebalancing"""
     
-    def __init__(self, portfolio_manager, bot_controller=None, config=None):
+    def __init__(self, portfolio_manager, bot_controller=None, config=None, clock=None):
         """
         Initialize rebalancing engine
         
@@ -22,10 +26,12 @@ class RebalancingEngine:
             portfolio_manager: PortfolioManager instance
             bot_controller: BotController instance (for dip buy mode)
             config: Configuration dictionary (optional)
+            clock: Time source (default: the bot controller's clock, else the wall clock)
         """
         self.portfolio = portfolio_manager
         self.bot_controller = bot_controller
         self.config = config or {}
+        self.clock = clock or getattr(bot_controller, 'clock', None) or get_clock()
         
         # Load accelerated test settings if available
         accel_config = self.config.get('accelerated_test', {})
@@ -135,7 +141,7 @@ class RebalancingEngine:
             
             mode = self.bot_controller.dip_buy_mode
             last_buy_time = self.bot_controller.last_dip_buy_time
-            now = datetime.now()
+            now = self.clock.now()
             
             if mode == 'daily':
                 # Check if it's 15:55-16:00 ET
@@ -180,7 +186,7 @@ class RebalancingEngine:
         # Find the best funding source based on priority and profitability
         funding_source = None
         funding_value = 0
-        min_allocation = {'SHV': 0.0, 'JEPI': 0.20, 'MAGS': 0.20}  # Min allocation to preserve
+        min_allocation = MIN_ALLOCATION  # Min allocation to preserve
         
         for symbol in rotation_priority:
             pos = self.portfolio.positions.get(symbol)
@@ -326,6 +332,7 @@ class RebalancingEngine:
                         'action': 'rebalance',
                         'trade_action': trade['action'],  # 'buy' or 'sell'
                         'symbol': trade['symbol'],
+                        'qty': trade['qty'],  # [NEW] whole shares from the rebalance solver
                         'amount_krw': trade['amount_krw'],
                         'reason': trade['reason']
                     })
@@ -337,52 +344,103 @@ class RebalancingEngine:
         """
         Execute a rebalancing action
         
+        [FIX] Legs go through trader.place_orders (one quote snapshot, sell before buy),
+        with Trader's (qty, symbol) / (amount, symbol) argument order.
+        
         Args:
             action: Trade action dict
             trader: Trader instance
         
         Returns:
-            True if successful
+            True if every order leg was sent
         """
         try:
             action_type = action['action']
             
             if action_type == 'profit_taking':
-                # Sell all TQQQ
-                trader.sell(action['sell_symbol'], action['sell_quantity'])
-                # Buy SCHD with profits
-                trader.buy(action['buy_symbol'], action['profit_amount'])
+                # Sell all TQQQ, buy SCHD with profits
+                results = trader.place_orders([
+                    {'symbol': action['sell_symbol'], 'side': 'sell', 'qty': action['sell_quantity']},
+                    {'symbol': action['buy_symbol'], 'side': 'buy', 'amount': action['profit_amount']},
+                ])
+                if not all(r.success for r in results):
+                    return False
                 # Reset TQQQ tracking
                 self.tqqq_entry_avg = 0.0
                 self.tqqq_total_invested = 0.0
                 logger.info(f"✅ Profit taking executed: {action['profit_pct']:.1f}%")
                 
             elif action_type == 'dip_buying':
-                # Sell SHV
-                trader.sell(action['sell_symbol'], action['sell_amount'])
-                # Buy TQQQ
-                trader.buy(action['buy_symbol'], action['sell_amount'])
+                # Sell SHV (enough shares to cover sell_amount), buy TQQQ
+                prices = trader.get_prices([action['sell_symbol'], action['buy_symbol']])
+                sell_price = prices.get(action['sell_symbol'], 0)
+                held = self.portfolio.positions.get(action['sell_symbol'], {}).get('quantity', 0)
+                sell_qty = min(held, math.ceil(action['sell_amount'] / sell_price)) if sell_price > 0 else 0
+                results = trader.place_orders([
+                    {'symbol': action['sell_symbol'], 'side': 'sell', 'qty': sell_qty},
+                    {'symbol': action['buy_symbol'], 'side': 'buy', 'amount': action['sell_amount']},
+                ], prices=prices)
+                if not all(r.success for r in results):
+                    return False
                 logger.info(f"✅ Dip buying executed at {action['dip_pct']:.1f}%")
                 
             elif action_type == 'interest_reinvest':
                 # Buy SCHD with interest
-                trader.buy(action['buy_symbol'], action['amount'])
+                results = trader.place_orders([
+                    {'symbol': action['buy_symbol'], 'side': 'buy', 'amount': action['amount']},
+                ])
+                if not results[0].success:
+                    return False
                 logger.info(f"✅ Interest reinvested: {action['amount']:,.0f} KRW")
                 
             elif action_type == 'rebalance':
-                # Execute rebalancing trade
-                import time
-                trade_action = action.get('trade_action', 'buy')
-                if trade_action == 'buy':
-                    trader.buy(action['symbol'], action['amount_krw'])
-                else:
-                    trader.sell(action['symbol'], action['amount_krw'])
-                logger.info(f"✅ Rebalance executed: {trade_action} {action['symbol']}")
-                # Rate limit: wait 1 second between orders
-                time.sleep(1)
+                # Execute rebalancing trade (use execute_actions to batch all legs)
+                return self.execute_actions([action], trader)
             
             return True
             
         except Exception as e:
             logger.error(f"Failed to execute action {action_type}: {e}")
             return False
+    
+    def execute_actions(self, actions: List[Dict], trader) -> bool:
+        """
+        Execute a list of actions; all 'rebalance' legs go out as one batch
+        (sells before buys, no sleep between orders).
+        
+        Returns:
+            True if every action succeeded
+        """
+        ok = True
+        legs = []
+        for action in actions:
+            if action['action'] != 'rebalance':
+                ok = self.execute_action(action, trader) and ok
+                continue
+            leg = {'symbol': action['symbol'], 'side': action.get('trade_action', 'buy'), 'reason': action.get('reason')}
+            if action.get('qty') is not None:
+                leg['qty'] = action['qty']
+            elif leg['side'] == 'buy':
+                leg['amount'] = action['amount_krw']
+            legs.append((action, leg))
+        
+        if legs:
+            # Legs without a solver qty sell amount_krw worth of shares at the snapshot price
+            prices = trader.get_prices({leg['symbol'] for _, leg in legs})
+            for action, leg in legs:
+                price = prices.get(leg['symbol'], 0)
+                if 'qty' not in leg and 'amount' not in leg:
+                    leg['qty'] = int(action['amount_krw'] / price) if price > 0 else 0
+            try:
+                results = trader.place_orders([leg for _, leg in legs], prices=prices)
+            except Exception as e:
+                logger.error(f"Failed to execute rebalance batch: {e}")
+                return False
+            for result in results:
+                if result.success:
+                    logger.info(f"✅ Rebalance executed: {result.side} {result.symbol} {result.qty} ({result.latency_ms:.0f}ms)")
+                else:
+                    logger.warning(f"❌ Rebalance failed: {result.side} {result.symbol} ({result.error})")
+            ok = all(r.success for r in results) and ok
+        
+        return ok
@@ -3,12 +3,70 @@
 Trader Module (Production Only / Clean Version)
 """
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
 from infinite_buying_bot.api import kis_api as api
 from infinite_buying_bot.api import kis_auth as ka
 
 logger = logging.getLogger(__name__)
 
+# KIS allows 20 REST calls/sec on real accounts; leave headroom for the other threads
+ORDER_TPS = 15
+BATCH_WORKERS = 4
+
+# Price API exchange codes: NAS for NASDAQ, AMS for NYSE American
+PRICE_EXCHANGES = {
+    'TQQQ': 'NAS', 'QQQ': 'NAS', 'SHV': 'NAS', 'SOXL': 'NAS',
+    'MAGS': 'AMS', 'JEPI': 'AMS', 'SPY': 'AMS', 'SCHD': 'AMS'
+}
+
+# IMPORTANT: Order API uses different exchange codes than price API
+# NASD for NASDAQ stocks (TQQQ, SHV, QQQ)
+# AMEX for NYSE American stocks (MAGS, JEPI, SPY)
+ORDER_EXCHANGES = {
+    'TQQQ': 'NASD', 'QQQ': 'NASD', 'SHV': 'NASD', 'SOXL': 'NASD',
+    'MAGS': 'AMEX', 'JEPI': 'AMEX', 'SPY': 'AMEX', 'SCHD': 'AMEX'
+}
+
+
+@dataclass
+class OrderResult:
+    """Outcome of one order leg (see Trader.place_orders)"""
+    symbol: str
+    side: str                 # 'buy' | 'sell'
+    qty: int
+    price: float              # limit price sent (snapshot price if never sent)
+    success: bool
+    order_no: str = ''        # KIS ODNO when accepted
+    error: str = ''
+    latency_ms: float = 0.0   # order API round trip
+
+    @property
+    def amount_usd(self) -> float:
+        return self.qty * self.price
+
+
+class RateLimiter:
+    """Thread-safe pacing: at most `tps` calls per second, spaced evenly"""
+
+    def __init__(self, tps: float):
+        self.interval = 1.0 / tps
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class Trader:
     def __init__(self, config, notifier):
         self.config = config
@@ -31,17 +89,33 @@ class Trader:
         
         # Force Real Mode
         self.env_mode = 'real'
+        
+        # [NEW] Shared by every batch call (quotes and orders)
+        self.limiter = RateLimiter(ORDER_TPS)
+        
+        # [NEW] OrderTracker (set by main): every accepted order is registered for fill tracking
+        self.order_tracker = None
 
     def get_price(self, symbol):
         # Use correct exchange code for each symbol
-        # NAS for NASDAQ, AMS for NYSE American
-        PRICE_EXCHANGES = {
-            'TQQQ': 'NAS', 'QQQ': 'NAS', 'SHV': 'NAS', 'SOXL': 'NAS',
-            'MAGS': 'AMS', 'JEPI': 'AMS', 'SPY': 'AMS', 'SCHD': 'AMS'
-        }
         exchange = PRICE_EXCHANGES.get(symbol, 'NAS')
         return api.get_current_price(self.trenv, exchange, symbol)
 
+    def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """One quote snapshot: all symbols fetched concurrently within the TPS limit (0.0 on failure)"""
+        symbols = list(dict.fromkeys(symbols))
+
+        def fetch(symbol):
+            self.limiter.acquire()
+            try:
+                return self.get_price(symbol)
+            except Exception as e:
+                logger.error(f"[BATCH] Price fetch failed for {symbol}: {e}")
+                return 0.0
+
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            return dict(zip(symbols, pool.map(fetch, symbols)))
+
     def get_balance(self):
         """Returns: (cash, quantity_of_main_symbol, avg_price_of_main_symbol)"""
         cash = 0.0
@@ -102,31 +176,7 @@ class Trader:
         logger.info(f"[ORDER] Type: MARKET, Symbol: {target}, Qty: {qty}, Price: ${price:.2f}")
         self.notifier.send(f"[BUYING] {target}\nQty: {qty}\nPrice: ${price}\nAmt: ${amount:.2f}")
         
-        # Use limit order at current price + $0.01 for immediate fill
-        limit_price = price + 0.01
-        
-        # IMPORTANT: Order API uses different exchange codes than price API
-        # NASD for NASDAQ stocks (TQQQ, SHV, QQQ)
-        # AMEX for NYSE American stocks (MAGS, JEPI, SPY)
-        ORDER_EXCHANGES = {
-            'TQQQ': 'NASD', 'QQQ': 'NASD', 'SHV': 'NASD', 'SOXL': 'NASD',
-            'MAGS': 'AMEX', 'JEPI': 'AMEX', 'SPY': 'AMEX', 'SCHD': 'AMEX'
-        }
-        order_exchange = ORDER_EXCHANGES.get(target, 'NASD')
-        logger.info(f"[ORDER] Using exchange: {order_exchange} for {target}")
-        
-        res = api.order(
-            "buy",
-            self.trenv.my_acct,
-            self.trenv.my_prod,
-            order_exchange,  # Use NASD for orders
-            target,
-            qty,
-            f"{limit_price:.2f}",  # Limit price +1 tick for immediate fill
-            "00"  # Limit Order
-        )
-        
-        if res is not None and not res.empty:
+        if self._submit("buy", target, qty, price).success:
             logger.info(f"[ORDER SUCCESS] {target} {qty} shares sent")
             self.notifier.send(f"[ORDER SENT] {target}")
             return True
@@ -168,19 +218,27 @@ class Trader:
         reason_str = f" ({reason})" if reason else ""
         self.notifier.send(f"[SELLING] {target}{reason_str}\nQty: {qty}\nPrice: ${price}")
         
-        # Use limit order at current price - $0.01 for immediate fill
-        limit_price = price - 0.01
-        
-        # IMPORTANT: Order API uses different exchange codes than price API
-        ORDER_EXCHANGES = {
-            'TQQQ': 'NASD', 'QQQ': 'NASD', 'SHV': 'NASD', 'SOXL': 'NASD',
-            'MAGS': 'AMEX', 'JEPI': 'AMEX', 'SPY': 'AMEX', 'SCHD': 'AMEX'
-        }
+        if self._submit("sell", target, qty, price).success:
+            logger.info(f"[ORDER SUCCESS] Sold {target} {qty} shares")
+            self.notifier.send(f"[SELL ORDER SENT] {target}")
+            return True
+        else:
+            logger.error(f"[ORDER FAILED] {target} sell order rejected")
+            self.notifier.send(f"[SELL ORDER REJECTED] {target}")
+            return False
+
+    def _submit(self, side: str, target: str, qty: int, price: float) -> OrderResult:
+        """
+        Send one limit order 1 cent through `price` (+$0.01 buy / -$0.01 sell) for immediate fill.
+        API exceptions propagate, like api.order itself.
+        """
+        limit_price = price + 0.01 if side == "buy" else price - 0.01
         order_exchange = ORDER_EXCHANGES.get(target, 'NASD')
         logger.info(f"[ORDER] Using exchange: {order_exchange} for {target}")
         
+        start = time.perf_counter()
         res = api.order(
-            "sell",
+            side,
             self.trenv.my_acct,
             self.trenv.my_prod,
             order_exchange,
@@ -189,15 +247,98 @@ class Trader:
             f"{limit_price:.2f}",
             "00"  # Limit Order
         )
+        latency_ms = (time.perf_counter() - start) * 1000
         
-        if res is not None and not res.empty:
-            logger.info(f"[ORDER SUCCESS] Sold {target} {qty} shares")
-            self.notifier.send(f"[SELL ORDER SENT] {target}")
-            return True
-        else:
-            logger.error(f"[ORDER FAILED] {target} sell order rejected")
-            self.notifier.send(f"[SELL ORDER REJECTED] {target}")
-            return False
+        if res is None or res.empty:
+            return OrderResult(target, side, int(qty), round(limit_price, 2), False,
+                               error='rejected', latency_ms=latency_ms)
+        order_no = str(res['ODNO'].iloc[0]) if 'ODNO' in res.columns else ''
+        result = OrderResult(target, side, int(qty), round(limit_price, 2), True,
+                             order_no=order_no, latency_ms=latency_ms)
+        if self.order_tracker is not None:
+            self.order_tracker.track(result)
+        return result
+
+    def place_orders(self, orders: List[Dict], prices: Optional[Dict[str, float]] = None,
+                     notify: bool = True) -> List[OrderResult]:
+        """
+        Submit several orders as one batch.
+        
+        Every leg is priced from a single quote snapshot. Sell legs are sent first, concurrently;
+        buy legs follow once the sells are answered so their proceeds count. All calls go
+        through the TPS limiter, so a multi-leg rebalance takes a few hundred ms instead of
+        one price fetch + order + sleep per leg.
+        
+        Args:
+            orders: [{symbol, side ('buy'/'sell'; 'type' also accepted), qty | amount (USD),
+                      fallback_price (optional)}]
+            prices: Quote snapshot to use; symbols missing from it are fetched in one round
+            notify: Send one summary notification for the whole batch
+        
+        Returns:
+            List[OrderResult] in the order given
+        """
+        start = time.perf_counter()
+        snapshot = dict(prices or {})
+        missing = [o['symbol'] for o in orders if not snapshot.get(o['symbol'], 0) > 0]
+        if missing:
+            snapshot.update(self.get_prices(missing))
+        
+        results: List[Optional[OrderResult]] = [None] * len(orders)
+        legs = []
+        for n, order in enumerate(orders):
+            symbol = order['symbol']
+            side = order.get('side') or order.get('type')
+            price = snapshot.get(symbol, 0.0)
+            if not price > 0:
+                price = order.get('fallback_price') or 0.0
+            if order.get('qty') is not None:
+                qty = int(order['qty'])
+            else:
+                qty = int(order.get('amount', 0) // price) if price > 0 else 0
+            
+            if side not in ("buy", "sell"):
+                error = f"unknown side {side!r}"
+            elif price <= 0:
+                error = f"invalid price for {symbol}"
+            elif qty <= 0:
+                error = f"invalid quantity {qty}"
+            else:
+                legs.append((n, side, symbol, qty, price))
+                continue
+            logger.warning(f"[BATCH] Skipped {side} {symbol}: {error}")
+            results[n] = OrderResult(symbol, str(side), max(qty, 0), price, False, error=error)
+        
+        def submit(leg):
+            _, side, symbol, qty, price = leg
+            self.limiter.acquire()
+            try:
+                return self._submit(side, symbol, qty, price)
+            except Exception as e:
+                logger.error(f"[BATCH] {side} {symbol} failed: {e}")
+                return OrderResult(symbol, side, qty, price, False, error=str(e))
+        
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            for side in ("sell", "buy"):
+                wave = [leg for leg in legs if leg[1] == side]
+                for leg, result in zip(wave, pool.map(submit, wave)):
+                    results[leg[0]] = result
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        sent = [r for r in results if r.success]
+        logger.info(f"[BATCH] {len(sent)}/{len(results)} orders sent in {elapsed_ms:.0f}ms")
+        for r in results:
+            status = f"#{r.order_no}" if r.success else f"FAILED ({r.error})"
+            logger.info(f"[BATCH]   {r.side} {r.symbol} {r.qty} @ ${r.price:.2f} {status} {r.latency_ms:.0f}ms")
+        
+        if notify and results:
+            lines = [f"[BATCH] {len(sent)}/{len(results)} orders sent ({elapsed_ms:.0f}ms)"]
+            for r in results:
+                mark = "✅" if r.success else "❌"
+                lines.append(f"{mark} {r.side.upper()} {r.symbol} {r.qty} @ ${r.price:.2f}")
+            self.notifier.send("\n".join(lines))
+        
+        return results
 
     def get_all_holdings(self):
         """Get all holdings from both NASD and AMEX exchanges"""
@@ -0,0 +1,233 @@
+"""
+Trading Loop - event-driven driver of BotController.run_monitoring_cycle()
+Market open/close, the S-T exchange and scheduled-single times, gradual intervals, portfolio
+snapshots and schedule-zone boundaries are timers on an EventScheduler; fills wake the loop.
+A cycle therefore runs on time instead of on the next 10-second tick, and a closed market
+costs one timer instead of a wake-up every minute.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from infinite_buying_bot.utils.clock import KST, Clock, get_clock
+from infinite_buying_bot.utils.event_scheduler import EventScheduler
+
+logger = logging.getLogger(__name__)
+
+CYCLE_SECONDS = 10          # monitoring cycle while the market is open (quotes for LAYER 0)
+CONTROL_SECONDS = 5         # heartbeat + runtime_config.json poll (no API calls)
+ERROR_BACKOFF_SECONDS = 60  # next cycle after a failed one
+
+# Daily timers: trading mode -> (BotController attribute holding its "HH:MM" KST, default)
+DAILY_MODES = {'st-exchange': ('daily_time', '16:00'), 'scheduled-single': ('scheduled_time', '22:00')}
+
+
+class TradingLoop:
+    """
+    Registers the bot's schedule as timers and runs them.
+
+    Timers (re-planned after every cycle and on settings changes; unchanged deadlines are kept):
+        control           every CONTROL_SECONDS: heartbeat, config sync, start/stop, calendar refresh
+        cycle             every CYCLE_SECONDS while open; otherwise at the next market open
+        market-close      status update at the close
+        st-exchange,
+        scheduled-single  the mode's daily time on the next trading day; runs the cycle even
+                          with the market closed and marks the trade due (BotController.mark_due)
+        gradual           last gradual buy + gradual_interval
+        snapshot          last portfolio snapshot + snapshot_interval_minutes
+        zone              next auto-schedule zone start
+    Events: 'fill' (OrderTracker, any thread) and 'price' run a cycle right away.
+    """
+
+    def __init__(self, bot_controller, scheduler, notifier, clock: Clock = None):
+        """
+        Args:
+            bot_controller: BotController to drive
+            scheduler: MarketScheduler (is_market_open / next_open / next_close)
+            notifier: Error notifications
+            clock: Time source (default: wall clock; a SimulatedClock runs days in seconds)
+        """
+        self.bot = bot_controller
+        self.scheduler = scheduler
+        self.notifier = notifier
+        self.clock = clock or get_clock()
+        self.events = EventScheduler(self.clock, on_error=self._on_error)
+        self.cycles = 0
+        self._was_running = None
+        self._plan_key = None
+        self._fired = {}  # daily mode -> KST datetime of the last fired timer
+
+        self.events.on('fill', self.run_cycle)
+        self.events.on('price', self.run_cycle)
+        tracker = getattr(bot_controller, 'order_tracker', None)
+        if tracker is not None:
+            tracker.add_listener(lambda order: self.events.emit('fill'))
+
+    def run(self, until: Optional[datetime] = None):
+        """
+        Run until interrupted, or until clock.now() (naive local time) reaches `until`.
+        """
+        until_ts = None
+        if until is not None:
+            until_ts = self.clock.time() + (until - self.clock.now()).total_seconds()
+        self.events.call_later('control', 0, self._control)
+        self.events.run(until_ts)
+
+    def stop(self):
+        self.events.stop()
+
+    # ------------------------------------------------------------------
+    # Callbacks
+    # ------------------------------------------------------------------
+
+    def _control(self):
+        self.events.call_later('control', CONTROL_SECONDS, self._control)
+        self.bot.status_manager.update_heartbeat()
+        self.bot.sync_with_config()  # in-memory snapshot, file re-read only on change
+        calendar = getattr(self.scheduler, 'calendar', None)
+        if calendar is not None and calendar.refresh():  # KIS holidays: at most once per KST day
+            self._plan_key = None  # closures changed: re-plan the open/close and daily timers
+        if self.bot.is_running != self._was_running:
+            self._was_running = self.bot.is_running
+            if not self.bot.is_running:
+                logger.info("Trading not started. Waiting for user command...")
+                self.bot.status_manager.update_logic("Paused", "Trading disabled in config")
+                self._cancel_all()
+            else:
+                self.events.cancel('cycle')  # started: run a cycle now
+        if self._settings() != self._plan_key:
+            self._plan()
+
+    def run_cycle(self, force: bool = False):
+        """
+        One monitoring cycle, then re-plan.
+
+        Args:
+            force: Run with the market closed (S-T exchange / scheduled-single pre-market)
+        """
+        self.bot.status_manager.update_heartbeat()
+        self.bot.sync_with_config()
+        if not self.bot.is_running:
+            return
+        if force or self.scheduler.is_market_open():
+            # bot_controller.run_monitoring_cycle() handles market data, DB logging,
+            # profit taking and every trading mode
+            self.bot.run_monitoring_cycle()
+            self.cycles += 1
+            self.events.call_later('cycle', CYCLE_SECONDS, self.run_cycle)
+        else:
+            logger.info("Market is closed. Sleeping...")
+            self.bot.status_manager.update_logic("Sleeping", "Market is Closed", "MARKET CLOSED")
+            self.events.cancel('cycle')
+        self._plan()
+
+    def _on_market_close(self):
+        logger.info("[EVENTS] Market closed")
+        self.bot.status_manager.update_logic("Sleeping", "Market is Closed", "MARKET CLOSED")
+        self.events.cancel('cycle')
+        self._plan()
+
+    def _run_daily(self, mode: str, when: datetime):
+        """Daily timer: mark the trade due and run the cycle regardless of market hours"""
+        self._fired[mode] = when
+        logger.info(f"[{mode.upper()}] Scheduled time {when:%Y-%m-%d %H:%M} KST reached")
+        self.bot.mark_due(mode, when)
+        self.run_cycle(force=True)
+        self._retry_daily(mode, when, run=False)
+
+    def _retry_daily(self, mode: str, when: datetime, run: bool = True):
+        """Re-run the forced cycle until the due trade is consumed (e.g. LAYER 0 ran first) or expires"""
+        if run:
+            self.run_cycle(force=True)
+        due = self.bot.due_events.get(mode)
+        if due != when:
+            return
+        if self.bot.trading_mode == mode and self.bot._is_due(mode, self.clock.kst_now()):
+            self.events.call_later(f'{mode}-retry', CYCLE_SECONDS, lambda: self._retry_daily(mode, when))
+        else:
+            self.bot.due_events.pop(mode, None)
+
+    def _on_error(self, name: str, error: Exception):
+        logger.error(f"Unexpected error: {error}")
+        self.notifier.send(f"Bot Error: {error}")
+        if self.bot.is_running:
+            self.events.call_later('cycle', ERROR_BACKOFF_SECONDS, self.run_cycle)
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    def _arm(self, name: str, when: Optional[float], callback):
+        """Set a timer unless it is already armed for the same time or overdue; None cancels it"""
+        current = self.events.deadline(name)
+        if when is None:
+            self.events.cancel(name)
+        elif current != when and not (current is not None and current <= self.clock.time()):
+            # An overdue timer (a cycle overran its deadline) fires first; the next plan re-arms it
+            self.events.set_timer(name, when, callback)
+
+    def _cancel_all(self):
+        for name in ('cycle', 'market-close', 'gradual', 'snapshot', 'zone', *DAILY_MODES):
+            self.events.cancel(name)
+
+    def _kst_ts(self, when: datetime) -> float:
+        """Naive KST datetime (BotController's time base) -> clock.time() timestamp"""
+        return when.replace(tzinfo=KST).timestamp()
+
+    def _settings(self):
+        """What the timers depend on besides the cycle's own timestamps (re-planned on change)"""
+        bot = self.bot
+        return (bot.is_running, bot.trading_mode, bot.runtime_config, bot.gradual_interval, bot.auto_schedule_enabled,
+                *(getattr(bot, attr, default) for attr, default in DAILY_MODES.values()))
+
+    def _plan(self):
+        bot = self.bot
+        self._plan_key = self._settings()
+        if not bot.is_running:
+            return
+        now = self.clock.kst_now()
+        market_open = self.scheduler.is_market_open()
+
+        if market_open:
+            self._arm('market-close', self.scheduler.next_close().timestamp() + 1, self._on_market_close)
+            if self.events.deadline('cycle') is None:
+                self.events.call_later('cycle', 0, self.run_cycle)
+        else:
+            self.events.cancel('market-close')
+            self._arm('cycle', self.scheduler.next_open().timestamp(), self.run_cycle)
+
+        zone_modes = {zone.get('mode') for zone in bot.schedule_zones} if bot.auto_schedule_enabled else set()
+        for mode, (attr, default) in DAILY_MODES.items():
+            target = getattr(bot, attr, default)
+            if bot.trading_mode == mode or mode in zone_modes:
+                after = now
+                if mode in self._fired:
+                    after = max(now, self._fired[mode] + timedelta(minutes=1))
+                when = bot._get_next_trading_datetime(target, after=after)
+                self._arm(mode, self._kst_ts(when), lambda mode=mode, when=when: self._run_daily(mode, when))
+            else:
+                self.events.cancel(mode)
+
+        # Interval timers only matter while cycles run; past deadlines are left to the next cycle
+        gradual_due = snapshot_due = None
+        if market_open and bot.trading_mode == 'gradual' and bot.last_dip_buy_time:
+            gradual_due = bot.last_dip_buy_time + timedelta(minutes=bot.gradual_interval)
+        if market_open and bot.last_snapshot_time:
+            snapshot_due = bot.last_snapshot_time + timedelta(minutes=bot.snapshot_interval_minutes)
+        self._arm('gradual', self._kst_ts(gradual_due) if gradual_due and gradual_due > now else None, self.run_cycle)
+        self._arm('snapshot', self._kst_ts(snapshot_due) if snapshot_due and snapshot_due > now else None, self.run_cycle)
+
+        self._arm('zone', self._next_zone_start(now) if zone_modes else None, self.run_cycle)
+
+    def _next_zone_start(self, now: datetime) -> Optional[float]:
+        starts = []
+        for zone in self.bot.schedule_zones:
+            try:
+                hour, minute = map(int, zone.get('start', '00:00').split(':'))
+            except ValueError:
+                continue
+            start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if start <= now:
+                start += timedelta(days=1)
+            starts.append(start)
+        return self._kst_ts(min(starts)) if starts else None
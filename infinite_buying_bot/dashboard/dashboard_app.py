@@ -13,10 +13,8 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from dashboard.database import (
-    get_current_stats, get_daily_stats, get_recent_trades,
-    get_initial_capital, set_initial_capital
-)
+from dashboard.database import migrate
+from dashboard.data_service import DashboardDataService
 
 # Page config
 st.set_page_config(
@@ -48,13 +46,22 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_data_service():
+    """One cached data layer per Streamlit server (survives reruns)"""
+    migrate()
+    return DashboardDataService()
+
+
+data = get_data_service()
+
 # Header
 st.title("🎯 Infinite Buying Strategy Dashboard")
 st.markdown("---")
 
 # Get current stats
-stats = get_current_stats()
-initial_capital = get_initial_capital()
+stats = data.get_current_stats()
+initial_capital = data.get_initial_capital()
 
 # Calculate values
 total_value = stats['total_value']
@@ -131,8 +138,7 @@ with col2:
     st.metric("현금", f"${cash:,.0f}", f"{(cash/total_value*100):.1f}%" if total_value > 0 else "0%")
     
     # Get detailed holdings from database
-    from dashboard.database import get_current_holdings
-    holdings = get_current_holdings()
+    holdings = data.get_current_holdings()
     
     # If no detailed holdings (e.g. bot not running), use the single position data
     if not holdings and stats['position_quantity'] > 0:
@@ -153,7 +159,7 @@ st.markdown("---")
 # Cumulative Return Chart
 st.subheader("📈 누적 수익률 추이")
 
-daily_stats = get_daily_stats()
+daily_stats = data.get_daily_stats()
 
 if not daily_stats.empty:
     fig = go.Figure()
@@ -213,7 +219,7 @@ st.markdown("---")
 # Recent Trades Table
 st.subheader("📋 최근 거래 내역")
 
-recent_trades = get_recent_trades(10)
+recent_trades = data.get_recent_trades(10)
 
 if not recent_trades.empty:
     # Format the dataframe for display
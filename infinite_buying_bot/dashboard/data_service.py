@@ -0,0 +1,174 @@
+"""
+Cached data layer for the Streamlit dashboard
+Serves dashboard queries from memory and only goes to SQLite when the underlying tables changed.
+"""
+import threading
+import time
+import logging
+
+import pandas as pd
+
+from dashboard.database import (
+    get_connection, get_current_stats, get_initial_capital,
+    get_current_holdings, get_recent_trades
+)
+
+logger = logging.getLogger(__name__)
+
+# Time-series tables served incrementally: table -> (date column, columns)
+SERIES_TABLES = {
+    'daily_stats': ('date', "date, total_value, daily_return_pct, cumulative_return_pct, "
+                            "position_quantity, position_avg_price"),
+    'portfolio_history': ('date', "date, total_value, cash_balance, invested_value, daily_return_pct, "
+                                  "cumulative_return_pct, benchmark_value, benchmark_return_pct, mdd_pct"),
+}
+
+
+class DashboardDataService:
+    """
+    TTL cache in front of dashboard.database for Streamlit reruns.
+
+    - Scalar/table results (stats, holdings, recent trades) are cached for `ttl_seconds`.
+      After the TTL only the tables' rowid high-water marks are read (O(1)); the query
+      is re-run only if a mark moved.
+    - Time series (daily_stats, portfolio_history) are fetched incrementally: only rows
+      above the cached rowid high-water mark, plus the latest date (which the bot updates
+      in place), are read and merged into the cached frame.
+    - Long series are downsampled to at most `max_points` for charting.
+
+    Usage (one instance per Streamlit server):
+        @st.cache_resource
+        def get_data_service():
+            return DashboardDataService()
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, max_points: int = 500, full_refresh_seconds: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_points = max_points
+        self.full_refresh_seconds = full_refresh_seconds
+        self._lock = threading.Lock()
+        self._cache = {}   # name -> (token, checked_at, value)
+        self._series = {}  # table -> {'df', 'hwm', 'checked_at', 'loaded_at'}
+
+    # ------------------------------------------------------------------
+    # Cached queries
+    # ------------------------------------------------------------------
+
+    def get_current_stats(self) -> dict:
+        return self._cached('current_stats', ('daily_stats', 'trades'), get_current_stats)
+
+    def get_initial_capital(self) -> float:
+        return self._cached('initial_capital', ('config',), get_initial_capital)
+
+    def get_current_holdings(self) -> list:
+        return self._cached('current_holdings', ('holdings',), get_current_holdings)
+
+    def get_recent_trades(self, limit: int = 10) -> pd.DataFrame:
+        return self._cached(f'recent_trades:{limit}', ('trades',), lambda: get_recent_trades(limit))
+
+    def get_daily_stats(self, downsample: bool = True) -> pd.DataFrame:
+        return self._get_series('daily_stats', downsample)
+
+    def get_portfolio_history(self, days: int = None, downsample: bool = True) -> pd.DataFrame:
+        df = self._get_series('portfolio_history', downsample=False)
+        if days is not None and not df.empty:
+            since = (pd.Timestamp.now().normalize() - pd.Timedelta(days=days)).strftime('%Y-%m-%d')
+            df = df[df['date'] >= since]
+        return self._downsample(df) if downsample else df
+
+    def invalidate(self):
+        """Drop everything (next call reloads from the database)."""
+        with self._lock:
+            self._cache.clear()
+            self._series.clear()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _high_water_marks(tables) -> tuple:
+        conn = get_connection()
+        return tuple(conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+                     for table in tables)
+
+    def _cached(self, name: str, tables, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(name)
+        if entry and now - entry[1] < self.ttl_seconds:
+            return entry[2]
+
+        token = self._high_water_marks(tables)
+        if entry and entry[0] == token:
+            value = entry[2]
+        else:
+            value = loader()
+        with self._lock:
+            self._cache[name] = (token, now, value)
+        return value
+
+    def _get_series(self, table: str, downsample: bool) -> pd.DataFrame:
+        now = time.monotonic()
+        with self._lock:
+            state = self._series.get(table)
+
+        if state is None or now - state['loaded_at'] >= self.full_refresh_seconds:
+            state = self._load_series(table, now)
+        elif now - state['checked_at'] >= self.ttl_seconds:
+            state = self._refresh_series(table, state, now)
+
+        df = state['df']
+        return self._downsample(df) if downsample else df
+
+    def _load_series(self, table: str, now: float) -> dict:
+        date_column, columns = SERIES_TABLES[table]
+        df = pd.read_sql_query(f"SELECT rowid AS _rowid, {columns} FROM {table} ORDER BY {date_column} ASC",
+                               get_connection())
+        state = {
+            'df': df.drop(columns='_rowid'),
+            'hwm': int(df['_rowid'].max()) if not df.empty else 0,
+            'checked_at': now,
+            'loaded_at': now,
+        }
+        with self._lock:
+            self._series[table] = state
+        return state
+
+    def _refresh_series(self, table: str, state: dict, now: float) -> dict:
+        """Fetch only new rows and the (possibly updated in place) latest date, then merge."""
+        date_column, columns = SERIES_TABLES[table]
+        cached = state['df']
+
+        current_hwm = self._high_water_marks((table,))[0]
+        if current_hwm < state['hwm']:
+            # Rows were deleted (e.g. clear_data) - start over
+            return self._load_series(table, now)
+
+        last_date = cached[date_column].iloc[-1] if not cached.empty else ''
+        new_rows = pd.read_sql_query(
+            f"SELECT rowid AS _rowid, {columns} FROM {table} "
+            f"WHERE rowid > ? OR {date_column} >= ? ORDER BY {date_column} ASC",
+            get_connection(), params=(state['hwm'], last_date)
+        )
+
+        df = cached
+        hwm = state['hwm']
+        if not new_rows.empty:
+            hwm = max(hwm, int(new_rows['_rowid'].max()))
+            new_rows = new_rows.drop(columns='_rowid')
+            df = pd.concat([cached[~cached[date_column].isin(new_rows[date_column])], new_rows],
+                           ignore_index=True).sort_values(date_column, ignore_index=True)
+
+        state = {'df': df, 'hwm': hwm, 'checked_at': now, 'loaded_at': state['loaded_at']}
+        with self._lock:
+            self._series[table] = state
+        return state
+
+    def _downsample(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Evenly thin a long series to at most max_points rows (first and last rows kept)."""
+        if len(df) <= self.max_points:
+            return df
+        step = -(-(len(df) - 1) // (self.max_points - 1))  # ceil
+        keep = list(range(0, len(df) - 1, step)) + [len(df) - 1]
+        return df.iloc[keep].reset_index(drop=True)
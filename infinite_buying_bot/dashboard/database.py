@@ -3,10 +3,14 @@ Database module for storing trading data
 Stores: trades, daily snapshots, current position
 """
 import sqlite3
+import sys
+import json
 import pandas as pd
 import time
 import functools
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 
@@ -14,6 +18,15 @@ logger = logging.getLogger(__name__)
 
 DB_PATH = Path(__file__).parent / "trading.db"
 
+# Raw holdings_history rows older than this are pruned (rollups are kept forever). None disables.
+HOLDINGS_HISTORY_RETENTION_DAYS = 90
+
+# Rollup granularity -> (table, bucket length in 'YYYY-MM-DD HH:MM:SS' timestamp, bucket suffix)
+ROLLUP_TABLES = {
+    'hourly': ('holdings_rollup_hourly', 13, ':00:00'),
+    'daily': ('holdings_rollup_daily', 10, ''),
+}
+
 
 def retry_on_locked(max_retries=3, delay=0.5):
     """Decorator to retry database operations on lock errors.
@@ -41,18 +54,167 @@ def retry_on_locked(max_retries=3, delay=0.5):
     return decorator
 
 
-def get_connection():
-    """Get database connection with WAL mode for better concurrency."""
-    conn = sqlite3.connect(DB_PATH, timeout=30)
+# Per-thread pooled connection state (connection, db path, transaction depth)
+_local = threading.local()
+
+
+def _connect():
+    """Open a new connection with WAL mode and busy timeout.
+    
+    isolation_level=None: 트랜잭션은 transaction()에서 명시적으로 관리.
+    동일한 SQL 문자열은 연결의 statement cache에서 재사용됨 (prepared statement).
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None, cached_statements=256)
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")  # per connection: enforces portfolio_holdings ON DELETE CASCADE
     return conn
 
 
-def init_db():
-    """Initialize database with required tables"""
+def get_connection():
+    """Get this thread's pooled database connection (WAL mode, busy timeout).
+    
+    연결은 스레드마다 한 번만 열어 재사용하므로 호출자가 close()하지 않아야 함.
+    DB_PATH가 바뀌면 (테스트/샘플 데이터 생성 등) 새로 연결함.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != str(DB_PATH):
+        if conn is not None:
+            conn.close()
+        conn = _connect()
+        _local.conn = conn
+        _local.path = str(DB_PATH)
+        _local.depth = 0
+    return conn
+
+
+def close_connection():
+    """Close this thread's pooled connection (e.g. on thread/process shutdown)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+        _local.depth = 0
+
+
+@contextmanager
+def transaction():
+    """Single write transaction on the pooled connection.
+    
+    가장 바깥 블록이 BEGIN IMMEDIATE ~ COMMIT 한 번으로 묶이고, 중첩 블록은 SAVEPOINT로
+    처리되어 내부 실패는 해당 블록만 롤백됨. 모니터링 주기의 여러 log_* 호출을
+    하나의 트랜잭션(fsync 1회)으로 묶을 때 사용.
+    
+    Usage:
+        with transaction():
+            log_holdings(holdings)
+            log_holdings_history(holdings)
+    """
     conn = get_connection()
-    cursor = conn.cursor()
+    depth = _local.depth
+    savepoint = f"sp_{depth}"
+    conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+    _local.depth = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth = depth
+        if depth == 0:
+            conn.execute("ROLLBACK")
+        else:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        raise
+    else:
+        _local.depth = depth
+        if depth > 0:
+            conn.execute(f"RELEASE {savepoint}")
+            return
+        try:
+            conn.execute("COMMIT")
+        except BaseException:
+            # COMMIT 실패(SQLITE_BUSY, I/O 오류) 시 트랜잭션이 열린 채 남으면 이 스레드의
+            # 이후 BEGIN IMMEDIATE가 모두 실패하므로 롤백 후 다시 던짐
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+
+def migrate() -> int:
+    """
+    Bring the schema up to date by applying pending numbered migrations (see MIGRATIONS).
+    
+    Call once at process start (bot, dashboard, exporter and maintenance scripts). Nothing runs
+    at import time, and the hot-path log_*/get_* functions never issue DDL. When the schema is
+    already current this is a single read of schema_version. Each migration commits in its own
+    BEGIN IMMEDIATE transaction and re-checks the version under the lock, so processes that
+    start at the same time apply each step exactly once.
+    
+    Returns:
+        Current schema version
+    """
+    path = str(DB_PATH)
+    if path in _migrated_paths:
+        return LATEST_SCHEMA_VERSION
+    
+    current = _schema_version(get_connection())
+    if current < LATEST_SCHEMA_VERSION:
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            with transaction() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        description TEXT,
+                        applied_at TEXT NOT NULL
+                    )
+                """)
+                if _schema_version(conn) >= version:
+                    continue  # Applied by another process meanwhile
+                step(conn.cursor())
+                conn.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                             (version, description, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            logger.info(f"[DB] Applied migration {version}: {description}")
+        current = LATEST_SCHEMA_VERSION
+    
+    _migrated_paths.add(path)
+    return current
+
+
+def init_db():
+    """Initialize database with required tables (kept for existing callers; same as migrate())"""
+    return migrate()
+
+
+def get_schema_version() -> int:
+    """Schema version recorded in the database (0 if never migrated)"""
+    return _schema_version(get_connection())
+
+
+def _schema_version(conn) -> int:
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone():
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def _add_missing_columns(cursor, table: str, columns: list):
+    """ALTER TABLE ... ADD COLUMN for each 'name TYPE' not yet present"""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+    for column in columns:
+        if column.split()[0] not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+
+
+# -----------------------------------------------------------------------------
+# Migrations (append only - never edit or renumber an applied step)
+# Steps use IF NOT EXISTS / column checks so databases created before schema_version
+# existed (all tables already present, version 0) migrate cleanly.
+# -----------------------------------------------------------------------------
+
+def _migration_001_base_tables(cursor):
+    """Core tables"""
     
     # Trades table
     cursor.execute("""
@@ -92,6 +254,19 @@ def init_db():
         )
     """)
     
+    # Current holdings table (replaced on every log_holdings)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS holdings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            symbol TEXT,
+            quantity INTEGER,
+            avg_price REAL,
+            current_price REAL,
+            value REAL
+        )
+    """)
+    
     # Portfolio snapshots table (for dashboard charts)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS portfolio_snapshots (
@@ -144,7 +319,7 @@ def init_db():
         )
     """)
     
-    # [NEW] Holdings history table for 5-minute interval snapshots (for reports & analysis)
+    # Holdings history table for 5-minute interval snapshots (for reports & analysis)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS holdings_history (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -158,98 +333,323 @@ def init_db():
             strategy_mode TEXT
         )
     """)
+
+
+def _migration_002_added_columns(cursor):
+    """Columns added after the first release (formerly migrate_db.py / ALTER on every start)"""
+    _add_missing_columns(cursor, 'trades', ['trade_count INTEGER', 'mdd_pct REAL'])
+    _add_missing_columns(cursor, 'portfolio_history',
+                         ['strategy_mode TEXT', 'trading_mode TEXT', 'graphrag_confidence REAL'])
+
+
+def _migration_003_history_indexes(cursor):
+    """Indexes for symbol / time-range report queries"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_holdings_history_symbol_ts ON holdings_history (symbol, timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_holdings_history_ts ON holdings_history (timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_history_ts ON portfolio_history (timestamp)")
+
+
+def _migration_004_holdings_rollups(cursor):
+    """Hourly/daily OHLC rollups of value and P&L per symbol (maintained by log_holdings_history)"""
+    for table, _, _ in ROLLUP_TABLES.values():
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                value_open REAL,
+                value_high REAL,
+                value_low REAL,
+                value_close REAL,
+                pnl_open REAL,
+                pnl_high REAL,
+                pnl_low REAL,
+                pnl_close REAL,
+                profit_pct_close REAL,
+                samples INTEGER NOT NULL DEFAULT 0,
+                first_timestamp TEXT,
+                last_timestamp TEXT,
+                PRIMARY KEY (bucket, symbol)
+            )
+        """)
+    _backfill_holdings_rollups(cursor)
+
+
+def _migration_005_portfolio_holdings(cursor):
+    """Normalized per-symbol holdings of each portfolio_history snapshot (replaces holdings_json)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS portfolio_holdings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            snapshot_id INTEGER NOT NULL REFERENCES portfolio_history(id) ON DELETE CASCADE,
+            date TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            qty REAL,
+            avg_price REAL,
+            current_price REAL,
+            market_value REAL,
+            pnl_pct REAL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_holdings_snapshot ON portfolio_holdings (snapshot_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_holdings_symbol_date ON portfolio_holdings (symbol, date)")
+    _migrate_holdings_json(cursor)
+
+
+def _migration_006_stats_summary(cursor):
+    """
+    Single-row summary counters for get_current_stats / get_performance_metrics.
+    
+    Maintained by triggers on trades/portfolio_history, so every writer (bot, generate_history,
+    clear_data, manual SQL) keeps them in sync and dashboard stats are O(1) regardless of history length.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_summary (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            trade_count INTEGER NOT NULL DEFAULT 0,
+            winning_trades INTEGER NOT NULL DEFAULT 0,
+            target_trades INTEGER NOT NULL DEFAULT 0,
+            return_days INTEGER NOT NULL DEFAULT 0,
+            return_sum REAL NOT NULL DEFAULT 0,
+            return_sumsq REAL NOT NULL DEFAULT 0,
+            positive_days INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    
+    # Trades: total / winning (pnl > 0) / target achieved (pnl_pct >= 10)
+    trade_delta = """
+        trade_count = trade_count {op} 1,
+        winning_trades = winning_trades {op} COALESCE({row}.pnl > 0, 0),
+        target_trades = target_trades {op} COALESCE({row}.pnl_pct >= 10, 0)
+    """
+    # Portfolio history: count / sum / sum of squares / positive days of daily_return_pct (NULLs ignored)
+    return_delta = """
+        return_days = return_days {op} ({row}.daily_return_pct IS NOT NULL),
+        return_sum = return_sum {op} COALESCE({row}.daily_return_pct, 0),
+        return_sumsq = return_sumsq {op} COALESCE({row}.daily_return_pct * {row}.daily_return_pct, 0),
+        positive_days = positive_days {op} COALESCE({row}.daily_return_pct > 0, 0)
+    """
+    for table, delta, columns in [('trades', trade_delta, 'pnl, pnl_pct'),
+                                  ('portfolio_history', return_delta, 'daily_return_pct')]:
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE stats_summary SET {delta.format(op='+', row='NEW')} WHERE id = 1;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE stats_summary SET {delta.format(op='-', row='OLD')} WHERE id = 1;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_update AFTER UPDATE OF {columns} ON {table}
+            BEGIN
+                UPDATE stats_summary SET {delta.format(op='-', row='OLD')} WHERE id = 1;
+                UPDATE stats_summary SET {delta.format(op='+', row='NEW')} WHERE id = 1;
+            END
+        """)
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_history_mdd ON portfolio_history (mdd_pct)")
     
-    # [NEW] Add strategy columns to portfolio_history (ignore if already exist)
-    for column in ['strategy_mode TEXT', 'trading_mode TEXT', 'graphrag_confidence REAL']:
+    # First run: seed counters from existing rows (same transaction as the triggers)
+    if not cursor.execute("SELECT 1 FROM stats_summary WHERE id = 1").fetchone():
+        _rebuild_stats_summary(cursor)
+
+
+def _rebuild_stats_summary(cursor):
+    """Recompute the summary counters from scratch"""
+    cursor.execute("""
+        INSERT OR REPLACE INTO stats_summary
+        (id, trade_count, winning_trades, target_trades,
+         return_days, return_sum, return_sumsq, positive_days)
+        SELECT 1, t.trade_count, t.winning_trades, t.target_trades,
+               p.return_days, p.return_sum, p.return_sumsq, p.positive_days
+        FROM (SELECT COUNT(*) AS trade_count,
+                     COUNT(CASE WHEN pnl > 0 THEN 1 END) AS winning_trades,
+                     COUNT(CASE WHEN pnl_pct >= 10 THEN 1 END) AS target_trades
+              FROM trades) t,
+             (SELECT COUNT(daily_return_pct) AS return_days,
+                     COALESCE(SUM(daily_return_pct), 0) AS return_sum,
+                     COALESCE(SUM(daily_return_pct * daily_return_pct), 0) AS return_sumsq,
+                     COUNT(CASE WHEN daily_return_pct > 0 THEN 1 END) AS positive_days
+              FROM portfolio_history) p
+    """)
+
+
+def rebuild_stats_summary():
+    """Recompute the summary counters (e.g. after bulk edits with triggers disabled)"""
+    with transaction() as conn:
+        _rebuild_stats_summary(conn.cursor())
+
+
+def _migrate_holdings_json(cursor):
+    """Move legacy holdings_json blobs into portfolio_holdings (blob is cleared once migrated)"""
+    cursor.execute("SELECT id, date, holdings_json FROM portfolio_history WHERE holdings_json IS NOT NULL")
+    rows = cursor.fetchall()
+    for snapshot_id, date, holdings_json in rows:
         try:
-            col_name = column.split()[0]
-            cursor.execute(f"ALTER TABLE portfolio_history ADD COLUMN {column}")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
+            holdings = json.loads(holdings_json)
+        except (TypeError, ValueError):
+            logger.warning(f"[DB] Skipping unreadable holdings_json for snapshot {snapshot_id} ({date})")
+            continue
+        replace_snapshot_holdings(cursor, snapshot_id, date, holdings)
+        cursor.execute("UPDATE portfolio_history SET holdings_json = NULL WHERE id = ?", (snapshot_id,))
+    if rows:
+        logger.info(f"[DB] Migrated holdings_json of {len(rows)} portfolio snapshots to portfolio_holdings")
+
+
+def replace_snapshot_holdings(cursor, snapshot_id: int, date: str, holdings: list):
+    """
+    Replace the per-symbol rows of one portfolio_history snapshot (in the caller's transaction).
     
-    conn.commit()
-    conn.close()
+    Args:
+        cursor: Cursor/connection inside a write transaction
+        snapshot_id: portfolio_history.id
+        date: Snapshot date (denormalized for per-symbol time-series queries)
+        holdings: List of holdings with symbol, qty, avg_price, current_price, market_value, pnl_pct
+    """
+    cursor.execute("DELETE FROM portfolio_holdings WHERE snapshot_id = ?", (snapshot_id,))
+    cursor.executemany("""
+        INSERT INTO portfolio_holdings
+        (snapshot_id, date, symbol, qty, avg_price, current_price, market_value, pnl_pct)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (snapshot_id, date, h.get('symbol', ''), h.get('qty', 0), h.get('avg_price', 0),
+         h.get('current_price', 0), h.get('market_value', h.get('value', 0)), h.get('pnl_pct', 0))
+        for h in holdings or []
+    ])
+
+
+def _backfill_holdings_rollups(cursor):
+    """Build rollups from existing holdings_history rows (only when rollups are still empty)"""
+    if cursor.execute("SELECT 1 FROM holdings_rollup_daily LIMIT 1").fetchone():
+        return
+    cursor.execute("""
+        SELECT timestamp, symbol, quantity, avg_price, current_price, value, profit_pct
+        FROM holdings_history
+        ORDER BY timestamp, id
+    """)
+    samples = [
+        _rollup_sample(ts, symbol, qty or 0, avg or 0, price or 0, value or 0, pct or 0)
+        for ts, symbol, qty, avg, price, value, pct in cursor.fetchall()
+    ]
+    if samples:
+        _update_rollups(cursor, samples)
+        logger.info(f"[DB] Backfilled holdings rollups from {len(samples)} history rows")
+
+
+def _rollup_sample(timestamp, symbol, qty, avg_price, current_price, value, profit_pct):
+    """One holdings_history row as a rollup sample"""
+    return {
+        'timestamp': timestamp,
+        'symbol': symbol,
+        'value': value,
+        'pnl': (current_price - avg_price) * qty,
+        'profit_pct': profit_pct,
+    }
+
+
+def _update_rollups(cursor, samples: list):
+    """Fold samples into the hourly/daily rollup tables (OHLC upsert, in the caller's transaction)"""
+    for table, bucket_len, suffix in ROLLUP_TABLES.values():
+        rows = [dict(sample, bucket=sample['timestamp'][:bucket_len] + suffix) for sample in samples]
+        cursor.executemany(f"""
+            INSERT INTO {table}
+            (bucket, symbol, value_open, value_high, value_low, value_close,
+             pnl_open, pnl_high, pnl_low, pnl_close, profit_pct_close,
+             samples, first_timestamp, last_timestamp)
+            VALUES (:bucket, :symbol, :value, :value, :value, :value,
+                    :pnl, :pnl, :pnl, :pnl, :profit_pct, 1, :timestamp, :timestamp)
+            ON CONFLICT(bucket, symbol) DO UPDATE SET
+                value_open = CASE WHEN excluded.first_timestamp < first_timestamp THEN excluded.value_open ELSE value_open END,
+                pnl_open = CASE WHEN excluded.first_timestamp < first_timestamp THEN excluded.pnl_open ELSE pnl_open END,
+                value_high = MAX(value_high, excluded.value_high),
+                value_low = MIN(value_low, excluded.value_low),
+                pnl_high = MAX(pnl_high, excluded.pnl_high),
+                pnl_low = MIN(pnl_low, excluded.pnl_low),
+                value_close = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.value_close ELSE value_close END,
+                pnl_close = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.pnl_close ELSE pnl_close END,
+                profit_pct_close = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.profit_pct_close ELSE profit_pct_close END,
+                first_timestamp = MIN(first_timestamp, excluded.first_timestamp),
+                last_timestamp = MAX(last_timestamp, excluded.last_timestamp),
+                samples = samples + 1
+        """, rows)
+
+# Schema migrations: (version, description, step). Append new steps at the end.
+MIGRATIONS = [
+    (1, 'base tables', _migration_001_base_tables),
+    (2, 'trades/portfolio_history added columns', _migration_002_added_columns),
+    (3, 'history indexes', _migration_003_history_indexes),
+    (4, 'holdings rollups', _migration_004_holdings_rollups),
+    (5, 'portfolio_holdings child table', _migration_005_portfolio_holdings),
+    (6, 'stats_summary counters', _migration_006_stats_summary),
+]
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# DB paths already migrated by this process (migrate() is a no-op after the first call)
+_migrated_paths = set()
+
+
+def _now() -> datetime:
+    """Row timestamp: the bot's process clock when loaded (simulated runs stamp simulated time), else wall time"""
+    clock = sys.modules.get('infinite_buying_bot.utils.clock')
+    return clock.get_clock().now() if clock else datetime.now()
+
 
 def set_initial_capital(amount: float):
     """Set initial capital (only once)"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR IGNORE INTO config (key, value) VALUES ('initial_capital', ?)", (str(amount),))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("INSERT OR IGNORE INTO config (key, value) VALUES ('initial_capital', ?)", (str(amount),))
 
 def get_initial_capital() -> float:
     """Get initial capital"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT value FROM config WHERE key = 'initial_capital'")
+    cursor = get_connection().execute("SELECT value FROM config WHERE key = 'initial_capital'")
     result = cursor.fetchone()
-    conn.close()
     return float(result[0]) if result else 0.0  # [FIX] Default 0 (Was 100M)
 
+def record_capital_flow(amount: float):
+    """Add a deposit (positive) or withdrawal (negative) to the net capital flow"""
+    with transaction() as conn:
+        conn.execute("""
+            INSERT INTO config (key, value) VALUES ('net_capital_flow', ?)
+            ON CONFLICT(key) DO UPDATE SET value = CAST(value AS REAL) + CAST(excluded.value AS REAL)
+        """, (str(amount),))
+
+def get_net_capital_flow() -> float:
+    """Net deposits minus withdrawals since initial capital was set (0 if none recorded)"""
+    cursor = get_connection().execute("SELECT value FROM config WHERE key = 'net_capital_flow'")
+    result = cursor.fetchone()
+    return float(result[0]) if result else 0.0
+
 def log_trade(trade_type: str, symbol: str, quantity: int, price: float, 
               pnl: float = None, pnl_pct: float = None, trade_count: int = None,
-              mdd_pct: float = None, reason: str = None):
-    """Log a trade to database"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    timestamp = datetime.now().isoformat()
+              mdd_pct: float = None, reason: str = None, at: datetime = None):
+    """Log a trade to database (at: when the trade happened, default now)"""
+    timestamp = (at or _now()).isoformat()
     total_value = quantity * price
     
-    cursor.execute("""
-        INSERT INTO trades (timestamp, type, symbol, quantity, price, total_value, pnl, pnl_pct, trade_count, mdd_pct, reason)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (timestamp, trade_type, symbol, quantity, price, total_value, pnl, pnl_pct, trade_count, mdd_pct, reason))
-    
-    conn.commit()
-    conn.close()
-
-def create_holdings_table():
-    """Create holdings table if it doesn't exist"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS holdings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            symbol TEXT,
-            quantity INTEGER,
-            avg_price REAL,
-            current_price REAL,
-            value REAL
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("""
+            INSERT INTO trades (timestamp, type, symbol, quantity, price, total_value, pnl, pnl_pct, trade_count, mdd_pct, reason)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (timestamp, trade_type, symbol, quantity, price, total_value, pnl, pnl_pct, trade_count, mdd_pct, reason))
 
 def log_holdings(holdings: list):
     """Log current holdings to database"""
-    create_holdings_table()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('DELETE FROM holdings')
-    
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    timestamp = _now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = [
+        (timestamp, h['symbol'], h['qty'], h['avg_price'], h['current_price'], h['value'])
+        for h in holdings
+    ]
     
-    for h in holdings:
-        cursor.execute('''
+    with transaction() as conn:
+        conn.execute('DELETE FROM holdings')
+        conn.executemany('''
             INSERT INTO holdings (timestamp, symbol, quantity, avg_price, current_price, value)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            timestamp,
-            h['symbol'],
-            h['qty'],
-            h['avg_price'],
-            h['current_price'],
-            h['value']
-        ))
-    
-    conn.commit()
-    conn.close()
+        ''', rows)
 
-def log_holdings_history(holdings: list, strategy_mode: str = None):
+def log_holdings_history(holdings: list, strategy_mode: str = None, at: datetime = None):
     """
     [NEW] Log holdings snapshot to history table for 5-minute interval tracking.
     Unlike log_holdings(), this APPENDS data for historical analysis.
@@ -257,12 +657,12 @@ def log_holdings_history(holdings: list, strategy_mode: str = None):
     Args:
         holdings: List of holdings with symbol, qty, avg_price, current_price, value
         strategy_mode: Current strategy mode (aggressive/neutral/defensive)
+        at: Snapshot time (default: now)
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    timestamp = (at or _now()).strftime('%Y-%m-%d %H:%M:%S')
     
+    rows = []
+    samples = []
     for h in holdings:
         # Calculate profit percentage
         avg_price = h.get('avg_price', 0)
@@ -271,11 +671,9 @@ def log_holdings_history(holdings: list, strategy_mode: str = None):
         if avg_price > 0:
             profit_pct = ((current_price - avg_price) / avg_price) * 100
         
-        cursor.execute('''
-            INSERT INTO holdings_history 
-            (timestamp, symbol, quantity, avg_price, current_price, value, profit_pct, strategy_mode)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        samples.append(_rollup_sample(timestamp, h['symbol'], h.get('qty', 0), avg_price,
+                                      current_price, h.get('value', 0), profit_pct))
+        rows.append((
             timestamp,
             h['symbol'],
             h.get('qty', 0),
@@ -286,82 +684,117 @@ def log_holdings_history(holdings: list, strategy_mode: str = None):
             strategy_mode
         ))
     
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT INTO holdings_history 
+            (timestamp, symbol, quantity, avg_price, current_price, value, profit_pct, strategy_mode)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        _update_rollups(conn.cursor(), samples)
+        _maybe_prune_holdings_history()
     logger.info(f"[DB] Holdings history saved: {len(holdings)} ETFs at {timestamp}")
 
+
+_last_prune_date = None
+
+
+def _maybe_prune_holdings_history():
+    """Apply the raw-row retention policy at most once per day"""
+    global _last_prune_date
+    today = _now().date()
+    if HOLDINGS_HISTORY_RETENTION_DAYS and _last_prune_date != today:
+        prune_holdings_history(HOLDINGS_HISTORY_RETENTION_DAYS)
+        _last_prune_date = today
+
+
+def prune_holdings_history(retention_days: int = HOLDINGS_HISTORY_RETENTION_DAYS) -> int:
+    """
+    Delete raw holdings_history rows older than retention_days.
+    Hourly/daily rollups are kept, so long-range reports stay available.
+    
+    Returns:
+        Number of deleted rows
+    """
+    cutoff = (_now() - timedelta(days=retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+    with transaction() as conn:
+        deleted = conn.execute("DELETE FROM holdings_history WHERE timestamp < ?", (cutoff,)).rowcount
+    if deleted:
+        logger.info(f"[DB] Pruned {deleted} holdings history rows older than {retention_days} days")
+    return deleted
+
+
+def get_holdings_rollup(granularity: str = 'daily', symbol: str = None, days: int = 30) -> pd.DataFrame:
+    """
+    Get hourly/daily OHLC rollups of value and P&L per symbol.
+    
+    Args:
+        granularity: 'hourly' or 'daily'
+        symbol: Filter by symbol (None for all)
+        days: Number of days to retrieve
+        
+    Returns:
+        DataFrame ordered by bucket, symbol
+    """
+    table, bucket_len, suffix = ROLLUP_TABLES[granularity]
+    since = (_now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')[:bucket_len] + suffix
+    query = f"SELECT * FROM {table} WHERE bucket >= ?"
+    params = [since]
+    if symbol:
+        query += " AND symbol = ?"
+        params.append(symbol)
+    query += " ORDER BY bucket, symbol"
+    return pd.read_sql_query(query, get_connection(), params=params)
+
 def get_current_holdings():
     """Get current holdings from database"""
-    create_holdings_table()
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
+    cursor.row_factory = sqlite3.Row
     cursor.execute('SELECT * FROM holdings')
     rows = cursor.fetchall()
-    conn.close()
     
     return [dict(row) for row in rows]
 
 def log_daily_stats(total_value: float, daily_return_pct: float, cumulative_return_pct: float,
                    position_quantity: int = 0, position_avg_price: float = 0):
     """Log daily statistics"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    date = datetime.now().date().isoformat()
-    
-    cursor.execute("""
-        INSERT OR REPLACE INTO daily_stats 
-        (date, total_value, daily_return_pct, cumulative_return_pct, position_quantity, position_avg_price)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (date, total_value, daily_return_pct, cumulative_return_pct, position_quantity, position_avg_price))
+    date = _now().date().isoformat()
     
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO daily_stats 
+            (date, total_value, daily_return_pct, cumulative_return_pct, position_quantity, position_avg_price)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (date, total_value, daily_return_pct, cumulative_return_pct, position_quantity, position_avg_price))
 
 def get_all_trades() -> pd.DataFrame:
     """Get all trades as DataFrame"""
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM trades ORDER BY timestamp DESC", conn)
-    conn.close()
+    df = pd.read_sql_query("SELECT * FROM trades ORDER BY timestamp DESC", get_connection())
     return df
 
 def get_recent_trades(limit: int = 10) -> pd.DataFrame:
     """Get recent trades"""
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query(f"SELECT * FROM trades ORDER BY timestamp DESC LIMIT {limit}", conn)
-    conn.close()
+    df = pd.read_sql_query("SELECT * FROM trades ORDER BY timestamp DESC LIMIT ?", get_connection(),
+                           params=(int(limit),))
     return df
 
 def get_daily_stats() -> pd.DataFrame:
     """Get all daily stats"""
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM daily_stats ORDER BY date ASC", conn)
-    conn.close()
+    df = pd.read_sql_query("SELECT * FROM daily_stats ORDER BY date ASC", get_connection())
     return df
 
 def get_current_stats():
-    """Get current trading statistics"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Get latest daily stat
-    cursor.execute("SELECT * FROM daily_stats ORDER BY date DESC LIMIT 1")
-    latest = cursor.fetchone()
-    
-    # Get total trades
-    cursor.execute("SELECT COUNT(*) FROM trades")
-    total_trades = cursor.fetchone()[0]
-    
-    # Get winning trades (pnl > 0)
-    cursor.execute("SELECT COUNT(*) FROM trades WHERE pnl > 0")
-    winning_trades = cursor.fetchone()[0]
-    
-    # Get target achieved trades (pnl_pct >= 10)
-    cursor.execute("SELECT COUNT(*) FROM trades WHERE pnl_pct >= 10")
-    target_achieved = cursor.fetchone()[0]
-    
-    conn.close()
+    """Get current trading statistics (single query: latest daily stat + trigger-maintained counters)"""
+    cursor = get_connection().execute("""
+        SELECT d.date, d.total_value, d.daily_return_pct, d.cumulative_return_pct,
+               d.position_quantity, d.position_avg_price,
+               s.trade_count, s.winning_trades, s.target_trades
+        FROM stats_summary s
+        LEFT JOIN (SELECT * FROM daily_stats ORDER BY date DESC LIMIT 1) d ON 1 = 1
+        WHERE s.id = 1
+    """)
+    row = cursor.fetchone()
+    latest = row if row and row[0] is not None else None
+    total_trades, winning_trades, target_achieved = row[6:9] if row else (0, 0, 0)
     
     if latest:
         return {
@@ -388,9 +821,6 @@ def get_current_stats():
             'win_rate': 0
         }
 
-# Initialize DB on import
-init_db()
-
 # =============================================================================
 # PORTFOLIO HISTORY FUNCTIONS (for Performance Report)
 # =============================================================================
@@ -427,59 +857,58 @@ def log_portfolio_history(
         benchmark_return_pct: Benchmark cumulative return
         holdings: List of holdings with qty, symbol, value
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    timestamp = datetime.now().isoformat()
-    date = datetime.now().date().isoformat()
-    
-    # Calculate MDD
-    cursor.execute("SELECT MAX(peak_value) FROM portfolio_history")
-    result = cursor.fetchone()
-    peak_value = result[0] if result and result[0] else total_value
-    peak_value = max(peak_value, total_value)
-    
-    mdd_pct = 0.0
-    if peak_value > 0:
-        mdd_pct = ((total_value - peak_value) / peak_value) * 100
-    
-    # Serialize holdings to JSON
-    holdings_json = json.dumps(holdings, ensure_ascii=False) if holdings else None
+    now = _now()
+    timestamp = now.isoformat()
+    date = now.date().isoformat()
     
     try:
-        cursor.execute("""
-            INSERT INTO portfolio_history 
-            (timestamp, date, total_value, cash_balance, invested_value,
-             daily_return_pct, cumulative_return_pct, benchmark_value, 
-             benchmark_return_pct, mdd_pct, peak_value, holdings_json,
-             strategy_mode, trading_mode, graphrag_confidence)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(date) DO UPDATE SET
-                timestamp = excluded.timestamp,
-                total_value = excluded.total_value,
-                cash_balance = excluded.cash_balance,
-                invested_value = excluded.invested_value,
-                daily_return_pct = excluded.daily_return_pct,
-                cumulative_return_pct = excluded.cumulative_return_pct,
-                benchmark_value = excluded.benchmark_value,
-                benchmark_return_pct = excluded.benchmark_return_pct,
-                mdd_pct = excluded.mdd_pct,
-                peak_value = excluded.peak_value,
-                holdings_json = excluded.holdings_json,
-                strategy_mode = excluded.strategy_mode,
-                trading_mode = excluded.trading_mode,
-                graphrag_confidence = excluded.graphrag_confidence
-        """, (timestamp, date, total_value, cash_balance, invested_value,
-              daily_return_pct, cumulative_return_pct, benchmark_value,
-              benchmark_return_pct, mdd_pct, peak_value, holdings_json,
-              strategy_mode, trading_mode, graphrag_confidence))
+        with transaction() as conn:
+            cursor = conn.cursor()
+            
+            # Calculate MDD
+            cursor.execute("SELECT MAX(peak_value) FROM portfolio_history")
+            result = cursor.fetchone()
+            peak_value = result[0] if result and result[0] else total_value
+            peak_value = max(peak_value, total_value)
+            
+            mdd_pct = 0.0
+            if peak_value > 0:
+                mdd_pct = ((total_value - peak_value) / peak_value) * 100
+            
+            cursor.execute("""
+                INSERT INTO portfolio_history 
+                (timestamp, date, total_value, cash_balance, invested_value,
+                 daily_return_pct, cumulative_return_pct, benchmark_value, 
+                 benchmark_return_pct, mdd_pct, peak_value, holdings_json,
+                 strategy_mode, trading_mode, graphrag_confidence)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?, ?, ?)
+                ON CONFLICT(date) DO UPDATE SET
+                    timestamp = excluded.timestamp,
+                    total_value = excluded.total_value,
+                    cash_balance = excluded.cash_balance,
+                    invested_value = excluded.invested_value,
+                    daily_return_pct = excluded.daily_return_pct,
+                    cumulative_return_pct = excluded.cumulative_return_pct,
+                    benchmark_value = excluded.benchmark_value,
+                    benchmark_return_pct = excluded.benchmark_return_pct,
+                    mdd_pct = excluded.mdd_pct,
+                    peak_value = excluded.peak_value,
+                    holdings_json = excluded.holdings_json,
+                    strategy_mode = excluded.strategy_mode,
+                    trading_mode = excluded.trading_mode,
+                    graphrag_confidence = excluded.graphrag_confidence
+            """, (timestamp, date, total_value, cash_balance, invested_value,
+                  daily_return_pct, cumulative_return_pct, benchmark_value,
+                  benchmark_return_pct, mdd_pct, peak_value,
+                  strategy_mode, trading_mode, graphrag_confidence))
+            
+            # Per-symbol holdings go to the normalized child table
+            snapshot_id = cursor.execute("SELECT id FROM portfolio_history WHERE date = ?", (date,)).fetchone()[0]
+            replace_snapshot_holdings(cursor, snapshot_id, date, holdings)
         
-        conn.commit()
         logger.info(f"[DB] Portfolio history saved: date={date}, total=${total_value:.2f}, return={cumulative_return_pct:.2f}%, mdd={mdd_pct:.2f}%")
     except Exception as e:
         logger.error(f"[DB] Failed to log portfolio history: {e}")
-    finally:
-        conn.close()
 
 
 def get_portfolio_history(days: int = 30) -> pd.DataFrame:
@@ -492,17 +921,15 @@ def get_portfolio_history(days: int = 30) -> pd.DataFrame:
     Returns:
         DataFrame with portfolio history
     """
-    conn = sqlite3.connect(DB_PATH)
     query = f"""
         SELECT date, total_value, cash_balance, invested_value,
                daily_return_pct, cumulative_return_pct, 
-               benchmark_value, benchmark_return_pct, mdd_pct, holdings_json
+               benchmark_value, benchmark_return_pct, mdd_pct
         FROM portfolio_history 
         WHERE date >= date('now', '-{days} days')
         ORDER BY date ASC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = pd.read_sql_query(query, get_connection())
     logger.info(f"[DB] Retrieved {len(df)} portfolio history records (last {days} days)")
     return df
 
@@ -514,20 +941,29 @@ def get_latest_portfolio_snapshot():
     Returns:
         Dict with latest portfolio data or None
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute("""
         SELECT date, total_value, cash_balance, invested_value,
                daily_return_pct, cumulative_return_pct, 
-               benchmark_value, benchmark_return_pct, mdd_pct, holdings_json
+               benchmark_value, benchmark_return_pct, mdd_pct, id
         FROM portfolio_history 
         ORDER BY date DESC 
         LIMIT 1
     """)
     row = cursor.fetchone()
-    conn.close()
     
     if row:
+        cursor.execute("""
+            SELECT symbol, qty, avg_price, current_price, market_value, pnl_pct
+            FROM portfolio_holdings
+            WHERE snapshot_id = ?
+            ORDER BY id
+        """, (row[9],))
+        holdings = [
+            {'symbol': h[0], 'qty': h[1], 'avg_price': h[2], 'current_price': h[3],
+             'market_value': h[4], 'pnl_pct': h[5]}
+            for h in cursor.fetchall()
+        ]
         return {
             'date': row[0],
             'total_value': row[1],
@@ -538,11 +974,35 @@ def get_latest_portfolio_snapshot():
             'benchmark_value': row[6],
             'benchmark_return_pct': row[7],
             'mdd_pct': row[8],
-            'holdings': json.loads(row[9]) if row[9] else []
+            'holdings': holdings
         }
     return None
 
 
+def get_symbol_snapshot_history(symbol: str = None, days: int = 30) -> pd.DataFrame:
+    """
+    Get per-symbol holdings time series from portfolio snapshots.
+    
+    Args:
+        symbol: Filter by symbol (None for all)
+        days: Number of days to retrieve
+        
+    Returns:
+        DataFrame with date, symbol, qty, avg_price, current_price, market_value, pnl_pct
+    """
+    query = """
+        SELECT date, symbol, qty, avg_price, current_price, market_value, pnl_pct
+        FROM portfolio_holdings
+        WHERE date >= date('now', ?)
+    """
+    params = [f'-{int(days)} days']
+    if symbol:
+        query += " AND symbol = ?"
+        params.append(symbol)
+    query += " ORDER BY date ASC, symbol"
+    return pd.read_sql_query(query, get_connection(), params=params)
+
+
 def get_performance_metrics():
     """
     Calculate key performance metrics for investment analysis.
@@ -556,15 +1016,17 @@ def get_performance_metrics():
         - avg_daily_return: Average daily return
         - volatility: Standard deviation of daily returns
     """
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT date, daily_return_pct, cumulative_return_pct, mdd_pct
-        FROM portfolio_history 
-        ORDER BY date ASC
-    """, conn)
-    conn.close()
+    # One query over the trigger-maintained counters plus two index lookups (latest date, min MDD)
+    row = get_connection().execute("""
+        SELECT EXISTS (SELECT 1 FROM portfolio_history),
+               (SELECT cumulative_return_pct FROM portfolio_history ORDER BY date DESC LIMIT 1),
+               (SELECT MIN(mdd_pct) FROM portfolio_history),
+               s.return_days, s.return_sum, s.return_sumsq, s.positive_days
+        FROM stats_summary s
+        WHERE s.id = 1
+    """).fetchone()
     
-    if df.empty:
+    if not row or not row[0]:
         return {
             'total_return': 0,
             'mdd': 0,
@@ -575,20 +1037,21 @@ def get_performance_metrics():
             'total_days': 0
         }
     
-    daily_returns = df['daily_return_pct'].dropna()
+    _, total_return, mdd, total_days, return_sum, return_sumsq, positive_days = row
     
     # Basic metrics
-    total_return = df['cumulative_return_pct'].iloc[-1] if len(df) > 0 else 0
-    mdd = df['mdd_pct'].min() if len(df) > 0 else 0
+    total_return = total_return if total_return is not None else float('nan')
+    mdd = mdd if mdd is not None else float('nan')
     
     # Win rate (positive return days)
-    positive_days = (daily_returns > 0).sum()
-    total_days = len(daily_returns)
     win_rate = (positive_days / total_days * 100) if total_days > 0 else 0
     
-    # Average daily return and volatility
-    avg_daily = daily_returns.mean() if len(daily_returns) > 0 else 0
-    volatility = daily_returns.std() if len(daily_returns) > 1 else 0
+    # Average daily return and volatility (sample std, same as pandas)
+    avg_daily = return_sum / total_days if total_days > 0 else 0
+    volatility = 0
+    if total_days > 1:
+        variance = (return_sumsq - return_sum * return_sum / total_days) / (total_days - 1)
+        volatility = max(variance, 0) ** 0.5
     
     # Simplified Sharpe Ratio (annualized, assuming 252 trading days)
     # Sharpe = (avg_return - risk_free_rate) / volatility
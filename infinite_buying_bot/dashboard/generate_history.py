@@ -12,12 +12,14 @@ import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import yfinance as yf
 import pandas as pd
 
 # Setup path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from dashboard.database import migrate, replace_snapshot_holdings
+from dashboard.market_data import get_market_data_store
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,23 +33,21 @@ DB_PATH = Path(__file__).parent / "trading.db"
 
 def get_historical_prices(symbols: list, days: int = 30) -> dict:
     """
-    Get historical prices for given symbols using yfinance
+    Get historical prices for given symbols from the local market data store
+    (missing days are fetched from the configured provider and kept on disk)
     
     Returns:
         dict: {symbol: {date: close_price, ...}, ...}
     """
     logger.info(f"Fetching historical prices for {symbols}...")
+    store = get_market_data_store()
     prices = {}
     
     for symbol in symbols:
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=f"{days}d")
-            if not hist.empty:
-                prices[symbol] = {}
-                for date, row in hist.iterrows():
-                    date_str = date.strftime('%Y-%m-%d')
-                    prices[symbol][date_str] = float(row['Close'])
+            closes = store.get_closes([symbol], days=days).get(symbol)
+            if closes:
+                prices[symbol] = closes
                 logger.info(f"  {symbol}: {len(prices[symbol])} days of data")
         except Exception as e:
             logger.warning(f"  Failed to get {symbol}: {e}")
@@ -227,18 +227,15 @@ def generate_historical_portfolio(days: int = 14):
     # 4. Save to database
     logger.info(f"\n4️⃣ Saving {len(daily_values)} records to database...")
     
-    import json
-    
     for dv in daily_values:
         timestamp = datetime.now().isoformat()
-        holdings_json_str = json.dumps(dv['holdings_json'], ensure_ascii=False)
         
         cursor.execute("""
             INSERT INTO portfolio_history 
             (timestamp, date, total_value, cash_balance, invested_value,
              daily_return_pct, cumulative_return_pct, benchmark_value, 
              benchmark_return_pct, mdd_pct, peak_value, holdings_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
             ON CONFLICT(date) DO UPDATE SET
                 timestamp = excluded.timestamp,
                 total_value = excluded.total_value,
@@ -254,7 +251,10 @@ def generate_historical_portfolio(days: int = 14):
         """, (timestamp, dv['date'], dv['total_value'], dv['cash_balance'],
               dv['invested_value'], dv['daily_return_pct'], dv['cumulative_return_pct'],
               dv['benchmark_value'], dv['benchmark_return_pct'], dv['mdd_pct'],
-              dv['peak_value'], holdings_json_str))
+              dv['peak_value']))
+        
+        snapshot_id = cursor.execute("SELECT id FROM portfolio_history WHERE date = ?", (dv['date'],)).fetchone()[0]
+        replace_snapshot_holdings(cursor, snapshot_id, dv['date'], dv['holdings_json'])
     
     conn.commit()
     conn.close()
@@ -283,5 +283,6 @@ if __name__ == "__main__":
     parser.add_argument('--days', type=int, default=14, help='Number of days to generate (default: 14)')
     args = parser.parse_args()
     
+    migrate()
     success = generate_historical_portfolio(args.days)
     sys.exit(0 if success else 1)
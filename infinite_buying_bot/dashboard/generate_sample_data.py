@@ -9,7 +9,7 @@ import random
 sys.path.append(str(Path(__file__).parent.parent))
 
 from dashboard.database import (
-    set_initial_capital, log_trade, log_daily_stats
+    migrate, set_initial_capital, log_trade, log_daily_stats
 )
 
 def generate_sample_data():
@@ -117,4 +117,5 @@ def generate_sample_data():
     print(f"   - Return: {cumulative_return:+.2f}%")
 
 if __name__ == "__main__":
+    migrate()
     generate_sample_data()
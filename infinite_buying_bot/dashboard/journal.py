@@ -0,0 +1,261 @@
+"""
+Write-behind journal for bot telemetry
+Moves holdings/trade/snapshot persistence off the trading loop onto a background writer thread.
+"""
+import atexit
+import logging
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+
+from infinite_buying_bot.utils.clock import get_clock
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryJournal:
+    """
+    Background writer for dashboard telemetry.
+
+    The trading loop only enqueues events; a single writer thread flushes them to
+    SQLite in batched transactions (one BEGIN/COMMIT per batch).
+
+    Coalescing:
+        - holdings: only the latest snapshot is kept (log_holdings replaces the table anyway)
+        - portfolio snapshot: only the latest pending job is kept
+        - holdings history / trades: appended in order through a bounded queue, stamped when enqueued
+
+    Overflow:
+        - holdings history events are dropped when the queue is full (counted in `dropped`)
+        - trades are never dropped; they are written synchronously instead (counted in `overflowed`)
+
+    Failed batches:
+        - the batch is rolled back and its events are retried one row at a time
+        - trades that still fail are kept and retried ahead of the next batch (counted in `requeued`);
+          holdings history that still fails is dropped, holdings go back to their slot unless newer ones arrived
+    """
+
+    def __init__(self, max_queue_size: int = 1000, flush_interval: float = 1.0):
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._atexit_registered = False
+
+        # Coalesced slots (latest wins)
+        self._pending_holdings: Optional[List[dict]] = None
+        self._pending_snapshot: Optional[Callable[[], None]] = None
+        # Trades whose write failed, retried ahead of the next batch (writer thread only)
+        self._failed_trades: List[tuple] = []
+
+        # Counters
+        self.stats: Dict[str, int] = {
+            'enqueued': 0,
+            'written': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'overflowed': 0,
+            'requeued': 0,
+            'batches': 0,
+            'errors': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the writer thread (idempotent). Registers a flush-on-exit hook."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="telemetry-journal", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+        logger.info("[JOURNAL] Writer thread started")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the writer thread after flushing everything still pending."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join(timeout)
+        self._thread = None
+
+        # Write whatever the thread could not (e.g. join timed out before the last batch)
+        if not thread.is_alive():
+            self._drain()
+        for _, (args, kwargs) in self._failed_trades:  # still failing after the final drain
+            logger.error(f"[JOURNAL] Trade not written at shutdown: {args} {kwargs}")
+        logger.info(f"[JOURNAL] Stopped: {self.stats}")
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until every event submitted before this call has been written."""
+        if not self._thread or not self._thread.is_alive():
+            self._drain()
+            return True
+
+        done = threading.Event()
+        try:
+            self._queue.put(('flush', done), timeout=timeout)
+        except queue.Full:
+            return False
+        self._wake.set()
+        return done.wait(timeout)
+
+    # ------------------------------------------------------------------
+    # Producers (called from the trading loop)
+    # ------------------------------------------------------------------
+
+    def log_holdings(self, holdings: list):
+        """Replace current holdings (coalesced: only the latest is written)."""
+        with self._lock:
+            if self._pending_holdings is not None:
+                self.stats['coalesced'] += 1
+            self._pending_holdings = [dict(h) for h in holdings]
+            self.stats['enqueued'] += 1
+        self._ensure_started()
+
+    def log_holdings_history(self, holdings: list, strategy_mode: str = None):
+        """Append a holdings history snapshot (dropped if the queue is full)."""
+        event = ('holdings_history', ([dict(h) for h in holdings], strategy_mode, get_clock().now()))
+        if not self._offer(event):
+            with self._lock:
+                self.stats['dropped'] += 1
+            logger.warning(f"[JOURNAL] Queue full, holdings history dropped (total dropped: {self.stats['dropped']})")
+
+    def log_trade(self, *args, **kwargs):
+        """Append a trade (written synchronously if the queue is full)."""
+        kwargs.setdefault('at', get_clock().now())
+        if not self._offer(('trade', (args, kwargs))):
+            with self._lock:
+                self.stats['overflowed'] += 1
+            logger.warning("[JOURNAL] Queue full, writing trade synchronously")
+            from infinite_buying_bot.dashboard.database import log_trade
+            log_trade(*args, **kwargs)
+
+    def submit_snapshot(self, job: Callable[[], None]):
+        """Run a portfolio snapshot job on the writer thread (coalesced: latest wins)."""
+        with self._lock:
+            if self._pending_snapshot is not None:
+                self.stats['coalesced'] += 1
+            self._pending_snapshot = job
+            self.stats['enqueued'] += 1
+        self._ensure_started()
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+        self._wake.set()
+
+    def _offer(self, event) -> bool:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            return False
+        with self._lock:
+            self.stats['enqueued'] += 1
+        self._ensure_started()
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        """Write one batch: holdings + history + trades in a single transaction, then the snapshot job."""
+        with self._lock:
+            events, self._failed_trades = self._failed_trades, []
+        waiters = []
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'flush':
+                waiters.append(payload)
+            else:
+                events.append((kind, payload))
+
+        # Slots are taken after the queue so a flush marker never overtakes an earlier slot update
+        with self._lock:
+            holdings = self._pending_holdings
+            snapshot = self._pending_snapshot
+            self._pending_holdings = None
+            self._pending_snapshot = None
+
+        if holdings is not None or events:
+            from infinite_buying_bot.dashboard.database import transaction
+            try:
+                with transaction():
+                    if holdings is not None:
+                        self._write('holdings', holdings)
+                    for kind, payload in events:
+                        self._write(kind, payload)
+                with self._lock:
+                    self.stats['written'] += len(events) + (holdings is not None)
+                    self.stats['batches'] += 1
+            except Exception as e:
+                with self._lock:
+                    self.stats['errors'] += 1
+                logger.error(f"[JOURNAL] Batch write failed ({len(events)} events), retrying one by one: {e}")
+                self._write_each(holdings, events)
+
+        if snapshot is not None:
+            try:
+                snapshot()
+                with self._lock:
+                    self.stats['written'] += 1
+            except Exception as e:
+                with self._lock:
+                    self.stats['errors'] += 1
+                logger.error(f"[JOURNAL] Snapshot job failed: {e}")
+
+        for waiter in waiters:
+            waiter.set()
+
+    @staticmethod
+    def _write(kind: str, payload):
+        from infinite_buying_bot.dashboard.database import log_holdings, log_holdings_history, log_trade
+        if kind == 'holdings':
+            log_holdings(payload)
+        elif kind == 'holdings_history':
+            log_holdings_history(payload[0], strategy_mode=payload[1], at=payload[2])
+        elif kind == 'trade':
+            log_trade(*payload[0], **payload[1])
+
+    def _write_each(self, holdings: Optional[List[dict]], events: list):
+        """Fallback after a failed batch: one transaction per event so one bad row cannot take the others down."""
+        items = ([('holdings', holdings)] if holdings is not None else []) + events
+        for kind, payload in items:
+            try:
+                self._write(kind, payload)
+            except Exception as e:
+                logger.error(f"[JOURNAL] {kind} write failed: {e}")
+            else:
+                with self._lock:
+                    self.stats['written'] += 1
+                continue
+            with self._lock:
+                if kind == 'trade':
+                    self._failed_trades.append((kind, payload))
+                    self.stats['requeued'] += 1
+                elif kind == 'holdings':
+                    if self._pending_holdings is None:
+                        self._pending_holdings = payload
+                else:
+                    self.stats['dropped'] += 1
@@ -0,0 +1,389 @@
+"""
+Local market data store
+Daily OHLCV bars cached on disk (SQLite) and gap-filled from pluggable providers (yfinance, KIS).
+"""
+import os
+import sqlite3
+import threading
+import time
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).parent / "market_data.db"
+
+# Providers tried in order (comma separated: yfinance, kis). Override with MARKET_DATA_PROVIDERS.
+DEFAULT_PROVIDERS = "yfinance"
+
+BAR_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+# Longest run of calendar days without a bar (weekend + holiday, special closures). A fetched range
+# counts as covered up to an edge only if a bar lies within this many days of it.
+COVERAGE_SLACK_DAYS = 5
+
+# KIS price API exchange codes (same as Trader.get_price)
+KIS_PRICE_EXCHANGES = {
+    'TQQQ': 'NAS', 'QQQ': 'NAS', 'SHV': 'NAS', 'SOXL': 'NAS',
+    'MAGS': 'AMS', 'JEPI': 'AMS', 'SPY': 'AMS', 'SCHD': 'AMS'
+}
+
+
+def _to_date_str(value) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def _shift(day: str, days: int) -> str:
+    return (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+# =============================================================================
+# Fetchers
+# =============================================================================
+
+class PriceFetcher:
+    """
+    Provider of daily bars. Subclasses implement fetch().
+
+    fetch() returns a DataFrame with BAR_COLUMNS (date as 'YYYY-MM-DD'), an empty frame when the
+    range has no trading days, or None when the symbol is not supported (next provider is tried).
+    Network/API errors should be raised, never reported as an empty frame. A provider that can
+    only return part of the range returns what it has; the store covers only the dates returned.
+    """
+    name = 'base'
+
+    def fetch(self, symbol: str, start: str, end: str) -> Optional[pd.DataFrame]:
+        raise NotImplementedError
+
+
+class YFinanceFetcher(PriceFetcher):
+    """Daily bars from Yahoo Finance (stocks, ETFs and indices such as ^GSPC)"""
+    name = 'yfinance'
+
+    def fetch(self, symbol: str, start: str, end: str) -> Optional[pd.DataFrame]:
+        import yfinance as yf
+
+        hist = yf.Ticker(symbol).history(start=start, end=_shift(end, 1))  # end is exclusive
+        if hist.empty:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        return pd.DataFrame({
+            'date': [ts.strftime('%Y-%m-%d') for ts in hist.index],
+            'open': hist['Open'].astype(float).values,
+            'high': hist['High'].astype(float).values,
+            'low': hist['Low'].astype(float).values,
+            'close': hist['Close'].astype(float).values,
+            'volume': hist['Volume'].astype(float).values,
+        })
+
+
+class KISFetcher(PriceFetcher):
+    """Daily bars from the KIS overseas dailyprice API (stocks/ETFs only; indices are left to other providers)"""
+    name = 'kis'
+
+    PAGE_SIZE = 100
+    MAX_PAGES = 20
+
+    def __init__(self, exchanges: Dict[str, str] = None, default_exchange: str = 'NAS'):
+        self.exchanges = exchanges or KIS_PRICE_EXCHANGES
+        self.default_exchange = default_exchange
+
+    def fetch(self, symbol: str, start: str, end: str) -> Optional[pd.DataFrame]:
+        if symbol.startswith('^'):
+            return None
+
+        from infinite_buying_bot.api import kis_api as api
+        from infinite_buying_bot.api import kis_auth as ka
+        trenv = ka.getTREnv()
+        if not trenv:
+            return None
+
+        exchange = self.exchanges.get(symbol, self.default_exchange)
+        frames = []
+        cursor = end
+        for _ in range(self.MAX_PAGES):
+            page = api.get_daily_prices(trenv, exchange, symbol, end_date=cursor.replace('-', ''))
+            if page is None:
+                raise RuntimeError(f"KIS dailyprice failed for {symbol} ending {cursor}")
+            if page.empty:
+                break
+            frames.append(page)
+            oldest = min(page['xymd'])
+            oldest = f"{oldest[:4]}-{oldest[4:6]}-{oldest[6:]}"
+            if oldest <= start or len(page) < self.PAGE_SIZE:
+                break
+            cursor = _shift(oldest, -1)
+        else:
+            logger.warning(f"[MARKET DATA] kis: {symbol} stopped at {self.MAX_PAGES} pages before {start}")
+
+        if not frames:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        raw = pd.concat(frames, ignore_index=True).drop_duplicates('xymd')
+        bars = pd.DataFrame({
+            'date': [f"{d[:4]}-{d[4:6]}-{d[6:]}" for d in raw['xymd']],
+            'open': pd.to_numeric(raw.get('open'), errors='coerce'),
+            'high': pd.to_numeric(raw.get('high'), errors='coerce'),
+            'low': pd.to_numeric(raw.get('low'), errors='coerce'),
+            'close': pd.to_numeric(raw.get('clos'), errors='coerce'),
+            'volume': pd.to_numeric(raw.get('tvol'), errors='coerce'),
+        })
+        return bars[(bars['date'] >= start) & (bars['date'] <= end)].sort_values('date', ignore_index=True)
+
+
+FETCHERS = {
+    'yfinance': YFinanceFetcher,
+    'kis': KISFetcher,
+}
+
+
+def build_fetchers(providers: str = None) -> List[PriceFetcher]:
+    """Fetcher chain from a comma separated provider list (default: MARKET_DATA_PROVIDERS or yfinance)"""
+    providers = providers or os.getenv("MARKET_DATA_PROVIDERS", DEFAULT_PROVIDERS)
+    fetchers = []
+    for name in providers.split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in FETCHERS:
+            raise ValueError(f"Unknown market data provider: {name} (available: {', '.join(FETCHERS)})")
+        fetchers.append(FETCHERS[name]())
+    return fetchers
+
+
+# =============================================================================
+# Store
+# =============================================================================
+
+class MarketDataStore:
+    """
+    Daily OHLCV bars on disk with incremental gap filling.
+
+    Each symbol keeps a coverage range (first/last date already fetched), so a query only
+    goes to the network for the part of the range that was never fetched, plus the most
+    recent bar once it is older than `refresh_seconds` (today's bar is still moving).
+    Everything else, and everything when the providers are unreachable, comes from disk.
+
+    Usage:
+        store = get_market_data_store()
+        store.latest_close('^GSPC')                  # benchmark value
+        store.get_bars('TQQQ', days=30)              # DataFrame (date, open, high, low, close, volume)
+        store.get_closes(['TQQQ', 'SHV'], days=30)   # {symbol: {date: close}}
+    """
+
+    def __init__(self, db_path=None, fetchers: List[PriceFetcher] = None, refresh_seconds: float = 900.0):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.fetchers = fetchers if fetchers is not None else build_fetchers()
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ohlcv (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                source TEXT,
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ohlcv_coverage (
+                symbol TEXT PRIMARY KEY,
+                first_date TEXT NOT NULL,
+                last_date TEXT NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        """)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def get_bars(self, symbol: str, start=None, end=None, days: int = None, refresh: bool = True) -> pd.DataFrame:
+        """
+        Daily bars for [start, end] (inclusive, 'YYYY-MM-DD' or date).
+
+        Args:
+            days: Calendar days back from end (alternative to start)
+            refresh: Gap-fill from the providers first (False = disk only)
+        """
+        start, end = self._resolve_range(start, end, days)
+        if refresh:
+            self.update(symbol, start, end)
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT {', '.join(BAR_COLUMNS)} FROM ohlcv WHERE symbol = ? AND date BETWEEN ? AND ? ORDER BY date",
+                self._conn, params=(symbol, start, end)
+            )
+
+    def get_closes(self, symbols: Iterable[str], start=None, end=None, days: int = None,
+                   refresh: bool = True) -> Dict[str, Dict[str, float]]:
+        """Closing prices per symbol: {symbol: {date: close}} (symbols without data are omitted)"""
+        closes = {}
+        for symbol in symbols:
+            bars = self.get_bars(symbol, start, end, days, refresh)
+            if not bars.empty:
+                closes[symbol] = dict(zip(bars['date'], bars['close'].astype(float)))
+        return closes
+
+    def latest_close(self, symbol: str, lookback_days: int = 7, refresh: bool = True) -> Optional[float]:
+        """Most recent close within the last lookback_days (None if unavailable)"""
+        bars = self.get_bars(symbol, days=lookback_days, refresh=refresh)
+        return float(bars['close'].iloc[-1]) if not bars.empty else None
+
+    def coverage(self, symbol: str) -> Optional[dict]:
+        """Fetched date range of a symbol (None if never fetched)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT first_date, last_date, checked_at FROM ohlcv_coverage WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return {'first_date': row[0], 'last_date': row[1], 'checked_at': row[2]} if row else None
+
+    # ------------------------------------------------------------------
+    # Gap filling
+    # ------------------------------------------------------------------
+
+    def update(self, symbol: str, start, end) -> int:
+        """
+        Fetch the parts of [start, end] not yet on disk.
+
+        Returns:
+            Number of bars written (0 if nothing was missing or all providers failed)
+        """
+        start, end = _to_date_str(start), _to_date_str(end)
+        today = date.today().isoformat()
+        end = min(end, today)  # Never mark future dates as covered
+        if start > end:
+            return 0
+
+        with self._lock:
+            written = 0
+            for gap_start, gap_end in self._missing_ranges(symbol, start, end, today):
+                bars = self._fetch(symbol, gap_start, gap_end)
+                if bars is None:
+                    continue
+                written += self._store(symbol, bars, gap_start, gap_end)
+            return written
+
+    def _missing_ranges(self, symbol: str, start: str, end: str, today: str) -> list:
+        covered = self.coverage(symbol)
+        if covered is None:
+            return [(start, end)]
+
+        ranges = []
+        if start < covered['first_date']:
+            ranges.append((start, _shift(covered['first_date'], -1)))
+        recent = covered['last_date'] >= _shift(today, -1)
+        stale = time.time() - covered['checked_at'] >= self.refresh_seconds
+        if end > covered['last_date'] or (recent and stale and end >= covered['last_date']):
+            # Re-fetch the last covered day as well: it may have been an intraday bar
+            ranges.append((covered['last_date'], end))
+        return ranges
+
+    def _fetch(self, symbol: str, start: str, end: str) -> Optional[pd.DataFrame]:
+        for fetcher in self.fetchers:
+            try:
+                bars = fetcher.fetch(symbol, start, end)
+            except Exception as e:
+                logger.warning(f"[MARKET DATA] {fetcher.name} failed for {symbol} {start}~{end}: {e}")
+                continue
+            if bars is not None:
+                bars = bars.assign(source=fetcher.name)
+                return bars
+        return None
+
+    def _store(self, symbol: str, bars: pd.DataFrame, start: str, end: str) -> int:
+        rows = [
+            (symbol, row.date, row.open, row.high, row.low, row.close, row.volume, row.source)
+            for row in bars.itertuples(index=False)
+            if start <= row.date <= end
+        ]
+        covered = self._covered_range([row[1] for row in rows], start, end)
+        existing = self.coverage(symbol)
+        if covered is not None and existing is not None and (
+                covered[0] > _shift(existing['last_date'], 1) or covered[1] < _shift(existing['first_date'], -1)):
+            covered = None  # coverage is one contiguous range: never bridge a hole the fetch did not fill
+        if covered is None:
+            logger.warning(f"[MARKET DATA] {symbol}: bars for {start}~{end} incomplete, coverage unchanged")
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("""
+                INSERT OR REPLACE INTO ohlcv (symbol, date, open, high, low, close, volume, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            if covered is not None:
+                conn.execute("""
+                    INSERT INTO ohlcv_coverage (symbol, first_date, last_date, checked_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(symbol) DO UPDATE SET
+                        first_date = MIN(first_date, excluded.first_date),
+                        last_date = MAX(last_date, excluded.last_date),
+                        checked_at = CASE WHEN excluded.last_date >= last_date
+                                          THEN excluded.checked_at ELSE checked_at END
+                """, (symbol, *covered, time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info(f"[MARKET DATA] {symbol}: stored {len(rows)} bars {start}~{end}")
+        return len(rows)
+
+    @staticmethod
+    def _covered_range(dates: List[str], start: str, end: str) -> Optional[tuple]:
+        """
+        Part of [start, end] the fetched bars vouch for.
+
+        An edge is covered when a bar lies within COVERAGE_SLACK_DAYS of it (weekends and holidays have
+        no bar); otherwise coverage stops at the outermost bar, so a truncated or partial answer
+        leaves the rest to be fetched again. None when nothing can be marked covered.
+        """
+        if not dates:
+            # No bars at all: only a span too short to hold a trading day counts as fetched
+            return (start, end) if _shift(start, COVERAGE_SLACK_DAYS) >= end else None
+        first, last = min(dates), max(dates)
+        covered_start = start if _shift(start, COVERAGE_SLACK_DAYS) >= first else first
+        covered_end = end if _shift(last, COVERAGE_SLACK_DAYS) >= end else last
+        return covered_start, covered_end
+
+    @staticmethod
+    def _resolve_range(start, end, days):
+        end = _to_date_str(end) if end is not None else date.today().isoformat()
+        if start is None:
+            start = _shift(end, -(days if days is not None else 30))
+        return _to_date_str(start), end
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_store: Optional[MarketDataStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_market_data_store() -> MarketDataStore:
+    """Process-wide store (providers from MARKET_DATA_PROVIDERS, default yfinance)"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = MarketDataStore()
+        return _default_store
+
+
+def set_market_data_store(store: MarketDataStore) -> Optional[MarketDataStore]:
+    """Replace the process-wide store (e.g. an offline one for simulated runs); returns the previous one"""
+    global _default_store
+    with _default_store_lock:
+        previous, _default_store = _default_store, store
+    return previous
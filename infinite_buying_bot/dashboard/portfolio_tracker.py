@@ -12,8 +12,6 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 
-import yfinance as yf
-
 # Add parent paths for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -24,6 +22,7 @@ from dashboard.database import (
     get_performance_metrics,
     get_initial_capital
 )
+from dashboard.market_data import get_market_data_store
 
 logger = logging.getLogger(__name__)
 
@@ -116,16 +115,13 @@ class PortfolioTracker:
             benchmark_return_pct = 0.0
             
             try:
-                sp500 = yf.Ticker(self.benchmark_symbol)
-                hist = sp500.history(period="1d")
-                if not hist.empty:
-                    benchmark_value = float(hist['Close'].iloc[-1])
+                bars = get_market_data_store().get_bars(self.benchmark_symbol, days=30)
+                if not bars.empty:
+                    benchmark_value = float(bars['close'].iloc[-1])
                     
                     # Get benchmark initial value (30 days ago or first available)
                     if self._benchmark_initial is None:
-                        hist_30d = sp500.history(period="30d")
-                        if not hist_30d.empty:
-                            self._benchmark_initial = float(hist_30d['Close'].iloc[0])
+                        self._benchmark_initial = float(bars['close'].iloc[0])
                     
                     if self._benchmark_initial and self._benchmark_initial > 0:
                         benchmark_return_pct = ((benchmark_value - self._benchmark_initial) / self._benchmark_initial) * 100
@@ -34,11 +34,15 @@ sys.path.append(PROJECT_ROOT)
 
 from infinite_buying_bot.utils.notifier import Notifier
 from infinite_buying_bot.utils.scheduler import MarketScheduler
+from infinite_buying_bot.utils.clock import get_clock
+from infinite_buying_bot.utils.market_calendar import MarketCalendar, fetch_kis_holidays, set_calendar
 # InfiniteBuyingStrategy moved to bot_controller
 from infinite_buying_bot.core.trader import Trader
+from infinite_buying_bot.core.order_tracker import OrderTracker
+from infinite_buying_bot.core.trading_loop import TradingLoop
 from infinite_buying_bot.api.bot_controller import BotController
 from infinite_buying_bot.telegram_bot.bot import TradingTelegramBot
-from infinite_buying_bot.dashboard.database import set_initial_capital
+from infinite_buying_bot.dashboard.database import migrate, set_initial_capital
 
 # Logging Setup
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
@@ -121,6 +125,8 @@ def main():
         return
 
     notifier = Notifier(config)
+    # [NEW] Holiday/session calendar: NYSE rules + KIS holidays (fetched once a day, cached in logs/)
+    set_calendar(MarketCalendar(source=fetch_kis_holidays))
     scheduler = MarketScheduler()
     # Note: Strategy logic now fully handled by bot_controller
     
@@ -131,7 +137,8 @@ def main():
         notifier.send(f"Bot Initialization Failed: {e}")
         return
     
-    # Initialize dashboard database
+    # Initialize dashboard database (apply pending schema migrations once per process)
+    migrate()
     set_initial_capital(100000000)  # 1억
     logger.info("Dashboard database initialized")
     
@@ -140,6 +147,9 @@ def main():
     bot_controller.set_trader(trader)
     bot_controller.set_notifier(notifier)
     
+    # [NEW] Fill tracking from the execution-notice websocket (REST polling as fallback)
+    bot_controller.set_order_tracker(OrderTracker(trader.trenv).start())
+    
     # [FIX] Add PortfolioManager Initialization (Critical for Gradual Mode)
     from infinite_buying_bot.core.portfolio_manager import PortfolioManager
     portfolio_manager = PortfolioManager(initial_capital=0.0)
@@ -159,94 +169,36 @@ def main():
     
     notifier.send("Bot Started. Waiting for user to start trading via Telegram...")
     
+    # Optional local status endpoint for the dashboard (served from memory)
+    if os.getenv("BOT_STATUS_PORT"):
+        bot_controller.status_manager.start_endpoint(int(os.getenv("BOT_STATUS_PORT")))
+    
     # [FIX] Explicitly set status to RUNNING
     bot_controller.status_manager.set_status("running")
     bot_controller.status_manager.update_logic("Started", "Bot is running and waiting for command")
     
-    while True:
-        try:
-            # [FIX] Update Heartbeat
-            bot_controller.status_manager.update_heartbeat()
-
-            # 0. Sync Config (Control Mechanism)
-            bot_controller.sync_with_config()
+    run_trading_loop(bot_controller, scheduler, notifier)
 
-            # 1. Check if trading is enabled
-            if not bot_controller.is_running:
-                logger.info("Trading not started. Waiting for user command...")
-                bot_controller.status_manager.update_logic("Paused", "Trading disabled in config")
-                time.sleep(5)
-                continue
-            
-            # 1.5 Check S-T Exchange Schedule (Allow Pre-market Execution)
-            is_st_scheduled_now = False
-            is_scheduled_single_now = False  # [NEW] 예약매매 체크
-            trading_mode = getattr(bot_controller, 'trading_mode', 'gradual')
-            
-            if trading_mode == 'st-exchange':
-                daily_time = getattr(bot_controller, 'daily_time', '22:00')
-                # [FIX] Use KST for time comparison (Server is UTC)
-                tz_kst = pytz.timezone('Asia/Seoul')
-                now_kst = datetime.now(tz_kst)
-                
-                try:
-                    target_hour, target_minute = map(int, daily_time.split(':'))
-                    if now_kst.hour == target_hour and now_kst.minute == target_minute:
-                        # Check if already executed today
-                        if not hasattr(bot_controller, 'last_st_exchange_date') or bot_controller.last_st_exchange_date != now_kst.date(): 
-                            is_st_scheduled_now = True
-                            logger.info(f"[S-T EXCHANGE] Pre-market execution allowed for scheduled time: {daily_time} KST")
-                except ValueError:
-                    logger.error(f"Invalid daily_time format: {daily_time}")
-            
-            # [NEW] 예약매매(scheduled-single) 모드도 휴장 시간에 실행 허용
-            elif trading_mode == 'scheduled-single':
-                scheduled_time = getattr(bot_controller, 'scheduled_time', '22:00')
-                tz_kst = pytz.timezone('Asia/Seoul')
-                now_kst = datetime.now(tz_kst)
-                
-                try:
-                    target_hour, target_minute = map(int, scheduled_time.split(':'))
-                    # 목표 시간 ±1분 범위 체크 (정확히 해당 분에 실행)
-                    if now_kst.hour == target_hour and now_kst.minute == target_minute:
-                        # 오늘 이미 실행했는지 체크
-                        last_scheduled = getattr(bot_controller, 'last_scheduled_buy_date', None)
-                        if last_scheduled != now_kst.date():
-                            is_scheduled_single_now = True
-                            logger.info(f"[SCHEDULED-SINGLE] Pre-market execution allowed for scheduled time: {scheduled_time} KST")
-                except ValueError:
-                    logger.error(f"Invalid scheduled_time format: {scheduled_time}")
-
-            # 2. Check Market Status (S-T Exchange and Scheduled-Single bypass market check)
-            if not scheduler.is_market_open() and not is_st_scheduled_now and not is_scheduled_single_now:
-                logger.info("Market is closed. Sleeping...")
-                bot_controller.status_manager.update_logic("Sleeping", "Market is Closed", "MARKET CLOSED")
-                time.sleep(60)
-                continue
+def run_trading_loop(bot_controller, scheduler, notifier, clock=None, until=None):
+    """
+    Main trading loop: event-driven (see core/trading_loop.py).
 
-            # ============================================================
-            # [UNIFIED] Delegate ALL trading logic to BotController
-            # ============================================================
-            # bot_controller.run_monitoring_cycle() handles:
-            # - Market data fetching
-            # - Holdings logging to DB
-            # - Profit taking (10% auto-sell)
-            # - Gradual mode execution
-            # - S-T Exchange execution
-            # - Scheduled single execution
-            # - Status updates
-            bot_controller.run_monitoring_cycle()
-            
-            # Sleep between cycles
-            time.sleep(10)
+    Market open/close, scheduled trade times, gradual intervals, snapshots and schedule
+    zones are timers; fills from the OrderTracker trigger a cycle at once. Between events
+    the loop is idle, so scheduled times are hit to the second instead of on a 10 s tick.
 
-        except KeyboardInterrupt:
-            logger.info("Bot stopped by user.")
-            break
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            notifier.send(f"Bot Error: {e}")
-            time.sleep(60)
+    Args:
+        clock: Time source for the timers (default: wall clock). With a SimulatedClock
+               idle time is skipped and days run in seconds.
+        until: Stop once clock.now() (naive local time) reaches this (None = run until interrupted)
+    """
+    loop = TradingLoop(bot_controller, scheduler, notifier, clock=clock or get_clock())
+    try:
+        loop.run(until)
+    except KeyboardInterrupt:
+        logger.info("Bot stopped by user.")
+        bot_controller.shutdown()
+    logger.info(f"[EVENTS] Trading loop stopped after {loop.cycles} cycles ({loop.events.fired} events)")
 
 if __name__ == "__main__":
     main()
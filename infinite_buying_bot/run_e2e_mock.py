@@ -1,8 +1,12 @@
 import sys
 import os
+import json
 import time
 import logging
 import asyncio
+import argparse
+import tempfile
+from datetime import datetime, timedelta
 from threading import Thread
 from dotenv import load_dotenv
 
@@ -15,8 +19,10 @@ from infinite_buying_bot.core.portfolio_manager import PortfolioManager
 from infinite_buying_bot.core.rebalancing_engine import RebalancingEngine
 from infinite_buying_bot.api.bot_controller import BotController
 from infinite_buying_bot.telegram_bot.bot import TradingTelegramBot
-from infinite_buying_bot.dashboard.database import log_trade, set_initial_capital, log_holdings
+from infinite_buying_bot.dashboard.database import migrate, log_trade, set_initial_capital, log_holdings
 from infinite_buying_bot.test.mocks import MockTrader, MockScheduler
+from infinite_buying_bot.utils.clock import SimulatedClock, set_clock
+from infinite_buying_bot.utils.scheduler import MarketScheduler
 
 # Load .env
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
@@ -76,6 +82,7 @@ def main():
     notifier = Notifier(config) # This might try to send real notifications if configured
     
     # Initialize DB
+    migrate()
     set_initial_capital(100000000)
     
     # Initialize Portfolio Components
@@ -165,5 +172,76 @@ def main():
             logger.error(f"Error: {e}")
             time.sleep(1)
 
+class LogNotifier:
+    """Notifier that only logs (simulated runs must not message Telegram)"""
+    def send(self, message):
+        logger.info(f"[NOTIFY] {message}")
+
+
+def simulate(days=7, trading_mode='gradual', start=None, initial_cash=100000.0):
+    """
+    Run the production loop (core.trading_loop.TradingLoop + BotController) against MockTrader
+    on a SimulatedClock: sleeps return immediately, so start times, scheduled trades,
+    30-minute snapshots and weekends play out for `days` simulated days in minutes.
+
+    Everything the run writes (trading.db, logs/bot_status.json, runtime_config.json,
+    market_data.db) goes to a temp dir; the live files are neither read nor changed.
+    """
+    from infinite_buying_bot.core.trading_loop import TradingLoop
+    from infinite_buying_bot.dashboard import database
+    from infinite_buying_bot.dashboard.market_data import MarketDataStore, set_market_data_store
+
+    if start is None:
+        # Next Monday 00:00 KST
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today + timedelta(days=(7 - today.weekday()) % 7 or 7)
+    clock = SimulatedClock(start)
+    set_clock(clock)  # for code paths that don't take a clock argument
+
+    sim_dir = tempfile.mkdtemp(prefix="e2e_sim_")
+    database.DB_PATH = os.path.join(sim_dir, "trading.db")
+    set_market_data_store(MarketDataStore(os.path.join(sim_dir, "market_data.db"), fetchers=[]))  # offline
+
+    migrate()
+    trader = MockTrader(initial_balance=initial_cash)
+    notifier = LogNotifier()
+
+    # Start half invested at the default target weights: the modes size orders from
+    # existing holdings (gradual only prices symbols it holds, st-exchange sells SHV)
+    portfolio_manager = PortfolioManager(initial_capital=initial_cash)
+    for symbol, weight in portfolio_manager.target_allocation.items():
+        trader.buy(initial_cash * weight * 0.5, symbol, reason="Initial position")
+    portfolio_manager.update_cash(trader.cash)
+
+    with open(os.path.join(sim_dir, "runtime_config.json"), 'w', encoding='utf-8') as f:
+        json.dump({"command": "start", "trading_mode": trading_mode, "gradual_start_time": "23:40"}, f)
+
+    bot_controller = BotController(clock=clock, root_path=sim_dir)
+    bot_controller.set_trader(trader)
+    bot_controller.set_notifier(notifier)
+    bot_controller.portfolio_manager = portfolio_manager
+    scheduler = MarketScheduler(clock=clock)
+
+    logger.info(f"Simulating {days} days of '{trading_mode}' from {clock.now():%Y-%m-%d %H:%M} KST in {sim_dir}...")
+    started = time.monotonic()
+    loop = TradingLoop(bot_controller, scheduler, notifier, clock=clock)
+    loop.run(until=clock.now() + timedelta(days=days))
+    bot_controller.shutdown()
+
+    elapsed = time.monotonic() - started
+    holdings = ", ".join(f"{h['symbol']} {h['qty']}" for h in trader.get_all_holdings()) or "none"
+    logger.info(f"Simulated {days} days in {elapsed:.1f}s (until {clock.now():%Y-%m-%d %H:%M} KST)")
+    logger.info(f"Cash: ${trader.cash:,.2f} | Holdings: {holdings}")
+    logger.info(f"Cycles: {loop.cycles} | Events: {loop.events.fired} | Snapshots: {len(database.get_portfolio_history(days + 1))}")
+    return trader
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Mock E2E run (Telegram-driven, or simulated time)")
+    parser.add_argument('--simulate-days', type=float, help="Run N simulated days on a simulated clock and exit")
+    parser.add_argument('--mode', default='gradual', choices=['gradual', 'st-exchange', 'scheduled-single'])
+    args = parser.parse_args()
+    if args.simulate_days:
+        simulate(days=args.simulate_days, trading_mode=args.mode)
+    else:
+        main()
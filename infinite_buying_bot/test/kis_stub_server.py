@@ -0,0 +1,1008 @@
+"""
+Local KIS stand-in server (HTTP + websocket) for offline throughput and resilience tests
+
+Implements the endpoints the bot uses with KIS-shaped requests and responses:
+    POST /oauth2/tokenP                                       access token
+    POST /oauth2/Approval                                     websocket approval key
+    GET  /uapi/overseas-price/v1/quotations/price             HHDFS76200200
+    GET  /uapi/overseas-stock/v1/trading/inquire-psamount     TTTS3007R
+    GET  /uapi/overseas-stock/v1/trading/inquire-balance      TTTT3012R (tr_cont pagination)
+    POST /uapi/overseas-stock/v1/trading/order                TTTT1002U / TTTT1006U
+    GET  /uapi/overseas-stock/v1/trading/inquire-nccs         TTTS3018R (open orders)
+    GET  /uapi/overseas-stock/v1/trading/inquire-ccnl         TTTS3035R (order/fill history)
+    GET  /uapi/overseas-stock/v1/quotations/countries-holiday CTOS5011R (markets trading on a date)
+    GET  /uapi/domestic-stock/v1/quotations/chk-holiday       CTCA0903R (Korean open days)
+    GET  /uapi/domestic-stock/v1/quotations/inquire-price     FHKST01010100
+    ws   HDFSCNT0 (realtime quote) and H0GSCNI0 (execution notice) subscriptions and frames
+
+Behaviour is deterministic for a given seed: prices follow a seeded random walk that moves
+one step per tick, and orders are matched against that walk (a buy fills when its limit
+reaches the ask, a sell when it reaches the bid; otherwise it rests until a later tick).
+Latency, HTTP 500s and the rate-limit error (EGW00201) can be injected per request.
+
+Control endpoints (not part of KIS):
+    GET  /stub/state      account, orders and request statistics
+    POST /stub/tick       advance prices N steps ({"steps": N}) and match resting orders
+    POST /stub/config     change latency / error settings at runtime
+
+Usage:
+    python -m infinite_buying_bot.test.kis_stub_server --port 8765 --latency 0.05 --error-rate 0.02
+    KIS_BASE_URL=http://127.0.0.1:8765 python -m infinite_buying_bot.main
+
+    # In-process
+    with KisStubServer(StubConfig(seed=7, latency=0.01)) as stub:
+        os.environ['KIS_BASE_URL'] = stub.base_url
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from websockets.asyncio.server import serve as ws_serve
+except ImportError:  # websockets < 13 or not installed
+    ws_serve = None
+
+try:
+    from Crypto.Cipher import AES  # pycryptodome (same as examples_user/kis_auth.py)
+    from Crypto.Util.Padding import pad
+except ImportError:
+    AES = None
+
+logger = logging.getLogger(__name__)
+
+# Order exchange per symbol (same split as Trader.buy/sell)
+EXCHANGES = {
+    'TQQQ': 'NASD', 'QQQ': 'NASD', 'SHV': 'NASD', 'SOXL': 'NASD',
+    'MAGS': 'AMEX', 'JEPI': 'AMEX', 'SPY': 'AMEX', 'SCHD': 'AMEX'
+}
+
+DEFAULT_PRICES = {
+    'TQQQ': 50.0, 'QQQ': 480.0, 'SHV': 110.0, 'SOXL': 30.0,
+    'MAGS': 50.0, 'JEPI': 57.0, 'SPY': 560.0, 'SCHD': 75.0,
+    '005930': 70000.0, '069500': 35000.0  # domestic (KRW)
+}
+
+RATE_LIMIT_MSG = ('EGW00201', '초당 거래건수를 초과하였습니다.')
+
+# Column order of the realtime frames (same lists as examples_user/overseas_stock/overseas_stock_functions_ws.py)
+QUOTE_COLUMNS = [
+    'SYMB', 'ZDIV', 'TYMD', 'XYMD', 'XHMS', 'KYMD', 'KHMS', 'OPEN', 'HIGH', 'LOW', 'LAST', 'SIGN',
+    'DIFF', 'RATE', 'PBID', 'PASK', 'VBID', 'VASK', 'EVOL', 'TVOL', 'TAMT', 'BIVL', 'ASVL', 'STRN', 'MTYP'
+]
+CCNL_COLUMNS = [
+    'CUST_ID', 'ACNT_NO', 'ODER_NO', 'OODER_NO', 'SELN_BYOV_CLS', 'RCTF_CLS', 'ODER_KIND2',
+    'STCK_SHRN_ISCD', 'CNTG_QTY', 'CNTG_UNPR', 'STCK_CNTG_HOUR', 'RFUS_YN', 'CNTG_YN', 'ACPT_YN',
+    'BRNC_NO', 'ODER_QTY', 'ACNT_NAME', 'CNTG_ISNM', 'ODER_COND', 'DEBT_GB', 'DEBT_DATE',
+    'START_TM', 'END_TM', 'TM_DIV_TP'
+]
+QUOTE_TR_IDS = ('HDFSCNT0',)
+CCNL_TR_IDS = ('H0GSCNI0', 'H0GSCNI9')
+MAX_SUBSCRIPTIONS = 40
+
+
+@dataclass
+class StubConfig:
+    host: str = '127.0.0.1'
+    port: int = 8765                  # 0 = pick a free port
+    ws_port: Optional[int] = 0        # 0 = pick a free port, None = no websocket
+    seed: int = 42
+    latency: float = 0.0              # seconds added to every HTTP response
+    jitter: float = 0.0               # + uniform(0, jitter) seconds
+    error_rate: float = 0.0           # fraction of API calls answered with HTTP 500
+    rate_limit: int = 0               # calls per second per appkey before EGW00201 (0 = off, KIS: 20)
+    rate_limit_error_rate: float = 0.0  # fraction of API calls answered with EGW00201 regardless of rate
+    error_paths: List[str] = field(default_factory=list)  # limit injected errors to these paths ([] = all)
+    page_size: int = 50               # inquire-balance rows per page (KIS returns up to 50)
+    cash: float = 10000.0             # USD
+    holdings: Dict[str, List[float]] = field(default_factory=dict)  # {symbol: [qty, avg_price]}
+    prices: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_PRICES))
+    volatility: float = 0.002         # stdev of the log return per tick
+    spread_bps: float = 4.0           # bid/ask spread around the last price
+    liquidity: int = 0                # max shares filled per order per tick (0 = unlimited)
+    fee_rate: float = 0.0025
+    tick_interval: float = 1.0        # seconds between automatic ticks (0 = only /stub/tick)
+    ping_interval: float = 30.0       # websocket PINGPONG interval
+    account: str = '12345678'
+    hts_id: str = 'stubuser'
+    us_holidays: List[str] = field(default_factory=list)  # YYYYMMDD dropped from countries-holiday
+    kr_holidays: List[str] = field(default_factory=list)  # YYYYMMDD with opnd_yn N in chk-holiday
+
+
+@dataclass
+class StubOrder:
+    odno: str
+    side: str                         # 'buy' / 'sell'
+    symbol: str
+    exchange: str
+    qty: int
+    limit: float
+    created: str
+    filled: int = 0
+    fill_amount: float = 0.0
+    fee: float = 0.0
+    reserved: float = 0.0             # buys: cash still held for the unfilled part
+    status: str = 'open'              # open / filled
+
+    @property
+    def remaining(self) -> int:
+        return self.qty - self.filled
+
+    @property
+    def avg_fill_price(self) -> float:
+        return self.fill_amount / self.filled if self.filled else 0.0
+
+
+class StubMarket:
+    """Seeded random-walk prices with daily open/high/low and a fixed bid/ask spread"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.last = dict(config.prices)
+        self.base = dict(self.last)   # previous close
+        self.open = dict(self.last)
+        self.high = dict(self.last)
+        self.low = dict(self.last)
+        self.volume: Dict[str, int] = defaultdict(int)
+        self.ticks = 0
+
+    def tick(self):
+        self.ticks += 1
+        for symbol in sorted(self.last):
+            step = math.exp(self.rng.gauss(0.0, self.config.volatility))
+            price = self._round(symbol, self.last[symbol] * step)
+            self.last[symbol] = price
+            self.high[symbol] = max(self.high[symbol], price)
+            self.low[symbol] = min(self.low[symbol], price)
+
+    def has(self, symbol: str) -> bool:
+        return symbol in self.last
+
+    def bid_ask(self, symbol: str):
+        last = self.last[symbol]
+        half = max(last * self.config.spread_bps / 20000.0, self._unit(symbol))
+        return self._round(symbol, last - half), self._round(symbol, last + half)
+
+    def is_domestic(self, symbol: str) -> bool:
+        return symbol.isdigit()
+
+    def _unit(self, symbol: str) -> float:
+        return 1.0 if self.is_domestic(symbol) else 0.01
+
+    def _round(self, symbol: str, price: float) -> float:
+        unit = self._unit(symbol)
+        return max(round(price / unit) * unit, unit)
+
+
+class MatchingEngine:
+    """Account (cash, positions) plus limit-order matching against StubMarket"""
+
+    def __init__(self, config: StubConfig, market: StubMarket):
+        self.config = config
+        self.market = market
+        self.cash = float(config.cash)
+        self.reserved_cash = 0.0
+        self.positions: Dict[str, List[float]] = {s: [int(q), float(a)] for s, (q, a) in config.holdings.items()}
+        self.reserved_qty: Dict[str, int] = defaultdict(int)
+        self.orders: Dict[str, StubOrder] = {}
+        self.next_odno = 1
+        self.listeners: List[Callable[[str, StubOrder, int, float], None]] = []
+
+    @property
+    def available_cash(self) -> float:
+        return self.cash - self.reserved_cash
+
+    def submit(self, side: str, symbol: str, exchange: str, qty: int, limit: float, now: datetime):
+        """Returns (order, None) or (None, (msg_cd, msg1))"""
+        if not self.market.has(symbol):
+            return None, ('APBK0656', '해당종목정보가 없습니다.')
+        if qty <= 0 or limit <= 0:
+            return None, ('APBK0506', '주문수량 또는 주문단가를 확인하세요.')
+
+        reserved = 0.0
+        if side == 'buy':
+            reserved = qty * limit * (1 + self.config.fee_rate)
+            if reserved > self.available_cash + 1e-9:
+                return None, ('APBK0952', '주문가능금액을 초과 했습니다')
+            self.reserved_cash += reserved
+        else:
+            held = self.positions.get(symbol, [0, 0.0])[0]
+            if qty > held - self.reserved_qty[symbol]:
+                return None, ('APBK0986', '주문가능수량을 초과 했습니다')
+            self.reserved_qty[symbol] += qty
+
+        order = StubOrder(
+            odno=f"{self.next_odno:010d}", side=side, symbol=symbol, exchange=exchange,
+            qty=qty, limit=limit, created=now.strftime('%H%M%S'), reserved=reserved
+        )
+        self.next_odno += 1
+        self.orders[order.odno] = order
+        self._notify('accepted', order, 0, 0.0)
+        self._match(order)
+        return order, None
+
+    def match_all(self):
+        for order in list(self.orders.values()):
+            if order.status == 'open':
+                self._match(order)
+
+    def _match(self, order: StubOrder):
+        bid, ask = self.market.bid_ask(order.symbol)
+        if order.side == 'buy' and order.limit < ask:
+            return
+        if order.side == 'sell' and order.limit > bid:
+            return
+
+        price = ask if order.side == 'buy' else bid
+        qty = order.remaining
+        if self.config.liquidity > 0:
+            qty = min(qty, self.config.liquidity)
+        notional = qty * price
+        fee = notional * self.config.fee_rate
+
+        position = self.positions.setdefault(order.symbol, [0, 0.0])
+        if order.side == 'buy':
+            release = order.reserved * qty / order.remaining
+            order.reserved -= release
+            self.reserved_cash -= release
+            self.cash -= notional + fee
+            position[1] = (position[0] * position[1] + notional) / (position[0] + qty)
+            position[0] += qty
+        else:
+            self.reserved_qty[order.symbol] -= qty
+            self.cash += notional - fee
+            position[0] -= qty
+            if position[0] <= 0:
+                del self.positions[order.symbol]
+
+        order.filled += qty
+        order.fill_amount += notional
+        order.fee += fee
+        self.market.volume[order.symbol] += qty
+        if order.remaining == 0:
+            order.status = 'filled'
+        self._notify('filled', order, qty, price)
+
+    def _notify(self, event: str, order: StubOrder, qty: int, price: float):
+        for listener in self.listeners:
+            try:
+                listener(event, order, qty, price)
+            except Exception as e:
+                logger.error(f"[STUB] Order listener failed: {e}")
+
+
+class KisStubServer:
+    """
+    HTTP + websocket server in background threads.
+
+    Usage:
+        stub = KisStubServer(StubConfig(latency=0.02, error_rate=0.05)).start()
+        ...  # point KIS_BASE_URL at stub.base_url
+        print(stub.stats)
+        stub.stop()
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None):
+        self.config = config or StubConfig()
+        self.market = StubMarket(self.config)
+        self.engine = MatchingEngine(self.config, self.market)
+        self.engine.listeners.append(self._on_order_event)
+
+        self.lock = threading.RLock()
+        self.fault_rng = random.Random(self.config.seed + 1)
+        self.approval_keys: Dict[str, str] = {}   # approval_key -> appkey
+        self.calls: Dict[str, deque] = defaultdict(deque)  # appkey -> call times (rate limit window)
+        self.stats: Dict[str, int] = defaultdict(int)
+
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._ws_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws_task: Optional[asyncio.Task] = None
+        self._ws_ready = threading.Event()
+        self._ws_clients: Dict[object, Dict] = {}
+        self.ws_port: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.config.host}:{self._httpd.server_address[1]}"
+
+    @property
+    def ws_url(self) -> Optional[str]:
+        return f"ws://{self.config.host}:{self.ws_port}" if self.ws_port else None
+
+    def start(self) -> 'KisStubServer':
+        self._httpd = ThreadingHTTPServer((self.config.host, self.config.port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._spawn(self._httpd.serve_forever, 'kis-stub-http')
+
+        if self.config.ws_port is not None:
+            if ws_serve is None:
+                logger.warning("[STUB] websockets>=13 not installed, realtime frames disabled")
+            else:
+                self._spawn(self._run_ws, 'kis-stub-ws')
+                self._ws_ready.wait(timeout=5)
+
+        if self.config.tick_interval > 0:
+            self._spawn(self._run_ticker, 'kis-stub-ticker')
+
+        logger.info(f"[STUB] KIS stub listening on {self.base_url}" + (f" / {self.ws_url}" if self.ws_url else ""))
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        if self._ws_task is not None:
+            self._ws_loop.call_soon_threadsafe(self._ws_task.cancel)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def tick(self, steps: int = 1):
+        """Advance prices `steps` times, matching resting orders after each step"""
+        for _ in range(steps):
+            with self.lock:
+                self.market.tick()
+                self.engine.match_all()
+            self._broadcast_quotes()
+
+    def _run_ticker(self):
+        while not self._stop.wait(self.config.tick_interval):
+            self.tick()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._dispatch(self, 'GET')
+
+            def do_POST(self):
+                stub._dispatch(self, 'POST')
+
+            def log_message(self, format, *args):
+                pass  # keep benchmark output clean
+
+        return Handler
+
+    def _dispatch(self, request: BaseHTTPRequestHandler, method: str):
+        url = urlparse(request.path)
+        path = url.path
+        params = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        body = {}
+        if method == 'POST':
+            length = int(request.headers.get('Content-Length') or 0)
+            raw = request.rfile.read(length) if length else b''
+            try:
+                body = json.loads(raw or b'{}')
+            except ValueError:
+                return self._send(request, 400, {'error_description': 'invalid json'})
+
+        route = self.ROUTES.get((method, path))
+        if route is None:
+            return self._send(request, 404, {'rt_cd': '1', 'msg_cd': 'EGW00002', 'msg1': f'{path} not found'})
+
+        self.stats['requests'] += 1
+        self.stats[f'{method} {path}'] += 1
+        if not path.startswith('/stub/'):
+            delay = self.config.latency + (self.fault_rng.uniform(0, self.config.jitter) if self.config.jitter else 0)
+            if delay > 0:
+                time.sleep(delay)
+
+            fault = self._inject_fault(path, request.headers.get('appkey', ''))
+            if fault:
+                return self._send(request, *fault)
+
+        try:
+            status, payload, headers = getattr(self, route)(request.headers, params, body)
+        except Exception as e:
+            logger.exception(f"[STUB] {path} failed")
+            status, payload, headers = 500, {'rt_cd': '1', 'msg_cd': 'EGW00500', 'msg1': str(e)}, {}
+        self._send(request, status, payload, headers)
+
+    def _inject_fault(self, path: str, appkey: str):
+        """Returns (status, payload) for an injected error, or None"""
+        if path.startswith('/oauth2/'):
+            return None
+        targeted = not self.config.error_paths or path in self.config.error_paths
+        with self.lock:
+            if self.config.rate_limit > 0:
+                now = time.monotonic()
+                window = self.calls[appkey]
+                while window and now - window[0] >= 1.0:
+                    window.popleft()
+                window.append(now)
+                if len(window) > self.config.rate_limit:
+                    self.stats['rate_limited'] += 1
+                    return 500, self._error(*RATE_LIMIT_MSG)
+            if targeted and self.fault_rng.random() < self.config.rate_limit_error_rate:
+                self.stats['rate_limited'] += 1
+                return 500, self._error(*RATE_LIMIT_MSG)
+            if targeted and self.fault_rng.random() < self.config.error_rate:
+                self.stats['server_errors'] += 1
+                return 500, self._error('EGW00500', 'Internal Server Error')
+        return None
+
+    def _send(self, request: BaseHTTPRequestHandler, status: int, payload: Dict, headers: Optional[Dict] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        try:
+            request.send_response(status)
+            request.send_header('Content-Type', 'application/json; charset=utf-8')
+            request.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                request.send_header(key, value)
+            request.end_headers()
+            request.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (timeout)
+
+    @staticmethod
+    def _error(msg_cd: str, msg1: str) -> Dict:
+        return {'rt_cd': '1', 'msg_cd': msg_cd, 'msg1': msg1}
+
+    @staticmethod
+    def _ok(output, msg1: str = '정상처리 되었습니다.', **extra) -> Dict:
+        payload = {'rt_cd': '0', 'msg_cd': 'MCA00000', 'msg1': msg1}
+        payload.update(extra)
+        if output is not None:
+            payload['output'] = output
+        return payload
+
+    def _check_token(self, headers, tr_ids=()):
+        """Returns an error response tuple, or None when the call is authorized"""
+        token = (headers.get('authorization') or '').replace('Bearer ', '', 1)
+        if token != self._issue(headers.get('appkey'), headers.get('appsecret')):
+            return 500, self._error('EGW00121', '유효하지 않은 token 입니다.'), {}
+        if tr_ids and headers.get('tr_id') not in tr_ids:
+            return 500, self._error('EGW00205', f"tr_id({headers.get('tr_id')})를 확인하세요."), {}
+        return None
+
+    def _now(self) -> datetime:
+        return datetime.now()
+
+    # --- OAuth ---
+
+    def _token(self, headers, params, body):
+        appkey, secret = body.get('appkey'), body.get('appsecret')
+        if not appkey or not secret:
+            return 403, {'error_code': 'EGW00103', 'error_description': '유효하지 않은 AppKey입니다.'}, {}
+        token = self._issue(appkey, secret)
+        expires = self._now() + timedelta(days=1)
+        return 200, {
+            'access_token': token,
+            'access_token_token_expired': expires.strftime('%Y-%m-%d %H:%M:%S'),
+            'token_type': 'Bearer',
+            'expires_in': 86400
+        }, {}
+
+    @staticmethod
+    def _issue(appkey, secret) -> str:
+        """Token derived from the key pair, so a cached token stays valid across stub restarts"""
+        return hashlib.sha256(f"{appkey}:{secret}".encode()).hexdigest()
+
+    def _approval(self, headers, params, body):
+        appkey = body.get('appkey')
+        if not appkey or not (body.get('secretkey') or body.get('appsecret')):
+            return 403, {'error_code': 'EGW00103', 'error_description': '유효하지 않은 AppKey입니다.'}, {}
+        key = hashlib.sha256(f"approval:{appkey}:{len(self.approval_keys)}".encode()).hexdigest()[:36]
+        self.approval_keys[key] = appkey
+        return 200, {'approval_key': key}, {}
+
+    # --- Quotations ---
+
+    def _overseas_price(self, headers, params, body):
+        denied = self._check_token(headers, ('HHDFS76200200',))
+        if denied:
+            return denied
+        symbol = params.get('SYMB', '')
+        with self.lock:
+            if not self.market.has(symbol) or self.market.is_domestic(symbol):
+                # KIS answers unknown symbols with an empty quote
+                return 200, self._ok({'rsym': '', 'zdiv': '', 'base': '', 'last': '', 'tvol': ''}), {}
+            last, base = self.market.last[symbol], self.market.base[symbol]
+            output = {
+                'rsym': f"D{params.get('EXCD', '')}{symbol}",
+                'zdiv': '4',
+                'base': f"{base:.4f}",
+                'pvol': '0',
+                'last': f"{last:.4f}",
+                'sign': self._sign(last, base),
+                'diff': f"{abs(last - base):.4f}",
+                'rate': f"{(last / base - 1) * 100:.2f}",
+                'tvol': str(self.market.volume[symbol]),
+                'tamt': f"{self.market.volume[symbol] * last:.0f}",
+                'ordy': 'Y'
+            }
+        return 200, self._ok(output), {}
+
+    def _domestic_price(self, headers, params, body):
+        denied = self._check_token(headers, ('FHKST01010100',))
+        if denied:
+            return denied
+        symbol = params.get('FID_INPUT_ISCD', '')
+        with self.lock:
+            if not self.market.has(symbol) or not self.market.is_domestic(symbol):
+                return 200, self._error('MCA01000', '종목코드를 확인하세요.'), {}
+            last, base = self.market.last[symbol], self.market.base[symbol]
+            output = {
+                'stck_prpr': f"{last:.0f}",
+                'prdy_vrss': f"{last - base:.0f}",
+                'prdy_vrss_sign': self._sign(last, base),
+                'prdy_ctrt': f"{(last / base - 1) * 100:.2f}",
+                'stck_oprc': f"{self.market.open[symbol]:.0f}",
+                'stck_hgpr': f"{self.market.high[symbol]:.0f}",
+                'stck_lwpr': f"{self.market.low[symbol]:.0f}",
+                'stck_sdpr': f"{base:.0f}",
+                'acml_vol': str(self.market.volume[symbol]),
+                'acml_tr_pbmn': f"{self.market.volume[symbol] * last:.0f}"
+            }
+        return 200, self._ok(output), {}
+
+    @staticmethod
+    def _sign(last: float, base: float) -> str:
+        return '2' if last > base else '5' if last < base else '3'
+
+    # --- Account ---
+
+    def _psamount(self, headers, params, body):
+        denied = self._check_token(headers, ('TTTS3007R', 'VTTS3007R'))
+        if denied:
+            return denied
+        with self.lock:
+            cash = max(self.engine.available_cash, 0.0)
+            try:
+                unit_price = float(params.get('OVRS_ORD_UNPR') or 0)
+            except ValueError:
+                unit_price = 0.0
+            max_qty = int(cash / (unit_price * (1 + self.config.fee_rate))) if unit_price > 0 else 0
+            output = {
+                'tr_crcy_cd': 'USD',
+                'ord_psbl_frcr_amt': f"{cash:.2f}",
+                'frcr_ord_psbl_amt1': f"{cash:.2f}",
+                'ovrs_ord_psbl_amt': f"{cash:.2f}",
+                'max_ord_psbl_qty': str(max_qty),
+                'ovrs_max_ord_psbl_qty': str(max_qty),
+                'exrt': '1350.0000'
+            }
+        return 200, self._ok(output), {}
+
+    def _balance(self, headers, params, body):
+        denied = self._check_token(headers, ('TTTT3012R', 'TTTS3012R', 'VTTS3012R'))
+        if denied:
+            return denied
+        exchange = params.get('OVRS_EXCG_CD', '')
+        try:
+            offset = int(params.get('CTX_AREA_NK200') or 0) if headers.get('tr_cont') == 'N' else 0
+        except ValueError:
+            offset = 0
+
+        with self.lock:
+            rows = []
+            purchase_total = value_total = 0.0
+            for symbol in sorted(self.engine.positions):
+                if self.market.is_domestic(symbol) or EXCHANGES.get(symbol, 'NASD') != exchange:
+                    continue
+                qty, avg = self.engine.positions[symbol]
+                last = self.market.last.get(symbol, avg)
+                purchase, value = qty * avg, qty * last
+                purchase_total += purchase
+                value_total += value
+                rows.append({
+                    'cano': self.config.account,
+                    'acnt_prdt_cd': params.get('ACNT_PRDT_CD', '01'),
+                    'ovrs_pdno': symbol,
+                    'ovrs_item_name': symbol,
+                    'ovrs_cblc_qty': str(int(qty)),
+                    'ord_psbl_qty': str(int(qty - self.engine.reserved_qty[symbol])),
+                    'pchs_avg_pric': f"{avg:.4f}",
+                    'frcr_pchs_amt1': f"{purchase:.5f}",
+                    'now_pric2': f"{last:.6f}",
+                    'ovrs_stck_evlu_amt': f"{value:.5f}",
+                    'frcr_evlu_pfls_amt': f"{value - purchase:.5f}",
+                    'evlu_pfls_rt': f"{(value / purchase - 1) * 100 if purchase else 0:.2f}",
+                    'tr_crcy_cd': 'USD',
+                    'ovrs_excg_cd': exchange
+                })
+            summary = {
+                'frcr_pchs_amt1': f"{purchase_total:.5f}",
+                'tot_evlu_pfls_amt': f"{value_total - purchase_total:.5f}",
+                'tot_pftrt': f"{(value_total / purchase_total - 1) * 100 if purchase_total else 0:.8f}",
+                'ovrs_rlzt_pfls_amt': '0.00000',
+                'ovrs_tot_pfls': f"{value_total - purchase_total:.5f}",
+                'frcr_buy_amt_smtl1': f"{purchase_total:.6f}"
+            }
+
+        page = rows[offset:offset + self.config.page_size]
+        more = offset + self.config.page_size < len(rows)
+        payload = self._ok(None, output1=page, output2=summary,
+                           ctx_area_fk200=f"{self.config.account}^01^{exchange}^USD^^" if more else '',
+                           ctx_area_nk200=str(offset + self.config.page_size) if more else '')
+        # Response tr_cont: F/M = more pages follow, D/E = last page
+        return 200, payload, {'tr_cont': ('M' if offset else 'F') if more else ('E' if offset else 'D')}
+
+    def _order(self, headers, params, body):
+        buy_ids, sell_ids = ('TTTT1002U', 'TTTS1002U', 'VTTT1002U'), ('TTTT1006U', 'TTTS1006U', 'VTTT1001U')
+        denied = self._check_token(headers, buy_ids + sell_ids)
+        if denied:
+            return denied
+        side = 'buy' if headers.get('tr_id') in buy_ids else 'sell'
+        try:
+            qty = int(float(body.get('ORD_QTY') or 0))
+            limit = float(body.get('OVRS_ORD_UNPR') or 0)
+        except ValueError:
+            return 200, self._error('APBK0506', '주문수량 또는 주문단가를 확인하세요.'), {}
+
+        symbol, exchange = body.get('PDNO', ''), body.get('OVRS_EXCG_CD', '')
+        if self.market.has(symbol) and EXCHANGES.get(symbol, 'NASD') != exchange:
+            return 200, self._error('APBK1234', f'해외거래소코드({exchange})를 확인하세요.'), {}
+
+        with self.lock:
+            order, error = self.engine.submit(side, symbol, exchange, qty, limit, self._now())
+        if error:
+            self.stats['orders_rejected'] += 1
+            return 200, self._error(*error), {}
+        self.stats['orders'] += 1
+        return 200, self._ok({
+            'KRX_FWDG_ORD_ORGNO': '01790',
+            'ODNO': order.odno,
+            'ORD_TMD': order.created
+        }, msg1='주문 전송 완료 되었습니다.', msg_cd='APBK0013'), {}
+
+    def _order_row(self, order: StubOrder) -> Dict:
+        """inquire-nccs / inquire-ccnl row for one order"""
+        return {
+            'ord_dt': self._now().strftime('%Y%m%d'), 'ord_tmd': order.created,
+            'odno': order.odno, 'orgn_odno': '', 'pdno': order.symbol, 'prdt_name': order.symbol,
+            'sll_buy_dvsn_cd': '02' if order.side == 'buy' else '01',
+            'sll_buy_dvsn_cd_name': '매수' if order.side == 'buy' else '매도',
+            'ovrs_excg_cd': order.exchange, 'tr_crcy_cd': 'USD',
+            'ft_ord_qty': str(order.qty), 'ft_ord_unpr3': f"{order.limit:.4f}",
+            'ft_ccld_qty': str(order.filled), 'ft_ccld_unpr3': f"{order.avg_fill_price:.4f}",
+            'ft_ccld_amt3': f"{order.fill_amount:.4f}", 'nccs_qty': str(order.remaining),
+            'prcs_stat_name': '완료' if order.status == 'filled' else '접수',
+            'rjct_rson': '', 'rjct_rson_name': ''
+        }
+
+    def _nccs(self, headers, params, body):
+        denied = self._check_token(headers, ('TTTS3018R',))
+        if denied:
+            return denied
+        exchange = params.get('OVRS_EXCG_CD', 'NASD')
+        with self.lock:
+            rows = [self._order_row(o) for o in self.engine.orders.values()
+                    if o.status == 'open' and (exchange == 'NASD' or o.exchange == exchange)]
+        return 200, self._ok(rows, ctx_area_fk200='', ctx_area_nk200=''), {'tr_cont': 'D'}
+
+    def _ccnl(self, headers, params, body):
+        denied = self._check_token(headers, ('TTTS3035R', 'VTTS3035R'))
+        if denied:
+            return denied
+        symbol = params.get('PDNO', '%')
+        with self.lock:
+            rows = [self._order_row(o) for o in self.engine.orders.values()
+                    if symbol in ('', '%') or o.symbol == symbol]
+        return 200, self._ok(rows, ctx_area_fk200='', ctx_area_nk200=''), {'tr_cont': 'D'}
+
+    # --- Calendar ---
+
+    # (tr_natn_cd, natn_eng_abrv_cd, tr_mket_cd, tr_mket_name, settlement days)
+    MARKETS = [('840', 'US', '01', '나스닥', 1), ('840', 'US', '02', '뉴욕', 1), ('840', 'US', '03', '아멕스', 1),
+               ('344', 'HK', '01', '홍콩', 2), ('392', 'JP', '01', '도쿄', 2)]
+
+    def _countries_holiday(self, headers, params, body):
+        denied = self._check_token(headers, ('CTOS5011R',))
+        if denied:
+            return denied
+        try:
+            day = datetime.strptime(params.get('TRAD_DT', ''), '%Y%m%d')
+        except ValueError:
+            return 500, self._error('OPSQ2001', 'TRAD_DT를 확인하세요.'), {}
+        rows = []
+        if day.weekday() < 5:
+            for natn, abbr, mket, name, days in self.MARKETS:
+                if abbr == 'US' and day.strftime('%Y%m%d') in self.config.us_holidays:
+                    continue
+                settle = day
+                for _ in range(days):
+                    settle += timedelta(days=3 if settle.weekday() == 4 else 1)
+                rows.append({'prdt_type_cd': '512', 'tr_natn_cd': natn, 'natn_eng_abrv_cd': abbr,
+                             'tr_mket_cd': mket, 'tr_mket_name': name,
+                             'acpl_sttl_dt': settle.strftime('%Y%m%d'), 'dmst_sttl_dt': settle.strftime('%Y%m%d')})
+        return 200, self._ok(rows, ctx_area_nk='', ctx_area_fk=''), {'tr_cont': 'D'}
+
+    def _chk_holiday(self, headers, params, body):
+        denied = self._check_token(headers, ('CTCA0903R',))
+        if denied:
+            return denied
+        try:
+            start = datetime.strptime(params.get('BASS_DT', ''), '%Y%m%d')
+        except ValueError:
+            return 500, self._error('OPSQ2001', 'BASS_DT를 확인하세요.'), {}
+        rows = []
+        for n in range(24):
+            day = start + timedelta(days=n)
+            key = day.strftime('%Y%m%d')
+            flag = 'Y' if day.weekday() < 5 and key not in self.config.kr_holidays else 'N'
+            rows.append({'bass_dt': key, 'wday_dvsn_cd': f"{(day.weekday() + 1) % 7 + 1:02d}",
+                         'bzdy_yn': flag, 'tr_day_yn': flag, 'opnd_yn': flag, 'sttl_day_yn': flag})
+        return 200, self._ok(rows, ctx_area_nk='', ctx_area_fk=''), {'tr_cont': 'D'}
+
+    # --- Control ---
+
+    def _stub_state(self, headers, params, body):
+        with self.lock:
+            return 200, self.state(), {}
+
+    def _stub_tick(self, headers, params, body):
+        self.tick(int(body.get('steps', 1)))
+        return 200, {'ticks': self.market.ticks}, {}
+
+    def _stub_config(self, headers, params, body):
+        tunable = ('latency', 'jitter', 'error_rate', 'rate_limit', 'rate_limit_error_rate',
+                   'error_paths', 'page_size', 'liquidity', 'volatility', 'spread_bps', 'us_holidays', 'kr_holidays')
+        unknown = [k for k in body if k not in tunable]
+        if unknown:
+            return 400, {'error_description': f"not tunable: {unknown}"}, {}
+        with self.lock:
+            for key, value in body.items():
+                setattr(self.config, key, value)
+        return 200, {k: getattr(self.config, k) for k in tunable}, {}
+
+    def state(self) -> Dict:
+        return {
+            'ticks': self.market.ticks,
+            'cash': round(self.engine.cash, 2),
+            'available_cash': round(self.engine.available_cash, 2),
+            'positions': {s: {'qty': int(q), 'avg_price': round(a, 4)} for s, (q, a) in self.engine.positions.items()},
+            'prices': dict(self.market.last),
+            'orders': [asdict(o) for o in self.engine.orders.values()],
+            'stats': dict(self.stats)
+        }
+
+    ROUTES = {
+        ('POST', '/oauth2/tokenP'): '_token',
+        ('POST', '/oauth2/Approval'): '_approval',
+        ('GET', '/uapi/overseas-price/v1/quotations/price'): '_overseas_price',
+        ('GET', '/uapi/domestic-stock/v1/quotations/inquire-price'): '_domestic_price',
+        ('GET', '/uapi/overseas-stock/v1/trading/inquire-psamount'): '_psamount',
+        ('GET', '/uapi/overseas-stock/v1/trading/inquire-balance'): '_balance',
+        ('POST', '/uapi/overseas-stock/v1/trading/order'): '_order',
+        ('GET', '/uapi/overseas-stock/v1/trading/inquire-nccs'): '_nccs',
+        ('GET', '/uapi/overseas-stock/v1/trading/inquire-ccnl'): '_ccnl',
+        ('GET', '/uapi/overseas-stock/v1/quotations/countries-holiday'): '_countries_holiday',
+        ('GET', '/uapi/domestic-stock/v1/quotations/chk-holiday'): '_chk_holiday',
+        ('GET', '/stub/state'): '_stub_state',
+        ('POST', '/stub/tick'): '_stub_tick',
+        ('POST', '/stub/config'): '_stub_config',
+    }
+
+    # ------------------------------------------------------------------
+    # Websocket
+    # ------------------------------------------------------------------
+
+    def _run_ws(self):
+        self._ws_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._ws_loop)
+
+        async def main():
+            async with ws_serve(self._ws_handler, self.config.host, self.config.ws_port) as server:
+                self.ws_port = server.sockets[0].getsockname()[1]
+                self._ws_ready.set()
+                await self._ws_ping()
+
+        self._ws_task = self._ws_loop.create_task(main())
+        try:
+            self._ws_loop.run_until_complete(self._ws_task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"[STUB] websocket server failed: {e}")
+        finally:
+            self._ws_ready.set()
+            self._ws_loop.close()
+
+    async def _ws_ping(self):
+        while not self._stop.is_set():
+            await asyncio.sleep(self.config.ping_interval)
+            stamp = self._now().strftime('%Y%m%d%H%M%S')
+            await self._ws_send_all(json.dumps({'header': {'tr_id': 'PINGPONG', 'datetime': stamp}}))
+
+    async def _ws_handler(self, ws):
+        client = {'subs': set(), 'keys': {}}  # keys: tr_id -> (key, iv) for encrypted frames
+        self._ws_clients[ws] = client
+        try:
+            async for raw in ws:
+                reply = self._ws_request(client, raw)
+                if reply:
+                    await ws.send(json.dumps(reply, ensure_ascii=False))
+        except Exception as e:
+            logger.debug(f"[STUB] websocket closed: {e}")
+        finally:
+            self._ws_clients.pop(ws, None)
+
+    def _ws_request(self, client: Dict, raw) -> Optional[Dict]:
+        try:
+            message = json.loads(raw)
+            header, request = message['header'], message['body']['input']
+            tr_id, tr_key = request['tr_id'], request['tr_key']
+        except (ValueError, KeyError, TypeError):
+            return None  # PINGPONG echoes and garbage
+
+        def reply(rt_cd, msg_cd, msg1, output=None, encrypt='N'):
+            body = {'rt_cd': rt_cd, 'msg_cd': msg_cd, 'msg1': msg1}
+            if output:
+                body['output'] = output
+            return {'header': {'tr_id': tr_id, 'tr_key': tr_key, 'encrypt': encrypt}, 'body': body}
+
+        if header.get('approval_key') not in self.approval_keys:
+            return reply('1', 'OPSP0011', 'invalid approval : NOT FOUND')
+        if tr_id not in QUOTE_TR_IDS + CCNL_TR_IDS:
+            return reply('1', 'OPSP0002', 'invalid tr_id')
+
+        sub = (tr_id, tr_key)
+        if header.get('tr_type') == '2':
+            client['subs'].discard(sub)
+            return reply('0', 'OPSP0003', 'UNSUBSCRIBE SUCCESS')
+        if sub in client['subs']:
+            return reply('1', 'OPSP0002', 'ALREADY IN SUBSCRIBE')
+        if len(client['subs']) >= MAX_SUBSCRIPTIONS:
+            return reply('1', 'OPSP0008', 'MAX SUBSCRIBE OVER')
+
+        client['subs'].add(sub)
+        if tr_id in CCNL_TR_IDS and AES is not None:
+            rng = random.Random(f"{self.config.seed}:{tr_key}")
+            alphabet = 'abcdefghijklmnopqrstuvwxyz0123456789'
+            key = ''.join(rng.choice(alphabet) for _ in range(32))
+            iv = ''.join(rng.choice(alphabet) for _ in range(16))
+            client['keys'][tr_id] = (key, iv)
+            return reply('0', 'OPSP0000', 'SUBSCRIBE SUCCESS', {'iv': iv, 'key': key}, encrypt='Y')
+        return reply('0', 'OPSP0000', 'SUBSCRIBE SUCCESS')
+
+    def _ws_post(self, frames: List):
+        """Queue ((tr_id, tr_key), fields) frames for delivery from any thread"""
+        if self._ws_loop is None or not self._ws_clients:
+            return
+        asyncio.run_coroutine_threadsafe(self._ws_deliver(frames), self._ws_loop)
+
+    async def _ws_deliver(self, frames: List):
+        for ws, client in list(self._ws_clients.items()):
+            for (tr_id, tr_key), fields in frames:
+                if (tr_id, tr_key) not in client['subs'] and not (tr_key is None and any(s[0] == tr_id for s in client['subs'])):
+                    continue
+                data = '^'.join(fields)
+                if tr_id in client['keys']:
+                    key, iv = client['keys'][tr_id]
+                    cipher = AES.new(key.encode('utf-8'), AES.MODE_CBC, iv.encode('utf-8'))
+                    data = base64.b64encode(cipher.encrypt(pad(data.encode('utf-8'), AES.block_size))).decode()
+                    frame = f"1|{tr_id}|001|{data}"
+                else:
+                    frame = f"0|{tr_id}|001|{data}"
+                try:
+                    await ws.send(frame)
+                except Exception:
+                    break
+
+    async def _ws_send_all(self, message: str):
+        for ws in list(self._ws_clients):
+            try:
+                await ws.send(message)
+            except Exception:
+                pass
+
+    def _broadcast_quotes(self):
+        if not self._ws_clients:
+            return
+        now = self._now()
+        frames = []
+        with self.lock:
+            for symbol in sorted(self.market.last):
+                if self.market.is_domestic(symbol):
+                    continue
+                exchange = {'NASD': 'NAS', 'AMEX': 'AMS', 'NYSE': 'NYS'}[EXCHANGES.get(symbol, 'NASD')]
+                last, base = self.market.last[symbol], self.market.base[symbol]
+                bid, ask = self.market.bid_ask(symbol)
+                volume = self.market.volume[symbol]
+                values = {
+                    'SYMB': symbol, 'ZDIV': '4', 'TYMD': now.strftime('%Y%m%d'), 'XYMD': now.strftime('%Y%m%d'),
+                    'XHMS': now.strftime('%H%M%S'), 'KYMD': now.strftime('%Y%m%d'), 'KHMS': now.strftime('%H%M%S'),
+                    'OPEN': f"{self.market.open[symbol]:.4f}", 'HIGH': f"{self.market.high[symbol]:.4f}",
+                    'LOW': f"{self.market.low[symbol]:.4f}", 'LAST': f"{last:.4f}", 'SIGN': self._sign(last, base),
+                    'DIFF': f"{abs(last - base):.4f}", 'RATE': f"{(last / base - 1) * 100:.2f}",
+                    'PBID': f"{bid:.4f}", 'PASK': f"{ask:.4f}", 'VBID': '100', 'VASK': '100',
+                    'EVOL': '0', 'TVOL': str(volume), 'TAMT': f"{volume * last:.0f}",
+                    'BIVL': '0', 'ASVL': '0', 'STRN': '100.00', 'MTYP': '1'
+                }
+                fields = [values[c] for c in QUOTE_COLUMNS]
+                frames.append((('HDFSCNT0', f"D{exchange}{symbol}"), fields))
+        self._ws_post(frames)
+
+    def _on_order_event(self, event: str, order: StubOrder, qty: int, price: float):
+        """MatchingEngine listener -> H0GSCNI0 execution notice (CNTG_YN 1 = accepted, 2 = filled)"""
+        values = {
+            'CUST_ID': self.config.hts_id, 'ACNT_NO': self.config.account + '01', 'ODER_NO': order.odno,
+            'OODER_NO': '', 'SELN_BYOV_CLS': '02' if order.side == 'buy' else '01', 'RCTF_CLS': '0',
+            'ODER_KIND2': '1', 'STCK_SHRN_ISCD': order.symbol, 'CNTG_QTY': str(qty if event == 'filled' else order.qty),
+            'CNTG_UNPR': f"{price if event == 'filled' else order.limit:.4f}",
+            'STCK_CNTG_HOUR': self._now().strftime('%H%M%S'), 'RFUS_YN': '0',
+            'CNTG_YN': '2' if event == 'filled' else '1', 'ACPT_YN': '2', 'BRNC_NO': '01790',
+            'ODER_QTY': str(order.qty), 'ACNT_NAME': 'STUB', 'CNTG_ISNM': order.symbol, 'ODER_COND': '0',
+            'DEBT_GB': '', 'DEBT_DATE': '', 'START_TM': '', 'END_TM': '', 'TM_DIV_TP': ''
+        }
+        fields = [values[c] for c in CCNL_COLUMNS]
+        # tr_key None = every subscriber of the tr_id (the stub has a single account)
+        self._ws_post([((tr_id, None), fields) for tr_id in CCNL_TR_IDS])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local KIS stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ws-port', type=int, default=21000, help="-1 = no websocket")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of HTTP 500 responses")
+    parser.add_argument('--rate-limit', type=int, default=0, help="Calls/sec per appkey before EGW00201 (KIS: 20)")
+    parser.add_argument('--rate-limit-error-rate', type=float, default=0.0)
+    parser.add_argument('--page-size', type=int, default=50, help="inquire-balance rows per page")
+    parser.add_argument('--cash', type=float, default=10000.0)
+    parser.add_argument('--holdings', default='{}', help='JSON, e.g. {"TQQQ": [10, 48.5]}')
+    parser.add_argument('--liquidity', type=int, default=0, help="Max shares filled per order per tick")
+    parser.add_argument('--tick-interval', type=float, default=1.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = StubConfig(
+        host=args.host, port=args.port, ws_port=None if args.ws_port < 0 else args.ws_port,
+        seed=args.seed, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, rate_limit_error_rate=args.rate_limit_error_rate,
+        page_size=args.page_size, cash=args.cash, holdings=json.loads(args.holdings),
+        liquidity=args.liquidity, tick_interval=args.tick_interval
+    )
+    stub = KisStubServer(config).start()
+    print(f"KIS_BASE_URL={stub.base_url}" + (f"  (websocket {stub.ws_url})" if stub.ws_url else ""))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import random
 import logging
+from infinite_buying_bot.core.trader import OrderResult
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -22,7 +23,10 @@ class MockTrader:
         self.current_prices = {
             "SOXL": 30.0,
             "TQQQ": 50.0,
-            "SCHD": 75.0
+            "SCHD": 75.0,
+            "MAGS": 50.0,
+            "SHV": 110.0,
+            "JEPI": 57.0
         }
         self.price_trend = {
             "SOXL": 0.0,
@@ -30,12 +34,39 @@ class MockTrader:
             "SCHD": 0.0
         }
         
-    def get_price(self):
+    def get_price(self, symbol=None):
         """Simulate price movement"""
+        target = symbol or self.symbol
+        if target not in self.current_prices:
+            return 0
         # Apply random walk with momentum
         change = (random.random() - 0.5) * 0.5 # -0.25 to +0.25
-        self.current_prices[self.symbol] += change
-        return round(self.current_prices[self.symbol], 2)
+        self.current_prices[target] = max(self.current_prices[target] + change, 0.01)
+        return round(self.current_prices[target], 2)
+
+    def get_prices(self, symbols):
+        return {symbol: self.get_price(symbol) for symbol in symbols}
+
+    def place_orders(self, orders, prices=None, notify=True):
+        """Same signature as Trader.place_orders (sells first, results in input order)"""
+        results = [None] * len(orders)
+        sides = [order.get('side') or order.get('type') for order in orders]
+        for n in sorted(range(len(orders)), key=lambda n: sides[n] != 'sell'):
+            order, side = orders[n], sides[n]
+            symbol = order['symbol']
+            qty = order.get('qty')
+            before = self.holdings.get(symbol, {}).get('qty', 0)
+            if side == 'sell':
+                ok = self.sell(qty or 0, symbol, reason=order.get('reason'), fallback_price=order.get('fallback_price'))
+            else:
+                price = (prices or {}).get(symbol) or self.current_prices.get(symbol, 0)
+                amount = qty * price if qty is not None else order.get('amount', 0)
+                ok = self.buy(amount, symbol, reason=order.get('reason'))
+            filled = abs(self.holdings.get(symbol, {}).get('qty', 0) - before)
+            price = round(self.current_prices.get(symbol, 0), 2)
+            results[n] = OrderResult(symbol, str(side), filled if ok else (qty or 0), price, bool(ok),
+                                     error='' if ok else 'rejected')
+        return results
 
     def get_balance(self):
         """Return current balance state"""
@@ -48,28 +79,50 @@ class MockTrader:
             
         return self.cash, qty, avg_price
 
-    def buy(self, amount, split_count=None, reason=None):
-        price = self.get_price()
+    def buy(self, amount, symbol=None, reason=None, **kwargs):
+        """Same signature as Trader.buy (amount in USD, qty = amount // price)"""
+        target = symbol or self.symbol
+        price = self.get_price(target)
+        if price <= 0:
+            return False
         qty = int(amount / price)
         
         if qty > 0 and self.cash >= (qty * price):
             self.cash -= (qty * price)
             
             # Update holdings
-            if self.symbol not in self.holdings:
-                self.holdings[self.symbol] = {'qty': 0, 'avg_price': 0.0}
+            if target not in self.holdings:
+                self.holdings[target] = {'qty': 0, 'avg_price': 0.0}
             
-            current = self.holdings[self.symbol]
+            current = self.holdings[target]
             total_cost = (current['qty'] * current['avg_price']) + (qty * price)
             total_qty = current['qty'] + qty
             
             current['qty'] = total_qty
             current['avg_price'] = total_cost / total_qty
             
-            logger.info(f"[MOCK] Bought {qty} {self.symbol} @ ${price:.2f}")
+            logger.info(f"[MOCK] Bought {qty} {target} @ ${price:.2f}")
             return True
         return False
 
+    def sell(self, qty, symbol=None, reason=None, fallback_price=None):
+        """Same signature as Trader.sell"""
+        target = symbol or self.symbol
+        held = self.holdings.get(target)
+        if not held or qty <= 0 or qty > held['qty']:
+            return False
+        price = self.get_price(target) or fallback_price or 0
+        if price <= 0:
+            return False
+        
+        self.cash += qty * price
+        held['qty'] -= qty
+        if held['qty'] == 0:
+            del self.holdings[target]
+        
+        logger.info(f"[MOCK] Sold {qty} {target} @ ${price:.2f}")
+        return True
+
     def sell_all(self, quantity):
         if self.symbol in self.holdings:
             price = self.get_price()
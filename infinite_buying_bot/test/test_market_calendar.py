@@ -0,0 +1,138 @@
+import sys
+import os
+import tempfile
+from datetime import date, datetime, time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from infinite_buying_bot.utils.clock import KST, SimulatedClock
+from infinite_buying_bot.utils.market_calendar import (
+    AFTER, CLOSED, ET, PRE, REGULAR, MarketCalendar, nyse_half_days, nyse_holidays
+)
+
+NYSE_2025 = [
+    date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+    date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 11, 27),
+    date(2025, 12, 25),
+]
+NYSE_2026 = [
+    date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3), date(2026, 5, 25),
+    date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7), date(2026, 11, 26), date(2026, 12, 25),
+]
+
+
+def et(*args):
+    return ET.localize(datetime(*args))
+
+
+def make_calendar(source=None, cache_path=None, now=datetime(2025, 11, 25, 9, 0)):
+    return MarketCalendar(source=source, cache_path=cache_path, clock=SimulatedClock(now, tz=KST))
+
+
+def test_nyse_holidays():
+    print("Testing NYSE holiday rules...")
+    assert sorted(nyse_holidays(2025)) == NYSE_2025
+    assert sorted(nyse_holidays(2026)) == NYSE_2026
+    assert nyse_holidays(2025)[date(2025, 1, 9)].startswith("National Day of Mourning")
+
+
+def test_observed_rules():
+    # Saturday July 4th -> Friday; Sunday Juneteenth -> Monday
+    assert nyse_holidays(2026)[date(2026, 7, 3)] == "Independence Day"
+    assert nyse_holidays(2022)[date(2022, 6, 20)] == "Juneteenth"
+    # Saturday Christmas 2027 -> Friday Dec 24; Saturday New Year 2028 is not moved to Dec 31
+    assert date(2027, 12, 24) in nyse_holidays(2027)
+    assert date(2027, 12, 31) not in nyse_holidays(2027)
+    assert not any(day.month == 1 and day.day <= 3 for day in nyse_holidays(2028))
+    assert not any(name == "Juneteenth" for name in nyse_holidays(2021).values())
+
+
+def test_half_days():
+    assert sorted(nyse_half_days(2025, nyse_holidays(2025))) == [
+        date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)
+    ]
+    # July 3rd 2026 is the observed Independence Day, not a half-day
+    assert sorted(nyse_half_days(2026, nyse_holidays(2026))) == [date(2026, 11, 27), date(2026, 12, 24)]
+
+    calendar = make_calendar()
+    assert calendar.close_time(date(2025, 11, 28)) == time(13, 0)
+    assert calendar.close_time(date(2025, 11, 26)) == time(16, 0)
+    assert calendar.close_time(date(2025, 11, 27)) is None
+    assert calendar.session(et(2025, 11, 28, 14, 0)) == AFTER
+    assert calendar.session(et(2025, 11, 28, 17, 30)) == CLOSED
+
+
+def test_trading_days_and_sessions():
+    calendar = make_calendar()
+    assert calendar.is_trading_day(date(2025, 1, 8))
+    assert not calendar.is_trading_day(date(2025, 1, 9))
+    assert not calendar.is_trading_day(date(2025, 1, 11))  # Saturday
+    assert calendar.holiday_name(date(2025, 4, 18)) == "Good Friday"
+    assert calendar.holiday_name(date(2025, 4, 17)) is None
+
+    assert calendar.session(et(2025, 3, 10, 8, 0)) == PRE
+    assert calendar.session(et(2025, 3, 10, 9, 30)) == REGULAR
+    assert calendar.session(et(2025, 3, 10, 16, 0)) == REGULAR
+    assert calendar.session(et(2025, 3, 10, 18, 0)) == AFTER
+    assert calendar.session(et(2025, 3, 10, 21, 0)) == CLOSED
+    assert calendar.session(et(2025, 3, 10, 3, 0)) == CLOSED
+    assert calendar.is_open(et(2025, 3, 10, 8, 0), extended=True)
+    assert not calendar.is_open(et(2025, 3, 10, 8, 0))
+    # Times in other zones are converted: 22:30 KST = 09:30 ET on Monday (EDT)
+    assert calendar.is_open(datetime(2025, 3, 10, 22, 30, tzinfo=KST))
+
+
+def test_next_open_and_close():
+    calendar = make_calendar()
+    # Weekend: Friday after the close -> Monday
+    assert calendar.next_open(et(2025, 3, 7, 17, 0)) == et(2025, 3, 10, 9, 30)
+    assert calendar.next_close(et(2025, 3, 7, 17, 0)) == et(2025, 3, 10, 16, 0)
+    # Before the open the same day, during the session the next day
+    assert calendar.next_open(et(2025, 3, 10, 8, 0)) == et(2025, 3, 10, 9, 30)
+    assert calendar.next_open(et(2025, 3, 10, 10, 0)) == et(2025, 3, 11, 9, 30)
+    assert calendar.next_close(et(2025, 3, 10, 10, 0)) == et(2025, 3, 10, 16, 0)
+    # Holidays: Good Friday + weekend, and the Jan 9 closure between two trading days
+    assert calendar.next_open(et(2025, 4, 17, 16, 30)) == et(2025, 4, 21, 9, 30)
+    assert calendar.next_open(et(2025, 1, 8, 12, 0)) == et(2025, 1, 10, 9, 30)
+    # Thanksgiving -> the half-day after it closes at 13:00
+    assert calendar.next_open(et(2025, 11, 27, 10, 0)) == et(2025, 11, 28, 9, 30)
+    assert calendar.next_close(et(2025, 11, 27, 10, 0)) == et(2025, 11, 28, 13, 0)
+    assert calendar.next_close(et(2025, 11, 28, 14, 0)) == et(2025, 12, 1, 16, 0)
+    # Across the year end (Jan 1 2026 is a Thursday holiday)
+    assert calendar.next_open(et(2025, 12, 31, 16, 30)) == et(2026, 1, 2, 9, 30)
+
+
+def test_kis_closures_and_cache():
+    closure = date(2025, 11, 25)
+
+    def source(today):
+        return {'us_closed': {closure: "KIS"}, 'us_checked': [closure], 'kr_open': {today: True}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'market_calendar.json')
+        calendar = make_calendar(source, cache_path)
+        assert calendar.is_trading_day(closure)
+        assert calendar.refresh()
+        assert not calendar.is_trading_day(closure)
+        assert calendar.next_open(et(2025, 11, 24, 17, 0)) == et(2025, 11, 26, 9, 30)
+        assert not calendar.refresh()  # once per KST day
+
+        cached = make_calendar(cache_path=cache_path)
+        assert cached.holiday_name(closure) == "KIS"
+        assert cached.fetched == date(2025, 11, 25)
+
+    # KIS lists the US market again: the closure is lifted
+    calendar = make_calendar(lambda today: {'us_closed': {}, 'us_checked': [closure], 'kr_open': {}})
+    calendar.kis_closed[closure] = "KIS"
+    assert calendar.refresh()
+    assert calendar.is_trading_day(closure)
+
+
+if __name__ == "__main__":
+    test_nyse_holidays()
+    test_observed_rules()
+    test_half_days()
+    test_trading_days_and_sessions()
+    test_next_open_and_close()
+    test_kis_closures_and_cache()
@@ -0,0 +1,145 @@
+import sys
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from infinite_buying_bot.core import order_tracker as ot
+from infinite_buying_bot.core.order_tracker import (
+    ACCEPTED, CANCELLED, FILLED, PARTIAL, REJECTED, SUBMITTED, OrderTracker, normalize_order_no
+)
+from infinite_buying_bot.utils.clock import SimulatedClock
+
+TRENV = SimpleNamespace(my_acct='12345678', my_prod='01', my_url_ws='', my_htsid='')
+
+
+def make_tracker():
+    return OrderTracker(TRENV, clock=SimulatedClock(datetime(2025, 3, 3, 23, 30)))
+
+
+def order_result(order_no, symbol='TQQQ', side='buy', qty=10, price=50.0, success=True):
+    return SimpleNamespace(success=success, order_no=order_no, symbol=symbol, side=side, qty=qty, price=price)
+
+
+def notice(order_no, **values):
+    return {'ODER_NO': order_no, 'RCTF_CLS': '0', 'OODER_NO': '', 'RFUS_YN': '0',
+            'CNTG_YN': '1', 'CNTG_QTY': '0', 'CNTG_UNPR': '0', 'ACPT_YN': '2', **values}
+
+
+def fill(order_no, qty, price):
+    return notice(order_no, CNTG_YN='2', CNTG_QTY=str(qty), CNTG_UNPR=str(price))
+
+
+def drain(tracker):
+    """Wait for the callbacks submitted so far (one worker thread, FIFO)"""
+    tracker._callbacks.submit(lambda: None).result(timeout=5)
+
+
+def test_accepted_partial_filled():
+    print("Testing OrderTracker transitions...")
+    tracker = make_tracker()
+    done = []
+    order = tracker.track(order_result('0030000001'), on_done=done.append)
+    assert order.state == SUBMITTED and order.order_no == '30000001'
+
+    tracker.on_notice(notice('0030000001'))
+    assert order.state == ACCEPTED
+
+    tracker.on_notice(fill('30000001', 4, 49.5))
+    assert order.state == PARTIAL and order.filled_qty == 4 and order.remaining == 6
+    assert tracker.open_orders() == [order]
+
+    tracker.on_notice(fill('0030000001', 6, 50.0))
+    assert order.state == FILLED and order.filled_qty == 10
+    assert abs(order.avg_fill_price - (4 * 49.5 + 6 * 50.0) / 10) < 1e-9
+    assert tracker.open_orders() == []
+    assert tracker.wait('30000001', timeout=0) is order
+
+    # Late or duplicate notices do not move a final order
+    tracker.on_notice(fill('30000001', 3, 51.0))
+    assert order.filled_qty == 10
+    drain(tracker)
+    assert done == [order]
+
+
+def test_rejected_and_expired():
+    tracker = make_tracker()
+    rejected = tracker.track(order_result('101'))
+    expired = tracker.track(order_result('102'))
+    tracker.on_notice(notice('101', RFUS_YN='1'))
+    tracker.on_notice(notice('102', ACPT_YN='3'))
+    assert rejected.state == REJECTED and rejected.reason == 'rejected by broker'
+    assert expired.state == CANCELLED and expired.filled_qty == 0
+
+
+def test_cancel_confirmation_ends_original_order():
+    tracker = make_tracker()
+    order = tracker.track(order_result('201', qty=5))
+    tracker.on_notice(fill('201', 2, 10.0))
+    # The cancel has its own order number; OODER_NO points at the order it cancels
+    tracker.on_notice(notice('0000000999', RCTF_CLS='2', OODER_NO='00201'))
+    assert order.state == CANCELLED and order.filled_qty == 2
+    assert tracker.get('999') is None
+
+
+def test_notice_before_track_is_replayed():
+    tracker = make_tracker()
+    tracker.on_notice(notice('301'))
+    tracker.on_notice(fill('301', 10, 20.0))
+    assert tracker.get('301') is None
+
+    done = []
+    order = tracker.track(order_result('00301', qty=10, price=20.0), on_done=done.append)
+    assert order.state == FILLED and order.filled_qty == 10
+    assert '301' not in tracker._pending
+
+    # Tracking a final order again runs the new callback right away, once
+    tracker.track(order_result('301'), on_done=done.append)
+    drain(tracker)
+    assert done == [order, order]
+
+
+def test_callbacks_and_listeners_run_once():
+    tracker = make_tracker()
+    done, heard = [], []
+    tracker.add_listener(heard.append)
+    order = tracker.track(order_result('401', qty=2), on_done=done.append)
+    tracker.track(order_result('401', qty=2), on_done=done.append)  # second callback, same order
+    tracker.on_notice(fill('401', 2, 5.0))
+    tracker.on_notice(notice('401', RFUS_YN='1'))
+    drain(tracker)
+    assert done == [order, order]
+    assert heard == [order]
+    assert order.callbacks == []
+
+
+def test_failed_results_are_not_tracked():
+    tracker = make_tracker()
+    assert tracker.track(order_result('501', success=False)) is None
+    assert tracker.track(order_result('')) is None
+    assert normalize_order_no(None) == '' and normalize_order_no(' 0042 ') == '42'
+
+
+def test_final_orders_are_evicted():
+    tracker = make_tracker()
+    kept = tracker.track(order_result('9999'))  # still open: never evicted
+    total = ot.FINISHED_ORDERS + 50
+    for n in range(1, total + 1):
+        tracker.track(order_result(str(n), qty=1))
+        tracker.on_notice(fill(str(n), 1, 1.0))
+    assert len(tracker.orders) == ot.FINISHED_ORDERS + 1
+    assert tracker.get('1') is None and tracker.get('50') is None
+    assert tracker.get('51').state == FILLED and tracker.get(str(total)).state == FILLED
+    assert tracker.get('9999') is kept and tracker.open_orders() == [kept]
+
+
+if __name__ == "__main__":
+    test_accepted_partial_filled()
+    test_rejected_and_expired()
+    test_cancel_confirmation_ends_original_order()
+    test_notice_before_track_is_replayed()
+    test_callbacks_and_listeners_run_once()
+    test_failed_results_are_not_tracked()
+    test_final_orders_are_evicted()
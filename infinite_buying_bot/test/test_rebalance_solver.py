@@ -0,0 +1,107 @@
+import sys
+import os
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from infinite_buying_bot.core.rebalance_solver import solve_rebalance, solve_single
+
+
+def brute_force(p, q0, cash, t, lb, ub, fee_rate, min_fee):
+    """Exhaustive optimum over every whole-share vector within the bounds and the cash"""
+    V = cash + (q0 * p).sum()
+    tc = max(0.0, 1.0 - t.sum())
+    ranges = [np.arange(lb[i], min(ub[i], V // p[i] + 1) + 1) for i in range(len(p))]
+    q = np.stack([g.ravel() for g in np.meshgrid(*ranges, indexing='ij')], axis=1)
+    notional = np.abs(q - q0) * p
+    fee = np.where(notional > 0, np.maximum(notional * fee_rate, min_fee), 0.0).sum(axis=1)
+    spent = ((q - q0) * p).sum(axis=1) + fee
+    error = ((q * p / V - t) ** 2).sum(axis=1) + ((cash - spent) / V - tc) ** 2
+    error[spent > cash + 1e-9] = np.inf
+    best = int(np.argmin(error))
+    return error[best], q[best]
+
+
+def random_case(rng, n=3):
+    p = rng.uniform(20, 150, n)
+    q0 = rng.integers(0, 8, n).astype(float)
+    cash = float(rng.uniform(0, 400))
+    t = rng.dirichlet(np.ones(n)) * rng.uniform(0.8, 1.0)
+    return p, q0, cash, t
+
+
+def check_solution(sol, p, q0, cash, lb, ub):
+    assert sol.cash_after >= -1e-9
+    assert np.all(sol.qty >= lb) and np.all(sol.qty <= ub)
+    assert np.all(sol.qty == np.round(sol.qty))
+    assert abs(cash - ((sol.qty - q0) * p).sum() - sol.fees - sol.cash_after) < 1e-6
+
+
+def test_matches_brute_force():
+    print("Testing solve_rebalance against exhaustive search...")
+    rng = np.random.default_rng(7)
+    for _ in range(300):
+        p, q0, cash, t = random_case(rng)
+        min_fee = float(rng.choice([0.0, 1.0]))
+        lower = np.where(rng.random(3) < 0.3, q0, 0.0)
+        upper = np.where(rng.random(3) < 0.2, q0 + 2, np.inf)
+        min_weights = np.where(rng.random(3) < 0.3, 0.2, 0.0)
+        sol = solve_rebalance(list('abc'), p, q0, cash, t, lower=lower, upper=upper,
+                              min_weights=min_weights, min_fee=min_fee)
+
+        # The floor holds a position at min(qty, ceil(min_weight * V / price)) shares
+        V = cash + (q0 * p).sum()
+        lb = np.maximum(lower, np.minimum(q0, np.ceil(min_weights * V / p - 1e-9)))
+        check_solution(sol, p, q0, cash, lb, upper)
+
+        best, best_qty = brute_force(p, q0, cash, t, lb, upper, 0.0025, min_fee)
+        assert sol.tracking_error ** 2 <= best + 1e-12, (p, q0, cash, t, sol.qty, best_qty)
+
+
+def test_upper_bounds_and_budget():
+    rng = np.random.default_rng(11)
+    for _ in range(50):
+        p, q0, cash, t = random_case(rng)
+        upper = q0 + rng.integers(0, 3, 3)
+        budget = cash / 2
+        sol = solve_rebalance(list('abc'), p, q0, cash, t, upper=upper, budget=budget)
+        check_solution(sol, p, q0, cash, np.zeros(3), upper)
+        assert cash - sol.cash_after <= budget + 1e-9
+
+
+def test_min_weight_floor_blocks_sales():
+    # Everything in "a", target all in "b": the floor keeps 30% of the value in "a"
+    p = np.array([10.0, 10.0])
+    q0 = np.array([100.0, 0.0])
+    sol = solve_rebalance(['a', 'b'], p, q0, 0.0, [0.0, 1.0], min_weights=[0.3, 0.0])
+    assert sol.qty[0] == 30
+    assert sol.cash_after >= 0
+
+
+def test_orders_sell_before_buy():
+    p = np.array([50.0, 50.0])
+    q0 = np.array([10.0, 0.0])
+    sol = solve_rebalance(['a', 'b'], p, q0, 0.0, [0.5, 0.5], fee_rate=0.0)
+    assert list(sol.qty) == [5.0, 5.0]
+    orders = sol.orders()
+    assert [o['type'] for o in orders] == ['sell', 'buy']
+    assert orders[0]['symbol'] == 'a' and orders[0]['qty'] == 5
+
+
+def test_solve_single_only_trades_symbol():
+    p = np.array([40.0, 60.0, 25.0])
+    q0 = np.array([5.0, 2.0, 8.0])
+    sol = solve_single(list('abc'), p, q0, 500.0, [0.3, 0.4, 0.3], 'b', side='buy')
+    assert sol.qty[0] == 5 and sol.qty[2] == 8
+    assert sol.qty[1] >= 2
+    assert sol.cash_after >= -1e-9
+
+
+if __name__ == "__main__":
+    test_matches_brute_force()
+    test_upper_bounds_and_budget()
+    test_min_weight_floor_blocks_sales()
+    test_orders_sell_before_buy()
+    test_solve_single_only_trades_symbol()
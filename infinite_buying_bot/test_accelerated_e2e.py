@@ -1,14 +1,15 @@
 """
 Accelerated E2E Integration Test for Infinite Buying Bot
-10 seconds = 1 day simulation
-Tests split buying strategy with KIS mock trading API
+One trading day per step on a SimulatedClock: each day's decision runs on a timer
+DECISION_MINUTES before that session's close (holidays and half-days from the market
+calendar), and the time between days is skipped instead of slept.
+Tests split buying strategy with KIS mock trading API (quotes and orders stay live)
 """
 
 import sys
 import os
-import time
 import logging
-from datetime import datetime
+from datetime import timedelta
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -30,11 +31,21 @@ logger = logging.getLogger(__name__)
 from infinite_buying_bot.core.trader import Trader
 from infinite_buying_bot.core.strategy import InfiniteBuyingStrategy
 from infinite_buying_bot.telegram_bot.notifications import TelegramNotifier
+from infinite_buying_bot.utils.clock import SimulatedClock, set_clock
+from infinite_buying_bot.utils.event_scheduler import EventScheduler
+from infinite_buying_bot.utils.market_calendar import ET, MarketCalendar
+
+DECISION_MINUTES = 5  # buy/sell check this long before the close (the strategy buys near the close)
 
 class AcceleratedTestRunner:
-    """Run accelerated E2E test with 10-second intervals"""
+    """Run accelerated E2E test, one simulated trading day per step"""
     
-    def __init__(self, config_path):
+    def __init__(self, config_path, start=None):
+        """
+        Args:
+            config_path: kis_devlp.yaml
+            start: Simulation start (naive = KST; default: now)
+        """
         # Load configuration
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
@@ -65,6 +76,12 @@ class AcceleratedTestRunner:
             logger.info(f"✅ Telegram notifier enabled for chat_id: {chat_id}")
             self.notifier = TelegramNotifier(bot_token, chat_id)
         
+        # Simulated time: timers fire at session closes, the gaps between them take no wall time
+        self.clock = SimulatedClock(start)
+        set_clock(self.clock)  # for code paths that don't take a clock argument
+        self.calendar = MarketCalendar(cache_path=None, clock=self.clock)
+        self.events = EventScheduler(self.clock)
+        
         # Initialize components
         self.trader = Trader(self.config, self.notifier)
         self.strategy = InfiniteBuyingStrategy(self.config)
@@ -82,7 +99,7 @@ class AcceleratedTestRunner:
     def print_balance(self):
         """Print current balance information"""
         buying_power, quantity, avg_price = self.trader.get_balance()
-        current_price = self.trader.get_price()
+        current_price = self.trader.get_price(self.trader.symbol)
         
         print(f"\n💰 Account Balance:")
         print(f"   Cash Available: ${buying_power:,.2f}")
@@ -102,12 +119,25 @@ class AcceleratedTestRunner:
         
         return buying_power, quantity, avg_price, current_price
     
+    def is_near_close(self, now):
+        """Within DECISION_MINUTES of the close of the session in progress"""
+        bounds = self.calendar.session_bounds(now.date())
+        return bounds is not None and bounds[1] - timedelta(minutes=DECISION_MINUTES) <= now < bounds[1]
+    
+    def next_decision(self, now):
+        """DECISION_MINUTES before the next close still ahead of `now` (aware ET)"""
+        decision = self.calendar.next_close(now) - timedelta(minutes=DECISION_MINUTES)
+        if decision <= now:
+            decision = self.calendar.next_close(self.calendar.next_open(now)) - timedelta(minutes=DECISION_MINUTES)
+        return decision
+    
     def simulate_day(self):
-        """Simulate one trading day (10 seconds in real time)"""
+        """Simulate one trading day (runs on the day's decision timer)"""
         self.test_day += 1
+        now = self.clock.now(ET)
         
         print(f"\n{'─'*70}")
-        print(f"📅 DAY {self.test_day} - {datetime.now().strftime('%H:%M:%S')}")
+        print(f"📅 DAY {self.test_day} - {now.strftime('%Y-%m-%d %H:%M')} ET")
         print(f"{'─'*70}")
         
         # Get current state
@@ -126,7 +156,7 @@ class AcceleratedTestRunner:
             print(f"   Selling ALL {quantity} shares at ${current_price:.2f}")
             
             # Execute sell with reason
-            self.trader.sell_all(quantity, reason="Profit Target 10%")
+            self.trader.sell(quantity, reason="Profit Target 10%", fallback_price=current_price)
             
             self.test_results.append({
                 'day': self.test_day,
@@ -139,9 +169,9 @@ class AcceleratedTestRunner:
             print(f"   ✅ Sell order executed - Strategy reset")
             return
         
-        # Check buy condition (assume near close for testing)
+        # Check buy condition (the timer fires near the close)
         should_buy, split_count = self.strategy.should_buy(
-            current_price, avg_price, quantity, is_near_close=True
+            current_price, avg_price, quantity, is_near_close=self.is_near_close(now)
         )
         
         if should_buy:
@@ -185,7 +215,8 @@ class AcceleratedTestRunner:
     def run_test(self, num_days=5):
         """Run accelerated test for specified number of days"""
         self.print_header("ACCELERATED E2E INTEGRATION TEST")
-        print(f"⏱️  Time Scale: 10 seconds = 1 trading day")
+        print(f"⏱️  Time Scale: simulated clock, 1 step = 1 trading day "
+              f"(from {self.clock.now(ET):%Y-%m-%d %H:%M} ET)")
         print(f"📊 Strategy: Infinite Buying (Updated)")
         print(f"   - Below Average: 1/40 split (Aggressive)")
         print(f"   - Above Average: 1/80 split (Conservative)")
@@ -200,13 +231,16 @@ class AcceleratedTestRunner:
         # Run simulation
         self.print_header(f"RUNNING {num_days}-DAY SIMULATION")
         
-        for day in range(num_days):
+        def run_day():
             self.simulate_day()
-            
-            # Wait 10 seconds (1 simulated day)
-            if day < num_days - 1:
-                print(f"\n⏳ Waiting 10 seconds for next day...")
-                time.sleep(10)
+            if self.test_day < num_days:
+                decision = self.next_decision(self.clock.now(ET))
+                print(f"\n⏳ Next day: {decision:%Y-%m-%d %H:%M} ET")
+                self.events.set_timer('day', decision.timestamp(), run_day)
+        
+        # Nothing armed after the last day: the loop returns
+        self.events.set_timer('day', self.next_decision(self.clock.now(ET)).timestamp(), run_day)
+        self.events.run()
         
         # Final results
         self.print_header("FINAL STATE")
@@ -253,7 +287,7 @@ def main():
         # Create test runner
         runner = AcceleratedTestRunner(config_path)
         
-        # Run 5-day simulation (50 seconds total)
+        # Run 5-day simulation (simulated time: only the API calls take wall time)
         runner.run_test(num_days=5)
         
     except KeyboardInterrupt:
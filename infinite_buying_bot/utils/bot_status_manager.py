@@ -1,21 +1,35 @@
 
+import atexit
+import copy
 import json
 import os
+import threading
 import time
 import logging
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Dict, Any, Optional
 
+from infinite_buying_bot.utils.clock import Clock, get_clock
+
 logger = logging.getLogger(__name__)
 
 class BotStatusManager:
     """
     Manages the real-time status of the trading bot.
     Writes status to a JSON file for the dashboard to read without polling KIS API.
+    
+    Updates only change the in-memory state and mark it dirty; the file is rewritten at most
+    once per `flush_interval` seconds (a background thread writes the trailing update), and
+    immediately when the system status changes (running -> paused, error, ...).
+    Optionally the state can also be served from memory over a local HTTP endpoint
+    (start_endpoint), so readers don't need the file at all.
     """
     
-    def __init__(self, root_path: str):
+    def __init__(self, root_path: str, flush_interval: float = 1.0, clock: Clock = None):
         self.root_path = root_path
+        self.clock = clock or get_clock()
+        self.flush_interval = flush_interval
         self.logs_dir = os.path.join(root_path, 'logs')
         os.makedirs(self.logs_dir, exist_ok=True)
         self.status_file = os.path.join(self.logs_dir, 'bot_status.json')
@@ -25,8 +39,8 @@ class BotStatusManager:
             'system': {
                 'status': 'initializing',  # initializing, running, paused, stopped, error
                 'pid': os.getpid(),
-                'start_time': datetime.now().isoformat(),
-                'last_heartbeat': datetime.now().isoformat(),
+                'start_time': self.clock.now().isoformat(),
+                'last_heartbeat': self.clock.now().isoformat(),
                 'heartbeat_ago': 0
             },
             'config': {
@@ -45,71 +59,133 @@ class BotStatusManager:
                 'market_status': 'Unknown',
                 'description': 'System is booting up'
             },
-            'last_updated': datetime.now().isoformat()
+            'last_updated': self.clock.now().isoformat()
         }
         
+        # Debounced persistence
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_flush = 0.0  # monotonic time of the last write
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._endpoint: Optional[ThreadingHTTPServer] = None
+        self.stats = {'updates': 0, 'writes': 0}
+        atexit.register(self.close)
+        
     def update_heartbeat(self):
         """Update only the heartbeat timestamp"""
-        self.state['system']['last_heartbeat'] = datetime.now().isoformat()
-        self.state['system']['heartbeat_ago'] = 0
-        self.state['last_updated'] = datetime.now().isoformat()
-        self._save()
+        with self._lock:
+            self.state['system']['last_heartbeat'] = self.clock.now().isoformat()
+            self.state['system']['heartbeat_ago'] = 0
+            self.state['last_updated'] = self.clock.now().isoformat()
+            self._save()
 
     def set_config_info(self, mode: str, strategy: str, interval: int):
         """Update static config info"""
-        self.state['config']['mode'] = mode
-        self.state['config']['strategy'] = strategy
-        self.state['config']['interval'] = interval
-        self._save()
+        with self._lock:
+            self.state['config']['mode'] = mode
+            self.state['config']['strategy'] = strategy
+            self.state['config']['interval'] = interval
+            self._save()
 
     def set_schedule(self, next_run: datetime, message: str = ""):
         """Update schedule information"""
-        self.state['schedule']['next_run'] = next_run.isoformat()
-        self.state['schedule']['message'] = message
-        
-        # Calculate remaining time
-        now = datetime.now()
-        remaining = (next_run - now).total_seconds()
-        self.state['schedule']['time_remaining'] = max(0, int(remaining))
-        self._save()
+        with self._lock:
+            self.state['schedule']['next_run'] = next_run.isoformat()
+            self.state['schedule']['message'] = message
+            
+            # Calculate remaining time
+            now = self.clock.now()
+            remaining = (next_run - now).total_seconds()
+            self.state['schedule']['time_remaining'] = max(0, int(remaining))
+            self._save()
 
     def update_logic(self, action: str, description: str, market_status: str = ""):
         """Update current logic/activity description"""
-        self.state['logic']['current_action'] = action
-        self.state['logic']['description'] = description
-        if market_status:
-            self.state['logic']['market_status'] = market_status
-        self._save()
+        with self._lock:
+            self.state['logic']['current_action'] = action
+            self.state['logic']['description'] = description
+            if market_status:
+                self.state['logic']['market_status'] = market_status
+            self._save()
 
     def update_market_data(self, price, cash, qty, avg):
         """Update market data for dashboard display"""
-        if 'market' not in self.state:
-            self.state['market'] = {}
-            
-        self.state['market']['current_price'] = price
-        self.state['market']['details'] = {
-            'cash': cash,
-            'holdings_qty': qty,
-            'avg_price': avg
-        }
-        self._save()
+        with self._lock:
+            if 'market' not in self.state:
+                self.state['market'] = {}
+                
+            self.state['market']['current_price'] = price
+            self.state['market']['details'] = {
+                'cash': cash,
+                'holdings_qty': qty,
+                'avg_price': avg
+            }
+            self._save()
 
     def set_status(self, status: str):
-        """Set detailed system status"""
-        self.state['system']['status'] = status
-        self._save()
+        """Set detailed system status (a change is written immediately)"""
+        with self._lock:
+            changed = self.state['system']['status'] != status
+            self.state['system']['status'] = status
+            self._save(immediate=changed)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Copy of the current in-memory status (same content as bot_status.json)"""
+        with self._lock:
+            return copy.deepcopy(self.state)
+
+    def flush(self):
+        """Write pending changes now"""
+        with self._lock:
+            if self._dirty:
+                self._write()
+
+    def close(self):
+        """Write pending changes and stop the flusher thread / endpoint"""
+        self._closed.set()
+        self._wake.set()
+        self.stop_endpoint()
+        self.flush()
 
-    def _save(self):
-        """Save state to JSON file using atomic write"""
+    def _save(self, immediate: bool = False):
+        """Mark state dirty; write now if the last write is older than flush_interval, otherwise defer"""
+        with self._lock:
+            self._dirty = True
+            self.stats['updates'] += 1
+            if immediate or self._closed.is_set() or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._write()
+                return
+            self._ensure_flusher()
+        self._wake.set()
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._run_flusher, name="bot-status-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self):
+        """Write the trailing update of each debounce window"""
+        while not self._closed.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            delay = self._last_flush + self.flush_interval - time.monotonic()
+            if delay > 0 and self._closed.wait(delay):
+                break
+            self.flush()
+
+    def _write(self):
+        """Save state to JSON file using atomic write (caller holds the lock)"""
         try:
             # Update last_updated
-            self.state['last_updated'] = datetime.now().isoformat()
+            self.state['last_updated'] = self.clock.now().isoformat()
             
             # Recalculate time_remaining if next_run is set
             if self.state['schedule']['next_run']:
                 try:
                     next_run = datetime.fromisoformat(self.state['schedule']['next_run'])
-                    remaining = (next_run - datetime.now()).total_seconds()
+                    remaining = (next_run - self.clock.now()).total_seconds()
                     self.state['schedule']['time_remaining'] = max(0, int(remaining))
                 except:
                     pass
@@ -117,11 +193,58 @@ class BotStatusManager:
             # Write to temp file first
             temp_file = self.status_file + '.tmp'
             with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self.state, f, indent=2, ensure_ascii=False)
+                json.dump(self.state, f, separators=(',', ':'), ensure_ascii=False)
             
             # Atomic rename
             os.replace(temp_file, self.status_file)
+            self.stats['writes'] += 1
             
         except Exception as e:
             logger.error(f"Failed to save bot status: {e}")
+        finally:
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Optional local read endpoint
+    # ------------------------------------------------------------------
+
+    def start_endpoint(self, port: int = 0, host: str = '127.0.0.1') -> int:
+        """
+        Serve the in-memory status as JSON on http://host:port/status (localhost only by default).
+        
+        Returns:
+            Bound port (useful with port=0)
+        """
+        if self._endpoint:
+            return self._endpoint.server_address[1]
+        manager = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/status'):
+                    self.send_error(404)
+                    return
+                body = json.dumps(manager.get_state(), ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep bot.log clean
+
+        self._endpoint = ThreadingHTTPServer((host, port), Handler)
+        self._endpoint.daemon_threads = True
+        threading.Thread(target=self._endpoint.serve_forever, name="bot-status-endpoint", daemon=True).start()
+        bound = self._endpoint.server_address[1]
+        logger.info(f"[STATUS] Serving bot status on http://{host}:{bound}/status")
+        return bound
+
+    def stop_endpoint(self):
+        if self._endpoint:
+            self._endpoint.shutdown()
+            self._endpoint.server_close()
+            self._endpoint = None
 
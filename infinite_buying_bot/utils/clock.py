@@ -0,0 +1,111 @@
+"""
+Clock abstraction - wall clock for production, simulated clock for fast end-to-end runs
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# KST (Korea Standard Time) = UTC+9
+KST = timezone(timedelta(hours=9))
+
+
+class Clock:
+    """
+    Wall clock. Components take a `clock` argument (defaulting to get_clock()) and call
+    it instead of datetime.now() / time.sleep(), so a SimulatedClock can be injected.
+    """
+
+    def now(self, tz=None) -> datetime:
+        """Same as datetime.now(tz): naive local time when tz is None"""
+        return datetime.now(tz)
+
+    def kst_now(self) -> datetime:
+        """Current KST time as a naive datetime (BotController compares naive KST times)"""
+        return self.now(KST).replace(tzinfo=None)
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    """
+    Clock that only moves when told to: sleep() advances it instantly.
+
+    A loop that sleeps between cycles therefore runs as fast as its own work allows, while
+    every time check (start times, intervals, daily windows, weekends) sees simulated time.
+    Time is shared by everyone holding the clock, so drive it from a single loop.
+
+    Usage:
+        clock = SimulatedClock(datetime(2025, 1, 6, 22, 0))   # naive = in `tz` (KST)
+        controller = BotController(clock=clock)
+        clock.sleep(60)                                        # returns immediately
+    """
+
+    def __init__(self, start: Optional[datetime] = None, tz=KST):
+        """
+        Args:
+            start: Start time (naive values are interpreted in `tz`; default: now)
+            tz: Local timezone of the simulation, used for naive now()
+        """
+        self.tz = tz
+        self._lock = threading.Lock()
+        self._now = self._to_utc(start) if start else datetime.now(timezone.utc)
+        self.slept = 0.0  # total simulated seconds spent in sleep()
+
+    def now(self, tz=None) -> datetime:
+        with self._lock:
+            current = self._now
+        if tz is None:
+            return current.astimezone(self.tz).replace(tzinfo=None)
+        return current.astimezone(tz)
+
+    def time(self) -> float:
+        with self._lock:
+            return self._now.timestamp()
+
+    def monotonic(self) -> float:
+        return self.time()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.advance(seconds)
+            with self._lock:
+                self.slept += seconds
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self._now += timedelta(seconds=seconds)
+
+    def set(self, when: datetime):
+        """Jump to `when` (naive values are interpreted in `tz`); moving backwards is allowed"""
+        with self._lock:
+            self._now = self._to_utc(when)
+
+    def _to_utc(self, when: datetime) -> datetime:
+        if when.tzinfo is None:
+            localize = getattr(self.tz, 'localize', None)  # pytz zones
+            when = localize(when) if localize else when.replace(tzinfo=self.tz)
+        return when.astimezone(timezone.utc)
+
+
+_clock: Clock = Clock()
+
+
+def get_clock() -> Clock:
+    """Process-wide default clock (wall clock unless set_clock was called)"""
+    return _clock
+
+
+def set_clock(clock: Clock) -> Clock:
+    """Replace the default clock; returns the previous one"""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
@@ -0,0 +1,254 @@
+"""
+Runtime config service - watches runtime_config.json and publishes validated, immutable snapshots
+"""
+import json
+import os
+import re
+import threading
+import logging
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import Any, Callable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRADING_MODES = ('gradual', 'st-exchange', 'scheduled-single')
+STRATEGY_MODES = ('aggressive', 'neutral', 'defensive')
+COMMANDS = ('start', 'stop')
+ALLOCATION_TOLERANCE = 0.01  # Same tolerance as PortfolioManager.update_target_allocation
+
+_HHMM = re.compile(r'^([01]?\d|2[0-3]):[0-5]\d$')
+
+
+def _freeze(value):
+    """Recursively convert dicts/lists to read-only mappings/tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """
+    Immutable snapshot of runtime_config.json.
+
+    Missing keys take the defaults below (same defaults BotController used when reading the file).
+    Optional fields are None when the key is absent, so consumers keep their own value.
+    `raw` holds the whole parsed file (read-only) for keys without a typed field.
+    """
+    command: str = 'stop'
+    strategy_mode: str = 'neutral'
+    dip_buy_mode: str = 'accelerated'
+    trading_mode: str = 'gradual'
+    gradual_interval: int = 5
+    daily_time: str = '22:00'
+    gradual_start_time: str = '23:40'
+    gradual_targets: Tuple[str, ...] = ('all',)
+    target_portfolio: Optional[Mapping[str, float]] = None
+    scheduled_symbol: Optional[str] = None
+    scheduled_time: Optional[str] = None
+    scheduled_qty: Optional[int] = None
+    auto_schedule_enabled: Optional[bool] = None
+    schedule_zones: Optional[Tuple[Mapping[str, Any], ...]] = None
+    raw: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    version: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict, previous: 'RuntimeConfig' = None, version: int = 0) -> Tuple['RuntimeConfig', List[str]]:
+        """
+        Build a validated snapshot.
+
+        An invalid value does not reject the whole file: that field keeps the previous
+        snapshot's value (or the default) and the problem is reported in the returned errors.
+
+        Returns:
+            (snapshot, validation errors)
+        """
+        previous = previous or cls()
+        errors = []
+        values = {}
+
+        for f in fields(cls):
+            if f.name in ('raw', 'version') or f.name not in data:
+                continue
+            value = data[f.name]
+            error = _validate(f.name, value)
+            if error:
+                errors.append(f"{f.name}: {error}")
+                values[f.name] = getattr(previous, f.name)
+            else:
+                values[f.name] = _freeze(value)
+
+        return cls(**values, raw=_freeze(data), version=version), errors
+
+    def get(self, key: str, default=None):
+        """Dict-style access to any key of the file"""
+        return self.raw.get(key, default)
+
+
+def _validate(name: str, value) -> Optional[str]:
+    """Return an error message, or None if the value is valid"""
+    if name == 'command' and value not in COMMANDS:
+        return f"must be one of {COMMANDS}, got {value!r}"
+    if name == 'trading_mode' and value not in TRADING_MODES:
+        return f"must be one of {TRADING_MODES}, got {value!r}"
+    if name == 'strategy_mode' and value not in STRATEGY_MODES:
+        return f"must be one of {STRATEGY_MODES}, got {value!r}"
+    if name in ('daily_time', 'gradual_start_time', 'scheduled_time'):
+        if not isinstance(value, str) or not _HHMM.match(value):
+            return f"must be HH:MM, got {value!r}"
+    if name in ('gradual_interval', 'scheduled_qty'):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            return f"must be a positive number, got {value!r}"
+    if name == 'gradual_targets':
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            return f"must be a list of symbols, got {value!r}"
+    if name == 'auto_schedule_enabled' and not isinstance(value, bool):
+        return f"must be true/false, got {value!r}"
+    if name == 'schedule_zones':
+        if not isinstance(value, list) or not all(isinstance(z, dict) for z in value):
+            return "must be a list of zones"
+        for zone in value:
+            if not _HHMM.match(str(zone.get('start', ''))) or not _HHMM.match(str(zone.get('end', ''))):
+                return f"zone {zone.get('name', '')!r} needs HH:MM start/end"
+            if zone.get('mode') not in TRADING_MODES:
+                return f"zone {zone.get('name', '')!r} has invalid mode {zone.get('mode')!r}"
+    if name == 'target_portfolio':
+        if not isinstance(value, dict) or not value:
+            return "must be a non-empty {symbol: weight} object"
+        if not all(isinstance(w, (int, float)) and not isinstance(w, bool) and w >= 0 for w in value.values()):
+            return "weights must be non-negative numbers"
+        total = sum(value.values())
+        if abs(total - 1.0) > ALLOCATION_TOLERANCE:
+            return f"allocation must sum to 100%, got {total * 100:.1f}%"
+    return None
+
+
+class ConfigService:
+    """
+    Watches runtime_config.json and publishes a new RuntimeConfig only when the file changes.
+
+    poll() is a single os.stat(): the file is parsed and validated only when its mtime/size
+    changed, then the snapshot is swapped in and subscribers are notified once. Callers in
+    the trading loop read `current` (in memory) instead of opening the file.
+
+    A file that fails to parse (e.g. half-written by the UI) keeps the previous snapshot and
+    is retried on the next change.
+
+    Usage:
+        service = ConfigService(path)
+        service.subscribe(lambda cfg: ...)   # called on every new snapshot
+        service.poll()                       # cheap; call once per cycle
+        service.current.trading_mode
+    """
+
+    def __init__(self, config_path: str):
+        self.config_path = config_path
+        self._lock = threading.RLock()
+        self._current = RuntimeConfig()
+        self._stamp = None  # (mtime_ns, size) of the last parsed file
+        self.exists = False  # runtime_config.json was present at the last poll
+        self._subscribers: List[Callable[[RuntimeConfig], None]] = []
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+
+    @property
+    def current(self) -> RuntimeConfig:
+        """Latest valid snapshot (defaults until the file has been read)"""
+        return self._current
+
+    def subscribe(self, callback: Callable[[RuntimeConfig], None], replay: bool = True) -> Callable[[], None]:
+        """
+        Register a callback for new snapshots.
+
+        Args:
+            replay: Call it immediately with the current snapshot if the file was already loaded
+
+        Returns:
+            Function that unsubscribes the callback
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            loaded = self._stamp is not None
+        if replay and loaded:
+            self._notify(callback, self._current)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def poll(self) -> bool:
+        """
+        Reload if the file changed since the last poll.
+
+        Returns:
+            True if a new snapshot was published
+        """
+        try:
+            stat = os.stat(self.config_path)
+        except FileNotFoundError:
+            self.exists = False
+            self._stamp = None  # reload a recreated file even if mtime/size match the old one
+            return False
+        self.exists = True
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return False
+
+        with self._lock:
+            if stamp == self._stamp:
+                return False
+            try:
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("top level must be an object")
+            except (OSError, ValueError) as e:
+                logger.error(f"[CONFIG] Failed to load {os.path.basename(self.config_path)}: {e} (keeping previous config)")
+                self._stamp = stamp
+                return False
+
+            snapshot, errors = RuntimeConfig.from_dict(data, previous=self._current,
+                                                       version=self._current.version + 1)
+            for error in errors:
+                logger.warning(f"[CONFIG] Invalid value ignored - {error}")
+
+            self._stamp = stamp
+            self._current = snapshot
+            subscribers = list(self._subscribers)
+
+        logger.info(f"[CONFIG] Loaded v{snapshot.version}: trading_mode={snapshot.trading_mode}, "
+                    f"command={snapshot.command}, strategy={snapshot.strategy_mode}")
+        for callback in subscribers:
+            self._notify(callback, snapshot)
+        return True
+
+    def start_watching(self, interval: float = 1.0):
+        """Poll from a background thread (for processes without their own loop)"""
+        if self._watch_thread and self._watch_thread.is_alive():
+            return
+        self._watch_stop.clear()
+
+        def run():
+            while not self._watch_stop.wait(interval):
+                self.poll()
+
+        self._watch_thread = threading.Thread(target=run, name="config-watcher", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        self._watch_stop.set()
+        if self._watch_thread:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+
+    @staticmethod
+    def _notify(callback, snapshot):
+        try:
+            callback(snapshot)
+        except Exception as e:
+            logger.error(f"[CONFIG] Subscriber {getattr(callback, '__name__', callback)} failed: {e}")
@@ -0,0 +1,201 @@
+"""
+Event Scheduler - heap-based timers on asyncio for the trading loop
+Named timers fire at clock.time() deadlines; events emitted from any thread (fills, prices)
+wake the loop at once. Between the two the loop is idle, so nothing polls on a fixed tick.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from infinite_buying_bot.utils.clock import Clock, SimulatedClock, get_clock
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Timer:
+    name: str
+    when: float            # clock.time() deadline
+    callback: Callable
+    cancelled: bool = False
+
+
+class EventScheduler:
+    """
+    Single-threaded event loop: one callback runs at a time, on the thread calling run().
+
+    Timers are keyed by name; setting a name again replaces the pending timer (cancelled
+    heap entries are skipped lazily). Callbacks may be plain functions or coroutines.
+    With a SimulatedClock idle waits advance the clock instead of sleeping, so simulated
+    days run as fast as the callbacks do.
+
+    Usage:
+        events = EventScheduler(clock)
+        events.on('fill', run_cycle)
+        events.set_timer('cycle', clock.time() + 10, run_cycle)
+        tracker.add_listener(lambda order: events.emit('fill'))   # from any thread
+        events.run(until=clock.time() + 3600)
+    """
+
+    def __init__(self, clock: Clock = None, on_error: Callable[[str, Exception], None] = None):
+        """
+        Args:
+            clock: Time source (default: wall clock)
+            on_error: Called with (timer/event name, exception) when a callback raises
+        """
+        self.clock = clock or get_clock()
+        self.on_error = on_error
+        self.fired = 0  # callbacks run (timers and events)
+
+        self._heap: List = []
+        self._timers: Dict[str, Timer] = {}
+        self._seq = itertools.count()
+        self._handlers: Dict[str, List[Callable]] = {}
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped = False
+
+    # ------------------------------------------------------------------
+    # Timers
+    # ------------------------------------------------------------------
+
+    def set_timer(self, name: str, when: float, callback: Callable) -> Timer:
+        """Fire `callback` at clock.time() >= when, replacing any pending timer of that name"""
+        self.cancel(name)
+        timer = Timer(name, float(when), callback)
+        self._timers[name] = timer
+        heapq.heappush(self._heap, (timer.when, next(self._seq), timer))
+        return timer
+
+    def call_later(self, name: str, delay: float, callback: Callable) -> Timer:
+        return self.set_timer(name, self.clock.time() + delay, callback)
+
+    def cancel(self, name: str):
+        timer = self._timers.pop(name, None)
+        if timer:
+            timer.cancelled = True
+
+    def deadline(self, name: str) -> Optional[float]:
+        """Pending deadline of a timer (None if not armed)"""
+        timer = self._timers.get(name)
+        return timer.when if timer else None
+
+    def _pop_due(self, now: float) -> Optional[Timer]:
+        while self._heap:
+            when, _, timer = self._heap[0]
+            if timer.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            if when > now:
+                return None
+            heapq.heappop(self._heap)
+            if self._timers.get(timer.name) is timer:
+                del self._timers[timer.name]
+            return timer
+        return None
+
+    def _next_deadline(self) -> Optional[float]:
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def on(self, event: str, callback: Callable):
+        """Run `callback` whenever `event` is emitted"""
+        self._handlers.setdefault(event, []).append(callback)
+
+    def emit(self, event: str):
+        """Thread-safe. Repeated emits before the loop handles the event run its handlers once."""
+        with self._lock:
+            if event in self._pending:
+                return
+            self._pending.append(event)
+        self._wake()
+
+    def stop(self):
+        """Thread-safe: make run() return after the current callback"""
+        self._stopped = True
+        self._wake()
+
+    def _wake(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # loop closed between the check and the call
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+
+    def run(self, until: Optional[float] = None):
+        """Run until stop() or clock.time() >= until"""
+        asyncio.run(self.run_async(until))
+
+    async def run_async(self, until: Optional[float] = None):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+        try:
+            while not self._stopped:
+                now = self.clock.time()
+                if until is not None and now >= until:
+                    break
+
+                with self._lock:
+                    events, self._pending = self._pending, []
+                for event in events:
+                    for callback in list(self._handlers.get(event, ())):
+                        await self._call(event, callback)
+
+                timer = self._pop_due(now)
+                if timer:
+                    await self._call(timer.name, timer.callback)
+                    continue
+                if events or self._pending:
+                    continue
+
+                deadline = self._next_deadline()
+                if until is not None:
+                    deadline = until if deadline is None else min(deadline, until)
+                await self._idle(None if deadline is None else deadline - self.clock.time())
+        finally:
+            self._loop = None
+
+    async def _call(self, name: str, callback: Callable):
+        self.fired += 1
+        try:
+            result = callback()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"[EVENTS] {name} failed: {e}")
+            if self.on_error:
+                self.on_error(name, e)
+
+    async def _idle(self, timeout: Optional[float]):
+        """Wait for the next deadline or an emitted event"""
+        if timeout is not None and timeout <= 0:
+            return
+        if isinstance(self.clock, SimulatedClock):
+            if timeout is None:
+                self._stopped = True  # nothing armed and nothing can emit: simulation is over
+            else:
+                self.clock.sleep(timeout)
+            await asyncio.sleep(0)
+            return
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
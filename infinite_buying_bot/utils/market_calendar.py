@@ -0,0 +1,385 @@
+"""
+Market Calendar - US exchange holidays, half-days and sessions with O(1) lookups
+NYSE holiday rules give the baseline for any year. KIS data (overseas countries_holiday,
+domestic chk_holiday) is fetched at most once per KST day, overlaid and cached to disk, so
+unscheduled closures are known without asking the API on every check.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+import pytz
+
+from infinite_buying_bot.utils.clock import KST, Clock, get_clock
+
+logger = logging.getLogger(__name__)
+
+ET = pytz.timezone('US/Eastern')
+
+# Sessions (US/Eastern)
+PRE, REGULAR, AFTER, CLOSED = 'pre', 'regular', 'after', 'closed'
+PRE_MARKET_OPEN = time(4, 0)
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+HALF_DAY_CLOSE = time(13, 0)
+AFTER_HOURS = timedelta(hours=4)  # after-market runs 4h past the close (20:00, 17:00 on half-days)
+
+KIS_LOOKAHEAD_DAYS = 7        # weekdays checked with countries_holiday per refresh
+RETRY_SECONDS = 3600          # wait after a failed KIS refresh
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'logs', 'market_calendar.json')
+
+# Closures outside the regular rules (national days of mourning, ...)
+SPECIAL_CLOSURES = {
+    date(2025, 1, 9): "National Day of Mourning (Jimmy Carter)",
+}
+
+
+# ----------------------------------------------------------------------
+# NYSE rules
+# ----------------------------------------------------------------------
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th `weekday` (0=Mon) of the month; n=-1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1))
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> Dict[date, str]:
+    """Full-day NYSE closures of one year"""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:  # a Saturday New Year's Day is not observed on Dec 31
+        holidays[_observed(new_year)] = "New Year's Day"
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = "Juneteenth"
+    holidays.update({day: name for day, name in SPECIAL_CLOSURES.items() if day.year == year})
+    return holidays
+
+
+def nyse_half_days(year: int, holidays: Dict[date, str]) -> Dict[date, time]:
+    """13:00 ET early closes: July 3, the day after Thanksgiving, Christmas Eve (weekdays only)"""
+    candidates = [date(year, 7, 3), _nth_weekday(year, 11, 3, 4) + timedelta(days=1), date(year, 12, 24)]
+    return {day: HALF_DAY_CLOSE for day in candidates if day.weekday() < 5 and day not in holidays}
+
+
+# ----------------------------------------------------------------------
+# KIS source
+# ----------------------------------------------------------------------
+
+def fetch_kis_holidays(today: date) -> Optional[Dict]:
+    """
+    Calendar data from KIS for the days starting at `today` (KST date).
+
+    countries_holiday lists the markets trading on a date: a weekday whose answer has rows
+    but no US market is a US closure. chk_holiday returns the Korean open-day flags.
+
+    Returns:
+        {'us_closed': {date: reason}, 'us_checked': [date], 'kr_open': {date: bool}}, or None
+        if both inquiries failed
+    """
+    from infinite_buying_bot.api import kis_api
+
+    us_closed, us_checked = {}, []
+    days = [today + timedelta(days=n) for n in range(2 * KIS_LOOKAHEAD_DAYS)]
+    for day in [d for d in days if d.weekday() < 5][:KIS_LOOKAHEAD_DAYS]:
+        try:
+            df = kis_api.countries_holiday(day.strftime('%Y%m%d'))
+        except Exception as e:
+            logger.warning(f"[CALENDAR] countries_holiday {day} failed: {e}")
+            df = None
+        if df is None:
+            break  # API error: keep what we have, the rest waits for the next refresh
+        if df.empty:
+            continue  # no markets listed at all: nothing to learn for this day
+        us_checked.append(day)
+        countries = set(df.get('natn_eng_abrv_cd', ())) | set(df.get('tr_natn_cd', ()))
+        if not countries & {'US', '840'}:
+            us_closed[day] = "KIS"
+
+    kr_open = {}
+    try:
+        df = kis_api.chk_holiday(today.strftime('%Y%m%d'))
+    except Exception as e:
+        logger.warning(f"[CALENDAR] chk_holiday failed: {e}")
+        df = None
+    if df is not None:
+        for row in df.to_dict('records'):
+            try:
+                kr_open[datetime.strptime(row['bass_dt'], '%Y%m%d').date()] = row.get('opnd_yn') == 'Y'
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    if not us_checked and not kr_open:
+        return None
+    return {'us_closed': us_closed, 'us_checked': us_checked, 'kr_open': kr_open}
+
+
+# ----------------------------------------------------------------------
+# Calendar
+# ----------------------------------------------------------------------
+
+class MarketCalendar:
+    """
+    US trading days and sessions, plus Korean open days when KIS provided them.
+
+    Lookups are dict hits: rule holidays are generated once per year on first use and KIS
+    closures live in their own dict (kis_closed). refresh() is the only call that may reach
+    the API, and it does so at most once per KST day (RETRY_SECONDS after a failure).
+
+    Usage:
+        calendar = MarketCalendar(source=fetch_kis_holidays)
+        calendar.refresh()                       # once per day, no-op otherwise
+        calendar.is_open()                       # regular session now
+        calendar.session(when)                   # 'pre' / 'regular' / 'after' / 'closed'
+        calendar.next_open()                     # aware ET datetime
+    """
+
+    def __init__(self, source: Callable[[date], Optional[Dict]] = None, cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 clock: Clock = None):
+        """
+        Args:
+            source: Fetches KIS data for a KST date (fetch_kis_holidays); None = rules and cache only
+            cache_path: JSON cache of the last KIS refresh (None = no disk cache)
+            clock: Time source (default: the process clock, resolved on use)
+        """
+        self.source = source
+        self.cache_path = cache_path
+        self._clock = clock
+        self.holidays: Dict[date, str] = {}
+        self.half_days: Dict[date, time] = {}
+        self.kr_open: Dict[date, bool] = {}
+        self.kis_closed: Dict[date, str] = {}
+        self.fetched: Optional[date] = None  # KST date of the last successful KIS refresh
+        self._years = set()
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._load_cache()
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock or get_clock()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _ensure_year(self, year: int):
+        if year not in self._years:
+            with self._lock:
+                if year not in self._years:
+                    holidays = nyse_holidays(year)
+                    self.half_days.update(nyse_half_days(year, holidays))
+                    self.holidays.update(holidays)
+                    self._years.add(year)
+
+    def is_trading_day(self, day: date) -> bool:
+        """US regular session on this (ET) date"""
+        if day.weekday() > 4:
+            return False
+        self._ensure_year(day.year)
+        return day not in self.holidays and day not in self.kis_closed
+
+    def holiday_name(self, day: date) -> Optional[str]:
+        self._ensure_year(day.year)
+        return self.holidays.get(day) or self.kis_closed.get(day)
+
+    def close_time(self, day: date) -> Optional[time]:
+        """Regular close on `day` (13:00 on half-days), None if closed"""
+        if not self.is_trading_day(day):
+            return None
+        return self.half_days.get(day, REGULAR_CLOSE)
+
+    def session_bounds(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """(open, close) of the regular session as aware ET datetimes, None if closed"""
+        close = self.close_time(day)
+        if close is None:
+            return None
+        return ET.localize(datetime.combine(day, REGULAR_OPEN)), ET.localize(datetime.combine(day, close))
+
+    def session(self, when: datetime = None) -> str:
+        """Session at `when` (aware; default: now): PRE, REGULAR, AFTER or CLOSED"""
+        now = (when or self.clock.now(ET)).astimezone(ET)
+        close = self.close_time(now.date())
+        if close is None:
+            return CLOSED
+        t = now.time()
+        if REGULAR_OPEN <= t <= close:
+            return REGULAR
+        if PRE_MARKET_OPEN <= t < REGULAR_OPEN:
+            return PRE
+        if t > close and now.replace(tzinfo=None) < datetime.combine(now.date(), close) + AFTER_HOURS:
+            return AFTER
+        return CLOSED
+
+    def is_open(self, when: datetime = None, extended: bool = False) -> bool:
+        """Regular session at `when` (pre/after-market too with extended=True)"""
+        session = self.session(when)
+        return session == REGULAR or (extended and session in (PRE, AFTER))
+
+    def next_trading_day(self, day: date) -> date:
+        """First trading day strictly after `day`"""
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def next_open(self, when: datetime = None) -> datetime:
+        """First regular-session open strictly after `when` (aware ET)"""
+        now = (when or self.clock.now(ET)).astimezone(ET)
+        day = now.date()
+        bounds = self.session_bounds(day)
+        if bounds is None or bounds[0] <= now:
+            day = self.next_trading_day(day)
+            bounds = self.session_bounds(day)
+        return bounds[0]
+
+    def next_close(self, when: datetime = None) -> datetime:
+        """Close of the session in progress at `when`, else of the next session (aware ET)"""
+        now = (when or self.clock.now(ET)).astimezone(ET)
+        bounds = self.session_bounds(now.date())
+        if bounds is not None and now <= bounds[1]:
+            return bounds[1]
+        return self.session_bounds(self.next_open(now).date())[1]
+
+    def is_kr_open(self, day: date) -> bool:
+        """Korean exchange open day (KIS opnd_yn when known, weekdays otherwise)"""
+        known = self.kr_open.get(day)
+        return known if known is not None else day.weekday() < 5
+
+    # ------------------------------------------------------------------
+    # KIS refresh / cache
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Fetch KIS data if not done today (KST). Cheap no-op otherwise.
+
+        Returns:
+            True if the calendar changed
+        """
+        if self.source is None:
+            return False
+        today = self.clock.now(KST).date()
+        if not force and (self.fetched == today or self.clock.time() < self._retry_at):
+            return False
+
+        data = self.source(today)
+        if data is None:
+            self._retry_at = self.clock.time() + RETRY_SECONDS
+            logger.warning(f"[CALENDAR] KIS holiday refresh failed, retrying in {RETRY_SECONDS // 60} min")
+            return False
+
+        changed = self._merge(data, announce=True)
+        self.fetched = today
+        self.kr_open = {day: flag for day, flag in self.kr_open.items() if day >= today - timedelta(days=31)}
+        self._save_cache()
+        logger.info(f"[CALENDAR] KIS refresh {today}: {len(self.kis_closed)} extra US closures, "
+                    f"{len(self.kr_open)} KR days")
+        return changed
+
+    def _merge(self, data: Dict, announce: bool = False) -> bool:
+        closed = data.get('us_closed', {})
+        changed = False
+        with self._lock:
+            for day in data.get('us_checked', ()):
+                if day in self.kis_closed and day not in closed:
+                    del self.kis_closed[day]  # KIS lists the US again: reopened
+                    changed = True
+            for day, reason in closed.items():
+                if day in self.kis_closed:
+                    continue
+                self.kis_closed[day] = reason
+                changed = True
+                if announce and day.weekday() < 5 and day not in nyse_holidays(day.year):
+                    logger.warning(f"[CALENDAR] KIS reports the US market closed on {day} (not a scheduled holiday)")
+            self.kr_open.update(data.get('kr_open', {}))
+        return changed
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            parse = date.fromisoformat
+            self._merge({
+                'us_closed': {parse(d): r for d, r in cached.get('us_closed', {}).items()},
+                'kr_open': {parse(d): bool(v) for d, v in cached.get('kr_open', {}).items()},
+            })
+            self.fetched = parse(cached['fetched']) if cached.get('fetched') else None
+        except Exception as e:
+            logger.warning(f"[CALENDAR] Ignoring unreadable cache {self.cache_path}: {e}")
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        cached = {
+            'fetched': self.fetched.isoformat() if self.fetched else None,
+            'us_closed': {d.isoformat(): r for d, r in sorted(self.kis_closed.items())},
+            'kr_open': {d.isoformat(): v for d, v in sorted(self.kr_open.items())},
+        }
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = f"{self.cache_path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(cached, f, indent=2)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"[CALENDAR] Cache write failed: {e}")
+
+
+_calendar: Optional[MarketCalendar] = None
+
+
+def get_calendar() -> MarketCalendar:
+    """Process-wide calendar (rules + disk cache unless set_calendar installed one with a KIS source)"""
+    global _calendar
+    if _calendar is None:
+        _calendar = MarketCalendar()
+    return _calendar
+
+
+def set_calendar(calendar: MarketCalendar) -> Optional[MarketCalendar]:
+    """Replace the process-wide calendar; returns the previous one"""
+    global _calendar
+    previous, _calendar = _calendar, calendar
+    return previous
@@ -3,41 +3,48 @@ import pytz
 import time
 import logging
 
+from infinite_buying_bot.utils.clock import get_clock
+from infinite_buying_bot.utils.market_calendar import ET, get_calendar
+
 logger = logging.getLogger(__name__)
 
 class MarketScheduler:
-    def __init__(self, timezone='US/Eastern'):
+    def __init__(self, timezone='US/Eastern', clock=None, calendar=None):
         self.tz = pytz.timezone(timezone)
+        self.clock = clock or get_clock()
+        self.calendar = calendar or get_calendar()
 
     def get_current_time(self):
-        return datetime.datetime.now(self.tz)
+        return self.clock.now(self.tz)
 
     def is_market_open(self):
-        """Check if US market is currently open (09:30 - 16:00 ET, Mon-Fri)."""
-        now = self.get_current_time()
-        
-        # Check weekday (0=Mon, 4=Fri)
-        if now.weekday() > 4:
-            return False
-            
-        # Market hours: 09:30 - 16:00
-        market_start = now.replace(hour=9, minute=30, second=0, microsecond=0)
-        market_end = now.replace(hour=16, minute=0, second=0, microsecond=0)
-        
-        return market_start <= now <= market_end
+        """Check if US market is currently open (regular session; holidays and half-days from the calendar)."""
+        return self.calendar.is_open(self.get_current_time())
+
+    def get_session(self):
+        """Current US session: 'pre', 'regular', 'after' or 'closed'."""
+        return self.calendar.session(self.get_current_time())
 
     def is_near_close(self, minutes=5):
         """Check if it is within 'minutes' before market close."""
         now = self.get_current_time()
-        
-        if now.weekday() > 4:
+        bounds = self.calendar.session_bounds(now.astimezone(ET).date())
+        if bounds is None:
             return False
             
-        market_end = now.replace(hour=16, minute=0, second=0, microsecond=0)
+        market_end = bounds[1]
         check_start = market_end - datetime.timedelta(minutes=minutes)
         
         return check_start <= now < market_end
 
+    def next_open(self):
+        """Next regular-session open strictly after now, as an aware datetime."""
+        return self.calendar.next_open(self.get_current_time())
+
+    def next_close(self):
+        """Close of the session in progress, or of the next session."""
+        return self.calendar.next_close(self.get_current_time())
+
     def wait_until_open(self):
         """Wait until market opens if currently closed."""
         if not self.is_market_open():
@@ -0,0 +1,43 @@
+'''고정폭 종목마스터(*.mst) 공통 파서 - 코스피/코스닥/코넥스 정제 파일에서 사용'''
+
+import importlib.util
+import os
+
+# 파서 구현은 MCP 서버(module/plugin/fixed_width.py) 한 곳에만 둡니다.
+# MCP 이미지는 자체 디렉터리만으로 빌드되므로 이쪽에서 파일 경로로 직접 불러옵니다.
+# (module 패키지 __init__은 fastmcp 등을 요구하므로 패키지 import는 사용하지 않음)
+_PARSER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                            "MCP", "Kis Trading MCP", "module", "plugin", "fixed_width.py")
+
+_spec = importlib.util.spec_from_file_location("kis_fixed_width", _PARSER_PATH)
+_fixed_width = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_fixed_width)
+
+parse_fixed_width_records = _fixed_width.parse_fixed_width_records
+
+
+def parse_fixed_width_master(file_name, head_columns, head_widths, middle_column,
+                             tail_columns, tail_widths, tail_width=None,
+                             encoding="cp949", numeric_columns=None):
+    """
+    종목마스터 파일을 바이트로 한 번 읽어 DataFrame으로 변환
+
+    파싱은 parse_fixed_width_records(MCP module/plugin/fixed_width.py)에 위임합니다.
+
+    Args:
+        file_name: 마스터파일 경로 (예: kospi_code.mst)
+        나머지 인자: parse_fixed_width_records와 동일
+
+    Returns:
+        DataFrame
+
+    Example:
+        >>> df = parse_fixed_width_master("kospi_code.mst", ['단축코드', '표준코드'], [9, 12], '한글명',
+        ...                               part2_columns, field_specs, tail_width=227)
+    """
+    with open(file_name, mode="rb") as f:
+        content = f.read()
+
+    return parse_fixed_width_records(content, head_columns, head_widths, middle_column,
+                                     tail_columns, tail_widths, tail_width=tail_width,
+                                     encoding=encoding, numeric_columns=numeric_columns)
@@ -1,6 +1,7 @@
 '''코스닥주식종목코드(kosdaq_code.mst) 정제 파이썬 파일'''
 
 import pandas as pd
+from fixed_width_master import parse_fixed_width_master
 import urllib.request
 import ssl
 import zipfile
@@ -29,27 +30,6 @@ def kosdaq_master_download(base_dir, verbose=False):
 
 def get_kosdaq_master_dataframe(base_dir):
     file_name = base_dir + "\\kosdaq_code.mst"
-    tmp_fil1 = base_dir + "\\kosdaq_code_part1.tmp"
-    tmp_fil2 = base_dir + "\\kosdaq_code_part2.tmp"
-
-    wf1 = open(tmp_fil1, mode="w")
-    wf2 = open(tmp_fil2, mode="w")
-
-    with open(file_name, mode="r", encoding="cp949") as f:
-        for row in f:
-            rf1 = row[0:len(row) - 222]
-            rf1_1 = rf1[0:9].rstrip()
-            rf1_2 = rf1[9:21].rstrip()
-            rf1_3 = rf1[21:].strip()
-            wf1.write(rf1_1 + ',' + rf1_2 + ',' + rf1_3 + '\n')
-            rf2 = row[-222:]
-            wf2.write(rf2)
-
-    wf1.close()
-    wf2.close()
-
-    part1_columns = ['단축코드','표준코드','한글종목명']
-    df1 = pd.read_csv(tmp_fil1, header=None, names=part1_columns, encoding='cp949')
 
     field_specs = [2, 1,
                    4, 4, 4, 1, 1,
@@ -83,15 +63,14 @@ def get_kosdaq_master_dataframe(base_dir):
                      '기준년월','전일기준 시가총액 (억)','그룹사 코드','회사신용한도초과여부','담보대출가능여부','대주가능여부'
                      ]
 
-    df2 = pd.read_fwf(tmp_fil2, widths=field_specs, names=part2_columns)
-
-    df = pd.merge(df1, df2, how='outer', left_index=True, right_index=True)
+    numeric_columns = ['주식 기준가', '정규 시장 매매 수량 단위', '시간외 시장 매매 수량 단위', '증거금 비율',
+                       '신용기간', '전일 거래량', '주식 액면가', '상장 주수(천)', '자본금', '공모 가격',
+                       '매출액', '영업이익', '경상이익', '단기순이익', 'ROE(자기자본이익률)', '전일기준 시가총액 (억)']
 
-    # clean temporary file and dataframe
-    del (df1)
-    del (df2)
-    os.remove(tmp_fil1)
-    os.remove(tmp_fil2)
+    # 행 끝 221바이트가 고정폭 영역 (field_specs는 영역 앞쪽부터 채워짐)
+    df = parse_fixed_width_master(file_name, ['단축코드', '표준코드'], [9, 12], '한글종목명',
+                                  part2_columns, field_specs, tail_width=221,
+                                  numeric_columns=numeric_columns)
 
     print("Done")
 
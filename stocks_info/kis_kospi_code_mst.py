@@ -5,6 +5,7 @@ import ssl
 import zipfile
 import os
 import pandas as pd
+from fixed_width_master import parse_fixed_width_master
 
 base_dir = os.getcwd()
 
@@ -29,27 +30,6 @@ def kospi_master_download(base_dir, verbose=False):
 
 def get_kospi_master_dataframe(base_dir):
     file_name = base_dir + "\\kospi_code.mst"
-    tmp_fil1 = base_dir + "\\kospi_code_part1.tmp"
-    tmp_fil2 = base_dir + "\\kospi_code_part2.tmp"
-
-    wf1 = open(tmp_fil1, mode="w")
-    wf2 = open(tmp_fil2, mode="w")
-
-    with open(file_name, mode="r", encoding="cp949") as f:
-        for row in f:
-            rf1 = row[0:len(row) - 228]
-            rf1_1 = rf1[0:9].rstrip()
-            rf1_2 = rf1[9:21].rstrip()
-            rf1_3 = rf1[21:].strip()
-            wf1.write(rf1_1 + ',' + rf1_2 + ',' + rf1_3 + '\n')
-            rf2 = row[-228:]
-            wf2.write(rf2)
-
-    wf1.close()
-    wf2.close()
-
-    part1_columns = ['단축코드', '표준코드', '한글명']
-    df1 = pd.read_csv(tmp_fil1, header=None, names=part1_columns, encoding='cp949')
 
     field_specs = [2, 1, 4, 4, 4,
                    1, 1, 1, 1, 1,
@@ -83,16 +63,15 @@ def get_kospi_master_dataframe(base_dir):
                      '시가총액', '그룹사코드', '회사신용한도초과', '담보대출가능', '대주가능'
                      ]
 
-    df2 = pd.read_fwf(tmp_fil2, widths=field_specs, names=part2_columns)
+    numeric_columns = ['기준가', '매매수량단위', '시간외수량단위', '증거금비율', '신용기간', '전일거래량',
+                       '액면가', '상장주수', '자본금', '공모가', '매출액', '영업이익', '경상이익', '당기순이익',
+                       'ROE', '시가총액']
 
-    df = pd.merge(df1, df2, how='outer', left_index=True, right_index=True)
+    # 행 끝 227바이트가 고정폭 영역
+    df = parse_fixed_width_master(file_name, ['단축코드', '표준코드'], [9, 12], '한글명',
+                                  part2_columns, field_specs, tail_width=227,
+                                  numeric_columns=numeric_columns)
 
-    # clean temporary file and dataframe
-    del (df1)
-    del (df2)
-    os.remove(tmp_fil1)
-    os.remove(tmp_fil2)
-    
     print("Done")
 
     return df